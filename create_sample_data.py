@@ -278,47 +278,25 @@ def gerar_mensalidades_para_todos_alunos():
         
         print("💰 Verificando e gerando mensalidades para todos os alunos...")
         
-        aluno_service = AlunoService()
         mensalidade_service = MensalidadeService()
         
-        # Listar todos os alunos ativos
-        alunos = aluno_service.listar_alunos()
-        alunos_ativos = [a for a in alunos if a['status'] == 'Ativo']
+        # Geração em lote: meses já existentes são ignorados
+        resultado = mensalidade_service.gerar_mensalidades_todas_turmas()
+        
+        if not resultado['success']:
+            print(f"❌ Erro: {resultado.get('error', 'Desconhecido')}")
+            return False
         
-        if not alunos_ativos:
+        if resultado['total_alunos'] == 0:
             print("ℹ️ Nenhum aluno ativo encontrado")
             return
         
-        total_geradas = 0
-        alunos_processados = 0
-        
-        for aluno in alunos_ativos:
-            try:
-                # Verificar se já tem mensalidades
-                stats = mensalidade_service.verificar_mensalidades_aluno(aluno['id'])
-                
-                if stats['total'] == 0:
-                    print(f"📋 Gerando mensalidades para {aluno['nome']}...")
-                    
-                    resultado = mensalidade_service.gerar_mensalidades_aluno(aluno['id'])
-                    
-                    if resultado['success']:
-                        mensalidades_criadas = resultado.get('mensalidades_criadas', 0)
-                        total_geradas += mensalidades_criadas
-                        print(f"✅ {mensalidades_criadas} mensalidades criadas")
-                    else:
-                        print(f"❌ Erro: {resultado.get('error', 'Desconhecido')}")
-                else:
-                    print(f"ℹ️ {aluno['nome']} já possui {stats['total']} mensalidades")
-                
-                alunos_processados += 1
-                
-            except Exception as e:
-                print(f"❌ Erro ao processar {aluno['nome']}: {e}")
+        for detalhe in resultado['detalhes'][1:]:
+            print(f"   {detalhe}")
         
         print(f"🎉 Processamento concluído:")
-        print(f"   📊 {alunos_processados} alunos processados")
-        print(f"   💰 {total_geradas} mensalidades geradas no total")
+        print(f"   📊 {resultado['total_sucesso']} alunos processados")
+        print(f"   💰 {resultado['mensalidades_criadas']} mensalidades geradas no total")
         
         return True
         
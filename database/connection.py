@@ -1,220 +1,394 @@
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+from database.migrations import (
+    aplicar_migracoes, obter_versao, VERSAO_ESQUEMA, DDL_HISTORICO_TRANSFERENCIAS
+)
+
+# PRAGMAs aplicados uma única vez, na criação de cada conexão do pool
+PRAGMAS_CONEXAO = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",      # ~16 MB de cache de páginas
+    "PRAGMA mmap_size = 134217728",    # 128 MB mapeados em memória
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """Conexão SQLite que volta para o pool ao ser fechada"""
+
+    _pool = None
+
+    def close(self):
+        """Devolve a conexão ao pool (ou fecha de fato se não houver pool)"""
+        pool = self._pool
+        if pool is None:
+            super().close()
+            return
+        pool.devolver(self)
+
+    def fechar_definitivamente(self):
+        """Fecha a conexão SQLite de verdade"""
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """Pool de conexões SQLite pré-configuradas e reutilizáveis"""
+
+    def __init__(self, db_path, max_ociosas=8, timeout=5.0):
+        self.db_path = db_path
+        self.max_ociosas = max_ociosas
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._ociosas = []
+        self._stats = {
+            'criadas': 0,
+            'reutilizadas': 0,
+            'devolvidas': 0,
+            'descartadas': 0,
+            'em_uso': 0,
+        }
+
+    def _criar_conexao(self):
+        """Abre uma nova conexão e aplica os PRAGMAs de desempenho"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            factory=PooledConnection,
+            check_same_thread=False,
+        )
+        for pragma in PRAGMAS_CONEXAO:
+            conn.execute(pragma)
+        conn._pool = self
+        return conn
+
+    def obter(self):
+        """Retorna uma conexão ociosa ou cria uma nova"""
+        with self._lock:
+            conn = self._ociosas.pop() if self._ociosas else None
+            if conn is not None:
+                self._stats['reutilizadas'] += 1
+            else:
+                self._stats['criadas'] += 1
+            self._stats['em_uso'] += 1
+
+        if conn is None:
+            try:
+                conn = self._criar_conexao()
+            except sqlite3.Error:
+                with self._lock:
+                    self._stats['criadas'] -= 1
+                    self._stats['em_uso'] -= 1
+                raise
+        return conn
+
+    def devolver(self, conn):
+        """Recebe a conexão de volta, descartando transações pendentes"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+        except sqlite3.Error:
+            # Conexão em estado inválido: não volta ao pool
+            with self._lock:
+                self._stats['em_uso'] -= 1
+                self._stats['descartadas'] += 1
+            conn.fechar_definitivamente()
+            return
+
+        with self._lock:
+            self._stats['em_uso'] -= 1
+            if conn in self._ociosas:
+                # close() chamado duas vezes na mesma conexão
+                self._stats['em_uso'] += 1
+                return
+            if len(self._ociosas) < self.max_ociosas:
+                self._ociosas.append(conn)
+                self._stats['devolvidas'] += 1
+                return
+            self._stats['descartadas'] += 1
+        conn.fechar_definitivamente()
+
+    def fechar_todas(self):
+        """Fecha todas as conexões ociosas do pool"""
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+        for conn in ociosas:
+            conn.fechar_definitivamente()
+
+    def estatisticas(self):
+        """Retorna estatísticas de uso do pool"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['ociosas'] = len(self._ociosas)
+        total = stats['criadas'] + stats['reutilizadas']
+        stats['taxa_reuso'] = (stats['reutilizadas'] / total * 100) if total else 0.0
+        return stats
+
+class TransacaoAbortada(sqlite3.Error):
+    """Uma etapa da unidade de trabalho falhou e desfez suas alterações"""
+
+
+class ConexaoSavepoint:
+    """Conexão entregue aos serviços dentro de `db.transacao()`.
+
+    Cada get_connection() do bloco vira um SAVEPOINT na conexão da
+    transação: commit() libera o savepoint, close() descarta o que não foi
+    confirmado (como o pool faria) e rollback() volta ao início dele e
+    aborta a transação inteira. O COMMIT de verdade acontece uma só vez,
+    no fim do bloco.
+    """
+
+    def __init__(self, transacao, nome):
+        object.__setattr__(self, '_transacao', transacao)
+        object.__setattr__(self, '_conn', transacao.conn)
+        object.__setattr__(self, '_nome', nome)
+        object.__setattr__(self, '_row_factory', transacao.conn.row_factory)
+        object.__setattr__(self, '_aberto', True)
+        self._conn.execute(f"SAVEPOINT {nome}")
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+    def __setattr__(self, nome, valor):
+        # Ex.: row_factory vale só até o close() deste savepoint
+        setattr(self._conn, nome, valor)
+
+    def _encerrar(self, desfazer):
+        if self._aberto:
+            if desfazer:
+                self._conn.execute(f"ROLLBACK TO {self._nome}")
+            self._conn.execute(f"RELEASE {self._nome}")
+            object.__setattr__(self, '_aberto', False)
+
+    def commit(self):
+        self._encerrar(desfazer=False)
+
+    def rollback(self):
+        self._encerrar(desfazer=True)
+        self._transacao.abortada = True
+
+    def close(self):
+        self._encerrar(desfazer=True)
+        self._conn.row_factory = self._row_factory
+
+
+class UnidadeDeTrabalho:
+    """Estado da transação aberta por `db.transacao()` no thread atual"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.abortada = False
+        self._savepoints = 0
+
+    def savepoint(self):
+        self._savepoints += 1
+        return ConexaoSavepoint(self, f"etapa_{self._savepoints}")
+
+
+class ConexaoSomenteLeitura(sqlite3.Connection):
+    """Conexão `mode=ro` que fica aberta enquanto o processo existir"""
+
+    def close(self):
+        """Encerra a leitura em andamento; a conexão continua aberta"""
+        if self.in_transaction:
+            self.rollback()
+        self.row_factory = None
+
+    def fechar_definitivamente(self):
+        super().close()
+
+
+class BancoSomenteLeitura:
+    """Banco somente leitura para processos de exportação.
+
+    Oferece o get_connection() usado pelos serviços, mas sempre com a mesma
+    conexão aberta em `mode=ro` (uma por processo), sem migrações nem pool.
+    """
+
+    PRAGMAS = (
+        "PRAGMA query_only = ON",
+        "PRAGMA cache_size = -16000",
+        "PRAGMA mmap_size = 134217728",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA busy_timeout = 5000",
+    )
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._conn = None
+
+    def get_connection(self):
+        if self._conn is None:
+            uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, factory=ConexaoSomenteLeitura)
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            self._conn = conn
+        return self._conn
+
+    def close_connection(self):
+        if self._conn is not None:
+            self._conn.fechar_definitivamente()
+            self._conn = None
+
+
 class DatabaseConnection:
-    def __init__(self, db_name="escola.db"):
-        """Inicializa conexão com banco corrigido"""
+    def __init__(self, db_name="escola.db", inicializar=True):
+        """Inicializa conexão com banco corrigido.
+
+        Com `inicializar=False` nada é aberto agora: as migrações rodam na
+        primeira get_connection().
+        """
         self.db_path = Path(__file__).parent / db_name
-        self.init_database()
+        self.pool = ConnectionPool(self.db_path)
+        self._local = threading.local()
+        self._inicializado = False
+        self._init_lock = threading.Lock()
+        if inicializar:
+            self.init_database()
+    
+    def _garantir_inicializado(self):
+        """Aplica as migrações na primeira conexão pedida"""
+        if not self._inicializado:
+            with self._init_lock:
+                if not self._inicializado:
+                    self.init_database()
     
     def get_connection(self):
-        """Retorna conexão com o banco"""
+        """Retorna conexão do pool (close() devolve a conexão ao pool).
+
+        Dentro de `transacao()` retorna um savepoint da conexão da transação.
+        """
+        transacao = getattr(self._local, 'transacao', None)
+        if transacao is not None:
+            return transacao.savepoint()
+        
+        self._garantir_inicializado()
         try:
-            return sqlite3.connect(self.db_path)
+            return self.pool.obter()
         except sqlite3.Error as e:
             print(f"Erro ao conectar ao banco: {e}")
             raise
     
-    def init_database(self):
-        """Cria todas as tabelas com estrutura corrigida"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    @contextmanager
+    def transacao(self):
+        """Unidade de trabalho: os serviços chamados no bloco compartilham uma
+        conexão e tudo é gravado num único COMMIT, ou nada é gravado.
+
+            with db.transacao() as conn:
+                ...  # conn e qualquer self.db.get_connection() dos serviços
+
+        Uma etapa que chama rollback() aborta a transação (TransacaoAbortada).
+        Blocos aninhados viram savepoints da transação externa.
+        """
+        atual = getattr(self._local, 'transacao', None)
+        if atual is not None:
+            conn = atual.savepoint()
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+            return
         
+        self._garantir_inicializado()
+        conn = self.pool.obter()
+        transacao = UnidadeDeTrabalho(conn)
+        self._local.transacao = transacao
         try:
-            print("🔄 Inicializando estrutura do banco...")
-            
-            # === TABELA TURMAS (apenas dados acadêmicos) ===
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS turmas (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    serie TEXT NOT NULL,
-                    ano_letivo TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # === TABELA ALUNOS (com dados financeiros individuais) ===
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS alunos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    data_nascimento DATE NOT NULL,
-                    cpf TEXT,
-                    sexo TEXT,
-                    nacionalidade TEXT DEFAULT 'Brasileira',
-                    telefone TEXT,
-                    endereco TEXT,
-                    turma_id INTEGER NOT NULL,
-                    status TEXT DEFAULT 'Ativo',
-                    valor_mensalidade REAL NOT NULL DEFAULT 0,
-                    desconto_fixo REAL DEFAULT 0,
-                    multa_por_dia REAL DEFAULT 0,
-                    dias_carencia_multa INTEGER DEFAULT 30,
-                    data_matricula DATE DEFAULT (date('now')),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (turma_id) REFERENCES turmas (id)
-                )
-            """)
-            
-            # === TABELA RESPONSÁVEIS ===
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS responsaveis (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    aluno_id INTEGER NOT NULL,
-                    nome TEXT NOT NULL,
-                    telefone TEXT NOT NULL,
-                    parentesco TEXT NOT NULL,
-                    principal BOOLEAN DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (aluno_id) REFERENCES alunos (id) ON DELETE CASCADE
-                )
-            """)
-            
-            # === TABELA PAGAMENTOS ===
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pagamentos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    aluno_id INTEGER NOT NULL,
-                    mes_referencia TEXT NOT NULL,
-                    valor_original REAL NOT NULL,
-                    desconto_aplicado REAL DEFAULT 0,
-                    multa_aplicada REAL DEFAULT 0,
-                    valor_final REAL NOT NULL,
-                    data_vencimento DATE NOT NULL,
-                    data_pagamento DATE,
-                    status TEXT DEFAULT 'Pendente',
-                    pode_receber_multa BOOLEAN DEFAULT 1,
-                    observacoes TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (aluno_id) REFERENCES alunos (id)
-                )
-            """)
-            
-            # === RECRIAR TABELA HISTÓRICO DE TRANSFERÊNCIAS CORRIGIDA ===
-            # Primeiro, drop se existe (para corrigir problemas)
-            cursor.execute("DROP TABLE IF EXISTS historico_transferencias")
-            
-            # Criar nova tabela com estrutura correta
-            cursor.execute("""
-                CREATE TABLE historico_transferencias (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    aluno_id INTEGER NOT NULL,
-                    turma_origem_id INTEGER,
-                    turma_destino_id INTEGER,
-                    motivo TEXT NOT NULL DEFAULT 'Transferência',
-                    observacoes TEXT,
-                    data_transferencia TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                    tipo_transferencia TEXT DEFAULT 'TRANSFERENCIA',
-                    usuario TEXT DEFAULT 'Sistema',
-                    FOREIGN KEY (aluno_id) REFERENCES alunos (id),
-                    FOREIGN KEY (turma_origem_id) REFERENCES turmas (id),
-                    FOREIGN KEY (turma_destino_id) REFERENCES turmas (id)
-                )
-            """)
-            
-            # === TABELA CONFIGURAÇÕES ===
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS configuracoes (
-                    id INTEGER PRIMARY KEY,
-                    chave TEXT UNIQUE NOT NULL,
-                    valor TEXT NOT NULL,
-                    descricao TEXT,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # === APLICAR MIGRAÇÕES ===
-            self._aplicar_migracoes(cursor)
-            
-            # === INSERIR DADOS INICIAIS SE NECESSÁRIO ===
-            self._inserir_dados_iniciais(cursor)
-            
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            if transacao.abortada:
+                raise TransacaoAbortada("Uma etapa da transação falhou; nada foi gravado")
             conn.commit()
-            print("✅ Banco de dados inicializado com sucesso!")
-            
-        except sqlite3.Error as e:
+        except BaseException:
             conn.rollback()
-            print(f"❌ Erro ao inicializar banco: {e}")
             raise
         finally:
+            self._local.transacao = None
             conn.close()
     
-    def _aplicar_migracoes(self, cursor):
-        """Aplica migrações necessárias"""
+    def close_connection(self):
+        """Fecha as conexões mantidas pelo pool"""
+        if not self._inicializado:
+            # Banco nunca usado neste processo: nada a otimizar
+            self.pool.fechar_todas()
+            return
         try:
-            # Verificar se existe coluna valor_mensalidade em alunos
-            cursor.execute("PRAGMA table_info(alunos)")
-            colunas = [col[1] for col in cursor.fetchall()]
-            
-            colunas_necessarias = [
-                'valor_mensalidade',
-                'desconto_fixo', 
-                'multa_por_dia',
-                'dias_carencia_multa',
-                'data_matricula'
-            ]
-            
-            for coluna in colunas_necessarias:
-                if coluna not in colunas:
-                    if coluna == 'valor_mensalidade':
-                        cursor.execute(f"ALTER TABLE alunos ADD COLUMN {coluna} REAL NOT NULL DEFAULT 0")
-                    elif coluna in ['desconto_fixo', 'multa_por_dia']:
-                        cursor.execute(f"ALTER TABLE alunos ADD COLUMN {coluna} REAL DEFAULT 0")
-                    elif coluna == 'dias_carencia_multa':
-                        cursor.execute(f"ALTER TABLE alunos ADD COLUMN {coluna} INTEGER DEFAULT 30")
-                    elif coluna == 'data_matricula':
-                        cursor.execute(f"ALTER TABLE alunos ADD COLUMN {coluna} DATE DEFAULT (date('now'))")
-                    
-                    print(f"✅ Coluna {coluna} adicionada à tabela alunos")
-            
+            # Atualiza estatísticas dos índices usados nesta sessão
+            conn = self.get_connection()
+            conn.execute("PRAGMA optimize")
+            conn.close()
         except sqlite3.Error as e:
-            print(f"⚠️ Aviso durante migração: {e}")
+            print(f"⚠️ Erro ao otimizar banco: {e}")
+        self.pool.fechar_todas()
     
-    def _inserir_dados_iniciais(self, cursor):
-        """Insere dados iniciais se necessário"""
+    def estatisticas_pool(self):
+        """Retorna estatísticas do pool de conexões"""
+        return self.pool.estatisticas()
+    
+    def init_database(self):
+        """Aplica as migrações pendentes (sem DDL quando o esquema está em dia)"""
+        conn = self.pool.obter()
+        
         try:
-            # Verificar se existem turmas
-            cursor.execute("SELECT COUNT(*) FROM turmas")
-            if cursor.fetchone()[0] == 0:
-                print("📋 Inserindo turmas iniciais...")
-                
-                turmas_iniciais = [
-                    ("1º Ano A", "1º Ano", "2025"),
-                    ("1º Ano B", "1º Ano", "2025"),
-                    ("2º Ano A", "2º Ano", "2025"),
-                    ("2º Ano B", "2º Ano", "2025"),
-                    ("3º Ano A", "3º Ano", "2025"),
-                    ("3º Ano B", "3º Ano", "2025"),
-                    ("Pré-escola", "Infantil", "2025")
-                ]
-                
-                cursor.executemany("""
-                    INSERT INTO turmas (nome, serie, ano_letivo) 
-                    VALUES (?, ?, ?)
-                """, turmas_iniciais)
-                
-                print(f"✅ {len(turmas_iniciais)} turmas inseridas")
-                
+            if obter_versao(conn) >= VERSAO_ESQUEMA:
+                self._inicializado = True
+                return
+            
+            print("🔄 Inicializando estrutura do banco...")
+            aplicadas = aplicar_migracoes(conn, self.db_path)
+            self._inicializado = True
+            print(f"✅ Banco de dados inicializado com sucesso! "
+                  f"({aplicadas} migração(ões), esquema v{VERSAO_ESQUEMA})")
+            
         except sqlite3.Error as e:
-            print(f"⚠️ Erro ao inserir dados iniciais: {e}")
+            print(f"❌ Erro ao inicializar banco: {e}")
+            raise
+        finally:
+            conn.close()
 
-# Instância global do banco
-db = DatabaseConnection()
+def versao_tabelas(conn, tabelas):
+    """Soma das versões das tabelas (muda a cada escrita, em qualquer processo)"""
+    marcadores = ", ".join("?" * len(tabelas))
+    return conn.execute(
+        f"SELECT COALESCE(SUM(versao), 0) FROM versoes_tabelas WHERE tabela IN ({marcadores})",
+        tuple(tabelas)
+    ).fetchone()[0]
+
+# Instância global do banco. Migra só na primeira conexão: quem só importa
+# os serviços (ex.: processos de exportação, com BancoSomenteLeitura) não
+# abre nem altera o banco de produção
+db = DatabaseConnection(inicializar=False)
 
 # Função para backup do banco
 def criar_backup():
     """Cria backup do banco de dados"""
     try:
-        import shutil
         from datetime import datetime
         
-        source = db.db_path
         backup_name = f"escola_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
         backup_path = db.db_path.parent / backup_name
         
-        shutil.copy2(source, backup_path)
+        # API de backup do SQLite (inclui páginas ainda no arquivo WAL)
+        conn = db.get_connection()
+        destino = sqlite3.connect(backup_path)
+        try:
+            conn.backup(destino)
+        finally:
+            destino.close()
+            conn.close()
         print(f"✅ Backup criado: {backup_name}")
         return True
         
@@ -232,22 +406,7 @@ def reset_transferencias_table():
         # Drop e recria tabela
         cursor.execute("DROP TABLE IF EXISTS historico_transferencias")
         
-        cursor.execute("""
-            CREATE TABLE historico_transferencias (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                aluno_id INTEGER NOT NULL,
-                turma_origem_id INTEGER,
-                turma_destino_id INTEGER,
-                motivo TEXT NOT NULL DEFAULT 'Transferência',
-                observacoes TEXT,
-                data_transferencia TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                tipo_transferencia TEXT DEFAULT 'TRANSFERENCIA',
-                usuario TEXT DEFAULT 'Sistema',
-                FOREIGN KEY (aluno_id) REFERENCES alunos (id),
-                FOREIGN KEY (turma_origem_id) REFERENCES turmas (id),
-                FOREIGN KEY (turma_destino_id) REFERENCES turmas (id)
-            )
-        """)
+        cursor.execute(DDL_HISTORICO_TRANSFERENCIAS.format(nome='historico_transferencias'))
         
         conn.commit()
         conn.close()
@@ -0,0 +1,804 @@
+"""
+Motor de migrações do banco de dados
+A versão do esquema fica em PRAGMA user_version; cada passo da lista
+MIGRACOES é aplicado uma única vez, em ordem, dentro de uma transação.
+"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+# === ESTRUTURA CANÔNICA DAS TABELAS ===
+DDL_TURMAS = """
+    CREATE TABLE IF NOT EXISTS {nome} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        serie TEXT NOT NULL,
+        ano_letivo TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+DDL_ALUNOS = """
+    CREATE TABLE IF NOT EXISTS {nome} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        data_nascimento DATE NOT NULL,
+        cpf TEXT,
+        sexo TEXT,
+        nacionalidade TEXT DEFAULT 'Brasileira',
+        telefone TEXT,
+        endereco TEXT,
+        turma_id INTEGER NOT NULL,
+        status TEXT DEFAULT 'Ativo',
+        valor_mensalidade REAL NOT NULL DEFAULT 0,
+        desconto_fixo REAL DEFAULT 0,
+        multa_por_dia REAL DEFAULT 0,
+        dias_carencia_multa INTEGER DEFAULT 30,
+        data_matricula DATE DEFAULT (date('now')),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (turma_id) REFERENCES turmas (id)
+    )
+"""
+
+DDL_RESPONSAVEIS = """
+    CREATE TABLE IF NOT EXISTS {nome} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        aluno_id INTEGER NOT NULL,
+        nome TEXT NOT NULL,
+        telefone TEXT NOT NULL,
+        parentesco TEXT NOT NULL,
+        principal BOOLEAN DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (aluno_id) REFERENCES alunos (id) ON DELETE CASCADE
+    )
+"""
+
+DDL_PAGAMENTOS = """
+    CREATE TABLE IF NOT EXISTS {nome} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        aluno_id INTEGER NOT NULL,
+        mes_referencia TEXT NOT NULL,
+        valor_original REAL NOT NULL,
+        desconto_aplicado REAL DEFAULT 0,
+        multa_aplicada REAL DEFAULT 0,
+        valor_final REAL NOT NULL,
+        data_vencimento DATE NOT NULL,
+        data_pagamento DATE,
+        status TEXT DEFAULT 'Pendente',
+        pode_receber_multa BOOLEAN DEFAULT 1,
+        observacoes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (aluno_id) REFERENCES alunos (id)
+    )
+"""
+
+DDL_HISTORICO_TRANSFERENCIAS = """
+    CREATE TABLE IF NOT EXISTS {nome} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        aluno_id INTEGER NOT NULL,
+        turma_origem_id INTEGER,
+        turma_destino_id INTEGER,
+        motivo TEXT NOT NULL DEFAULT 'Transferência',
+        observacoes TEXT,
+        data_transferencia TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        tipo_transferencia TEXT DEFAULT 'TRANSFERENCIA',
+        usuario TEXT DEFAULT 'Sistema',
+        FOREIGN KEY (aluno_id) REFERENCES alunos (id),
+        FOREIGN KEY (turma_origem_id) REFERENCES turmas (id),
+        FOREIGN KEY (turma_destino_id) REFERENCES turmas (id)
+    )
+"""
+
+DDL_CONFIG_FINANCEIRAS = """
+    CREATE TABLE IF NOT EXISTS {nome} (
+        id INTEGER PRIMARY KEY,
+        desconto_pontualidade REAL DEFAULT 0,
+        dias_limite_desconto INTEGER DEFAULT 5,
+        multa_por_dia REAL DEFAULT 2.0,
+        dias_carencia_multa INTEGER DEFAULT 30,
+        descricao TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+DDL_CONFIGURACOES = """
+    CREATE TABLE IF NOT EXISTS {nome} (
+        id INTEGER PRIMARY KEY,
+        chave TEXT UNIQUE NOT NULL,
+        valor TEXT NOT NULL,
+        descricao TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+TURMAS_INICIAIS = [
+    ("1º Ano A", "1º Ano", "2025"),
+    ("1º Ano B", "1º Ano", "2025"),
+    ("2º Ano A", "2º Ano", "2025"),
+    ("2º Ano B", "2º Ano", "2025"),
+    ("3º Ano A", "3º Ano", "2025"),
+    ("3º Ano B", "3º Ano", "2025"),
+    ("Pré-escola", "Infantil", "2025")
+]
+
+
+# === FUNÇÕES AUXILIARES ===
+def _tabela_existe(cursor, tabela):
+    """Verifica se a tabela existe"""
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name = ?", (tabela,)
+    )
+    return cursor.fetchone() is not None
+
+
+def _colunas(cursor, tabela):
+    """Retorna informações das colunas da tabela (PRAGMA table_info)"""
+    cursor.execute(f"PRAGMA table_info({tabela})")
+    return cursor.fetchall()
+
+
+def _adicionar_colunas(cursor, tabela, colunas):
+    """Adiciona colunas ausentes: colunas = [(nome, definicao), ...]"""
+    existentes = {col[1] for col in _colunas(cursor, tabela)}
+    for coluna, definicao in colunas:
+        if coluna not in existentes:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+            print(f"✅ Coluna {coluna} adicionada à tabela {tabela}")
+
+
+def _recriar_tabela(cursor, tabela, ddl, remover=()):
+    """
+    Recria a tabela com a estrutura canônica preservando os dados.
+    Colunas extras existentes (que não estão em 'remover') são mantidas.
+    """
+    atuais = _colunas(cursor, tabela)
+    temporaria = f"{tabela}_nova"
+
+    cursor.execute(f"DROP TABLE IF EXISTS {temporaria}")
+    cursor.execute(ddl.format(nome=temporaria))
+
+    canonicas = {col[1] for col in _colunas(cursor, temporaria)}
+    for col in atuais:
+        nome, tipo = col[1], col[2]
+        if nome not in canonicas and nome not in remover:
+            cursor.execute(f"ALTER TABLE {temporaria} ADD COLUMN {nome} {tipo}")
+
+    copiar = [col[1] for col in atuais if col[1] not in remover]
+    lista = ", ".join(copiar)
+    cursor.execute(f"INSERT INTO {temporaria} ({lista}) SELECT {lista} FROM {tabela}")
+
+    cursor.execute(f"DROP TABLE {tabela}")
+    cursor.execute(f"ALTER TABLE {temporaria} RENAME TO {tabela}")
+
+
+# === MIGRAÇÕES ===
+def _migracao_001_estrutura_base(cursor):
+    """Estrutura base: tabelas, colunas financeiras dos alunos e turmas iniciais"""
+    if (_tabela_existe(cursor, 'responsaveis_financeiros')
+            and not _tabela_existe(cursor, 'responsaveis')):
+        cursor.execute("ALTER TABLE responsaveis_financeiros RENAME TO responsaveis")
+        print("✅ Tabela responsaveis_financeiros renomeada para responsaveis")
+
+    for tabela, ddl in (('turmas', DDL_TURMAS),
+                        ('alunos', DDL_ALUNOS),
+                        ('responsaveis', DDL_RESPONSAVEIS),
+                        ('pagamentos', DDL_PAGAMENTOS),
+                        ('configuracoes', DDL_CONFIGURACOES)):
+        cursor.execute(ddl.format(nome=tabela))
+
+    _adicionar_colunas(cursor, 'alunos', [
+        ('valor_mensalidade', 'REAL NOT NULL DEFAULT 0'),
+        ('desconto_fixo', 'REAL DEFAULT 0'),
+        ('multa_por_dia', 'REAL DEFAULT 0'),
+        ('dias_carencia_multa', 'INTEGER DEFAULT 30'),
+        # ALTER TABLE não aceita DEFAULT não constante: preencher em seguida
+        ('data_matricula', 'DATE'),
+    ])
+    cursor.execute("""
+        UPDATE alunos SET data_matricula = COALESCE(date(created_at), date('now'))
+        WHERE data_matricula IS NULL
+    """)
+    _adicionar_colunas(cursor, 'pagamentos', [
+        ('pode_receber_multa', 'BOOLEAN DEFAULT 1'),
+        ('observacoes', 'TEXT'),
+    ])
+
+    # Histórico de transferências: corrigir estrutura SEM apagar registros
+    if not _tabela_existe(cursor, 'historico_transferencias'):
+        cursor.execute(DDL_HISTORICO_TRANSFERENCIAS.format(nome='historico_transferencias'))
+    else:
+        cursor.execute("""
+            SELECT sql FROM sqlite_master
+            WHERE type='table' AND name='historico_transferencias'
+        """)
+        sql_atual = cursor.fetchone()[0]
+        if 'data_transferencia TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP' not in sql_atual:
+            print("🔧 Corrigindo estrutura da tabela de transferências...")
+            _recriar_tabela(cursor, 'historico_transferencias', DDL_HISTORICO_TRANSFERENCIAS)
+
+    cursor.execute("SELECT COUNT(*) FROM turmas")
+    if cursor.fetchone()[0] == 0:
+        print("📋 Inserindo turmas iniciais...")
+        cursor.executemany("""
+            INSERT INTO turmas (nome, serie, ano_letivo)
+            VALUES (?, ?, ?)
+        """, TURMAS_INICIAIS)
+        print(f"✅ {len(TURMAS_INICIAIS)} turmas inseridas")
+
+
+def _migracao_002_turmas_sem_financeiro(cursor):
+    """Move valores financeiros das turmas para os alunos (antigo fix_database.py)"""
+    colunas_turmas = {col[1] for col in _colunas(cursor, 'turmas')}
+    if 'valor_mensalidade' not in colunas_turmas:
+        return
+
+    print("🔄 Removendo campos financeiros da tabela turmas...")
+    cursor.execute("""
+        UPDATE alunos
+        SET valor_mensalidade = (
+            SELECT t.valor_mensalidade FROM turmas t WHERE t.id = alunos.turma_id
+        )
+        WHERE (valor_mensalidade = 0 OR valor_mensalidade IS NULL)
+          AND EXISTS (
+            SELECT 1 FROM turmas t
+            WHERE t.id = alunos.turma_id AND t.valor_mensalidade > 0
+          )
+    """)
+
+    financeiras = colunas_turmas - {'id', 'nome', 'serie', 'ano_letivo', 'created_at'}
+    _recriar_tabela(cursor, 'turmas', DDL_TURMAS, remover=financeiras)
+    print("✅ Migração da tabela turmas concluída!")
+
+
+def _migracao_003_alunos_sem_email(cursor):
+    """Remove o campo email da tabela alunos (antigo fix_email_database.py)"""
+    colunas_alunos = {col[1] for col in _colunas(cursor, 'alunos')}
+    if 'email' not in colunas_alunos:
+        return
+
+    print("🔧 Removendo campo email da tabela alunos...")
+    _recriar_tabela(cursor, 'alunos', DDL_ALUNOS, remover=('email',))
+    print("✅ Campo email removido com sucesso!")
+
+
+def _migracao_004_indices(cursor):
+    """Índices compostos e parciais para as consultas mais frequentes"""
+    indices = [
+        # Mensalidades de um aluno (histórico, geração, join a partir de alunos)
+        """CREATE INDEX IF NOT EXISTS idx_pagamentos_aluno_vencimento
+           ON pagamentos (aluno_id, data_vencimento)""",
+        # Filtros por status + vencimento (financeiro, inadimplência)
+        """CREATE INDEX IF NOT EXISTS idx_pagamentos_status_vencimento
+           ON pagamentos (status, data_vencimento)""",
+        # Receita: pagamentos pagos por data de pagamento
+        """CREATE INDEX IF NOT EXISTS idx_pagamentos_status_pagamento
+           ON pagamentos (status, data_pagamento)""",
+        # Parcial: apenas mensalidades em aberto, por vencimento
+        """CREATE INDEX IF NOT EXISTS idx_pagamentos_abertos_vencimento
+           ON pagamentos (data_vencimento, aluno_id)
+           WHERE status IN ('Pendente', 'Atrasado')""",
+        # Alunos por status (dashboard) e por turma (listagens, contagens)
+        """CREATE INDEX IF NOT EXISTS idx_alunos_status_turma
+           ON alunos (status, turma_id)""",
+        """CREATE INDEX IF NOT EXISTS idx_alunos_turma_status
+           ON alunos (turma_id, status)""",
+        # Responsável principal de cada aluno
+        """CREATE INDEX IF NOT EXISTS idx_responsaveis_aluno_principal
+           ON responsaveis (aluno_id, principal)""",
+        # Histórico de transferências por aluno
+        """CREATE INDEX IF NOT EXISTS idx_historico_transferencias_aluno
+           ON historico_transferencias (aluno_id, data_transferencia)""",
+    ]
+    for sql in indices:
+        cursor.execute(sql)
+
+
+# Ordinal de data compatível com date.toordinal() do Python (01/01/0001 = 1)
+SQL_ORDINAL = "CAST(julianday(date({coluna})) - 1721424.5 AS INTEGER)"
+
+
+def _migracao_005_colunas_periodo(cursor):
+    """Colunas inteiras de período em pagamentos, mantidas por triggers"""
+    _adicionar_colunas(cursor, 'pagamentos', [
+        ('vencimento_ordinal', 'INTEGER'),
+        ('pagamento_ordinal', 'INTEGER'),
+        ('ano', 'INTEGER'),
+        ('mes', 'INTEGER'),
+    ])
+
+    atualizar = f"""
+        UPDATE pagamentos SET
+            vencimento_ordinal = {SQL_ORDINAL.format(coluna='NEW.data_vencimento')},
+            pagamento_ordinal = {SQL_ORDINAL.format(coluna='NEW.data_pagamento')},
+            ano = CAST(strftime('%Y', NEW.data_vencimento) AS INTEGER),
+            mes = CAST(strftime('%m', NEW.data_vencimento) AS INTEGER)
+        WHERE id = NEW.id;
+    """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_pagamentos_periodo_insert
+        AFTER INSERT ON pagamentos
+        BEGIN
+            {atualizar}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_pagamentos_periodo_update
+        AFTER UPDATE OF data_vencimento, data_pagamento ON pagamentos
+        BEGIN
+            {atualizar}
+        END
+    """)
+
+    # Preencher registros existentes
+    cursor.execute(f"""
+        UPDATE pagamentos SET
+            vencimento_ordinal = {SQL_ORDINAL.format(coluna='data_vencimento')},
+            pagamento_ordinal = {SQL_ORDINAL.format(coluna='data_pagamento')},
+            ano = CAST(strftime('%Y', data_vencimento) AS INTEGER),
+            mes = CAST(strftime('%m', data_vencimento) AS INTEGER)
+    """)
+
+    # Índices de período passam a usar as colunas inteiras
+    for indice in ('idx_pagamentos_status_vencimento',
+                   'idx_pagamentos_status_pagamento',
+                   'idx_pagamentos_abertos_vencimento'):
+        cursor.execute(f"DROP INDEX IF EXISTS {indice}")
+
+    indices = [
+        """CREATE INDEX IF NOT EXISTS idx_pagamentos_status_vencimento
+           ON pagamentos (status, vencimento_ordinal)""",
+        """CREATE INDEX IF NOT EXISTS idx_pagamentos_status_pagamento
+           ON pagamentos (status, pagamento_ordinal)""",
+        """CREATE INDEX IF NOT EXISTS idx_pagamentos_abertos_vencimento
+           ON pagamentos (vencimento_ordinal, aluno_id)
+           WHERE status IN ('Pendente', 'Atrasado')""",
+        """CREATE INDEX IF NOT EXISTS idx_pagamentos_vencimento_ordinal
+           ON pagamentos (vencimento_ordinal)""",
+        # Filtro por mês (com ou sem ano); filtros por ano usam o ordinal
+        """CREATE INDEX IF NOT EXISTS idx_pagamentos_mes_ano
+           ON pagamentos (mes, ano)""",
+    ]
+    for sql in indices:
+        cursor.execute(sql)
+
+
+def _migracao_006_mensalidade_unica(cursor):
+    """Uma mensalidade por aluno e mês de referência (UNIQUE aluno_id, mes_referencia)"""
+    # Remover duplicatas: mantém a paga (se houver) ou a mais antiga
+    cursor.execute("""
+        DELETE FROM pagamentos
+        WHERE EXISTS (
+            SELECT 1 FROM pagamentos outro
+            WHERE outro.aluno_id = pagamentos.aluno_id
+              AND outro.mes_referencia = pagamentos.mes_referencia
+              AND outro.id != pagamentos.id
+              AND ((outro.status = 'Pago') > (pagamentos.status = 'Pago')
+                   OR ((outro.status = 'Pago') = (pagamentos.status = 'Pago')
+                       AND outro.id < pagamentos.id))
+        )
+    """)
+    if cursor.rowcount:
+        print(f"🧹 {cursor.rowcount} mensalidade(s) duplicada(s) removida(s)")
+
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_pagamentos_aluno_mes_unico
+        ON pagamentos (aluno_id, mes_referencia)
+    """)
+
+
+def _migracao_007_dias_atraso(cursor):
+    """Coluna dias_atraso em pagamentos (status de atraso persistido)"""
+    _adicionar_colunas(cursor, 'pagamentos', [
+        ('dias_atraso', 'INTEGER DEFAULT 0'),
+    ])
+
+
+def _criar_gatilhos_versao(cursor, tabela):
+    """Incrementa versoes_tabelas a cada INSERT/UPDATE/DELETE em `tabela`"""
+    cursor.execute("INSERT OR IGNORE INTO versoes_tabelas (tabela, versao) VALUES (?, 0)", (tabela,))
+    for operacao in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_versao_{tabela}_{operacao.lower()}
+            AFTER {operacao} ON {tabela}
+            BEGIN
+                UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = '{tabela}';
+            END
+        """)
+
+
+def _migracao_008_versoes_tabelas(cursor):
+    """Contador de versão por tabela (invalidação de caches entre processos)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS versoes_tabelas (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for tabela in ('alunos', 'turmas', 'pagamentos'):
+        _criar_gatilhos_versao(cursor, tabela)
+
+
+def _migracao_009_trabalhos_exportacao(cursor):
+    """Fila de trabalhos de exportação (status e arquivo gerado)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS trabalhos_exportacao (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            parametros TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'Pendente',
+            arquivo TEXT,
+            registros INTEGER,
+            erro TEXT,
+            criado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            iniciado_em TIMESTAMP,
+            concluido_em TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_trabalhos_exportacao_abertos
+        ON trabalhos_exportacao (status, id)
+        WHERE status IN ('Pendente', 'Executando')
+    """)
+
+
+def _migracao_010_versao_configuracoes(cursor):
+    """config_financeiras garantida e contador de versão das configurações (cache)"""
+    cursor.execute(DDL_CONFIG_FINANCEIRAS.format(nome='config_financeiras'))
+    cursor.execute("""
+        INSERT INTO config_financeiras
+        (id, desconto_pontualidade, dias_limite_desconto, multa_por_dia, dias_carencia_multa, descricao)
+        SELECT 1, 10.0, 5, 2.0, 30, 'Configurações padrão do sistema'
+        WHERE NOT EXISTS (SELECT 1 FROM config_financeiras)
+    """)
+    for tabela in ('configuracoes', 'config_financeiras'):
+        _criar_gatilhos_versao(cursor, tabela)
+
+
+# === RESUMOS FINANCEIROS (mantidos por triggers) ===
+# Contadores comuns aos resumos: coluna -> contribuição de uma mensalidade {r}
+CONTADORES_RESUMO = (
+    ('mensalidades', "({r}.id IS NOT NULL)"),
+    ('valor_total', "COALESCE({r}.valor_final, 0)"),
+    ('pagas', "({r}.status IS 'Pago')"),
+    ('valor_pago', "CASE WHEN {r}.status = 'Pago' THEN COALESCE({r}.valor_final, 0) ELSE 0 END"),
+    ('pendentes', "({r}.status IS 'Pendente')"),
+    ('valor_pendente', "CASE WHEN {r}.status = 'Pendente' THEN COALESCE({r}.valor_final, 0) ELSE 0 END"),
+    ('atrasadas', "({r}.status IS 'Atrasado')"),
+    ('valor_atrasado', "CASE WHEN {r}.status = 'Atrasado' THEN COALESCE({r}.valor_final, 0) ELSE 0 END"),
+)
+
+# Contadores só de resumo_turmas: coluna -> contribuição de um resumo_alunos {r}
+CONTADORES_TURMA = (
+    ('alunos_ativos', "1"),
+    ('alunos_com_valor', "({r}.valor_mensalidade > 0)"),
+    ('meta_mensal', "{r}.valor_mensalidade"),
+    ('inadimplentes', "({r}.atrasadas > 0)"),
+) + tuple((coluna, f"{{r}}.{coluna}") for coluna, _ in CONTADORES_RESUMO)
+
+TABELAS_RESUMO = ('resumo_alunos', 'resumo_turmas', 'resumo_meses')
+
+
+def _colunas_contadores(contadores):
+    return ",\n".join(f"{coluna} {'REAL' if coluna.startswith(('valor', 'meta')) else 'INTEGER'} NOT NULL DEFAULT 0"
+                       for coluna, _ in contadores)
+
+
+def _somar_contadores(contadores, linha, sinal='+'):
+    """Cláusula SET que soma (ou subtrai) a contribuição de `linha` (NEW, OLD, s...)"""
+    return ", ".join(f"{coluna} = {coluna} {sinal} {expressao.format(r=linha)}"
+                     for coluna, expressao in contadores)
+
+
+def _agregar_contadores(linha):
+    """SELECT dos contadores somando as mensalidades de `linha`"""
+    return ", ".join(f"COALESCE(SUM({expressao.format(r=linha)}), 0) AS {coluna}"
+                     for coluna, expressao in CONTADORES_RESUMO)
+
+
+SQL_ALUNO_ATIVO = "(SELECT status FROM alunos WHERE id = {r}.aluno_id) = 'Ativo'"
+
+
+def _ajustar_meses_do_aluno(aluno, fator, condicao="1"):
+    """UPDATE que soma (fator 1) ou subtrai (fator -1) de resumo_meses todas as mensalidades do aluno.
+
+    Subconsultas correlacionadas (uma mensalidade por aluno e mês, pelo
+    índice único) em vez de UPDATE ... FROM, que exige SQLite 3.33.
+    """
+    definicoes = ", ".join(
+        f"""{coluna} = {coluna} + ({fator}) * (
+            SELECT COALESCE(SUM({expressao.format(r='p')}), 0) FROM pagamentos p
+            WHERE p.aluno_id = {aluno}.id AND p.mes_referencia = resumo_meses.mes_referencia
+        )"""
+        for coluna, expressao in CONTADORES_RESUMO
+    )
+    return f"""
+        UPDATE resumo_meses SET {definicoes}
+        WHERE mes_referencia IN (SELECT mes_referencia FROM pagamentos WHERE aluno_id = {aluno}.id)
+          AND {condicao};
+    """
+
+
+def _gatilhos_meses_por_aluno():
+    """Triggers de alunos que movem todas as mensalidades do aluno em resumo_meses"""
+    return {
+        'trg_resumo_alunos_ativacao': f"""
+            AFTER UPDATE OF status ON alunos
+            WHEN (OLD.status IS 'Ativo') != (NEW.status IS 'Ativo')
+            BEGIN
+                {_ajustar_meses_do_aluno('NEW', "CASE WHEN NEW.status IS 'Ativo' THEN 1 ELSE -1 END")}
+            END
+        """,
+        'trg_resumo_alunos_exclusao': f"""
+            AFTER DELETE ON alunos
+            BEGIN
+                DELETE FROM resumo_alunos WHERE aluno_id = OLD.id;
+                {_ajustar_meses_do_aluno('OLD', -1, "OLD.status IS 'Ativo'")}
+            END
+        """,
+    }
+
+
+def reconstruir_resumos(cursor):
+    """Recalcula do zero resumo_alunos, resumo_turmas e resumo_meses.
+
+    resumo_turmas é preenchido pelos próprios triggers de resumo_alunos.
+    """
+    for tabela in ('resumo_turmas', 'resumo_alunos', 'resumo_meses'):
+        cursor.execute(f"DELETE FROM {tabela}")
+
+    colunas = ", ".join(coluna for coluna, _ in CONTADORES_RESUMO)
+    cursor.execute("INSERT INTO resumo_turmas (turma_id) SELECT id FROM turmas")
+    cursor.execute(f"""
+        INSERT INTO resumo_alunos (aluno_id, turma_id, ativo, valor_mensalidade, {colunas})
+        SELECT a.id, a.turma_id, a.status IS 'Ativo', COALESCE(a.valor_mensalidade, 0),
+               {_agregar_contadores('p')}
+        FROM alunos a
+        LEFT JOIN pagamentos p ON p.aluno_id = a.id
+        GROUP BY a.id
+    """)
+    cursor.execute(f"""
+        INSERT INTO resumo_meses (mes_referencia, {colunas})
+        SELECT m.mes_referencia, {_agregar_contadores('p')}
+        FROM (SELECT DISTINCT mes_referencia FROM pagamentos) m
+        LEFT JOIN (
+            pagamentos p INNER JOIN alunos a ON a.id = p.aluno_id AND a.status = 'Ativo'
+        ) ON p.mes_referencia = m.mes_referencia
+        GROUP BY m.mes_referencia
+    """)
+
+
+def _migracao_011_resumos_financeiros(cursor):
+    """Resumos financeiros por aluno, turma e mês de referência, mantidos por triggers"""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS resumo_alunos (
+            aluno_id INTEGER PRIMARY KEY,
+            turma_id INTEGER,
+            ativo INTEGER NOT NULL DEFAULT 1,
+            valor_mensalidade REAL NOT NULL DEFAULT 0,
+            {_colunas_contadores(CONTADORES_RESUMO)}
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS resumo_turmas (
+            turma_id INTEGER PRIMARY KEY,
+            {_colunas_contadores(CONTADORES_TURMA)}
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS resumo_meses (
+            mes_referencia TEXT PRIMARY KEY,
+            {_colunas_contadores(CONTADORES_RESUMO)}
+        )
+    """)
+
+    gatilhos = {
+        # Mensalidades -> resumo do aluno e do mês (só alunos ativos entram no mês)
+        'trg_resumo_pagamentos_insert': f"""
+            AFTER INSERT ON pagamentos
+            BEGIN
+                UPDATE resumo_alunos SET {_somar_contadores(CONTADORES_RESUMO, 'NEW')}
+                WHERE aluno_id = NEW.aluno_id;
+                INSERT OR IGNORE INTO resumo_meses (mes_referencia) VALUES (NEW.mes_referencia);
+                UPDATE resumo_meses SET {_somar_contadores(CONTADORES_RESUMO, 'NEW')}
+                WHERE mes_referencia = NEW.mes_referencia AND {SQL_ALUNO_ATIVO.format(r='NEW')};
+            END
+        """,
+        'trg_resumo_pagamentos_delete': f"""
+            AFTER DELETE ON pagamentos
+            BEGIN
+                UPDATE resumo_alunos SET {_somar_contadores(CONTADORES_RESUMO, 'OLD', '-')}
+                WHERE aluno_id = OLD.aluno_id;
+                UPDATE resumo_meses SET {_somar_contadores(CONTADORES_RESUMO, 'OLD', '-')}
+                WHERE mes_referencia = OLD.mes_referencia AND {SQL_ALUNO_ATIVO.format(r='OLD')};
+            END
+        """,
+        'trg_resumo_pagamentos_update': f"""
+            AFTER UPDATE OF status, valor_final, aluno_id, mes_referencia ON pagamentos
+            WHEN OLD.status IS NOT NEW.status OR OLD.valor_final IS NOT NEW.valor_final
+                 OR OLD.aluno_id IS NOT NEW.aluno_id OR OLD.mes_referencia IS NOT NEW.mes_referencia
+            BEGIN
+                UPDATE resumo_alunos SET {_somar_contadores(CONTADORES_RESUMO, 'OLD', '-')}
+                WHERE aluno_id = OLD.aluno_id;
+                UPDATE resumo_alunos SET {_somar_contadores(CONTADORES_RESUMO, 'NEW')}
+                WHERE aluno_id = NEW.aluno_id;
+                UPDATE resumo_meses SET {_somar_contadores(CONTADORES_RESUMO, 'OLD', '-')}
+                WHERE mes_referencia = OLD.mes_referencia AND {SQL_ALUNO_ATIVO.format(r='OLD')};
+                INSERT OR IGNORE INTO resumo_meses (mes_referencia) VALUES (NEW.mes_referencia);
+                UPDATE resumo_meses SET {_somar_contadores(CONTADORES_RESUMO, 'NEW')}
+                WHERE mes_referencia = NEW.mes_referencia AND {SQL_ALUNO_ATIVO.format(r='NEW')};
+            END
+        """,
+        # Resumo do aluno -> resumo da turma (só alunos ativos)
+        'trg_resumo_alunos_insert': f"""
+            AFTER INSERT ON resumo_alunos
+            BEGIN
+                UPDATE resumo_turmas SET {_somar_contadores(CONTADORES_TURMA, 'NEW')}
+                WHERE turma_id = NEW.turma_id AND NEW.ativo;
+            END
+        """,
+        'trg_resumo_alunos_delete': f"""
+            AFTER DELETE ON resumo_alunos
+            BEGIN
+                UPDATE resumo_turmas SET {_somar_contadores(CONTADORES_TURMA, 'OLD', '-')}
+                WHERE turma_id = OLD.turma_id AND OLD.ativo;
+            END
+        """,
+        'trg_resumo_alunos_update': f"""
+            AFTER UPDATE ON resumo_alunos
+            BEGIN
+                UPDATE resumo_turmas SET {_somar_contadores(CONTADORES_TURMA, 'OLD', '-')}
+                WHERE turma_id = OLD.turma_id AND OLD.ativo;
+                UPDATE resumo_turmas SET {_somar_contadores(CONTADORES_TURMA, 'NEW')}
+                WHERE turma_id = NEW.turma_id AND NEW.ativo;
+            END
+        """,
+        # Alunos: cadastro, transferência, ativação e exclusão
+        'trg_resumo_alunos_cadastro': """
+            AFTER INSERT ON alunos
+            BEGIN
+                INSERT OR REPLACE INTO resumo_alunos (aluno_id, turma_id, ativo, valor_mensalidade)
+                VALUES (NEW.id, NEW.turma_id, NEW.status IS 'Ativo', COALESCE(NEW.valor_mensalidade, 0));
+            END
+        """,
+        'trg_resumo_alunos_alteracao': """
+            AFTER UPDATE OF turma_id, status, valor_mensalidade ON alunos
+            WHEN OLD.turma_id IS NOT NEW.turma_id OR OLD.status IS NOT NEW.status
+                 OR OLD.valor_mensalidade IS NOT NEW.valor_mensalidade
+            BEGIN
+                UPDATE resumo_alunos SET turma_id = NEW.turma_id, ativo = NEW.status IS 'Ativo',
+                       valor_mensalidade = COALESCE(NEW.valor_mensalidade, 0)
+                WHERE aluno_id = NEW.id;
+            END
+        """,
+        # Turmas
+        'trg_resumo_turmas_insert': """
+            AFTER INSERT ON turmas
+            BEGIN
+                INSERT OR IGNORE INTO resumo_turmas (turma_id) VALUES (NEW.id);
+            END
+        """,
+        'trg_resumo_turmas_delete': """
+            AFTER DELETE ON turmas
+            BEGIN
+                DELETE FROM resumo_turmas WHERE turma_id = OLD.id;
+            END
+        """,
+        **_gatilhos_meses_por_aluno(),
+    }
+    for nome, corpo in gatilhos.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {nome} {corpo}")
+
+    reconstruir_resumos(cursor)
+
+
+def _migracao_012_resumos_sem_update_from(cursor):
+    """Triggers de resumo_meses por aluno sem UPDATE ... FROM (SQLite anterior a 3.33)"""
+    # Bancos criados com a versão anterior da migração 11; um SQLite antigo
+    # nem abre um esquema com essa sintaxe
+    for nome, corpo in _gatilhos_meses_por_aluno().items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+        cursor.execute(f"CREATE TRIGGER {nome} {corpo}")
+
+
+def _migracao_013_marcadores_execucao(cursor):
+    """Marcadores de execução (ex.: último recálculo de status) fora de configuracoes"""
+    # configuracoes tem contador de versão: gravar ali invalidava o cache
+    # de configurações de todos os processos a cada recálculo diário
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS marcadores_execucao (
+            chave TEXT PRIMARY KEY,
+            valor TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO marcadores_execucao (chave, valor, updated_at)
+        SELECT chave, valor, updated_at FROM configuracoes
+        WHERE chave = 'ultimo_recalculo_status' AND valor IS NOT NULL
+    """)
+    cursor.execute("DELETE FROM configuracoes WHERE chave = 'ultimo_recalculo_status'")
+
+
+# Lista ordenada: a posição (1, 2, 3...) é o número da versão do esquema.
+# Novas migrações devem ser SEMPRE adicionadas ao final.
+MIGRACOES = [
+    _migracao_001_estrutura_base,
+    _migracao_002_turmas_sem_financeiro,
+    _migracao_003_alunos_sem_email,
+    _migracao_004_indices,
+    _migracao_005_colunas_periodo,
+    _migracao_006_mensalidade_unica,
+    _migracao_007_dias_atraso,
+    _migracao_008_versoes_tabelas,
+    _migracao_009_trabalhos_exportacao,
+    _migracao_010_versao_configuracoes,
+    _migracao_011_resumos_financeiros,
+    _migracao_012_resumos_sem_update_from,
+    _migracao_013_marcadores_execucao,
+]
+
+VERSAO_ESQUEMA = len(MIGRACOES)
+
+
+def obter_versao(conn):
+    """Retorna a versão do esquema gravada no banco"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _criar_backup(conn, db_path, versao):
+    """Cria backup antes de migrar um banco já existente"""
+    try:
+        backup_name = f"escola_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_v{versao}.db"
+        backup_path = Path(db_path).parent / backup_name
+        destino = sqlite3.connect(backup_path)
+        try:
+            conn.backup(destino)
+        finally:
+            destino.close()
+        print(f"✅ Backup criado: {backup_name}")
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Erro ao criar backup: {e}")
+
+
+def aplicar_migracoes(conn, db_path=None):
+    """
+    Aplica as migrações pendentes.
+    Com o esquema em dia, custa apenas uma leitura de PRAGMA user_version.
+    Retorna o número de migrações aplicadas.
+    """
+    versao = obter_versao(conn)
+    if versao >= VERSAO_ESQUEMA:
+        return 0
+
+    if db_path is not None and conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='table'").fetchone()[0]:
+        _criar_backup(conn, db_path, versao)
+
+    # Recriações de tabela exigem foreign_keys desligado (fora da transação)
+    conn.execute("PRAGMA foreign_keys = OFF")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+
+        # Outro processo pode ter migrado enquanto aguardávamos o lock
+        versao = obter_versao(conn)
+        pendentes = MIGRACOES[versao:]
+
+        for numero, migracao in enumerate(pendentes, start=versao + 1):
+            print(f"🔄 Migração {numero}: {migracao.__doc__}")
+            migracao(cursor)
+
+        violacoes = cursor.execute("PRAGMA foreign_key_check").fetchall()
+        if violacoes:
+            print(f"⚠️ {len(violacoes)} referência(s) inválida(s) encontradas após migração")
+
+        cursor.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        conn.commit()
+        return len(pendentes)
+
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
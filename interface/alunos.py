@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from services.aluno_service import AlunoService
 from utils.formatters import format_currency, format_date
+from utils.virtual_treeview import VirtualTreeview
+from utils.tarefas import TarefasTela
 from datetime import datetime, date
 import re
 
@@ -30,6 +32,9 @@ class AlunosInterface:
         main_container = tk.Frame(self.parent_frame, bg='white')
         main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
+        # Consultas em segundo plano, canceladas quando a tela é destruída
+        self.tarefas = TarefasTela(main_container)
+        
         # === CABEÇALHO ===
         header_frame = tk.Frame(main_container, bg='white')
         header_frame.pack(fill=tk.X, pady=(0, 20))
@@ -143,12 +148,10 @@ class AlunosInterface:
         )
         list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
         
-        # TreeView
-        tree_frame = tk.Frame(list_frame, bg='white')
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
+        # TreeView virtual (só as linhas visíveis são desenhadas)
         columns = ('id', 'nome', 'cpf', 'idade', 'turma', 'mensalidade', 'responsavel', 'status')
-        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=12)
+        self.tree = VirtualTreeview(list_frame, columns, self.formatar_linha_aluno, height=12)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Configurar colunas
         colunas_config = {
@@ -166,24 +169,19 @@ class AlunosInterface:
             self.tree.heading(col, text=heading)
             self.tree.column(col, width=width, minwidth=50)
         
-        # Scrollbars
-        v_scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        h_scroll = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.tree.xview)
-        
-        self.tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
-        
-        # Grid
-        self.tree.grid(row=0, column=0, sticky='nsew')
-        v_scroll.grid(row=0, column=1, sticky='ns')
-        h_scroll.grid(row=1, column=0, sticky='ew')
-        
-        tree_frame.grid_columnconfigure(0, weight=1)
-        tree_frame.grid_rowconfigure(0, weight=1)
-        
         # Tags
         self.tree.tag_configure('ativo', background='#d4edda')
         self.tree.tag_configure('inativo', background='#f8d7da')
         
+        # Indicador de carregamento
+        self.loading_label = tk.Label(
+            self.tree,
+            text="🔄 Carregando alunos...",
+            font=('Arial', 12),
+            bg='white',
+            fg='#6c757d'
+        )
+        
         # === BOTÕES DE AÇÃO ===
         btn_frame = tk.Frame(list_frame, bg='white')
         btn_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
@@ -517,15 +515,25 @@ class AlunosInterface:
             resp['principal'].set(dados['principal'])
 
     def carregar_dados(self):
-        """Carrega dados iniciais"""
+        """Carrega alunos e turmas em segundo plano"""
+        print("👥 Carregando dados de alunos...")
+        
+        self.tarefas.executar(
+            self._buscar_dados,
+            ao_concluir=self._exibir_dados,
+            ao_falhar=self._erro_carregamento,
+            carregando=self.loading_label,
+            chave='dados'
+        )
+
+    def _buscar_dados(self):
+        """Consultas da tela (roda fora do thread do Tk)"""
+        return self.aluno_service.listar_alunos(), self.aluno_service.listar_turmas()
+
+    def _exibir_dados(self, dados):
+        """Preenche combos e lista com o resultado da carga"""
         try:
-            print("👥 Carregando dados de alunos...")
-            
-            # Carregar alunos
-            self.alunos_data = self.aluno_service.listar_alunos()
-            
-            # Carregar turmas
-            self.turmas_data = self.aluno_service.listar_turmas()
+            self.alunos_data, self.turmas_data = dados
             
             # Atualizar combos
             turma_values = ["Todas"] + [t['display'] for t in self.turmas_data]
@@ -540,33 +548,30 @@ class AlunosInterface:
             print(f"✅ {len(self.alunos_data)} alunos e {len(self.turmas_data)} turmas carregados")
             
         except Exception as e:
-            print(f"❌ Erro ao carregar dados: {e}")
-            messagebox.showerror("Erro", f"Erro ao carregar dados:\n{e}")
+            self._erro_carregamento(e)
+
+    def _erro_carregamento(self, erro):
+        print(f"❌ Erro ao carregar dados: {erro}")
+        messagebox.showerror("Erro", f"Erro ao carregar dados:\n{erro}")
+
+    def formatar_linha_aluno(self, aluno):
+        """Converte um aluno em (values, tags) para a grade"""
+        tag = 'ativo' if aluno.get('status', '').lower() == 'ativo' else 'inativo'
+        
+        return (
+            aluno.get('id', ''),
+            aluno.get('nome', ''),
+            aluno.get('cpf', 'N/I'),
+            aluno.get('idade', 0),
+            f"{aluno.get('turma_nome', '')} - {aluno.get('turma_serie', '')}",
+            format_currency(aluno.get('valor_mensalidade', 0)),
+            aluno.get('responsavel_principal', 'N/I'),
+            aluno.get('status', '')
+        ), (tag,)
 
     def atualizar_lista_alunos(self):
         """Atualiza a lista de alunos na árvore"""
-        
-        # Limpar árvore
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Inserir dados
-        for aluno in self.alunos_data:
-            try:
-                tag = 'ativo' if aluno.get('status', '').lower() == 'ativo' else 'inativo'
-                
-                self.tree.insert('', tk.END, values=(
-                    aluno.get('id', ''),
-                    aluno.get('nome', ''),
-                    aluno.get('cpf', 'N/I'),
-                    aluno.get('idade', 0),
-                    f"{aluno.get('turma_nome', '')} - {aluno.get('turma_serie', '')}",
-                    format_currency(aluno.get('valor_mensalidade', 0)),
-                    aluno.get('responsavel_principal', 'N/I'),
-                    aluno.get('status', '')
-                ), tags=(tag,))
-            except Exception as e:
-                print(f"⚠️ Erro ao inserir aluno {aluno.get('nome', '')}: {e}")
+        self.tree.definir_fonte(self.alunos_data)
 
     def filtrar_alunos(self):
         """Filtra alunos por turma"""
@@ -577,27 +582,11 @@ class AlunosInterface:
                 self.atualizar_lista_alunos()
                 return
             
-            # Limpar árvore
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Filtrar e inserir
-            for aluno in self.alunos_data:
-                turma_completa = f"{aluno.get('turma_nome', '')} - {aluno.get('turma_serie', '')}"
-                
-                if turma_filtro in turma_completa:
-                    tag = 'ativo' if aluno.get('status', '').lower() == 'ativo' else 'inativo'
-                    
-                    self.tree.insert('', tk.END, values=(
-                        aluno.get('id', ''),
-                        aluno.get('nome', ''),
-                        aluno.get('cpf', 'N/I'),
-                        aluno.get('idade', 0),
-                        turma_completa,
-                        format_currency(aluno.get('valor_mensalidade', 0)),
-                        aluno.get('responsavel_principal', 'N/I'),
-                        aluno.get('status', '')
-                    ), tags=(tag,))
+            # Filtrar; a grade formata só as linhas visíveis
+            self.tree.definir_fonte([
+                aluno for aluno in self.alunos_data
+                if turma_filtro in f"{aluno.get('turma_nome', '')} - {aluno.get('turma_serie', '')}"
+            ])
             
         except Exception as e:
             print(f"❌ Erro ao filtrar: {e}")
@@ -615,14 +604,13 @@ class AlunosInterface:
     def editar_aluno(self):
         """Edita aluno selecionado - CORRIGIDO"""
         try:
-            selection = self.tree.selection()
-            if not selection:
+            aluno = self.tree.registro_selecionado()
+            if not aluno:
                 messagebox.showwarning("Atenção", "Selecione um aluno para editar")
                 return
             
             # Obter ID do aluno selecionado
-            item = self.tree.item(selection[0])
-            aluno_id = item['values'][0]
+            aluno_id = aluno['id']
             
             if not aluno_id:
                 messagebox.showerror("Erro", "ID do aluno inválido")
@@ -898,15 +886,14 @@ class AlunosInterface:
     def excluir_aluno(self):
         """Exclui aluno selecionado"""
         try:
-            selection = self.tree.selection()
-            if not selection:
+            aluno = self.tree.registro_selecionado()
+            if not aluno:
                 messagebox.showwarning("Atenção", "Selecione um aluno para excluir")
                 return
             
             # Obter dados do aluno
-            item = self.tree.item(selection[0])
-            aluno_id = item['values'][0]
-            aluno_nome = item['values'][1]
+            aluno_id = aluno['id']
+            aluno_nome = aluno['nome']
             
             # Confirmar exclusão
             if not messagebox.askyesno("Confirmar Exclusão", 
@@ -929,14 +916,13 @@ class AlunosInterface:
     def ver_historico(self):
         """Mostra histórico financeiro do aluno"""
         try:
-            selection = self.tree.selection()
-            if not selection:
+            aluno = self.tree.registro_selecionado()
+            if not aluno:
                 messagebox.showwarning("Atenção", "Selecione um aluno para ver o histórico")
                 return
             
-            item = self.tree.item(selection[0])
-            aluno_id = item['values'][0]
-            aluno_nome = item['values'][1]
+            aluno_id = aluno['id']
+            aluno_nome = aluno['nome']
             
             # Buscar histórico
             historico = self.aluno_service.buscar_historico_financeiro(aluno_id)
@@ -972,9 +958,22 @@ class AlunosInterface:
         frame_lista = tk.Frame(janela)
         frame_lista.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
-        # TreeView
+        # TreeView virtual
         columns = ('mes', 'valor_orig', 'desconto', 'multa', 'valor_final', 'vencimento', 'pagamento', 'status')
-        tree = ttk.Treeview(frame_lista, columns=columns, show='headings', height=15)
+        
+        def formatar_linha(item):
+            return (
+                item.get('mes_referencia', ''),
+                format_currency(item.get('valor_original', 0)),
+                format_currency(item.get('desconto_aplicado', 0)),
+                format_currency(item.get('multa_aplicada', 0)),
+                format_currency(item.get('valor_final', 0)),
+                format_date(item.get('data_vencimento')),
+                format_date(item.get('data_pagamento')) if item.get('data_pagamento') else '-',
+                item.get('status', '')
+            ), ()
+        
+        tree = VirtualTreeview(frame_lista, columns, formatar_linha, height=15)
         
         # Configurar colunas
         headers = {
@@ -992,25 +991,10 @@ class AlunosInterface:
             tree.heading(col, text=header_text)
             tree.column(col, width=100, minwidth=80)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(frame_lista, orient="vertical", command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-        
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill=tk.BOTH, expand=True)
         
         # Inserir dados
-        for item in historico:
-            tree.insert('', tk.END, values=(
-                item.get('mes_referencia', ''),
-                format_currency(item.get('valor_original', 0)),
-                format_currency(item.get('desconto_aplicado', 0)),
-                format_currency(item.get('multa_aplicada', 0)),
-                format_currency(item.get('valor_final', 0)),
-                format_date(item.get('data_vencimento')),
-                format_date(item.get('data_pagamento')) if item.get('data_pagamento') else '-',
-                item.get('status', '')
-            ))
+        tree.definir_fonte(historico)
         
         # Botão fechar
         tk.Button(
@@ -282,8 +282,14 @@ class ConfigFinanceiraInterface:
                 resultado = mensalidade_service.recalcular_todas_mensalidades()
                 
                 if resultado['success']:
+                    # Encargos de todas as mensalidades em aberto, num só cálculo
+                    from services.financeiro_service import FinanceiroService
+                    encargos = FinanceiroService().calcular_encargos_em_aberto()
                     messagebox.showinfo("Sucesso", 
-                                      f"✅ {resultado['atualizadas']} mensalidades recalculadas!")
+                                      f"✅ {resultado['atualizadas']} mensalidades recalculadas!\n\n"
+                                      f"Se pagas hoje, as {len(encargos['ids'])} mensalidades em aberto somam:\n"
+                                      f"• Multas: {format_currency(encargos['multa'].sum())}\n"
+                                      f"• Total: {format_currency(encargos['valor_final'].sum())}")
                 else:
                     messagebox.showerror("Erro", f"❌ Erro: {resultado['error']}")
                     
@@ -300,37 +306,43 @@ class ConfigFinanceiraInterface:
             self.atualizar_preview()
     
     def atualizar_preview(self):
-        """Atualiza preview de cálculos"""
+        """Atualiza preview de cálculos (valores do formulário, ainda não salvos)"""
         try:
             # Limpar preview
             self.preview_text.delete(1.0, tk.END)
             
             # Valores atuais
-            desconto = float(self.desconto_var.get().replace(',', '.')) if self.desconto_var.get() else 0
-            dias_desc = int(self.dias_desconto_var.get()) if self.dias_desconto_var.get() else 0
-            multa = float(self.multa_var.get().replace(',', '.')) if self.multa_var.get() else 0
-            carencia = int(self.carencia_var.get()) if self.carencia_var.get() else 0
+            config = {
+                'desconto_pontualidade': float(self.desconto_var.get().replace(',', '.')) if self.desconto_var.get() else 0,
+                'dias_limite_desconto': int(self.dias_desconto_var.get()) if self.dias_desconto_var.get() else 0,
+                'multa_por_dia': float(self.multa_var.get().replace(',', '.')) if self.multa_var.get() else 0,
+                'dias_carencia_multa': int(self.carencia_var.get()) if self.carencia_var.get() else 0
+            }
             
-            # Exemplo com mensalidade de R$ 100
+            # Exemplo com mensalidade de R$ 100, calculado pelo mesmo motor da cobrança
             valor_exemplo = 100.00
+            calculo = self.config_service.calcular_preview_valores(
+                valor_exemplo, date.today().strftime('%Y-%m-%d'), config
+            )
             
             preview = f"PREVIEW DE CÁLCULOS (Mensalidade: R$ {valor_exemplo:.2f})\n"
             preview += "=" * 60 + "\n\n"
             
             preview += "💰 DESCONTO POR PONTUALIDADE:\n"
-            if desconto > 0:
-                preview += f"   • Valor do desconto: R$ {desconto:.2f}\n"
-                preview += f"   • Válido até {dias_desc} dias antes do vencimento\n"
-                preview += f"   • Valor final: R$ {valor_exemplo - desconto:.2f}\n"
+            if config['desconto_pontualidade'] > 0:
+                preview += f"   • Valor do desconto: R$ {config['desconto_pontualidade']:.2f}\n"
+                preview += f"   • Válido até {config['dias_limite_desconto']} dias antes do vencimento\n"
+                preview += f"   • Valor final: R$ {calculo['cenario_desconto']['valor_final']:.2f}\n"
             else:
                 preview += "   • Desconto desabilitado\n"
             
             preview += "\n⚠️ MULTA POR ATRASO:\n"
-            if multa > 0:
-                preview += f"   • Multa por dia: R$ {multa:.2f}\n"
-                preview += f"   • Carência: {carencia} dias\n"
-                preview += f"   • Exemplo 40 dias atraso: R$ {valor_exemplo + (10 * multa):.2f}\n"
-                preview += f"     (10 dias de multa = {carencia} + 10)\n"
+            if config['multa_por_dia'] > 0:
+                dias_atraso = calculo['cenario_multa']['dias_diferenca']
+                preview += f"   • Multa por dia: R$ {config['multa_por_dia']:.2f}\n"
+                preview += f"   • Carência: {config['dias_carencia_multa']} dias\n"
+                preview += f"   • Exemplo {dias_atraso} dias atraso: R$ {calculo['cenario_multa']['valor_final']:.2f}\n"
+                preview += f"     (10 dias de multa = {config['dias_carencia_multa']} + 10)\n"
             else:
                 preview += "   • Multa desabilitada\n"
             
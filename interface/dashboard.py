@@ -2,21 +2,33 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from services.dashboard_service import DashboardService
 from utils.formatters import format_currency
+from utils.tarefas import TarefasTela
 from datetime import datetime
-import matplotlib
-matplotlib.use('TkAgg')  # Configurar backend antes de importar pyplot
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import numpy as np
-
-# Configurar estilo do matplotlib
-plt.style.use('default')
-plt.rcParams['font.size'] = 9
-plt.rcParams['axes.titlesize'] = 11
-plt.rcParams['axes.labelsize'] = 9
-plt.rcParams['xtick.labelsize'] = 8
-plt.rcParams['ytick.labelsize'] = 8
+
+# matplotlib só é importado quando o primeiro gráfico é desenhado
+_matplotlib = None
+
+
+def carregar_matplotlib():
+    """Importa e configura o matplotlib uma única vez; retorna (Figure, FigureCanvasTkAgg)"""
+    global _matplotlib
+    if _matplotlib is None:
+        import matplotlib
+        matplotlib.use('TkAgg')  # Configurar backend antes de qualquer figura
+        import matplotlib.style
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        # Configurar estilo do matplotlib
+        matplotlib.style.use('default')
+        matplotlib.rcParams['font.size'] = 9
+        matplotlib.rcParams['axes.titlesize'] = 11
+        matplotlib.rcParams['axes.labelsize'] = 9
+        matplotlib.rcParams['xtick.labelsize'] = 8
+        matplotlib.rcParams['ytick.labelsize'] = 8
+
+        _matplotlib = (Figure, FigureCanvasTkAgg)
+    return _matplotlib
 
 class DashboardInterface:
     def __init__(self, parent_frame):
@@ -24,6 +36,7 @@ class DashboardInterface:
         self.parent_frame.configure(bg='white')
         self.dashboard_service = DashboardService()
         self.graficos_canvas = {}  # Armazenar referências dos canvas
+        self.snapshot = None  # DashboardSnapshot exibido (imutável)
         
         try:
             self.create_interface()
@@ -72,9 +85,21 @@ class DashboardInterface:
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
 
+        # Consultas em segundo plano, canceladas quando a tela é destruída
+        self.tarefas = TarefasTela(canvas)
+        self.loading_label = tk.Label(
+            canvas,
+            text="🔄 Carregando dados do dashboard...",
+            font=('Arial', 14),
+            bg='white',
+            fg='#3498db'
+        )
+
         # Bind mousewheel para scroll
         def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+            # bind_all vale para a janela toda: só rolar com o dashboard visível
+            if canvas.winfo_exists() and canvas.winfo_ismapped():
+                canvas.yview_scroll(int(-1*(event.delta/120)), "units")
         canvas.bind_all("<MouseWheel>", _on_mousewheel)
 
         # Container principal dentro do scroll
@@ -217,20 +242,8 @@ class DashboardInterface:
             fg='#2c3e50'
         ).pack(pady=(10, 5))
 
-        # Figura matplotlib
-        fig = Figure(figsize=(5, 4), dpi=80, facecolor='white')
-        ax = fig.add_subplot(111)
-
-        # Canvas
-        canvas = FigureCanvasTkAgg(fig, chart_frame)
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
-
-        # Armazenar referências
-        self.graficos_canvas['status_mensalidades'] = {
-            'fig': fig,
-            'ax': ax,
-            'canvas': canvas
-        }
+        # Figura criada no primeiro desenho (matplotlib carregado sob demanda)
+        self.criar_placeholder_grafico(chart_frame, 'status_mensalidades')
 
     def create_chart_receita_mensal(self, parent, row, col):
         """Gráfico de barras - Receita mensal"""
@@ -245,17 +258,8 @@ class DashboardInterface:
             fg='#2c3e50'
         ).pack(pady=(10, 5))
 
-        fig = Figure(figsize=(5, 4), dpi=80, facecolor='white')
-        ax = fig.add_subplot(111)
-
-        canvas = FigureCanvasTkAgg(fig, chart_frame)
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
-
-        self.graficos_canvas['receita_mensal'] = {
-            'fig': fig,
-            'ax': ax,
-            'canvas': canvas
-        }
+        # Figura criada no primeiro desenho (matplotlib carregado sob demanda)
+        self.criar_placeholder_grafico(chart_frame, 'receita_mensal')
 
     def create_chart_alunos_turma(self, parent, row, col):
         """Gráfico de barras - Alunos por turma"""
@@ -270,17 +274,8 @@ class DashboardInterface:
             fg='#2c3e50'
         ).pack(pady=(10, 5))
 
-        fig = Figure(figsize=(5, 4), dpi=80, facecolor='white')
-        ax = fig.add_subplot(111)
-
-        canvas = FigureCanvasTkAgg(fig, chart_frame)
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
-
-        self.graficos_canvas['alunos_turma'] = {
-            'fig': fig,
-            'ax': ax,
-            'canvas': canvas
-        }
+        # Figura criada no primeiro desenho (matplotlib carregado sob demanda)
+        self.criar_placeholder_grafico(chart_frame, 'alunos_turma')
 
     def create_chart_inadimplencia(self, parent, row, col):
         """Gráfico de linha - Evolução da inadimplência"""
@@ -295,17 +290,8 @@ class DashboardInterface:
             fg='#2c3e50'
         ).pack(pady=(10, 5))
 
-        fig = Figure(figsize=(5, 4), dpi=80, facecolor='white')
-        ax = fig.add_subplot(111)
-
-        canvas = FigureCanvasTkAgg(fig, chart_frame)
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
-
-        self.graficos_canvas['inadimplencia'] = {
-            'fig': fig,
-            'ax': ax,
-            'canvas': canvas
-        }
+        # Figura criada no primeiro desenho (matplotlib carregado sob demanda)
+        self.criar_placeholder_grafico(chart_frame, 'inadimplencia')
 
     def create_chart_top_inadimplentes(self, parent, row, col):
         """Gráfico de barras horizontais - Top inadimplentes"""
@@ -320,18 +306,43 @@ class DashboardInterface:
             fg='#2c3e50'
         ).pack(pady=(10, 5))
 
-        fig = Figure(figsize=(5, 4), dpi=80, facecolor='white')
-        ax = fig.add_subplot(111)
+        # Figura criada no primeiro desenho (matplotlib carregado sob demanda)
+        self.criar_placeholder_grafico(chart_frame, 'top_inadimplentes')
 
-        canvas = FigureCanvasTkAgg(fig, chart_frame)
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
+    def criar_placeholder_grafico(self, chart_frame, chave):
+        """Reserva o espaço do gráfico até os dados chegarem"""
+        placeholder = tk.Label(
+            chart_frame,
+            text="🔄 Carregando gráfico...",
+            font=('Arial', 10),
+            bg='white',
+            fg='#6c757d',
+            width=50,
+            height=16
+        )
+        placeholder.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
 
-        self.graficos_canvas['top_inadimplentes'] = {
-            'fig': fig,
-            'ax': ax,
-            'canvas': canvas
+        self.graficos_canvas[chave] = {
+            'frame': chart_frame,
+            'placeholder': placeholder
         }
 
+    def obter_grafico(self, chave):
+        """Figura, eixo e canvas do gráfico, criados no primeiro desenho"""
+        graf = self.graficos_canvas[chave]
+        if 'canvas' not in graf:
+            Figure, FigureCanvasTkAgg = carregar_matplotlib()
+
+            fig = Figure(figsize=(5, 4), dpi=80, facecolor='white')
+            ax = fig.add_subplot(111)
+
+            graf['placeholder'].destroy()
+            canvas = FigureCanvasTkAgg(fig, graf['frame'])
+            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
+
+            graf.update(fig=fig, ax=ax, canvas=canvas)
+        return graf
+
     def create_resumo_financeiro(self, parent, row, col):
         """Card de resumo financeiro"""
         resumo_frame = tk.Frame(parent, bg='#f8f9fa', relief='solid', bd=1)
@@ -350,15 +361,31 @@ class DashboardInterface:
         self.resumo_content.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
 
     def carregar_dados(self):
-        """Carrega todos os dados e atualiza os gráficos"""
-        try:
-            print("🔄 Carregando dados do dashboard...")
+        """Calcula o snapshot em segundo plano; os gráficos são desenhados ao concluir"""
+        print("🔄 Carregando dados do dashboard...")
+
+        # Um snapshot com todos os cards e gráficos (em cache até os dados mudarem)
+        self.tarefas.executar(
+            self._buscar_snapshot,
+            ao_concluir=self.exibir_snapshot,
+            ao_falhar=self.erro_carregamento,
+            carregando=self.loading_label,
+            chave='snapshot'
+        )
 
-            # Carregar estatísticas gerais para os cards
-            stats = self.dashboard_service.obter_estatisticas_gerais()
-            self.atualizar_stats_cards(stats)
+    def _buscar_snapshot(self):
+        """Snapshot + importação do matplotlib, ambos fora do thread do Tk"""
+        snapshot = self.dashboard_service.snapshot()
+        carregar_matplotlib()
+        return snapshot
 
-            # Carregar e plotar cada gráfico
+    def exibir_snapshot(self, snapshot):
+        """Atualiza cards e gráficos com o snapshot (thread do Tk)"""
+        try:
+            self.snapshot = snapshot
+            self.atualizar_stats_cards(self.snapshot.estatisticas)
+
+            # Plotar cada gráfico
             self.plotar_grafico_status_mensalidades()
             self.plotar_grafico_receita_mensal()
             self.plotar_grafico_alunos_turma()
@@ -366,11 +393,20 @@ class DashboardInterface:
             self.plotar_grafico_top_inadimplentes()
             self.atualizar_resumo_financeiro()
 
+            # Gráficos sem dados continuam sem figura
+            for graf in self.graficos_canvas.values():
+                if 'canvas' not in graf:
+                    graf['placeholder'].config(text="📭 Sem dados para exibir")
+
             print("✅ Dashboard carregado com sucesso!")
 
         except Exception as e:
-            print(f"❌ Erro ao carregar dados do dashboard: {e}")
-            messagebox.showerror("Erro", f"Erro ao carregar dashboard: {str(e)}")
+            self.erro_carregamento(e)
+
+    def erro_carregamento(self, erro):
+        """Falha ao carregar ou exibir os dados do dashboard"""
+        print(f"❌ Erro ao carregar dados do dashboard: {erro}")
+        messagebox.showerror("Erro", f"Erro ao carregar dashboard: {str(erro)}")
 
     def atualizar_stats_cards(self, stats):
         """Atualiza os cards de estatísticas"""
@@ -427,10 +463,10 @@ class DashboardInterface:
     def plotar_grafico_status_mensalidades(self):
         """Plota gráfico de pizza do status das mensalidades"""
         try:
-            dados = self.dashboard_service.obter_dados_grafico_status_mensalidades()
+            dados = self.snapshot.status_mensalidades
             
             if 'status_mensalidades' in self.graficos_canvas and dados['labels']:
-                graf = self.graficos_canvas['status_mensalidades']
+                graf = self.obter_grafico('status_mensalidades')
                 ax = graf['ax']
                 ax.clear()
 
@@ -459,10 +495,10 @@ class DashboardInterface:
     def plotar_grafico_receita_mensal(self):
         """Plota gráfico de barras da receita mensal"""
         try:
-            dados = self.dashboard_service.obter_dados_grafico_receita_mensal()
+            dados = self.snapshot.receita_mensal
             
             if 'receita_mensal' in self.graficos_canvas and dados['labels']:
-                graf = self.graficos_canvas['receita_mensal']
+                graf = self.obter_grafico('receita_mensal')
                 ax = graf['ax']
                 ax.clear()
 
@@ -493,10 +529,10 @@ class DashboardInterface:
     def plotar_grafico_alunos_turma(self):
         """Plota gráfico de barras dos alunos por turma"""
         try:
-            dados = self.dashboard_service.obter_dados_grafico_alunos_por_turma()
+            dados = self.snapshot.alunos_por_turma
             
             if 'alunos_turma' in self.graficos_canvas and dados['labels']:
-                graf = self.graficos_canvas['alunos_turma']
+                graf = self.obter_grafico('alunos_turma')
                 ax = graf['ax']
                 ax.clear()
 
@@ -527,10 +563,10 @@ class DashboardInterface:
     def plotar_grafico_inadimplencia(self):
         """Plota gráfico de linha da evolução da inadimplência"""
         try:
-            dados = self.dashboard_service.obter_dados_grafico_inadimplencia()
+            dados = self.snapshot.inadimplencia
             
             if 'inadimplencia' in self.graficos_canvas and dados['labels']:
-                graf = self.graficos_canvas['inadimplencia']
+                graf = self.obter_grafico('inadimplencia')
                 ax = graf['ax']
                 ax.clear()
 
@@ -560,10 +596,10 @@ class DashboardInterface:
     def plotar_grafico_top_inadimplentes(self):
         """Plota gráfico de barras horizontais dos top inadimplentes"""
         try:
-            dados = self.dashboard_service.obter_dados_grafico_top_inadimplentes()
+            dados = self.snapshot.top_inadimplentes
             
             if 'top_inadimplentes' in self.graficos_canvas and dados['labels']:
-                graf = self.graficos_canvas['top_inadimplentes']
+                graf = self.obter_grafico('top_inadimplentes')
                 ax = graf['ax']
                 ax.clear()
 
@@ -594,7 +630,7 @@ class DashboardInterface:
     def atualizar_resumo_financeiro(self):
         """Atualiza o card de resumo financeiro"""
         try:
-            dados = self.dashboard_service.obter_resumo_financeiro_atual()
+            dados = self.snapshot.resumo_financeiro
             
             # Limpar conteúdo anterior
             for widget in self.resumo_content.winfo_children():
@@ -1,10 +1,18 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from services.financeiro_service import FinanceiroService
+from services.export_service import ExportService
 from services.aluno_service import AlunoService
 from utils.formatters import format_currency, format_date
+from utils.virtual_treeview import VirtualTreeview, FonteEmBlocos, FontePaginada
+from utils.tarefas import TarefasTela
+from interface.modo_caixa import ModoCaixa
+from services.modelo_pagamentos import ModeloPagamentos, CODIGO_STATUS, CHAVES_ORDENACAO
+from services.motor_encargos import obter_motor
+from services.indice_caixa import codigo_referencia
 from datetime import datetime, date, timedelta
 import calendar
+import numpy as np
 
 class FinanceiroInterface:
     def __init__(self, parent_frame):
@@ -13,6 +21,7 @@ class FinanceiroInterface:
         
         self.financeiro_service = FinanceiroService()
         self.aluno_service = AlunoService()
+        self.export_service = ExportService()
         
         # Cache para melhor performance
         self._turmas_cache = None
@@ -20,10 +29,20 @@ class FinanceiroInterface:
         self._cache_timestamp = None
         
         # Variáveis de interface
-        self.mensalidades_data = []
         self.mensalidades_filtradas = []
         self.mensalidade_selecionada = None
         
+        # Modelo colunar: filtros, ordenação e totais são vetorizados;
+        # `posicoes` são as linhas do modelo visíveis, já ordenadas.
+        # Sem modelo (histórico grande demais), a grade usa páginas do banco
+        self.modelo = ModeloPagamentos([])
+        self.posicoes = np.array([], dtype=np.intp)
+        self.filtros_aplicados = {}
+        self.tamanho_pagina = 200
+        self.ordenacao = ('vencimento', True)
+        self.resumo_atual = None
+        self._alunos_filtro = {}
+        
         # Variáveis de filtro avançado
         self.filtros = {
             'status': tk.StringVar(value="Todos"),
@@ -87,6 +106,9 @@ class FinanceiroInterface:
         main_container = tk.Frame(self.parent_frame, bg='white')
         main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
+        # Consultas em segundo plano, canceladas quando a tela é destruída
+        self.tarefas = TarefasTela(main_container)
+        
         # === CABEÇALHO COM ESTATÍSTICAS ===
         self.criar_cabecalho_stats(main_container)
         
@@ -218,6 +240,18 @@ class FinanceiroInterface:
             padx=15,
             pady=5,
             relief='flat'
+        ).pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        
+        tk.Button(
+            action_frame,
+            text="🧾 Modo Caixa (F2)",
+            command=self.abrir_modo_caixa,
+            font=('Arial', 10, 'bold'),
+            bg='#27ae60',
+            fg='white',
+            padx=15,
+            pady=5,
+            relief='flat'
         ).pack(side=tk.TOP, fill=tk.X)
     
     def criar_area_filtros_avancados(self, parent):
@@ -359,17 +393,15 @@ class FinanceiroInterface:
     def criar_lista_mensalidades(self, parent):
         """Cria lista de mensalidades otimizada"""
         
-        # === TREEVIEW MELHORADA ===
-        tree_frame = tk.Frame(parent, bg='white')
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
+        # === TREEVIEW VIRTUAL (só as linhas visíveis são desenhadas) ===
         # Definir colunas com mais informações
         columns = (
             'id', 'aluno', 'turma', 'mes_ref', 'vencimento', 
             'valor_original', 'desconto', 'multa', 'valor_final', 'status', 'dias_atraso'
         )
         
-        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=15)
+        self.tree = VirtualTreeview(parent, columns, self.formatar_linha_mensalidade, height=15)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Configurar colunas otimizadas
         colunas_config = {
@@ -390,20 +422,6 @@ class FinanceiroInterface:
             self.tree.heading(col, text=heading, command=lambda c=col: self.ordenar_coluna(c))
             self.tree.column(col, width=width, minwidth=40)
         
-        # Scrollbars otimizadas
-        v_scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        h_scroll = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.tree.xview)
-        
-        self.tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
-        
-        # Grid otimizado
-        self.tree.grid(row=0, column=0, sticky='nsew')
-        v_scroll.grid(row=0, column=1, sticky='ns')
-        h_scroll.grid(row=1, column=0, sticky='ew')
-        
-        tree_frame.grid_columnconfigure(0, weight=1)
-        tree_frame.grid_rowconfigure(0, weight=1)
-        
         # Bind de seleção
         self.tree.bind("<<TreeviewSelect>>", self.on_mensalidade_select)
         self.tree.bind("<Double-1>", self.on_double_click)
@@ -416,7 +434,7 @@ class FinanceiroInterface:
         
         # Indicador de carregamento
         self.loading_label = tk.Label(
-            tree_frame,
+            self.tree,
             text="🔄 Carregando mensalidades...",
             font=('Arial', 12),
             bg='white',
@@ -461,6 +479,7 @@ class FinanceiroInterface:
         self.info_labels = {}
         info_configs = [
             ('aluno', 'Aluno: Nenhum selecionado'),
+            ('codigo', 'Código: -'),
             ('turma', 'Turma: -'),
             ('mes', 'Mês/Ano: -'),
             ('vencimento', 'Vencimento: -'),
@@ -595,29 +614,64 @@ class FinanceiroInterface:
     
     # === MÉTODOS DE FILTRO AVANÇADO ===
     
-    def carregar_dados_iniciais(self):
-        """Carrega dados iniciais com cache"""
+    def carregar_dados_iniciais(self, depois=None):
+        """Carrega modelo, turmas e alunos em segundo plano; a grade é montada ao concluir.
+
+        `depois` é chamado (no thread do Tk) quando a grade já reflete os novos dados.
+        """
+        print("💰 Carregando dados financeiros...")
+        
+        self.tarefas.executar(
+            self._buscar_dados_iniciais,
+            ao_concluir=lambda dados: self._exibir_dados_iniciais(dados, depois),
+            ao_falhar=self._erro_carregamento,
+            carregando=self.loading_label,
+            chave='dados_iniciais'
+        )
+    
+    def _buscar_dados_iniciais(self):
+        """Consultas da carga inicial (roda fora do thread do Tk)"""
+        # Colunas numéricas de todas as mensalidades (uma consulta), ou
+        # None se passarem do limite: aí filtros e ordem vão para o banco
+        modelo = self.financeiro_service.carregar_modelo_pagamentos(
+            self.financeiro_service.LIMITE_MODELO_PAGAMENTOS
+        )
+        
+        if modelo is not None:
+            # Ordem da grade já calculada fora do thread do Tk
+            modelo.ordem(*self.ordenacao)
+            anos = [int(ano) for ano in np.unique(modelo.ano)[::-1] if ano]
+        else:
+            anos = self.financeiro_service.listar_anos_mensalidades()
+        
+        turmas = self.aluno_service.listar_turmas()
+        alunos = self.aluno_service.listar_alunos()
+        return modelo, turmas, alunos, anos
+    
+    def _exibir_dados_iniciais(self, dados, depois=None):
+        """Aplica o resultado da carga inicial na tela"""
         try:
-            print("💰 Carregando dados financeiros...")
-            
-            # Carregar mensalidades
-            self.mensalidades_data = self.financeiro_service.listar_mensalidades()
-            self.mensalidades_filtradas = self.mensalidades_data.copy()
+            self.modelo, turmas, alunos, anos = dados
+            self._turmas_cache = turmas
+            self._cache_timestamp = datetime.now()
             
             # Carregar dados para filtros
-            self.atualizar_combos_filtros()
+            self.atualizar_combos_filtros(alunos, anos)
             
-            # Atualizar interface
-            self.atualizar_tree()
-            self.atualizar_estatisticas()
+            # Grade + estatísticas dos filtros atuais
+            self.aplicar_filtros()
             
-            print(f"✅ {len(self.mensalidades_data)} mensalidades carregadas")
+            if depois:
+                depois()
             
         except Exception as e:
-            print(f"❌ Erro ao carregar dados iniciais: {e}")
-            self.mostrar_erro(f"Erro ao carregar dados: {e}")
+            self._erro_carregamento(e)
     
-    def atualizar_combos_filtros(self):
+    def _erro_carregamento(self, erro):
+        print(f"❌ Erro ao carregar dados iniciais: {erro}")
+        self.mostrar_erro(f"Erro ao carregar dados: {erro}")
+    
+    def atualizar_combos_filtros(self, alunos=None, anos=None):
         """Atualiza combos de filtros com dados atuais"""
         try:
             # Turmas
@@ -625,14 +679,16 @@ class FinanceiroInterface:
             turma_values = ["Todas"] + [t['display'] for t in turmas]
             self.turma_combo['values'] = turma_values
             
-            # Anos únicos das mensalidades
-            anos = set()
-            for m in self.mensalidades_data:
-                if m.get('mes_referencia'):
-                    ano = m['mes_referencia'].split('-')[0]
-                    anos.add(ano)
+            # Alunos de todas as turmas
+            if alunos is None:
+                self.atualizar_combo_alunos(None)
+            else:
+                self.preencher_combo_alunos(alunos)
             
-            ano_values = ["Todos"] + sorted(list(anos), reverse=True)
+            # Anos com mensalidades
+            if anos is None:
+                anos = self.financeiro_service.listar_anos_mensalidades()
+            ano_values = ["Todos"] + [str(ano) for ano in anos]
             
             # Atualizar combos de ano se diferentes dos valores atuais
             current_anos = list(self.filtros['ano'].get() for _ in range(1))
@@ -654,120 +710,99 @@ class FinanceiroInterface:
             elif hasattr(widget, 'winfo_children'):
                 self._update_combo_recursive(widget, combo_name, values)
     
+    def atualizar_combo_alunos(self, turma_id):
+        """Busca os alunos da turma em segundo plano e preenche o combo"""
+        self.tarefas.executar(
+            self.aluno_service.listar_alunos, turma_id,
+            ao_concluir=self.preencher_combo_alunos,
+            chave='combo_alunos'
+        )
+    
+    def preencher_combo_alunos(self, alunos):
+        """Preenche o combo de alunos (ativos) e o mapa nome -> id usado no filtro"""
+        alunos = [a for a in alunos if a.get('status') == 'Ativo']
+        self._alunos_filtro = {a['nome']: a['id'] for a in alunos}
+        self.aluno_combo['values'] = ["Todos"] + sorted(self._alunos_filtro)
+    
     def on_turma_change(self):
         """Atualiza combo de alunos quando turma muda"""
         try:
-            turma_selecionada = self.filtros['turma'].get()
-            
-            if turma_selecionada == "Todas":
-                # Todos os alunos
-                alunos_únicos = set()
-                for m in self.mensalidades_data:
-                    alunos_únicos.add(m.get('aluno_nome', ''))
-                aluno_values = ["Todos"] + sorted(list(alunos_únicos))
-            else:
-                # Alunos da turma específica
-                alunos_únicos = set()
-                for m in self.mensalidades_data:
-                    if turma_selecionada in m.get('turma_nome', ''):
-                        alunos_únicos.add(m.get('aluno_nome', ''))
-                aluno_values = ["Todos"] + sorted(list(alunos_únicos))
-            
-            self.aluno_combo['values'] = aluno_values
+            turma = self._turma_selecionada()
+            self.atualizar_combo_alunos(turma['id'] if turma else None)
             self.filtros['aluno'].set("Todos")
             
+            # O filtro por turma não depende do combo de alunos
             self.aplicar_filtros()
             
         except Exception as e:
             print(f"❌ Erro ao atualizar alunos por turma: {e}")
     
-    def aplicar_filtros(self):
-        """Aplica todos os filtros selecionados"""
-        try:
-            print("🔍 Aplicando filtros avançados...")
-            
-            dados_filtrados = self.mensalidades_data.copy()
-            
-            # Filtro por status
-            status = self.filtros['status'].get()
-            if status != "Todos":
-                dados_filtrados = [m for m in dados_filtrados 
-                                 if status.lower() in m.get('status', '').lower()]
-            
-            # Filtro por mês
-            mes = self.filtros['mes'].get()
-            if mes != "Todos":
-                mes_num = mes.split(' - ')[0] if ' - ' in mes else mes
-                dados_filtrados = [m for m in dados_filtrados 
-                                 if m.get('mes_referencia', '').split('-')[1] == mes_num]
-            
-            # Filtro por ano
-            ano = self.filtros['ano'].get()
-            if ano != "Todos":
-                dados_filtrados = [m for m in dados_filtrados 
-                                 if m.get('mes_referencia', '').split('-')[0] == ano]
-            
-            # Filtro por turma
-            turma = self.filtros['turma'].get()
-            if turma != "Todas":
-                dados_filtrados = [m for m in dados_filtrados 
-                                 if turma in m.get('turma_nome', '')]
-            
-            # Filtro por aluno
-            aluno = self.filtros['aluno'].get()
-            if aluno != "Todos":
-                dados_filtrados = [m for m in dados_filtrados 
-                                 if aluno in m.get('aluno_nome', '')]
-            
-            # Filtro por valor mínimo
-            valor_min = self.filtros['valor_min'].get()
-            if valor_min:
-                try:
-                    valor_min_float = float(valor_min.replace(',', '.'))
-                    dados_filtrados = [m for m in dados_filtrados 
-                                     if m.get('valor_final', 0) >= valor_min_float]
-                except ValueError:
-                    pass
-            
-            # Filtro por valor máximo
-            valor_max = self.filtros['valor_max'].get()
-            if valor_max:
+    def _turma_selecionada(self):
+        """Turma (dict) escolhida no combo, ou None para 'Todas'"""
+        display = self.filtros['turma'].get()
+        for turma in self.get_turmas_cached():
+            if turma['display'] == display:
+                return turma
+        return None
+    
+    def coletar_filtros(self):
+        """Converte os campos da tela no dicionário de filtros do FinanceiroService"""
+        filtros = {}
+        
+        status = self.filtros['status'].get()
+        if status != "Todos":
+            filtros['status'] = status
+        
+        mes = self.filtros['mes'].get()
+        if mes != "Todos":
+            filtros['mes'] = int(mes.split(' - ')[0])
+        
+        ano = self.filtros['ano'].get()
+        if ano != "Todos":
+            filtros['ano'] = int(ano)
+        
+        turma = self._turma_selecionada()
+        if turma:
+            filtros['turma_id'] = turma['id']
+        
+        aluno = self.filtros['aluno'].get()
+        if aluno in self._alunos_filtro:
+            filtros['aluno_id'] = self._alunos_filtro[aluno]
+        
+        for chave in ('valor_min', 'valor_max'):
+            valor = self.filtros[chave].get().strip()
+            if valor:
                 try:
-                    valor_max_float = float(valor_max.replace(',', '.'))
-                    dados_filtrados = [m for m in dados_filtrados 
-                                     if m.get('valor_final', 0) <= valor_max_float]
+                    filtros[chave] = float(valor.replace(',', '.'))
                 except ValueError:
                     pass
+        
+        for chave in ('data_inicio', 'data_fim'):
+            valor = self.filtros[chave].get()
+            if valor and valor != "DD/MM/AAAA":
+                data_obj = self.parse_date_filter(valor)
+                if data_obj:
+                    filtros[chave] = data_obj
+        
+        return filtros
+    
+    def aplicar_filtros(self):
+        """Aplica todos os filtros selecionados no modelo colunar (no banco quando não há modelo)"""
+        try:
+            print("🔍 Aplicando filtros avançados...")
             
-            # Filtro por data início
-            data_inicio = self.filtros['data_inicio'].get()
-            if data_inicio and data_inicio != "DD/MM/AAAA":
-                try:
-                    data_inicio_obj = self.parse_date_filter(data_inicio)
-                    if data_inicio_obj:
-                        dados_filtrados = [m for m in dados_filtrados 
-                                         if self.parse_date_filter(m.get('data_vencimento', '')) >= data_inicio_obj]
-                except:
-                    pass
-            
-            # Filtro por data fim
-            data_fim = self.filtros['data_fim'].get()
-            if data_fim and data_fim != "DD/MM/AAAA":
-                try:
-                    data_fim_obj = self.parse_date_filter(data_fim)
-                    if data_fim_obj:
-                        dados_filtrados = [m for m in dados_filtrados 
-                                         if self.parse_date_filter(m.get('data_vencimento', '')) <= data_fim_obj]
-                except:
-                    pass
-            
-            self.mensalidades_filtradas = dados_filtrados
+            self.filtros_aplicados = self.coletar_filtros()
+            if self.modelo is not None:
+                # Máscara booleana + argsort sobre as colunas do modelo
+                coluna, decrescente = self.ordenacao
+                self.posicoes = self.modelo.ordenar(
+                    self.modelo.filtrar(self.filtros_aplicados), coluna, decrescente
+                )
             
-            # Atualizar interface
-            self.atualizar_tree()
             self.atualizar_estatisticas()
+            self.atualizar_tree()
             
-            print(f"✅ Filtros aplicados: {len(dados_filtrados)}/{len(self.mensalidades_data)} mensalidades")
+            print(f"✅ Filtros aplicados: {len(self.mensalidades_filtradas)} mensalidades")
             
         except Exception as e:
             print(f"❌ Erro ao aplicar filtros: {e}")
@@ -802,7 +837,7 @@ class FinanceiroInterface:
         except:
             return None
     
-    def limpar_filtros(self):
+    def limpar_filtros(self, aplicar=True):
         """Limpa todos os filtros"""
         try:
             # Reset filtros
@@ -816,10 +851,9 @@ class FinanceiroInterface:
             self.filtros['data_inicio'].set("DD/MM/AAAA")
             self.filtros['data_fim'].set("DD/MM/AAAA")
             
-            # Recarregar todos os dados
-            self.mensalidades_filtradas = self.mensalidades_data.copy()
-            self.atualizar_tree()
-            self.atualizar_estatisticas()
+            # Reaplicar sem filtros (no modelo já carregado)
+            if aplicar:
+                self.aplicar_filtros()
             
             print("🗑️ Filtros limpos")
             
@@ -888,7 +922,7 @@ class FinanceiroInterface:
     def aplicar_filtro_rapido(self, tipo, valor):
         """Aplica filtro rápido específico"""
         try:
-            self.limpar_filtros()
+            self.limpar_filtros(aplicar=False)
             
             if tipo == 'status':
                 self.filtros['status'].set(valor)
@@ -930,77 +964,86 @@ class FinanceiroInterface:
     # === MÉTODOS DE INTERFACE MELHORADOS ===
     
     def atualizar_tree(self):
-        """Atualiza a árvore com dados filtrados"""
+        """Exibe as posições atuais (ou as páginas do banco) na grade virtual"""
         try:
-            # Mostrar indicador de carregamento
-            self.loading_label.place(relx=0.5, rely=0.5, anchor='center')
-            self.parent_frame.update()
-            
-            # Limpar árvore
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Inserir dados filtrados
-            for mensalidade in self.mensalidades_filtradas:
-                # Calcular dias de atraso
-                dias_atraso = self.calcular_dias_atraso(mensalidade.get('data_vencimento'))
-                
-                # Determinar tag baseada no status e dias de atraso
-                status = mensalidade.get('status', '').lower()
-                tag = 'pendente'
-                
-                if 'pago' in status:
-                    tag = 'pago'
-                elif 'atrasado' in status or dias_atraso > 0:
-                    tag = 'muito_atrasado' if dias_atraso > 30 else 'atrasado'
-                
-                # Inserir item
-                self.tree.insert('', tk.END, values=(
-                    mensalidade.get('id', ''),
-                    mensalidade.get('aluno_nome', ''),
-                    mensalidade.get('turma_nome', ''),
-                    mensalidade.get('mes_referencia', ''),
-                    format_date(mensalidade.get('data_vencimento')),
-                    format_currency(mensalidade.get('valor_original', 0)),
-                    format_currency(mensalidade.get('desconto_aplicado', 0)),
-                    format_currency(mensalidade.get('multa_aplicada', 0)),
-                    format_currency(mensalidade.get('valor_final', 0)),
-                    mensalidade.get('status', ''),
-                    dias_atraso if dias_atraso > 0 else ''
-                ), tags=(tag,))
-            
-            # Remover indicador de carregamento
-            self.loading_label.place_forget()
+            if self.modelo is None:
+                # Páginas por chave, buscadas conforme a rolagem
+                self.mensalidades_filtradas = FontePaginada(
+                    self._buscar_pagina, self.resumo_atual['total'], self.tamanho_pagina
+                )
+            else:
+                # Detalhes (nomes, turma, observações) só das linhas que aparecem
+                self.mensalidades_filtradas = FonteEmBlocos(
+                    self.modelo.id[self.posicoes],
+                    self.financeiro_service.obter_mensalidades_por_ids,
+                    self.tamanho_pagina
+                )
+            self.tree.definir_fonte(self.mensalidades_filtradas)
             
         except Exception as e:
-            self.loading_label.place_forget()
             print(f"❌ Erro ao atualizar tree: {e}")
     
+    def _buscar_pagina(self, apos, limite):
+        """Página do banco com os filtros e a ordenação atuais (para FontePaginada)"""
+        coluna, decrescente = self.ordenacao
+        pagina = self.financeiro_service.buscar_pagina_mensalidades(
+            self.filtros_aplicados, coluna, decrescente, apos=apos, limite=limite
+        )
+        return {
+            'registros': pagina['mensalidades'],
+            'cursor': pagina['cursor'],
+            'tem_mais': pagina['tem_mais']
+        }
+    
+    def formatar_linha_mensalidade(self, mensalidade):
+        """Converte uma mensalidade em (values, tags) para a grade"""
+        # Dias de atraso persistidos pelo recálculo diário
+        dias_atraso = mensalidade.get('dias_atraso') or 0
+        
+        # Determinar tag baseada no status e dias de atraso
+        status = mensalidade.get('status', '').lower()
+        tag = 'pendente'
+        
+        if 'pago' in status:
+            tag = 'pago'
+        elif 'atrasado' in status or dias_atraso > 0:
+            tag = 'muito_atrasado' if dias_atraso > 30 else 'atrasado'
+        
+        return (
+            mensalidade.get('id', ''),
+            mensalidade.get('aluno_nome', ''),
+            mensalidade.get('turma_nome', ''),
+            mensalidade.get('mes_referencia', ''),
+            format_date(mensalidade.get('data_vencimento')),
+            format_currency(mensalidade.get('valor_original', 0)),
+            format_currency(mensalidade.get('desconto_aplicado', 0)),
+            format_currency(mensalidade.get('multa_aplicada', 0)),
+            format_currency(mensalidade.get('valor_final', 0)),
+            mensalidade.get('status', ''),
+            dias_atraso if dias_atraso > 0 else ''
+        ), (tag,)
+    
     def atualizar_estatisticas(self):
-        """Atualiza estatísticas em tempo real"""
+        """Atualiza estatísticas dos filtros atuais (agregadas no modelo ou no banco)"""
         try:
-            dados = self.mensalidades_filtradas
-            
-            # Contadores
-            total = len(dados)
-            pendentes = len([m for m in dados if 'pendente' in m.get('status', '').lower()])
-            atrasadas = len([m for m in dados if 'atrasado' in m.get('status', '').lower() 
-                           or self.calcular_dias_atraso(m.get('data_vencimento')) > 0])
-            pagas = len([m for m in dados if 'pago' in m.get('status', '').lower()])
-            
-            # Valor total
-            valor_total = sum(m.get('valor_final', 0) for m in dados)
-            
-            # Atualizar variáveis
-            self.stats_vars['total_mensalidades'].set(str(total))
-            self.stats_vars['valor_total'].set(format_currency(valor_total))
-            self.stats_vars['pendentes'].set(str(pendentes))
-            self.stats_vars['atrasadas'].set(str(atrasadas))
-            self.stats_vars['pagas'].set(str(pagas))
+            if self.modelo is None:
+                self.resumo_atual = self.financeiro_service.resumir_mensalidades(self.filtros_aplicados)
+            else:
+                self.resumo_atual = self.modelo.resumir(self.posicoes)
+            self.exibir_estatisticas()
             
         except Exception as e:
             print(f"❌ Erro ao atualizar estatísticas: {e}")
     
+    def exibir_estatisticas(self):
+        """Mostra self.resumo_atual nos cards do cabeçalho"""
+        resumo = self.resumo_atual
+        self.stats_vars['total_mensalidades'].set(str(resumo['total']))
+        self.stats_vars['valor_total'].set(format_currency(resumo['valor_total']))
+        self.stats_vars['pendentes'].set(str(resumo['pendentes']))
+        self.stats_vars['atrasadas'].set(str(resumo['atrasadas']))
+        self.stats_vars['pagas'].set(str(resumo['pagas']))
+    
     def calcular_dias_atraso(self, data_vencimento):
         """Calcula dias de atraso"""
         try:
@@ -1021,35 +1064,17 @@ class FinanceiroInterface:
             return 0
     
     def ordenar_coluna(self, col):
-        """Ordena dados por coluna"""
+        """Ordena por coluna no modelo colunar, ou no banco sem modelo (clique repetido inverte a direção)"""
         try:
-            reverse = getattr(self, f'_sort_{col}_reverse', False)
+            if col not in CHAVES_ORDENACAO:
+                return
             
-            # Mapear colunas para campos de dados
-            col_mapping = {
-                'id': 'id',
-                'aluno': 'aluno_nome', 
-                'turma': 'turma_nome',
-                'mes_ref': 'mes_referencia',
-                'vencimento': 'data_vencimento',
-                'valor_original': 'valor_original',
-                'valor_final': 'valor_final',
-                'status': 'status'
-            }
-            
-            field = col_mapping.get(col, col)
-            
-            # Ordenar dados filtrados
-            if field in ['valor_original', 'valor_final']:
-                self.mensalidades_filtradas.sort(
-                    key=lambda x: x.get(field, 0), reverse=reverse
-                )
-            else:
-                self.mensalidades_filtradas.sort(
-                    key=lambda x: str(x.get(field, '')), reverse=reverse
-                )
+            reverse = getattr(self, f'_sort_{col}_reverse', False)
+            self.ordenacao = (col, reverse)
             
-            # Atualizar tree
+            if self.modelo is not None:
+                # Reordenar só as posições filtradas (argsort no modelo)
+                self.posicoes = self.modelo.ordenar(self.posicoes, col, reverse)
             self.atualizar_tree()
             
             # Toggle reverse para próxima ordenação
@@ -1061,10 +1086,9 @@ class FinanceiroInterface:
     def on_double_click(self, event):
         """Ação no duplo clique"""
         try:
-            item = self.tree.selection()[0]
-            values = self.tree.item(item)['values']
+            mensalidade = self.tree.registro_selecionado()
             
-            if values and values[9] != 'Pago':  # Se não está pago
+            if mensalidade and mensalidade.get('status') != 'Pago':  # Se não está pago
                 # Auto-selecionar para pagamento
                 self.on_mensalidade_select(event)
                 # Focar no campo de desconto
@@ -1079,25 +1103,8 @@ class FinanceiroInterface:
     def on_mensalidade_select(self, event):
         """Quando uma mensalidade é selecionada - VERSÃO MELHORADA"""
         try:
-            selection = self.tree.selection()
-            if not selection:
-                return
-            
-            # Obter dados da linha selecionada
-            item = self.tree.item(selection[0])
-            values = item['values']
-            
-            if not values:
-                return
-            
-            # Encontrar mensalidade completa nos dados filtrados
-            mensalidade_id = values[0]
-            
-            self.mensalidade_selecionada = None
-            for mensalidade in self.mensalidades_filtradas:
-                if str(mensalidade.get('id')) == str(mensalidade_id):
-                    self.mensalidade_selecionada = mensalidade
-                    break
+            # Mensalidade completa guardada na fonte da grade virtual
+            self.mensalidade_selecionada = self.tree.registro_selecionado()
             
             if not self.mensalidade_selecionada:
                 return
@@ -1126,6 +1133,7 @@ class FinanceiroInterface:
         
         # Atualizar labels com mais informações
         self.info_labels['aluno'].config(text=f"Aluno: {m.get('aluno_nome', '')}")
+        self.info_labels['codigo'].config(text=f"Código: {codigo_referencia(m['id'])}")
         self.info_labels['turma'].config(text=f"Turma: {m.get('turma_nome', '')}")
         self.info_labels['mes'].config(text=f"Mês/Ano: {m.get('mes_referencia', '')}")
         self.info_labels['vencimento'].config(text=f"Vencimento: {format_date(m.get('data_vencimento'))}")
@@ -1251,18 +1259,22 @@ class FinanceiroInterface:
             if not self.mensalidade_selecionada:
                 return
             
-            dias_atraso = self.calcular_dias_atraso(self.mensalidade_selecionada.get('data_vencimento'))
+            m = self.mensalidade_selecionada
+            dias_atraso = self.calcular_dias_atraso(m.get('data_vencimento'))
             
             if dias_atraso <= 0:
                 messagebox.showinfo("Info", "Esta mensalidade não está em atraso")
                 return
             
-            # Fórmula: 2% do valor original + R$ 1 por dia
-            valor_original = float(self.mensalidade_selecionada.get('valor_original', 0))
-            multa_percentual = valor_original * 0.02  # 2%
-            multa_diaria = dias_atraso * 1.0  # R$ 1 por dia
-            
-            multa_total = multa_percentual + multa_diaria
+            # Mesmas regras do diálogo de pagamento e da prévia (config_financeiras)
+            motor = obter_motor()
+            calculo = motor.calcular_um(
+                float(m.get('valor_original', 0)),
+                m.get('data_vencimento'),
+                date.today(),
+                m.get('pode_receber_multa', True)
+            )
+            multa_total = calculo['multa_aplicada']
             
             self.var_multa.set(f"{multa_total:.2f}")
             self.calcular_valor_final()
@@ -1271,8 +1283,8 @@ class FinanceiroInterface:
                 "Multa Calculada",
                 f"Multa automática aplicada:\n\n"
                 f"• {dias_atraso} dias de atraso\n"
-                f"• 2% do valor: {format_currency(multa_percentual)}\n"
-                f"• R$ 1,00 por dia: {format_currency(multa_diaria)}\n"
+                f"• Carência: {motor.dias_carencia_multa} dias\n"
+                f"• {calculo['dias_multa']} dia(s) × {format_currency(motor.multa_por_dia)}\n"
                 f"• Total: {format_currency(multa_total)}"
             )
             
@@ -1430,12 +1442,12 @@ Confirmar este pagamento?
                     f"📅 Data: {date.today().strftime('%d/%m/%Y')}"
                 )
                 
-                # Atualizar interface
-                self.atualizar_tudo()
+                # Corrigir só a linha paga e, em seguida, focar no próximo pendente
                 self.cancelar_selecao()
-                
-                # Focar no próximo pendente
-                self.focar_proximo_pendente()
+                if self.aplicar_mensalidade_alterada(resultado.get('mensalidade')):
+                    self.focar_proximo_pendente()
+                else:
+                    self.atualizar_tudo(depois=self.focar_proximo_pendente)
                 
             else:
                 messagebox.showerror("Erro", f"❌ Erro ao processar pagamento:\n{resultado['error']}")
@@ -1444,28 +1456,113 @@ Confirmar este pagamento?
             print(f"❌ Erro ao dar baixa: {e}")
             messagebox.showerror("Erro", f"Erro ao processar pagamento:\n{e}")
     
+    def aplicar_mensalidade_alterada(self, mensalidade):
+        """Atualiza na tela uma mensalidade alterada, sem recarregar tudo.
+
+        Grava os novos valores no modelo, soma aos cards só a diferença da
+        linha e, conforme os filtros aplicados, redesenha a linha, a tira da
+        grade ou a insere no lugar da ordenação atual (ex.: paga com a grade
+        filtrada em "Pago"). Combos de filtro não mudam: turma, aluno e ano
+        continuam os mesmos. Uma linha já exibida fica onde está até a
+        próxima ordenação.
+        Sem modelo, a grade paginada é refeita com os filtros atuais.
+        Retorna False se a mensalidade não está no modelo (recarregar).
+        """
+        try:
+            if not mensalidade:
+                return False
+            
+            posicao = self.modelo.posicao(mensalidade['id']) if self.modelo is not None else None
+            if self.modelo is not None and posicao is None:
+                return False
+            
+            # Painel de pagamento não pode ficar com dados velhos (ex.: paga no modo caixa)
+            if self.mensalidade_selecionada and self.mensalidade_selecionada.get('id') == mensalidade['id']:
+                self.cancelar_selecao()
+            
+            if self.modelo is None:
+                self.aplicar_filtros()
+                return True
+            
+            # Índice na grade (normalmente a linha que estava selecionada)
+            indices = np.flatnonzero(self.posicoes == posicao)
+            exibida = len(indices) > 0
+            
+            antes = self.modelo.resumir([posicao] if exibida else [])
+            self.modelo.atualizar_mensalidade(mensalidade)
+            
+            atende = bool(self.modelo.mascara(self.filtros_aplicados, [posicao])[0])
+            if not exibida and not atende:
+                return True
+            
+            depois = self.modelo.resumir([posicao] if atende else [])
+            self.resumo_atual = {chave: valor - antes[chave] + depois[chave]
+                                 for chave, valor in self.resumo_atual.items()}
+            self.exibir_estatisticas()
+            
+            if exibida and atende:
+                indice = int(indices[0])
+                self.mensalidades_filtradas.atualizar(indice, mensalidade)
+                self.tree.atualizar_linha(indice)
+            elif exibida:
+                indice = int(indices[0])
+                self.posicoes = np.delete(self.posicoes, indice)
+                self.mensalidades_filtradas.chaves = self.modelo.id[self.posicoes]
+                self.tree.remover_linha(indice)
+            else:
+                indice = self._indice_na_ordem(posicao)
+                self.posicoes = np.insert(self.posicoes, indice, posicao)
+                self.mensalidades_filtradas.chaves = self.modelo.id[self.posicoes]
+                self.mensalidades_filtradas.atualizar(indice, mensalidade)
+                self.tree.inserir_linha(indice)
+            
+            return True
+            
+        except Exception as e:
+            print(f"⚠️ Erro ao atualizar mensalidade na tela: {e}")
+            return False
+    
+    def _indice_na_ordem(self, posicao):
+        """Índice da grade onde a posição entra na ordenação atual"""
+        ordem = self.modelo.ordem(*self.ordenacao)
+        classificacao = np.empty(len(ordem), dtype=np.intp)
+        classificacao[ordem] = np.arange(len(ordem))
+        return int(np.searchsorted(classificacao[self.posicoes], classificacao[posicao]))
+    
+    def abrir_modo_caixa(self):
+        """Abre o modo caixa; cada recebimento corrige a grade sem recarregar"""
+        try:
+            ModoCaixa(self.parent_frame.winfo_toplevel(), ao_pagar=self.aplicar_mensalidade_alterada)
+        except Exception as e:
+            print(f"❌ Erro ao abrir modo caixa: {e}")
+            messagebox.showerror("Erro", f"Erro ao abrir modo caixa:\n{e}")
+    
     def focar_proximo_pendente(self):
         """Foca automaticamente na próxima mensalidade pendente"""
         try:
-            for item in self.tree.get_children():
-                values = self.tree.item(item)['values']
-                if len(values) >= 10:
-                    status = values[9].lower()
-                    if 'pendente' in status or 'atrasado' in status:
-                        self.tree.selection_set(item)
-                        self.tree.focus(item)
-                        self.tree.see(item)
-                        # Simular evento de seleção
-                        fake_event = type('Event', (), {})()
-                        self.on_mensalidade_select(fake_event)
-                        break
+            # Primeira pendente/atrasada a partir do topo da tela
+            if self.modelo is None:
+                # Sem modelo: só nas linhas da página seguinte ao topo
+                fim = min(len(self.mensalidades_filtradas), self.tree.inicio + self.tamanho_pagina)
+                abertas = [indice for indice in range(self.tree.inicio, fim)
+                           if self.mensalidades_filtradas[indice]['status'] in ('Pendente', 'Atrasado')]
+                if abertas:
+                    self.tree.selecionar_indice(abertas[0])
+                return
+            
+            status = self.modelo.status[self.posicoes[self.tree.inicio:]]
+            abertas = np.flatnonzero((status == CODIGO_STATUS['Pendente']) |
+                                     (status == CODIGO_STATUS['Atrasado']))
+            if len(abertas):
+                # Dispara <<TreeviewSelect>> -> on_mensalidade_select
+                self.tree.selecionar_indice(self.tree.inicio + int(abertas[0]))
         except Exception as e:
             print(f"⚠️ Erro ao focar próximo pendente: {e}")
     
     def cancelar_selecao(self):
         """Cancela seleção atual com limpeza completa"""
         try:
-            self.tree.selection_remove(self.tree.selection())
+            self.tree.limpar_selecao()
             self.mensalidade_selecionada = None
             
             # Limpar informações
@@ -1474,6 +1571,8 @@ Confirmar este pagamento?
                     label.config(text="Aluno: Nenhum selecionado", fg='black')
                 elif key == 'status':
                     label.config(text="Status: -", fg='black')
+                elif key == 'codigo':
+                    label.config(text="Código: -", fg='black')
                 elif key == 'dias_atraso':
                     label.config(text="Dias em Atraso: -", fg='black')
                 else:
@@ -1498,16 +1597,16 @@ Confirmar este pagamento?
         except Exception as e:
             print(f"❌ Erro ao cancelar seleção: {e}")
     
-    def atualizar_tudo(self):
+    def atualizar_tudo(self, depois=None):
         """Atualiza todos os dados e interface"""
         try:
-            # Recarregar dados
-            self.carregar_dados_iniciais()
+            # Recarregar dados (em segundo plano)
+            self.carregar_dados_iniciais(depois)
             
             # Cancelar seleção
             self.cancelar_selecao()
             
-            print("🔄 Interface atualizada completamente")
+            print("🔄 Recarregando interface financeira...")
             
         except Exception as e:
             print(f"❌ Erro ao atualizar tudo: {e}")
@@ -1516,7 +1615,8 @@ Confirmar este pagamento?
     def gerar_relatorio_avancado(self):
         """Gera relatório avançado baseado nos filtros atuais"""
         try:
-            if not self.mensalidades_filtradas:
+            resumo = self.resumo_atual
+            if not resumo or not resumo['total']:
                 messagebox.showwarning("Atenção", "Nenhuma mensalidade encontrada com os filtros atuais")
                 return
             
@@ -1542,33 +1642,32 @@ Confirmar este pagamento?
             resumo_frame = tk.LabelFrame(relatorio, text="Resumo Executivo", font=('Arial', 12, 'bold'))
             resumo_frame.pack(fill=tk.X, padx=20, pady=10)
             
-            dados = self.mensalidades_filtradas
-            total_valor = sum(m.get('valor_final', 0) for m in dados)
-            valor_pago = sum(m.get('valor_final', 0) for m in dados if 'pago' in m.get('status', '').lower())
+            total_valor = resumo['valor_total']
+            valor_pago = resumo['valor_pago']
             valor_pendente = total_valor - valor_pago
             
             resumo_text = f"""
 📊 RESUMO GERAL:
-• Total de Mensalidades: {len(dados)}
+• Total de Mensalidades: {resumo['total']}
 • Valor Total: {format_currency(total_valor)}
 • Valor Arrecadado: {format_currency(valor_pago)}
 • Valor Pendente: {format_currency(valor_pendente)}
 • Taxa de Inadimplência: {((valor_pendente/total_valor)*100) if total_valor > 0 else 0:.1f}%
 
 📈 DISTRIBUIÇÃO POR STATUS:
-• Pagas: {len([m for m in dados if 'pago' in m.get('status', '').lower()])}
-• Pendentes: {len([m for m in dados if 'pendente' in m.get('status', '').lower()])}
-• Atrasadas: {len([m for m in dados if 'atrasado' in m.get('status', '').lower()])}
+• Pagas: {resumo['pagas']}
+• Pendentes: {resumo['pendentes']}
+• Atrasadas: {resumo['atrasadas']}
             """
             
             tk.Label(resumo_frame, text=resumo_text.strip(), font=('Arial', 10), 
                     justify=tk.LEFT, bg='white').pack(padx=10, pady=10)
             
-            # Botão de exportar (futuro)
+            # Exporta as mensalidades dos filtros atuais direto do banco
             tk.Button(
                 relatorio,
                 text="💾 Exportar Relatório",
-                command=lambda: messagebox.showinfo("Info", "Exportação será implementada em breve"),
+                command=lambda: self.exportar_relatorio_csv(relatorio),
                 font=('Arial', 12, 'bold'),
                 bg='#27ae60',
                 fg='white',
@@ -1580,6 +1679,34 @@ Confirmar este pagamento?
             print(f"❌ Erro ao gerar relatório: {e}")
             messagebox.showerror("Erro", f"Erro ao gerar relatório:\n{e}")
     
+    def exportar_relatorio_csv(self, janela):
+        """Exporta para CSV as mensalidades dos filtros atuais (em segundo plano)"""
+        arquivo = filedialog.asksaveasfilename(
+            parent=janela,
+            title="Exportar Mensalidades",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv")],
+            initialfile=f"mensalidades_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        )
+        if not arquivo:
+            return
+        
+        def concluir(resultado):
+            if resultado['success']:
+                messagebox.showinfo("Exportação Concluída",
+                    f"✅ {resultado['linhas']} mensalidade(s) exportada(s) para:\n{resultado['filename']}")
+            else:
+                messagebox.showerror("Erro", f"Erro ao exportar:\n{resultado['error']}")
+        
+        self.tarefas.executar(
+            self.export_service.exportar_mensalidades_banco_csv,
+            arquivo,
+            self.coletar_filtros(),
+            ao_concluir=concluir,
+            ao_falhar=lambda e: messagebox.showerror("Erro", f"Erro ao exportar:\n{e}"),
+            chave='exportacao'
+        )
+    
     def limpar_placeholder(self, event, placeholder_text):
         """Remove placeholder do campo"""
         if event.widget.get() == placeholder_text:
@@ -1620,6 +1747,7 @@ Confirmar este pagamento?
             
             self.parent_frame.bind('<Escape>', cancelar_com_esc)
             self.parent_frame.bind('<F5>', atualizar_com_f5)
+            self.parent_frame.bind('<F2>', lambda e: self.abrir_modo_caixa())
             self.parent_frame.bind('<Control-f>', focar_filtros)
             self.parent_frame.focus_set()
             
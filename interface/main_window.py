@@ -1,13 +1,48 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from interface.dashboard import DashboardInterface
-from interface.alunos import AlunosInterface
-from interface.turmas import TurmasInterface
-from interface.financeiro_corrigido import FinanceiroInterface
-from interface.transferencia_corrigida import TransferenciaAvancadaInterface
-from database.connection import db
+from database.connection import db, versao_tabelas
+from utils.tarefas import encerrar_pool
+from utils.cache_telas import CacheTelas
+from services.mensalidade_service import MensalidadeService
+import importlib
 import sys
 
+# Telas importadas só na primeira navegação:
+# nome -> (módulo, classe, tabelas exibidas, método que recarrega os dados)
+TELAS = {
+    'dashboard': ('interface.dashboard', 'DashboardInterface',
+                  ('alunos', 'turmas', 'pagamentos'), 'carregar_dados'),
+    'alunos': ('interface.alunos', 'AlunosInterface',
+               ('alunos', 'turmas'), 'carregar_dados'),
+    'turmas': ('interface.turmas', 'TurmasInterface',
+               ('alunos', 'turmas'), 'carregar_turmas'),
+    'financeiro': ('interface.financeiro_corrigido', 'FinanceiroInterface',
+                   ('alunos', 'turmas', 'pagamentos'), 'atualizar_tudo'),
+    'transferencias': ('interface.transferencia_corrigida', 'TransferenciaInterface',
+                       ('alunos', 'turmas'), 'carregar_turmas'),
+}
+
+
+def carregar_tela(nome):
+    """Importa o módulo da tela na primeira vez que ela é aberta e retorna a classe"""
+    modulo, classe = TELAS[nome][:2]
+    return getattr(importlib.import_module(modulo), classe)
+
+
+def versao_tela(nome):
+    """Versão atual das tabelas exibidas pela tela"""
+    conn = db.get_connection()
+    try:
+        return versao_tabelas(conn, TELAS[nome][2])
+    finally:
+        conn.close()
+
+
+def recarregar_tela(nome, interface):
+    """Recarrega os dados de uma tela viva cujas tabelas mudaram"""
+    getattr(interface, TELAS[nome][3])()
+
+
 class SistemaGestaoEscolarCorrigido:
     def __init__(self):
         self.root = tk.Tk()
@@ -25,6 +60,9 @@ class SistemaGestaoEscolarCorrigido:
         try:
             db.init_database()
             print("✅ Banco de dados inicializado")
+            
+            # Atualizar status de atraso das mensalidades (uma vez por dia)
+            MensalidadeService().recalcular_status_se_necessario()
         except Exception as e:
             messagebox.showerror("Erro no Banco de Dados", 
                                f"Erro ao inicializar banco de dados:\n{str(e)}")
@@ -46,6 +84,14 @@ class SistemaGestaoEscolarCorrigido:
         self.content_frame = tk.Frame(self.main_frame, bg='white')
         self.content_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
 
+        # Telas construídas uma vez e reaproveitadas na navegação
+        self.telas = CacheTelas(
+            self.content_frame,
+            construir=lambda nome, container: carregar_tela(nome)(container),
+            versao=versao_tela,
+            recarregar=recarregar_tela
+        )
+
         # Mostrar dashboard por padrão
         self.current_interface = None
         self.show_dashboard()
@@ -150,9 +196,13 @@ class SistemaGestaoEscolarCorrigido:
         button.config(bg=original_color)
 
     def clear_content(self):
-        """Limpa o conteúdo atual"""
+        """Esconde a tela atual (telas em cache continuam vivas) e remove as demais"""
+        self.telas.esconder()
+        
+        vivas = self.telas.containers()
         for widget in self.content_frame.winfo_children():
-            widget.destroy()
+            if widget not in vivas:
+                widget.destroy()
         self.current_interface = None
 
     def update_navbar_selection(self, selected_button):
@@ -187,7 +237,7 @@ class SistemaGestaoEscolarCorrigido:
             self.clear_content()
             self.update_navbar_selection("🏠 Dashboard")
             
-            self.current_interface = DashboardInterface(self.content_frame)
+            self.current_interface = self.telas.mostrar('dashboard')
             print("✅ Dashboard carregado")
             
         except Exception as e:
@@ -200,7 +250,7 @@ class SistemaGestaoEscolarCorrigido:
             self.clear_content()
             self.update_navbar_selection("👥 Alunos")
             
-            self.current_interface = AlunosInterface(self.content_frame)
+            self.current_interface = self.telas.mostrar('alunos')
             print("✅ Interface de Alunos carregada")
             
         except Exception as e:
@@ -213,7 +263,7 @@ class SistemaGestaoEscolarCorrigido:
             self.clear_content()
             self.update_navbar_selection("🏫 Turmas")
             
-            self.current_interface = TurmasInterface(self.content_frame)
+            self.current_interface = self.telas.mostrar('turmas')
             print("✅ Interface de Turmas carregada")
             
         except Exception as e:
@@ -226,26 +276,9 @@ class SistemaGestaoEscolarCorrigido:
             self.clear_content()
             self.update_navbar_selection("💰 Financeiro")
             
-            # Mostrar loading
-            loading_frame = tk.Frame(self.content_frame, bg='white')
-            loading_frame.pack(fill=tk.BOTH, expand=True)
-            
-            loading_label = tk.Label(
-                loading_frame,
-                text="💰 Carregando Sistema Financeiro Avançado...\n🔄 Nova lógica de pagamentos",
-                font=('Arial', 16),
-                bg='white',
-                fg='#27ae60',
-                justify='center'
-            )
-            loading_label.pack(expand=True)
-            self.root.update()
-            
-            # Remover loading
-            loading_frame.destroy()
-            
-            # Carregar interface corrigida
-            self.current_interface = FinanceiroInterface(self.content_frame)
+            # A tela é montada na hora; os dados chegam em segundo plano
+            # (com indicador de carregamento da própria tela)
+            self.current_interface = self.telas.mostrar('financeiro')
             print("✅ Interface Financeiro CORRIGIDA carregada")
             
         except Exception as e:
@@ -258,26 +291,9 @@ class SistemaGestaoEscolarCorrigido:
             self.clear_content()
             self.update_navbar_selection("🔄 Transferências")
             
-            # Mostrar loading
-            loading_frame = tk.Frame(self.content_frame, bg='white')
-            loading_frame.pack(fill=tk.BOTH, expand=True)
-            
-            loading_label = tk.Label(
-                loading_frame,
-                text="🔄 Carregando Sistema de Transferências...\n✅ Erro de importação corrigido",
-                font=('Arial', 16),
-                bg='white',
-                fg='#9b59b6',
-                justify='center'
-            )
-            loading_label.pack(expand=True)
-            self.root.update()
-            
-            # Remover loading
-            loading_frame.destroy()
-            
-            # Carregar interface corrigida
-            self.current_interface = TransferenciaAvancadaInterface(self.content_frame)
+            # A tela é montada na hora; os dados chegam em segundo plano
+            # (com indicador de carregamento da própria tela)
+            self.current_interface = self.telas.mostrar('transferencias')
             print("✅ Interface de Transferências CORRIGIDA carregada")
             
         except Exception as e:
@@ -386,6 +402,10 @@ class SistemaGestaoEscolarCorrigido:
                 relief='flat'
             ).pack(side=tk.RIGHT)
             
+            # Fila de exportações (importada só quando a tela abre)
+            PainelExportacoes = getattr(importlib.import_module('interface.relatorios'), 'PainelExportacoes')
+            PainelExportacoes(config_frame)
+            
             print("✅ Configurações carregadas")
             
         except Exception as e:
@@ -468,6 +488,13 @@ class SistemaGestaoEscolarCorrigido:
             print("👋 Encerrando Sistema de Gestão Escolar...")
             
             try:
+                stats = db.estatisticas_pool()
+                print(f"📊 Pool de conexões: {stats['criadas']} criadas, "
+                      f"{stats['reutilizadas']} reutilizadas ({stats['taxa_reuso']:.0f}% reuso)")
+                encerrar_pool()
+                trabalhos = sys.modules.get('services.trabalho_exportacao_service')
+                if trabalhos:
+                    trabalhos.encerrar_processos()
                 db.close_connection()
                 print("✅ Conexão com banco fechada")
             except:
@@ -0,0 +1,299 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+from collections import deque
+from datetime import date
+from services.financeiro_service import FinanceiroService
+from services.indice_caixa import IndiceCaixa, codigo_referencia
+from services.motor_encargos import obter_motor
+from utils.formatters import format_currency, format_date
+from utils.tarefas import TarefasTela
+
+# F12 repetido antes disso (tecla segurada) não recebe a mensalidade seguinte
+INTERVALO_CONFIRMACAO = 0.5
+
+class ModoCaixa:
+    """Recebimento só pelo teclado (ou leitor de código de barras).
+
+    Enter com texto busca (código impresso, id ou CPF do aluno); F12 recebe
+    a mensalidade destacada (Enter vazio, como o CR/LF extra do leitor, não
+    recebe nada); ↑/↓ trocam a mensalidade da família; Esc encerra o
+    atendimento e chama o próximo da fila. Códigos lidos durante um
+    atendimento entram na fila.
+    """
+
+    def __init__(self, parent, ao_pagar=None):
+        self.parent = parent
+        self.ao_pagar = ao_pagar
+
+        self.financeiro_service = FinanceiroService()
+        self.indice = IndiceCaixa()
+        self.indice_pronto = False
+
+        self.fila = deque()
+        self.familia = []
+        self.encargos = None
+        self.destacada = 0
+        self.recebidas = 0
+        self.total_recebido = 0.0
+        self._recebido_em = 0.0
+
+        self.create_window()
+
+        # Índice montado em segundo plano; buscas feitas antes entram na fila
+        self.tarefas.executar(
+            self.indice.carregar,
+            ao_concluir=self._indice_carregado,
+            ao_falhar=lambda e: self.mostrar_status(f"❌ Erro ao carregar mensalidades: {e}", '#dc3545'),
+            carregando=self.lbl_carregando,
+            chave='indice_caixa'
+        )
+
+    def create_window(self):
+        """Cria a janela do modo caixa"""
+        self.janela = tk.Toplevel(self.parent)
+        self.janela.title("🧾 Modo Caixa")
+        self.janela.geometry("900x560")
+        self.janela.configure(bg='white')
+        self.janela.transient(self.parent)
+
+        self.tarefas = TarefasTela(self.janela)
+
+        header = tk.Frame(self.janela, bg='#2c3e50', height=60)
+        header.pack(fill=tk.X)
+        header.pack_propagate(False)
+
+        tk.Label(
+            header, text="🧾 Modo Caixa",
+            font=('Arial', 16, 'bold'), fg='white', bg='#2c3e50'
+        ).pack(side=tk.LEFT, padx=20)
+
+        self.lbl_sessao = tk.Label(
+            header, text="Recebidas: 0 | Total: R$ 0,00",
+            font=('Arial', 11, 'bold'), fg='white', bg='#2c3e50'
+        )
+        self.lbl_sessao.pack(side=tk.RIGHT, padx=20)
+
+        main_frame = tk.Frame(self.janela, bg='white')
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=15)
+
+        # Campo único de leitura
+        busca_frame = tk.Frame(main_frame, bg='white')
+        busca_frame.pack(fill=tk.X)
+
+        tk.Label(
+            busca_frame, text="Código / ID / CPF:",
+            font=('Arial', 12, 'bold'), bg='white'
+        ).pack(side=tk.LEFT)
+
+        self.entry_codigo = tk.Entry(busca_frame, font=('Consolas', 16), width=24)
+        self.entry_codigo.pack(side=tk.LEFT, padx=10)
+
+        self.lbl_fila = tk.Label(busca_frame, text="Fila: 0", font=('Arial', 11), bg='white', fg='#6c757d')
+        self.lbl_fila.pack(side=tk.LEFT, padx=10)
+
+        self.lbl_carregando = tk.Label(main_frame, text="⏳ Carregando mensalidades...", font=('Arial', 10),
+                                       bg='white', fg='#6c757d')
+
+        self.lbl_status = tk.Label(main_frame, text="Leia o código ou digite o ID/CPF e tecle Enter",
+                                   font=('Arial', 12), bg='white', anchor='w')
+        self.lbl_status.pack(fill=tk.X, pady=(10, 5))
+
+        # Mensalidades em aberto da família
+        columns = ('codigo', 'aluno', 'turma', 'mes', 'vencimento', 'original', 'desconto', 'multa', 'total')
+        headings = {
+            'codigo': ('Código', 100), 'aluno': ('Aluno', 170), 'turma': ('Turma', 110),
+            'mes': ('Mês/Ano', 70), 'vencimento': ('Vencimento', 85), 'original': ('Original', 80),
+            'desconto': ('Desconto', 75), 'multa': ('Multa', 70), 'total': ('A Receber', 90)
+        }
+        self.tree = ttk.Treeview(main_frame, columns=columns, show='headings', height=12,
+                                 selectmode='browse', takefocus=False)
+        for col, (texto, largura) in headings.items():
+            self.tree.heading(col, text=texto)
+            self.tree.column(col, width=largura, anchor='center' if col != 'aluno' else 'w')
+        self.tree.tag_configure('atrasado', foreground='#dc3545')
+        self.tree.pack(fill=tk.BOTH, expand=True, pady=5)
+
+        self.lbl_total = tk.Label(main_frame, text="", font=('Arial', 14, 'bold'), bg='white', fg='#28a745')
+        self.lbl_total.pack(anchor='e')
+
+        tk.Label(
+            main_frame,
+            text="Enter: buscar   F12: receber destacada   ↑/↓: escolher mensalidade   Esc: próximo da fila",
+            font=('Arial', 10), bg='white', fg='#6c757d'
+        ).pack(fill=tk.X, pady=(10, 0))
+
+        # Todas as teclas no campo de leitura: o foco nunca sai dele
+        self.entry_codigo.bind('<Return>', self.on_enter)
+        self.entry_codigo.bind('<KP_Enter>', self.on_enter)
+        self.entry_codigo.bind('<F12>', self.on_confirmar)
+        self.entry_codigo.bind('<Up>', lambda e: self.mover_destaque(-1))
+        self.entry_codigo.bind('<Down>', lambda e: self.mover_destaque(1))
+        self.entry_codigo.bind('<Escape>', lambda e: self.proximo_da_fila())
+        self.entry_codigo.focus_set()
+
+    # === FLUXO DO CAIXA ===
+
+    def _indice_carregado(self, indice, mensalidade=None):
+        """Índice pronto; depois de um conflito, volta à família da mensalidade recusada"""
+        self.indice_pronto = True
+        if mensalidade is not None:
+            self.familia = indice.abertas_da_familia(mensalidade)
+            if self.familia:
+                self.destacada = 0
+                self.exibir_familia()
+                return
+        else:
+            self.mostrar_status(f"✅ {len(indice.mensalidades)} mensalidades em aberto prontas para busca", 'black')
+        if not self.familia:
+            self.proximo_da_fila(limpar_status=mensalidade is None)
+
+    def _recarregar_indice(self, mensalidade):
+        """Refaz o índice em segundo plano; leituras feitas enquanto isso entram na fila"""
+        self.indice_pronto = False
+        self.familia = []
+        self.exibir_familia()
+        self.tarefas.executar(
+            self.indice.carregar,
+            ao_concluir=lambda indice: self._indice_carregado(indice, mensalidade),
+            ao_falhar=lambda e: self.mostrar_status(f"❌ Erro ao carregar mensalidades: {e}", '#dc3545'),
+            carregando=self.lbl_carregando,
+            chave='indice_caixa'
+        )
+
+    def on_enter(self, event=None):
+        """Enter com texto busca (ou enfileira); vazio é ignorado"""
+        texto = self.entry_codigo.get().strip()
+        self.entry_codigo.delete(0, tk.END)
+
+        if texto:
+            if self.familia or not self.indice_pronto:
+                self.fila.append(texto)
+                self.atualizar_fila()
+            else:
+                self.buscar(texto)
+        return "break"
+
+    def on_confirmar(self, event=None):
+        """F12 recebe a mensalidade destacada"""
+        if self.familia and time.monotonic() - self._recebido_em >= INTERVALO_CONFIRMACAO:
+            self.receber_destacada()
+        return "break"
+
+    def buscar(self, texto):
+        """Busca no índice em memória e mostra a família"""
+        resultado = self.indice.buscar(texto)
+        if not resultado:
+            self.mostrar_status(f"❌ Nada em aberto para '{texto}'", '#dc3545')
+            self.proximo_da_fila(limpar_status=False)
+            return
+
+        self.familia = resultado['familia']
+        self.destacada = 0
+        self.exibir_familia()
+
+        m = resultado['mensalidade']
+        self.mostrar_status(f"👤 {m['aluno_nome']} — {len(self.familia)} mensalidade(s) em aberto na família", 'black')
+
+    def receber_destacada(self):
+        """Registra o pagamento da mensalidade destacada com os encargos de hoje"""
+        m = self.familia[self.destacada]
+        desconto = float(self.encargos['desconto'][self.destacada])
+        multa = float(self.encargos['multa'][self.destacada])
+        valor_final = float(self.encargos['valor_final'][self.destacada])
+
+        resultado = self.financeiro_service.processar_pagamento(
+            m['id'], valor_final, desconto, multa, m.get('observacoes') or "Recebido no caixa"
+        )
+
+        self._recebido_em = time.monotonic()
+
+        if not resultado['success']:
+            # Ex.: já paga em outro terminal: o índice é refeito em segundo plano
+            self.mostrar_status(f"❌ {m['aluno_nome']} {m['mes_referencia']}: {resultado['error']}", '#dc3545')
+            self._recarregar_indice(m)
+            return
+
+        self.indice.registrar_pagamento(m['id'])
+        self.recebidas += 1
+        self.total_recebido += valor_final
+        self.lbl_sessao.config(text=f"Recebidas: {self.recebidas} | Total: {format_currency(self.total_recebido)}")
+        self.mostrar_status(
+            f"✅ Recebido: {m['aluno_nome']} {m['mes_referencia']} — {format_currency(valor_final)}",
+            '#28a745'
+        )
+        if self.ao_pagar and resultado.get('mensalidade'):
+            self.ao_pagar(resultado['mensalidade'])
+
+        # Próximas da mesma família, sem nova consulta
+        self.familia = self.indice.abertas_da_familia(m)
+        if self.familia:
+            self.destacada = min(self.destacada, len(self.familia) - 1)
+            self.exibir_familia()
+        else:
+            self.proximo_da_fila(limpar_status=False)
+
+    def proximo_da_fila(self, limpar_status=True):
+        """Encerra o atendimento atual e busca o próximo código da fila"""
+        self.familia = []
+        self.exibir_familia()
+
+        if self.fila and self.indice_pronto:
+            texto = self.fila.popleft()
+            self.atualizar_fila()
+            self.buscar(texto)
+        elif limpar_status:
+            self.mostrar_status("Leia o código ou digite o ID/CPF e tecle Enter", 'black')
+
+    # === EXIBIÇÃO ===
+
+    def exibir_familia(self):
+        """Mostra as mensalidades da família com multa/desconto calculados para hoje"""
+        self.tree.delete(*self.tree.get_children())
+
+        if not self.familia:
+            self.encargos = None
+            self.lbl_total.config(text="")
+            return
+
+        self.encargos = obter_motor(self.financeiro_service.db).calcular(
+            [m['valor_original'] for m in self.familia],
+            [m['data_vencimento'] for m in self.familia],
+            date.today(),
+            [m['pode_receber_multa'] for m in self.familia]
+        )
+
+        for i, m in enumerate(self.familia):
+            self.tree.insert('', tk.END, iid=str(i), values=(
+                codigo_referencia(m['id']),
+                m['aluno_nome'],
+                m['turma_nome'],
+                m['mes_referencia'],
+                format_date(m['data_vencimento']),
+                format_currency(m['valor_original']),
+                format_currency(float(self.encargos['desconto'][i])),
+                format_currency(float(self.encargos['multa'][i])),
+                format_currency(float(self.encargos['valor_final'][i]))
+            ), tags=('atrasado',) if m['status'] == 'Atrasado' else ())
+
+        self.mover_destaque(0)
+
+    def mover_destaque(self, passos):
+        if not self.familia:
+            return "break"
+        self.destacada = max(0, min(self.destacada + passos, len(self.familia) - 1))
+        self.tree.selection_set(str(self.destacada))
+        self.tree.see(str(self.destacada))
+
+        m = self.familia[self.destacada]
+        self.lbl_total.config(
+            text=f"F12 para receber {m['mes_referencia']} de {m['aluno_nome']}: "
+                 f"{format_currency(float(self.encargos['valor_final'][self.destacada]))}"
+        )
+        return "break"
+
+    def atualizar_fila(self):
+        self.lbl_fila.config(text=f"Fila: {len(self.fila)}")
+
+    def mostrar_status(self, texto, cor):
+        self.lbl_status.config(text=texto, fg=cor)
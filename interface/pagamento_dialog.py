@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from utils.formatters import format_currency, format_date
 from utils.input_formatters import CurrencyEntry
+from services.motor_encargos import obter_motor
 from datetime import date, datetime
 
 class PagamentoDialog:
@@ -10,6 +11,7 @@ class PagamentoDialog:
         self.mensalidade_data = mensalidade_data
         self.callback = callback
         self.resultado = None
+        self.motor = obter_motor()
         
         self.create_dialog()
     
@@ -265,40 +267,26 @@ class PagamentoDialog:
             print(f"Erro ao calcular valores: {e}")
     
     def calcular_multa(self):
-        """Calcula multa baseada no atraso"""
+        """Calcula multa baseada no atraso (regras de config_financeiras)"""
         try:
             # Data de vencimento
             data_vencimento_str = self.mensalidade_data.get('data_vencimento', '')
             if not data_vencimento_str:
                 return 0
             
-            data_vencimento = datetime.strptime(data_vencimento_str, '%Y-%m-%d').date()
-            
             # Data de pagamento
-            data_pagamento_str = self.data_pagamento_var.get()
-            if not data_pagamento_str:
-                return 0
-            
             try:
-                data_pagamento = datetime.strptime(data_pagamento_str, '%d/%m/%Y').date()
-            except:
+                data_pagamento = datetime.strptime(self.data_pagamento_var.get(), '%d/%m/%Y').date()
+            except ValueError:
                 return 0
             
-            # Calcular dias de atraso
-            dias_atraso = (data_pagamento - data_vencimento).days
-            
-            if dias_atraso <= 0:
-                return 0  # Sem atraso
-            
-            # Multa: 2% do valor + R$ 1,00 por dia (configurável)
-            valor_original = float(self.mensalidade_data.get('valor_original', 0))
-            
-            multa_percentual = valor_original * 0.02  # 2%
-            multa_diaria = dias_atraso * 1.00  # R$ 1,00 por dia
-            
-            multa_total = multa_percentual + multa_diaria
-            
-            return max(0, multa_total)
+            calculo = self.motor.calcular_um(
+                float(self.mensalidade_data.get('valor_original', 0)),
+                data_vencimento_str,
+                data_pagamento,
+                self.mensalidade_data.get('pode_receber_multa', True)
+            )
+            return calculo['multa_aplicada']
             
         except Exception as e:
             print(f"Erro ao calcular multa: {e}")
@@ -0,0 +1,88 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from services.trabalho_exportacao_service import TrabalhoExportacaoService, PACOTE_MENSAL
+from utils.formatters import format_date
+
+
+class PainelExportacoes:
+    """Fila de exportações: enfileira o pacote do mês e acompanha o status"""
+
+    # Intervalo de atualização da lista enquanto houver trabalho em aberto (ms)
+    INTERVALO_ATUALIZACAO = 1000
+
+    def __init__(self, parent_frame):
+        self.parent_frame = parent_frame
+        self.trabalho_service = TrabalhoExportacaoService()
+        self._timer = None
+        self.create_interface()
+        self.atualizar_lista()
+
+    def create_interface(self):
+        """Cria a seção de exportações"""
+        frame = tk.LabelFrame(self.parent_frame, text="📦 Exportações", font=('Arial', 12, 'bold'), bg='white')
+        frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
+
+        botoes_frame = tk.Frame(frame, bg='white')
+        botoes_frame.pack(fill=tk.X, padx=20, pady=(15, 10))
+
+        tk.Button(
+            botoes_frame,
+            text="📦 Pacote do Mês",
+            command=self.gerar_pacote_mensal,
+            font=('Arial', 11, 'bold'),
+            bg='#16a085',
+            fg='white',
+            padx=20,
+            pady=8,
+            relief='flat'
+        ).pack(side=tk.LEFT)
+
+        self.status_label = tk.Label(
+            botoes_frame,
+            text="",
+            font=('Arial', 10),
+            bg='white',
+            fg='#6c757d'
+        )
+        self.status_label.pack(side=tk.LEFT, padx=15)
+
+        colunas = ('ID', 'Relatório', 'Status', 'Registros', 'Arquivo', 'Criado')
+        self.tree = ttk.Treeview(frame, columns=colunas, show='headings', height=6)
+        larguras = {'ID': 50, 'Relatório': 200, 'Status': 100, 'Registros': 90, 'Arquivo': 380, 'Criado': 130}
+        for coluna in colunas:
+            self.tree.heading(coluna, text=coluna)
+            self.tree.column(coluna, width=larguras[coluna], anchor='w' if coluna in ('Relatório', 'Arquivo') else 'center')
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 15))
+
+    def gerar_pacote_mensal(self):
+        """Enfileira os relatórios do fechamento do mês"""
+        resultado = self.trabalho_service.enfileirar_pacote(PACOTE_MENSAL)
+        if not resultado['success']:
+            messagebox.showerror("Erro", resultado['error'])
+            return
+        self.atualizar_lista()
+
+    def atualizar_lista(self):
+        """Recarrega a fila; continua atualizando enquanto houver trabalho em aberto"""
+        self._timer = None
+        if not self.tree.winfo_exists():
+            return
+
+        self.tree.delete(*self.tree.get_children())
+        for trabalho in self.trabalho_service.listar_trabalhos():
+            detalhe = trabalho['erro'] if trabalho['status'] == 'Erro' else trabalho['arquivo']
+            self.tree.insert('', 'end', values=(
+                trabalho['id'],
+                trabalho['descricao'],
+                trabalho['status'],
+                trabalho['registros'] if trabalho['registros'] is not None else '',
+                detalhe or '',
+                format_date(trabalho['criado_em'][:10]) + trabalho['criado_em'][10:16] if trabalho['criado_em'] else ''
+            ))
+
+        em_aberto = self.trabalho_service.em_aberto()
+        if em_aberto:
+            self.status_label.config(text=f"⏳ {em_aberto} relatório(s) em andamento...")
+            self._timer = self.tree.after(self.INTERVALO_ATUALIZACAO, self.atualizar_lista)
+        else:
+            self.status_label.config(text="")
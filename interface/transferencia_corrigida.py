@@ -3,6 +3,7 @@ from tkinter import ttk, messagebox
 from services.transferencia_service import TransferenciaService
 from services.aluno_service import AlunoService
 from utils.formatters import format_date
+from utils.tarefas import TarefasTela
 from datetime import datetime
 
 class TransferenciaInterface:
@@ -37,6 +38,9 @@ class TransferenciaInterface:
         main_container = tk.Frame(self.parent_frame, bg='white')
         main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
+        # Consultas em segundo plano, canceladas quando a tela é destruída
+        self.tarefas = TarefasTela(main_container)
+        
         # === CABEÇALHO ===
         header_frame = tk.Frame(main_container, bg='white')
         header_frame.pack(fill=tk.X, pady=(0, 20))
@@ -194,6 +198,15 @@ class TransferenciaInterface:
         canvas.configure(yscrollcommand=scrollbar.set)
         
         canvas.pack(side="left", fill="both", expand=True)
+        
+        # Indicador de carregamento da lista de alunos
+        self.loading_alunos = tk.Label(
+            canvas,
+            text="🔄 Carregando alunos...",
+            font=('Arial', 11),
+            bg='white',
+            fg='#6c757d'
+        )
         scrollbar.pack(side="right", fill="y")
         
         # Inicializar lista vazia
@@ -326,12 +339,22 @@ class TransferenciaInterface:
         self.lista_historico.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
     def carregar_turmas(self):
-        """Carrega lista de turmas"""
+        """Carrega lista de turmas (em segundo plano)"""
+        print("🔄 Carregando turmas para transferência...")
+        self.atualizar_info("🔄 Carregando turmas...")
+        
+        # Usar o serviço correto
+        self.tarefas.executar(
+            self.aluno_service.listar_turmas,
+            ao_concluir=self.exibir_turmas,
+            ao_falhar=self.erro_carregar_turmas,
+            chave='turmas'
+        )
+
+    def exibir_turmas(self, turmas):
+        """Preenche os combos com as turmas carregadas"""
         try:
-            print("🔄 Carregando turmas para transferência...")
-            
-            # Usar o serviço correto
-            self.turmas_data = self.aluno_service.listar_turmas()
+            self.turmas_data = turmas
             
             if not self.turmas_data:
                 print("⚠️ Nenhuma turma encontrada")
@@ -357,8 +380,11 @@ class TransferenciaInterface:
             print(f"✅ {len(self.turmas_data)} turmas carregadas")
             
         except Exception as e:
-            print(f"❌ Erro ao carregar turmas: {e}")
-            self.atualizar_info(f"Erro ao carregar turmas:\n{str(e)}")
+            self.erro_carregar_turmas(e)
+
+    def erro_carregar_turmas(self, erro):
+        print(f"❌ Erro ao carregar turmas: {erro}")
+        self.atualizar_info(f"Erro ao carregar turmas:\n{str(erro)}")
 
     def on_turma_origem_change(self, event=None):
         """Quando turma de origem muda"""
@@ -404,8 +430,22 @@ class TransferenciaInterface:
             
             print(f"📋 Carregando alunos da turma ID: {turma_id}")
             
-            # Carregar alunos
-            self.alunos_turma_origem = self.aluno_service.buscar_alunos_por_turma(turma_id)
+            # Carregar alunos (em segundo plano)
+            self.tarefas.executar(
+                self.aluno_service.buscar_alunos_por_turma, turma_id,
+                ao_concluir=self.exibir_alunos_turma,
+                ao_falhar=self.erro_carregar_alunos,
+                carregando=self.loading_alunos,
+                chave='alunos_turma'
+            )
+            
+        except Exception as e:
+            self.erro_carregar_alunos(e)
+
+    def exibir_alunos_turma(self, alunos):
+        """Monta a lista com os alunos carregados da turma de origem"""
+        try:
+            self.alunos_turma_origem = alunos
             
             if not self.alunos_turma_origem:
                 messagebox.showinfo("Informação", "Nenhum aluno encontrado nesta turma")
@@ -422,8 +462,11 @@ class TransferenciaInterface:
             print(f"✅ {len(self.alunos_turma_origem)} alunos carregados")
             
         except Exception as e:
-            print(f"❌ Erro ao carregar alunos: {e}")
-            messagebox.showerror("Erro", f"Erro ao carregar alunos:\n{e}")
+            self.erro_carregar_alunos(e)
+
+    def erro_carregar_alunos(self, erro):
+        print(f"❌ Erro ao carregar alunos: {erro}")
+        messagebox.showerror("Erro", f"Erro ao carregar alunos:\n{erro}")
 
     def criar_lista_alunos(self):
         """Cria lista de alunos com checkboxes"""
@@ -550,21 +593,14 @@ class TransferenciaInterface:
                 if turma['display'] == turma_destino:
                     turma_destino_id = turma['id']
             
-            # Validar cada aluno
-            problemas_gerais = []
-            
-            if turma_destino == turma_origem:
-                problemas_gerais.append("• Turma de destino deve ser diferente da origem")
+            # Validar a seleção inteira de uma vez
+            validacao = self.transferencia_service.validar_transferencia_lote(
+                [aluno['id'] for aluno in alunos_selecionados], turma_origem_id, turma_destino_id
+            )
             
-            problemas_alunos = []
-            for aluno in alunos_selecionados:
-                validacao = self.transferencia_service.validar_transferencia(
-                    aluno['id'], turma_origem_id, turma_destino_id
-                )
-                
-                if not validacao['success']:
-                    for problema in validacao['problemas']:
-                        problemas_alunos.append(f"• {aluno['nome']}: {problema}")
+            problemas_gerais = [f"• {problema}" for problema in validacao['problemas']]
+            problemas_alunos = [f"• {erro['nome'] or erro['aluno_id']}: {erro['error']}"
+                                for erro in validacao['erros']]
             
             # Mostrar resultado
             todos_problemas = problemas_gerais + problemas_alunos
@@ -644,81 +680,78 @@ class TransferenciaInterface:
             if not messagebox.askyesno("Confirmar Transferência", confirmacao.strip()):
                 return
             
-            # Executar transferências
-            sucessos = 0
-            erros = []
-            
             motivo = self.motivo_var.get() or "Transferência"
             observacoes = self.entry_observacoes.get("1.0", tk.END).strip()
             
             print(f"📝 Motivo: {motivo}")
             print(f"💭 Observações: {observacoes}")
             
-            for i, aluno in enumerate(alunos_selecionados):
-                try:
-                    print(f"🔄 Transferindo {i+1}/{len(alunos_selecionados)}: {aluno['nome']} (ID: {aluno['id']})")
-                    
-                    # Usar o serviço corrigido
-                    resultado = self.transferencia_service.transferir_aluno(
-                        aluno['id'], 
-                        turma_origem_id, 
-                        turma_destino_id,
-                        motivo,
-                        observacoes
-                    )
-                    
-                    if resultado['success']:
-                        sucessos += 1
-                        print(f"✅ {aluno.get('nome', '')} transferido com sucesso")
-                    else:
-                        erros.append(f"• {aluno.get('nome', '')}: {resultado.get('error', 'Erro desconhecido')}")
-                        print(f"❌ Erro ao transferir {aluno.get('nome', '')}: {resultado.get('error', '')}")
-                    
-                    # Pequena pausa para não sobrecarregar o banco
-                    import time
-                    time.sleep(0.1)
-                        
-                except Exception as e:
-                    erros.append(f"• {aluno.get('nome', '')}: {str(e)}")
-                    print(f"❌ Exceção ao transferir {aluno.get('nome', '')}: {e}")
-            
-            # Mostrar resultado final
-            print(f"📊 Resultado: {sucessos} sucessos, {len(erros)} erros")
-            
-            if sucessos > 0:
-                mensagem_final = f"✅ {sucessos} aluno(s) transferido(s) com sucesso!"
-                if erros:
-                    mensagem_final += f"\n\n❌ Erros encontrados:\n" + "\n".join(erros)
-                
-                messagebox.showinfo("Transferência Concluída", mensagem_final)
-                
-                # Recarregar dados
-                print("🔄 Recarregando interface...")
-                self.carregar_turmas()
-                self.limpar_selecao()
-                
-                # Limpar turma origem para forçar nova seleção
-                self.turma_origem_var.set('')
-                self.alunos_turma_origem = []
-                
-                # Limpar lista de alunos
-                for widget in self.scrollable_alunos.winfo_children():
-                    widget.destroy()
-                self.checkboxes_alunos = []
-                
-                self.habilitar_controles(False)
-                self.atualizar_info("Transferência concluída!\nSelecione nova turma de origem")
-                
-                print("✅ Interface atualizada!")
-                
-            else:
-                messagebox.showerror("Erro na Transferência", 
-                    "❌ Nenhuma transferência foi concluída.\n\nErros encontrados:\n\n" + "\n".join(erros))
-                print("❌ Nenhuma transferência concluída")
+            # Lote inteiro numa transação, fora do thread do Tk
+            self.tarefas.executar(
+                self.transferencia_service.transferir_alunos_lote,
+                [aluno['id'] for aluno in alunos_selecionados],
+                turma_origem_id,
+                turma_destino_id,
+                motivo,
+                observacoes,
+                ao_concluir=self.concluir_transferencia,
+                ao_falhar=self.falha_transferencia,
+                ao_progresso=self.progresso_transferencia,
+                chave='transferencia'
+            )
                 
         except Exception as e:
-            print(f"❌ Erro crítico na transferência: {e}")
-            messagebox.showerror("Erro Crítico", f"Erro crítico durante a transferência:\n\n{str(e)}\n\nConsulte o console para mais detalhes.")
+            self.falha_transferencia(e)
+
+    def progresso_transferencia(self, feitos, total, mensagem):
+        """Mostra o andamento da transferência em lote"""
+        self.atualizar_info(f"🔄 {mensagem}\n{feitos}/{total} aluno(s)")
+
+    def concluir_transferencia(self, resultado):
+        """Mostra o resultado da transferência em lote e recarrega a tela"""
+        sucessos = len(resultado['transferidos'])
+        erros = [f"• {erro['nome'] or erro['aluno_id']}: {erro['error']}" for erro in resultado['erros']]
+        if resultado.get('error'):
+            erros.insert(0, f"• {resultado['error']}")
+        
+        # Mostrar resultado final
+        print(f"📊 Resultado: {sucessos} sucessos, {len(erros)} erros")
+        
+        if sucessos > 0:
+            mensagem_final = f"✅ {sucessos} aluno(s) transferido(s) com sucesso!"
+            if erros:
+                mensagem_final += f"\n\n❌ Erros encontrados:\n" + "\n".join(erros)
+            
+            messagebox.showinfo("Transferência Concluída", mensagem_final)
+            
+            # Recarregar dados
+            print("🔄 Recarregando interface...")
+            self.carregar_turmas()
+            self.limpar_selecao()
+            
+            # Limpar turma origem para forçar nova seleção
+            self.turma_origem_var.set('')
+            self.alunos_turma_origem = []
+            
+            # Limpar lista de alunos
+            for widget in self.scrollable_alunos.winfo_children():
+                widget.destroy()
+            self.checkboxes_alunos = []
+            
+            self.habilitar_controles(False)
+            self.atualizar_info("Transferência concluída!\nSelecione nova turma de origem")
+            
+            print("✅ Interface atualizada!")
+            
+        else:
+            self.atualizar_info("Nenhuma transferência concluída")
+            messagebox.showerror("Erro na Transferência", 
+                "❌ Nenhuma transferência foi concluída.\n\nErros encontrados:\n\n" + "\n".join(erros))
+            print("❌ Nenhuma transferência concluída")
+
+    def falha_transferencia(self, erro):
+        print(f"❌ Erro crítico na transferência: {erro}")
+        messagebox.showerror("Erro Crítico", f"Erro crítico durante a transferência:\n\n{str(erro)}\n\nConsulte o console para mais detalhes.")
 
 
     def transferir_aluno_simples(self, aluno_id, turma_origem_id, turma_destino_id, motivo, observacoes):
@@ -755,18 +788,24 @@ class TransferenciaInterface:
             return {'success': False, 'error': str(e)}
 
     def carregar_historico(self):
-        """Carrega histórico recente de transferências - CORRIGIDO"""
+        """Carrega histórico recente de transferências (em segundo plano)"""
+        # Usar o serviço corrigido
+        self.tarefas.executar(
+            self.transferencia_service.obter_historico_transferencias, 10,
+            ao_concluir=self.exibir_historico,
+            ao_falhar=self.erro_carregar_historico,
+            chave='historico'
+        )
+
+    def exibir_historico(self, historico):
+        """Preenche a lista com o histórico carregado"""
         try:
-            # Usar o serviço corrigido
-            historico = self.transferencia_service.obter_historico_transferencias(10)
-            
             # Limpar lista
             self.lista_historico.delete(0, tk.END)
             
             # Inserir histórico
             for item in historico:
                 try:
-                    from utils.formatters import format_date
                     data = format_date(item['data_transferencia']) if item['data_transferencia'] else "N/A"
                     texto = f"{data} - {item['aluno_nome']} ({item['turma_origem']} → {item['turma_destino']})"
                     self.lista_historico.insert(tk.END, texto)
@@ -776,10 +815,13 @@ class TransferenciaInterface:
                     self.lista_historico.insert(tk.END, texto)
             
         except Exception as e:
-            print(f"❌ Erro ao carregar histórico: {e}")
-            # Inserir mensagem de erro na lista
-            self.lista_historico.delete(0, tk.END)
-            self.lista_historico.insert(tk.END, "Erro ao carregar histórico")
+            self.erro_carregar_historico(e)
+
+    def erro_carregar_historico(self, erro):
+        print(f"❌ Erro ao carregar histórico: {erro}")
+        # Inserir mensagem de erro na lista
+        self.lista_historico.delete(0, tk.END)
+        self.lista_historico.insert(tk.END, "Erro ao carregar histórico")
 
     def habilitar_controles(self, habilitar):
         """Habilita/desabilita controles de transferência"""
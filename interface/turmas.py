@@ -1,6 +1,7 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 from services.turma_service import TurmaService
+from services.virada_ano_service import ViradaAnoService
 from datetime import datetime
 
 class TurmasInterface:
@@ -8,6 +9,7 @@ class TurmasInterface:
         self.parent_frame = parent_frame
         self.parent_frame.configure(bg='white')
         self.turma_service = TurmaService()
+        self.virada_service = ViradaAnoService()
         self.turma_editando = None
         self.create_interface()
         self.carregar_turmas()
@@ -229,6 +231,13 @@ class TurmasInterface:
         )
         atualizar_btn.pack(side=tk.LEFT)
         
+        virada_btn = tk.Button(
+            action_frame, text="🎓 Virada de Ano", command=self.virada_ano_letivo,
+            font=('Arial', 11, 'bold'), bg='#28a745',
+            fg='white', padx=20, pady=8, relief='flat', cursor='hand2'
+        )
+        virada_btn.pack(side=tk.RIGHT)
+        
         # Bind duplo clique
         self.tree.bind('<Double-1>', lambda e: self.editar_turma())
     
@@ -367,3 +376,57 @@ class TurmasInterface:
         except Exception as e:
             print(f"Erro ao carregar turmas: {e}")
             messagebox.showerror("Erro", f"Erro ao carregar turmas: {str(e)}")
+    
+    def virada_ano_letivo(self):
+        """Encerra o ano letivo: prévia, confirmação e execução em uma transação"""
+        anos = [int(self.tree.item(item)['values'][3]) for item in self.tree.get_children()
+                if str(self.tree.item(item)['values'][3]).isdigit()]
+        
+        ano_atual = simpledialog.askinteger(
+            "Virada de Ano Letivo", "Ano letivo a encerrar:",
+            initialvalue=max(anos) if anos else datetime.now().year,
+            parent=self.parent_frame
+        )
+        if not ano_atual:
+            return
+        
+        reajuste = simpledialog.askfloat(
+            "Virada de Ano Letivo", f"Reajuste das mensalidades para {ano_atual + 1} (%):",
+            initialvalue=0, minvalue=-100, parent=self.parent_frame
+        )
+        if reajuste is None:
+            return
+        
+        plano = self.virada_service.planejar_virada(ano_atual, reajuste)
+        if not plano['success']:
+            messagebox.showerror("Virada de Ano Letivo", plano['error'])
+            return
+        
+        linhas = [f"• {t['origem_nome']} → {t['destino_nome']}"
+                  f"{' (nova)' if t['destino_id'] is None else ''}: {len(t['aluno_ids'])} aluno(s)"
+                  for t in plano['promocoes']]
+        linhas += [f"• {t['origem_nome']}: {len(t['aluno_ids'])} concluinte(s), ficam inativos na turma"
+                   for t in plano['concluintes']]
+        
+        previa = (
+            f"📅 {plano['ano_atual']} → {plano['ano_novo']}\n\n"
+            + "\n".join(linhas[:15]) + ("\n• ..." if len(linhas) > 15 else "") + "\n\n"
+            f"🏫 Turmas novas: {len(plano['turmas_novas'])}\n"
+            f"👥 Alunos promovidos: {plano['total_promovidos']}\n"
+            f"💰 Mensalidades a gerar: até {plano['mensalidades_previstas']}\n"
+            f"📈 Reajuste: {plano['reajuste_percentual']:.1f}%\n\n"
+            "Confirmar a virada do ano letivo?"
+        )
+        if not messagebox.askyesno("Virada de Ano Letivo - Prévia", previa):
+            return
+        
+        resultado = self.virada_service.executar_virada(ano_atual, reajuste)
+        if resultado['success']:
+            messagebox.showinfo("Virada de Ano Letivo",
+                f"✅ Ano letivo {resultado['ano_novo']} aberto!\n\n"
+                f"• {resultado['turmas_criadas']} turma(s) criada(s)\n"
+                f"• {resultado['alunos_promovidos']} aluno(s) promovido(s)\n"
+                f"• {resultado['mensalidades_criadas']} mensalidade(s) gerada(s)")
+            self.carregar_turmas()
+        else:
+            messagebox.showerror("Virada de Ano Letivo", resultado['error'])
@@ -14,6 +14,7 @@ Todos os problemas foram identificados e corrigidos:
 
 import os
 import sys
+import importlib.util
 import tkinter as tk
 from tkinter import messagebox, ttk
 import sqlite3
@@ -57,11 +58,12 @@ def verificar_dependencias():
     
     faltando = []
     
+    # find_spec só localiza o pacote: importar o matplotlib aqui custaria
+    # centenas de ms na abertura, e ele só é usado nos gráficos do dashboard
     for nome, modulo in dependencias.items():
-        try:
-            __import__(modulo)
+        if importlib.util.find_spec(modulo) is not None:
             print(f"✅ {nome}: OK")
-        except ImportError:
+        else:
             faltando.append(nome)
             print(f"❌ {nome}: NÃO INSTALADO")
     
@@ -103,6 +105,11 @@ def inicializar_banco():
         
         conn.close()
         print("✅ Banco de dados OK")
+        
+        # Atualizar status de atraso das mensalidades (uma vez por dia)
+        from services.mensalidade_service import MensalidadeService
+        MensalidadeService().recalcular_status_se_necessario()
+        
         return True
         
     except Exception as e:
@@ -5,6 +5,7 @@ Ferramenta para gerenciar mensalidades
 
 from services.mensalidade_service import MensalidadeService
 from services.aluno_service import AlunoService
+from services.financeiro_service import FinanceiroService
 import sys
 
 def menu_principal():
@@ -21,7 +22,8 @@ def menu_principal():
         print("2. 🏫 Gerar mensalidades para todos os alunos")
         print("3. 🔄 Recalcular status das mensalidades")
         print("4. 👤 Listar mensalidades de um aluno")
-        print("5. 🚪 Sair")
+        print("5. 📊 Reconstruir resumos financeiros")
+        print("6. 🚪 Sair")
         print("-"*50)
         
         try:
@@ -36,6 +38,8 @@ def menu_principal():
             elif opcao == '4':
                 listar_mensalidades_aluno(mensalidade_service)
             elif opcao == '5':
+                reconstruir_resumos()
+            elif opcao == '6':
                 print("👋 Encerrando...")
                 break
             else:
@@ -115,6 +119,16 @@ def recalcular_status(mensalidade_service):
     else:
         print(f"❌ Erro: {resultado['error']}")
 
+def reconstruir_resumos():
+    """Recalcula as tabelas de resumo financeiro (normalmente mantidas por triggers)"""
+    print("📊 Reconstruindo resumos financeiros...")
+    resultado = FinanceiroService().reconstruir_resumos()
+    
+    if resultado['success']:
+        print(f"✅ Resumos de {resultado['alunos']} alunos reconstruídos!")
+    else:
+        print(f"❌ Erro: {resultado['error']}")
+
 def listar_mensalidades_aluno(mensalidade_service):
     """Lista mensalidades de um aluno"""
     try:
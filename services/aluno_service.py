@@ -33,107 +33,102 @@ class AlunoService:
         return turmas
     
     def salvar_aluno(self, aluno_data, responsaveis_data):
-        """Salva aluno e GERA MENSALIDADES AUTOMATICAMENTE"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        """Salva aluno, responsáveis e mensalidades numa única transação.
+
+        As mensalidades (geradas no cadastro ou reajustadas na edição) usam a
+        mesma conexão: ou tudo é gravado com um COMMIT, ou nada é gravado.
+        """
+        from services.mensalidade_service import MensalidadeService
+        mensalidade_service = MensalidadeService()
+        mensalidade_service.db = self.db
+        
+        is_edicao = 'id' in aluno_data
         
         try:
-            is_edicao = 'id' in aluno_data
-            
-            if is_edicao:
-                # === EDIÇÃO DE ALUNO EXISTENTE ===
-                print(f"✏️ Editando aluno ID: {aluno_data['id']}")
-                
-                # Buscar valor antigo para comparação
-                cursor.execute("SELECT valor_mensalidade FROM alunos WHERE id = ?", (aluno_data['id'],))
-                valor_antigo_row = cursor.fetchone()
-                valor_antigo = valor_antigo_row[0] if valor_antigo_row else 0
-                
-                # Atualizar aluno existente
-                cursor.execute("""
-                    UPDATE alunos 
-                    SET nome = ?, data_nascimento = ?, cpf = ?, sexo = ?, nacionalidade = ?, 
-                        telefone = ?, endereco = ?, turma_id = ?, status = ?, valor_mensalidade = ?
-                    WHERE id = ?
-                """, (
-                    aluno_data['nome'],
-                    aluno_data['data_nascimento'],
-                    aluno_data.get('cpf'),
-                    aluno_data.get('sexo'),
-                    aluno_data.get('nacionalidade'),
-                    aluno_data.get('telefone'),
-                    aluno_data.get('endereco'),
-                    aluno_data['turma_id'],
-                    aluno_data['status'],
-                    aluno_data['valor_mensalidade'],
-                    aluno_data['id']
-                ))
-                aluno_id = aluno_data['id']
+            with self.db.transacao() as conn:
+                cursor = conn.cursor()
                 
-                # Remover responsáveis antigos
-                cursor.execute("DELETE FROM responsaveis WHERE aluno_id = ?", (aluno_id,))
-                
-                # Se valor mudou, atualizar mensalidades pendentes
-                if abs(float(valor_antigo) - float(aluno_data['valor_mensalidade'])) > 0.01:
-                    print(f"💰 Valor mudou: R$ {valor_antigo:.2f} → R$ {aluno_data['valor_mensalidade']:.2f}")
-                    conn.commit()  # Commit das alterações do aluno primeiro
+                if is_edicao:
+                    # === EDIÇÃO DE ALUNO EXISTENTE ===
+                    print(f"✏️ Editando aluno ID: {aluno_data['id']}")
                     
-                    # Atualizar mensalidades pendentes
-                    from services.mensalidade_service import MensalidadeService
-                    mensalidade_service = MensalidadeService()
+                    # Buscar valor antigo para comparação
+                    cursor.execute("SELECT valor_mensalidade FROM alunos WHERE id = ?", (aluno_data['id'],))
+                    valor_antigo_row = cursor.fetchone()
+                    valor_antigo = valor_antigo_row[0] if valor_antigo_row else 0
                     
-                    resultado_atualizacao = mensalidade_service.atualizar_valores_mensalidades_pendentes(
-                        aluno_id, aluno_data['valor_mensalidade']
-                    )
+                    # Atualizar aluno existente
+                    cursor.execute("""
+                        UPDATE alunos 
+                        SET nome = ?, data_nascimento = ?, cpf = ?, sexo = ?, nacionalidade = ?, 
+                            telefone = ?, endereco = ?, turma_id = ?, status = ?, valor_mensalidade = ?
+                        WHERE id = ?
+                    """, (
+                        aluno_data['nome'],
+                        aluno_data['data_nascimento'],
+                        aluno_data.get('cpf'),
+                        aluno_data.get('sexo'),
+                        aluno_data.get('nacionalidade'),
+                        aluno_data.get('telefone'),
+                        aluno_data.get('endereco'),
+                        aluno_data['turma_id'],
+                        aluno_data['status'],
+                        aluno_data['valor_mensalidade'],
+                        aluno_data['id']
+                    ))
+                    aluno_id = aluno_data['id']
                     
-                    if resultado_atualizacao['success']:
-                        print(f"✅ {resultado_atualizacao['mensalidades_atualizadas']} mensalidades atualizadas")
-                    else:
-                        print(f"⚠️ Erro ao atualizar mensalidades: {resultado_atualizacao['error']}")
-                
-            else:
-                # === CRIAÇÃO DE NOVO ALUNO ===
-                print(f"👤 Criando novo aluno: {aluno_data['nome']}")
-                
-                # Criar novo aluno
-                cursor.execute("""
-                    INSERT INTO alunos (nome, data_nascimento, cpf, sexo, nacionalidade, telefone, 
-                                       endereco, turma_id, status, valor_mensalidade, data_matricula)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, date('now'))
-                """, (
-                    aluno_data['nome'],
-                    aluno_data['data_nascimento'],
-                    aluno_data.get('cpf'),
-                    aluno_data.get('sexo'),
-                    aluno_data.get('nacionalidade'),
-                    aluno_data.get('telefone'),
-                    aluno_data.get('endereco'),
-                    aluno_data['turma_id'],
-                    aluno_data['status'],
-                    aluno_data['valor_mensalidade']
-                ))
-                aluno_id = cursor.lastrowid
+                    # Remover responsáveis antigos
+                    cursor.execute("DELETE FROM responsaveis WHERE aluno_id = ?", (aluno_id,))
+                    
+                    # Se valor mudou, atualizar mensalidades pendentes (mesma transação)
+                    if abs(float(valor_antigo) - float(aluno_data['valor_mensalidade'])) > 0.01:
+                        print(f"💰 Valor mudou: R$ {valor_antigo:.2f} → R$ {aluno_data['valor_mensalidade']:.2f}")
+                        
+                        resultado_atualizacao = mensalidade_service.atualizar_valores_mensalidades_pendentes(
+                            aluno_id, aluno_data['valor_mensalidade']
+                        )
+                        
+                        if resultado_atualizacao['success']:
+                            print(f"✅ {resultado_atualizacao['mensalidades_atualizadas']} mensalidades atualizadas")
+                        else:
+                            print(f"⚠️ Erro ao atualizar mensalidades: {resultado_atualizacao['error']}")
+                    
+                else:
+                    # === CRIAÇÃO DE NOVO ALUNO ===
+                    print(f"👤 Criando novo aluno: {aluno_data['nome']}")
+                    
+                    # Criar novo aluno
+                    cursor.execute("""
+                        INSERT INTO alunos (nome, data_nascimento, cpf, sexo, nacionalidade, telefone, 
+                                           endereco, turma_id, status, valor_mensalidade, data_matricula)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, date('now'))
+                    """, (
+                        aluno_data['nome'],
+                        aluno_data['data_nascimento'],
+                        aluno_data.get('cpf'),
+                        aluno_data.get('sexo'),
+                        aluno_data.get('nacionalidade'),
+                        aluno_data.get('telefone'),
+                        aluno_data.get('endereco'),
+                        aluno_data['turma_id'],
+                        aluno_data['status'],
+                        aluno_data['valor_mensalidade']
+                    ))
+                    aluno_id = cursor.lastrowid
+                    
+                    print(f"✅ Aluno criado com ID: {aluno_id}")
                 
-                print(f"✅ Aluno criado com ID: {aluno_id}")
-            
-            # Salvar responsáveis
-            for i, resp in enumerate(responsaveis_data):
-                cursor.execute("""
+                # Salvar responsáveis
+                cursor.executemany("""
                     INSERT INTO responsaveis (aluno_id, nome, telefone, parentesco, principal)
                     VALUES (?, ?, ?, ?, ?)
-                """, (aluno_id, resp['nome'], resp['telefone'], resp['parentesco'], 
-                     1 if resp.get('principal', False) else 0))
-            
-            conn.commit()
-            conn.close()
-            
-            # === GERAR MENSALIDADES PARA NOVO ALUNO ===
-            if not is_edicao and aluno_data.get('status', '').lower() == 'ativo':
-                print(f"💰 Gerando mensalidades para novo aluno...")
+                """, [(aluno_id, resp['nome'], resp['telefone'], resp['parentesco'],
+                       1 if resp.get('principal', False) else 0) for resp in responsaveis_data])
                 
-                try:
-                    from services.mensalidade_service import MensalidadeService
-                    mensalidade_service = MensalidadeService()
+                # === GERAR MENSALIDADES PARA NOVO ALUNO (mesma transação) ===
+                if not is_edicao and aluno_data.get('status', '').lower() == 'ativo':
+                    print(f"💰 Gerando mensalidades para novo aluno...")
                     
                     resultado_mensalidades = mensalidade_service.gerar_mensalidades_aluno(aluno_id)
                     
@@ -141,12 +136,8 @@ class AlunoService:
                         mensalidades_criadas = resultado_mensalidades.get('mensalidades_criadas', 0)
                         print(f"🎉 {mensalidades_criadas} mensalidades criadas automaticamente!")
                     else:
+                        # Erro de banco aborta a transação; regra de negócio (ex.: valor zero) não
                         print(f"⚠️ Erro ao gerar mensalidades: {resultado_mensalidades.get('error', 'Erro desconhecido')}")
-                        
-                except ImportError:
-                    print("⚠️ Serviço de mensalidades não disponível")
-                except Exception as e:
-                    print(f"⚠️ Erro ao gerar mensalidades: {e}")
             
             acao = "atualizado" if is_edicao else "cadastrado"
             print(f"✅ Aluno {acao} com sucesso: {aluno_data['nome']}")
@@ -154,17 +145,13 @@ class AlunoService:
             return {'success': True, 'id': aluno_id}
             
         except sqlite3.Error as e:
-            conn.rollback()
-            conn.close()
             print(f"❌ Erro SQL ao salvar aluno: {e}")
             return {'success': False, 'error': str(e)}
         
         except Exception as e:
-            conn.rollback()
-            conn.close()
             print(f"❌ Erro geral ao salvar aluno: {e}")
             return {'success': False, 'error': str(e)}
-    
+
     def listar_alunos(self, turma_id=None):
         """Lista alunos simplificado"""
         conn = self.db.get_connection()
@@ -0,0 +1,144 @@
+"""
+Cache em processo das configurações (`configuracoes` e `config_financeiras`).
+
+Cada banco tem um snapshot com todas as chaves de `configuracoes` e a linha
+de `config_financeiras`, lidas juntas. Salvar pelas services descarta o
+snapshot na hora (write-through); escritas de outros processos são
+percebidas pelo contador de versoes_tabelas, consultado no máximo a cada
+INTERVALO_VERIFICACAO segundos. Configuração custa uma leitura por mudança,
+não uma por cálculo.
+"""
+
+import sqlite3
+import threading
+import time
+
+from database.connection import db, versao_tabelas
+
+TABELAS_CONFIGURACAO = ('configuracoes', 'config_financeiras')
+
+# Segundos entre consultas ao contador de versão (escritas de outros processos)
+INTERVALO_VERIFICACAO = 1.0
+
+VERDADEIROS = ('1', 'true', 'sim', 's', 'yes', 'on')
+
+
+class SnapshotConfiguracoes:
+    """Configurações lidas de uma vez, com a versão das tabelas no momento da leitura"""
+
+    def __init__(self, versao, valores, financeiro):
+        self.versao = versao
+        self.valores = valores
+        self.financeiro = financeiro
+        self.verificado_em = time.monotonic()
+        self._motor = None
+
+    def motor(self):
+        """MotorEncargos desta configuração (criado na primeira vez)"""
+        if self._motor is None:
+            from services.motor_encargos import MotorEncargos
+            self._motor = MotorEncargos(self.financeiro)
+        return self._motor
+
+
+class CacheConfiguracoes:
+    # Snapshot por arquivo de banco (compartilhado entre instâncias)
+    _snapshots = {}
+    _lock = threading.Lock()
+
+    def __init__(self, banco=None):
+        self.db = banco or db
+
+    def snapshot(self):
+        """Snapshot atual, relido só se alguma configuração mudou"""
+        chave = str(self.db.db_path)
+        with self._lock:
+            atual = self._snapshots.get(chave)
+        if atual and time.monotonic() - atual.verificado_em < INTERVALO_VERIFICACAO:
+            return atual
+
+        conn = self.db.get_connection()
+        # Dentro de db.transacao() (savepoint) a leitura já é de um instante só
+        propria = not conn.in_transaction
+        try:
+            if atual and atual.versao == versao_tabelas(conn, TABELAS_CONFIGURACAO):
+                atual.verificado_em = time.monotonic()
+                return atual
+
+            # Versão e valores do mesmo instante
+            if propria:
+                conn.execute("BEGIN")
+            versao = versao_tabelas(conn, TABELAS_CONFIGURACAO)
+            cursor = conn.cursor()
+            cursor.execute("SELECT chave, valor FROM configuracoes")
+            valores = dict(cursor.fetchall())
+            cursor.execute("""
+                SELECT desconto_pontualidade, dias_limite_desconto, multa_por_dia,
+                       dias_carencia_multa, id, descricao, updated_at
+                FROM config_financeiras ORDER BY id DESC LIMIT 1
+            """)
+            row = cursor.fetchone()
+            if propria:
+                conn.commit()
+        except sqlite3.Error as e:
+            if propria:
+                conn.rollback()
+            print(f"⚠️ Erro ao ler configurações: {e}")
+            versao, valores, row = -1, {}, None
+        finally:
+            conn.close()
+
+        financeiro = None
+        if row:
+            financeiro = {
+                'id': row[4],
+                'desconto_pontualidade': row[0],
+                'dias_limite_desconto': row[1],
+                'multa_por_dia': row[2],
+                'dias_carencia_multa': row[3],
+                'descricao': row[5],
+                'updated_at': row[6]
+            }
+
+        snapshot = SnapshotConfiguracoes(versao, valores, financeiro)
+        # Lido numa transação alheia: pode ter escritas que ainda serão desfeitas
+        if versao >= 0 and propria:
+            with self._lock:
+                self._snapshots[chave] = snapshot
+        return snapshot
+
+    def invalidar(self):
+        """Descarta o snapshot deste banco (chamado depois de salvar)"""
+        with self._lock:
+            self._snapshots.pop(str(self.db.db_path), None)
+
+    # === ACESSORES TIPADOS ===
+
+    def texto(self, chave, padrao=None):
+        valor = self.snapshot().valores.get(chave)
+        return padrao if valor is None else valor
+
+    def inteiro(self, chave, padrao=0):
+        valor = self.decimal(chave, None)
+        return padrao if valor is None else int(valor)
+
+    def decimal(self, chave, padrao=0.0):
+        try:
+            return float(str(self.snapshot().valores[chave]).replace(',', '.'))
+        except (KeyError, TypeError, ValueError):
+            return padrao
+
+    def booleano(self, chave, padrao=False):
+        valor = self.snapshot().valores.get(chave)
+        if valor is None:
+            return padrao
+        return str(valor).strip().lower() in VERDADEIROS
+
+    def financeiro(self):
+        """Linha de config_financeiras (cópia) ou None se não houver"""
+        financeiro = self.snapshot().financeiro
+        return dict(financeiro) if financeiro else None
+
+    def motor(self):
+        """MotorEncargos da configuração atual"""
+        return self.snapshot().motor()
@@ -1,30 +1,19 @@
 from database.connection import db
 import sqlite3
 from datetime import datetime, date, timedelta
+from services.cache_configuracoes import CacheConfiguracoes
+from services.motor_encargos import MotorEncargos, obter_motor
 
 class ConfigFinanceiraService:
     def __init__(self):
         self.db = db
     
     def obter_configuracoes(self):
-        """Obtém configurações financeiras"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM config_financeiras ORDER BY id DESC LIMIT 1")
-        row = cursor.fetchone()
-        conn.close()
+        """Obtém configurações financeiras (do cache; relidas só quando mudam)"""
+        config = CacheConfiguracoes(self.db).financeiro()
         
-        if row:
-            return {
-                'id': row[0],
-                'desconto_pontualidade': row[1],
-                'dias_limite_desconto': row[2],
-                'multa_por_dia': row[3],
-                'dias_carencia_multa': row[4],
-                'descricao': row[5],
-                'updated_at': row[6]
-            }
+        if config:
+            return config
         else:
             # Retornar valores padrão
             return {
@@ -59,6 +48,7 @@ class ConfigFinanceiraService:
             
             conn.commit()
             conn.close()
+            CacheConfiguracoes(self.db).invalidar()
             return {'success': True}
             
         except sqlite3.Error as e:
@@ -66,13 +56,8 @@ class ConfigFinanceiraService:
             return {'success': False, 'error': str(e)}
     
     def calcular_valor_com_ajustes(self, valor_original, data_vencimento, data_pagamento, pode_receber_multa=True):
-        """Calcula valor com desconto ou multa baseado nas datas"""
-        config = self.obter_configuracoes()
-        
-        # Valores base
-        valor_final = valor_original
-        desconto_aplicado = 0
-        multa_aplicada = 0
+        """Calcula valor com desconto ou multa baseado nas datas (MotorEncargos)"""
+        motor = obter_motor(self.db)
         
         if not data_pagamento:
             # Sem pagamento, retornar valor original
@@ -80,56 +65,14 @@ class ConfigFinanceiraService:
                 'valor_final': valor_original,
                 'desconto_aplicado': 0,
                 'multa_aplicada': 0,
-                'pode_ter_desconto': self._pode_ter_desconto(data_vencimento, date.today(), config),
+                'pode_ter_desconto': self._pode_ter_desconto(data_vencimento, date.today(), motor.config),
                 'dias_atraso': self._calcular_dias_atraso(data_vencimento, date.today()),
                 'observacao': 'Aguardando pagamento'
             }
         
         try:
-            # Converter datas
-            if isinstance(data_vencimento, str):
-                data_venc = datetime.strptime(data_vencimento, '%Y-%m-%d').date()
-            else:
-                data_venc = data_vencimento
-            
-            if isinstance(data_pagamento, str):
-                data_pag = datetime.strptime(data_pagamento, '%Y-%m-%d').date()
-            else:
-                data_pag = data_pagamento
-            
-            dias_diferenca = (data_pag - data_venc).days
-            
-            if dias_diferenca <= 0:
-                # Pagamento antecipado ou no vencimento
-                if abs(dias_diferenca) <= config['dias_limite_desconto']:
-                    # Aplicar desconto por pontualidade
-                    desconto_aplicado = config['desconto_pontualidade']
-                    valor_final = valor_original - desconto_aplicado
-                    observacao = f"Desconto por pontualidade aplicado (pago {abs(dias_diferenca)} dia(s) antes do vencimento)"
-                else:
-                    observacao = "Pago no vencimento"
-            else:
-                # Pagamento em atraso
-                if pode_receber_multa and dias_diferenca > config['dias_carencia_multa']:
-                    # Aplicar multa apenas após período de carência
-                    dias_multa = dias_diferenca - config['dias_carencia_multa']
-                    multa_aplicada = dias_multa * config['multa_por_dia']
-                    valor_final = valor_original + multa_aplicada
-                    observacao = f"Multa aplicada ({dias_multa} dias × R$ {config['multa_por_dia']:.2f})"
-                else:
-                    if not pode_receber_multa:
-                        observacao = f"Pago com {dias_diferenca} dias de atraso (sem multa - matrícula anterior)"
-                    else:
-                        observacao = f"Pago com {dias_diferenca} dias de atraso (dentro do período de carência)"
-            
-            return {
-                'valor_final': max(valor_final, 0),  # Nunca deixar valor negativo
-                'desconto_aplicado': desconto_aplicado,
-                'multa_aplicada': multa_aplicada,
-                'dias_diferenca': dias_diferenca,
-                'observacao': observacao
-            }
-            
+            return motor.calcular_um(valor_original, data_vencimento, data_pagamento, pode_receber_multa)
+        
         except Exception as e:
             return {
                 'valor_final': valor_original,
@@ -165,26 +108,32 @@ class ConfigFinanceiraService:
         except:
             return 0
     
-    def calcular_preview_valores(self, valor_original, data_vencimento):
-        """Calcula preview de valores para diferentes cenários"""
-        config = self.obter_configuracoes()
+    def calcular_preview_valores(self, valor_original, data_vencimento, config=None):
+        """Calcula preview de valores para diferentes cenários.
         
-        # Cenário 1: Pagamento antecipado (com desconto)
-        data_antecipada = datetime.strptime(data_vencimento, '%Y-%m-%d').date() - timedelta(days=config['dias_limite_desconto'])
-        cenario_desconto = self.calcular_valor_com_ajustes(valor_original, data_vencimento, data_antecipada.strftime('%Y-%m-%d'))
+        `config` permite simular valores ainda não salvos; sem ele usa a
+        configuração atual. Os três cenários saem de um único cálculo em lote.
+        """
+        motor = MotorEncargos(config) if config else obter_motor(self.db)
+        vencimento = datetime.strptime(data_vencimento, '%Y-%m-%d').date()
         
-        # Cenário 2: Pagamento no vencimento
-        cenario_normal = self.calcular_valor_com_ajustes(valor_original, data_vencimento, data_vencimento)
+        data_antecipada = vencimento - timedelta(days=motor.dias_limite_desconto)
+        data_inicio_multa = vencimento + timedelta(days=motor.dias_carencia_multa)
+        data_atrasada = data_inicio_multa + timedelta(days=10)
         
-        # Cenário 3: Pagamento com atraso (após carência)
-        data_atrasada = datetime.strptime(data_vencimento, '%Y-%m-%d').date() + timedelta(days=config['dias_carencia_multa'] + 10)
-        cenario_multa = self.calcular_valor_com_ajustes(valor_original, data_vencimento, data_atrasada.strftime('%Y-%m-%d'))
+        calculo = motor.calcular(valor_original, vencimento, [data_antecipada, vencimento, data_atrasada])
+        cenario_desconto, cenario_normal, cenario_multa = ({
+            'valor_final': float(calculo['valor_final'][i]),
+            'desconto_aplicado': float(calculo['desconto'][i]),
+            'multa_aplicada': float(calculo['multa'][i]),
+            'dias_diferenca': int(calculo['dias_diferenca'][i])
+        } for i in range(3))
         
         return {
-            'config': config,
+            'config': motor.config,
             'cenario_desconto': cenario_desconto,
             'cenario_normal': cenario_normal,
             'cenario_multa': cenario_multa,
             'data_limite_desconto': data_antecipada.strftime('%d/%m/%Y'),
-            'data_inicio_multa': (datetime.strptime(data_vencimento, '%Y-%m-%d').date() + timedelta(days=config['dias_carencia_multa'])).strftime('%d/%m/%Y')
+            'data_inicio_multa': data_inicio_multa.strftime('%d/%m/%Y')
         }
@@ -1,40 +1,32 @@
 from database.connection import db
+from services.cache_configuracoes import CacheConfiguracoes
 import sqlite3
 from datetime import datetime
 
 class ConfiguracaoService:
+    # A tabela configuracoes é criada pelas migrações (database/migrations.py)
     def __init__(self):
         self.db = db
-        self.init_config_table()
     
-    def init_config_table(self):
-        """Inicializa tabela de configurações"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS configuracoes (
-                id INTEGER PRIMARY KEY,
-                chave TEXT UNIQUE NOT NULL,
-                valor TEXT NOT NULL,
-                descricao TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+    @property
+    def cache(self):
+        return CacheConfiguracoes(self.db)
     
     def obter_configuracao(self, chave, valor_padrao=None):
-        """Obtém uma configuração"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT valor FROM configuracoes WHERE chave = ?", (chave,))
-        result = cursor.fetchone()
-        conn.close()
-        
-        return result[0] if result else valor_padrao
+        """Obtém uma configuração (texto, do cache)"""
+        return self.cache.texto(chave, valor_padrao)
+    
+    def obter_inteiro(self, chave, valor_padrao=0):
+        """Obtém uma configuração como inteiro"""
+        return self.cache.inteiro(chave, valor_padrao)
+    
+    def obter_decimal(self, chave, valor_padrao=0.0):
+        """Obtém uma configuração como número decimal (aceita vírgula)"""
+        return self.cache.decimal(chave, valor_padrao)
+    
+    def obter_booleano(self, chave, valor_padrao=False):
+        """Obtém uma configuração como booleano ('1', 'true', 'sim'...)"""
+        return self.cache.booleano(chave, valor_padrao)
     
     def salvar_configuracao(self, chave, valor, descricao=None):
         """Salva uma configuração"""
@@ -49,6 +41,7 @@ class ConfiguracaoService:
             
             conn.commit()
             conn.close()
+            self.cache.invalidar()
             return {'success': True}
         except sqlite3.Error as e:
             conn.close()
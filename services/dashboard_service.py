@@ -1,411 +1,296 @@
-from database.connection import db
+from database.connection import db, versao_tabelas
 import sqlite3
 from datetime import datetime, date, timedelta
-from utils.formatters import format_date
+from types import MappingProxyType
+from typing import NamedTuple
+from utils.formatters import format_date, month_ordinal_range, year_ordinal_range
 import calendar
 
-class DashboardService:
-    def __init__(self):
-        self.db = db
+# Tabelas lidas pelo dashboard: qualquer escrita nelas invalida o snapshot
+TABELAS_DASHBOARD = ('alunos', 'turmas', 'pagamentos')
 
-    def obter_estatisticas_gerais(self):
-        """Obtém estatísticas gerais para o dashboard"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+CORES_STATUS = {'Pagas': '#28a745', 'Atrasadas': '#dc3545', 'Pendentes': '#ffc107'}
 
-        try:
-            # Total de alunos ativos
-            cursor.execute("SELECT COUNT(*) FROM alunos WHERE status = 'Ativo'")
-            total_alunos = cursor.fetchone()[0] or 0
 
-            # Total de turmas
-            cursor.execute("SELECT COUNT(*) FROM turmas")
-            total_turmas = cursor.fetchone()[0] or 0
+class DashboardSnapshot(NamedTuple):
+    """Fotografia imutável de todos os cards e gráficos do dashboard"""
+    versao: int
+    data_referencia: date
+    gerado_em: datetime
+    estatisticas: MappingProxyType
+    resumos: MappingProxyType
+    status_mensalidades: MappingProxyType
+    receita_mensal: MappingProxyType
+    alunos_por_turma: MappingProxyType
+    inadimplencia: MappingProxyType
+    top_inadimplentes: MappingProxyType
+    resumo_financeiro: MappingProxyType
 
-            # Receita do mês atual
-            mes_atual = date.today().strftime('%Y-%m')
-            cursor.execute("""
-                SELECT COALESCE(SUM(valor_final), 0)
-                FROM pagamentos
-                WHERE status = 'Pago'
-                AND strftime('%Y-%m', data_pagamento) = ?
-            """, (mes_atual,))
-            receita_mes = cursor.fetchone()[0] or 0
 
-            # Mensalidades pendentes
-            cursor.execute("""
-                SELECT COUNT(*)
-                FROM pagamentos p
-                INNER JOIN alunos a ON p.aluno_id = a.id
-                WHERE p.status = 'Pendente'
-                AND a.status = 'Ativo'
-            """)
-            pendentes = cursor.fetchone()[0] or 0
+def _congelar(valor):
+    """Converte dicts/listas em MappingProxyType/tuplas (recursivamente)"""
+    if isinstance(valor, dict):
+        return MappingProxyType({chave: _congelar(v) for chave, v in valor.items()})
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    return valor
 
-            # Mensalidades atrasadas
-            cursor.execute("""
-                SELECT COUNT(*)
-                FROM pagamentos p
-                INNER JOIN alunos a ON p.aluno_id = a.id
-                WHERE (p.status = 'Atrasado' OR (p.status = 'Pendente' AND date(p.data_vencimento) < date('now')))
-                AND a.status = 'Ativo'
-            """)
-            atrasadas = cursor.fetchone()[0] or 0
 
-            conn.close()
+def _descongelar(valor):
+    """Cópia mutável de uma parte do snapshot (formato dos métodos antigos)"""
+    if isinstance(valor, MappingProxyType):
+        return {chave: _descongelar(v) for chave, v in valor.items()}
+    if isinstance(valor, tuple):
+        return [_descongelar(v) for v in valor]
+    return valor
 
-            return {
-                'total_alunos': total_alunos,
-                'total_turmas': total_turmas,
-                'receita_mes': receita_mes,
-                'pendentes': pendentes,
-                'atrasadas': atrasadas
-            }
 
-        except Exception as e:
-            conn.close()
-            print(f"Erro ao obter estatísticas: {e}")
-            return {
-                'total_alunos': 0,
-                'total_turmas': 0,
-                'receita_mes': 0,
-                'pendentes': 0,
-                'atrasadas': 0
-            }
+def _ultimos_meses(hoje, quantidade=6):
+    """(ano, mes) dos últimos meses, do mais antigo ao atual"""
+    meses = []
+    ano, mes = hoje.year, hoje.month
+    for _ in range(quantidade):
+        meses.append((ano, mes))
+        ano, mes = (ano - 1, 12) if mes == 1 else (ano, mes - 1)
+    return meses[::-1]
 
-    def obter_resumos(self):
-        """Obtém resumos adicionais"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
 
-        try:
-            # Turma com mais alunos
-            cursor.execute("""
-                SELECT t.nome, t.serie, COUNT(a.id) as total_alunos
-                FROM turmas t
-                LEFT JOIN alunos a ON t.id = a.turma_id AND a.status = 'Ativo'
-                GROUP BY t.id, t.nome, t.serie
-                ORDER BY total_alunos DESC
-                LIMIT 1
-            """)
-            turma_popular_row = cursor.fetchone()
-            turma_popular = f"{turma_popular_row[0]} - {turma_popular_row[1]} ({turma_popular_row[2]} alunos)" if turma_popular_row else "N/A"
+def _rotulo_mes(ano, mes):
+    return f"{calendar.month_name[mes][:3]}/{str(ano)[2:]}"
 
-            # Valor total em aberto
-            cursor.execute("""
-                SELECT COALESCE(SUM(p.valor_final), 0)
-                FROM pagamentos p
-                INNER JOIN alunos a ON p.aluno_id = a.id
-                WHERE p.status IN ('Pendente', 'Atrasado')
-                AND a.status = 'Ativo'
-            """)
-            valor_aberto = cursor.fetchone()[0] or 0
 
-            # Próximo vencimento
-            cursor.execute("""
-                SELECT MIN(p.data_vencimento)
-                FROM pagamentos p
-                INNER JOIN alunos a ON p.aluno_id = a.id
-                WHERE p.status = 'Pendente'
-                AND date(p.data_vencimento) >= date('now')
-                AND a.status = 'Ativo'
-            """)
-            proximo_venc_row = cursor.fetchone()
-            proximo_vencimento = format_date(proximo_venc_row[0]) if proximo_venc_row and proximo_venc_row[0] else "N/A"
-
-            # Meta mensal (valor estimado baseado nos alunos ativos)
-            cursor.execute("""
-                SELECT COALESCE(SUM(a.valor_mensalidade), 0)
-                FROM alunos a
-                WHERE a.status = 'Ativo'
-            """)
-            meta_mensal = cursor.fetchone()[0] or 0
-
-            conn.close()
-
-            return {
-                'turma_popular': turma_popular,
-                'valor_aberto': valor_aberto,
-                'proximo_vencimento': proximo_vencimento,
-                'meta_mensal': meta_mensal
-            }
+class DashboardService:
+    # Snapshot em cache por arquivo de banco (compartilhado entre instâncias)
+    _snapshots = {}
 
-        except Exception as e:
-            conn.close()
-            print(f"Erro ao obter resumos: {e}")
-            return {
-                'turma_popular': 'N/A',
-                'valor_aberto': 0,
-                'proximo_vencimento': 'N/A',
-                'meta_mensal': 0
-            }
+    def __init__(self):
+        self.db = db
 
-    def obter_dados_grafico_status_mensalidades(self):
-        """Dados para gráfico de pizza - Status das mensalidades"""
+    def snapshot(self):
+        """Retorna o snapshot do dashboard, recalculando só se os dados mudaram.
+
+        A checagem custa uma leitura de versoes_tabelas; o cálculo completo
+        são a leitura dos resumos por turma (mantidos por triggers) e uma
+        consulta indexada por data, numa única transação de leitura.
+        """
+        chave = str(self.db.db_path)
+        hoje = date.today()
+        atual = self._snapshots.get(chave)
+        
         conn = self.db.get_connection()
-        cursor = conn.cursor()
-
+        # Dentro de db.transacao() (savepoint) a leitura já é de um instante só
+        propria = not conn.in_transaction
+        
         try:
-            cursor.execute("""
-                SELECT 
-                    CASE 
-                        WHEN p.status = 'Pago' THEN 'Pagas'
-                        WHEN p.status = 'Atrasado' OR (p.status = 'Pendente' AND date(p.data_vencimento) < date('now')) THEN 'Atrasadas'
-                        ELSE 'Pendentes'
-                    END as status_categoria,
-                    COUNT(*) as quantidade
-                FROM pagamentos p
-                INNER JOIN alunos a ON p.aluno_id = a.id
-                WHERE a.status = 'Ativo'
-                GROUP BY status_categoria
-                ORDER BY quantidade DESC
-            """)
+            if atual and atual.data_referencia == hoje and \
+                    atual.versao == versao_tabelas(conn, TABELAS_DASHBOARD):
+                conn.close()
+                return atual
+            
+            # Leitura consistente: versão e agregados vêm do mesmo instante
+            if propria:
+                conn.execute("BEGIN")
+            versao = versao_tabelas(conn, TABELAS_DASHBOARD)
+            snapshot = self._calcular_snapshot(conn.cursor(), hoje, versao)
+            if propria:
+                conn.commit()
+            conn.close()
+            
+            # Lido numa transação alheia: pode ter escritas que ainda serão desfeitas
+            if propria:
+                self._snapshots[chave] = snapshot
+            return snapshot
             
-            dados = cursor.fetchall()
+        except sqlite3.Error as e:
+            if propria:
+                conn.rollback()
             conn.close()
+            print(f"Erro ao calcular snapshot do dashboard: {e}")
+            return self._calcular_snapshot(None, hoje, -1)
+
+    def invalidar_cache(self):
+        """Descarta o snapshot em cache deste banco"""
+        self._snapshots.pop(str(self.db.db_path), None)
+
+    def _calcular_snapshot(self, cursor, hoje, versao):
+        """Monta o snapshot a partir das consultas (cursor None = snapshot vazio)"""
+        meses = _ultimos_meses(hoje)
+        faixas = [month_ordinal_range(ano, mes) for ano, mes in meses]
+        turmas = self._agregar_turmas(cursor) if cursor else []
+        movimento = self._agregar_movimento(cursor, hoje, faixas) if cursor else {}
+        
+        def soma(campo):
+            return sum(t[campo] or 0 for t in turmas)
+        
+        total_alunos = soma('alunos')
+        receitas = movimento.get('receitas', [0] * len(meses))
+        proximo = movimento.get('proximo')
+        
+        # Turmas com alunos/inadimplentes (ordenação estável por quantidade)
+        por_alunos = sorted((t for t in turmas if t['alunos'] > 0),
+                            key=lambda t: t['alunos'], reverse=True)
+        por_inadimplentes = sorted((t for t in turmas if t['inadimplentes']),
+                                   key=lambda t: t['inadimplentes'], reverse=True)
+        
+        status = {
+            'Pagas': soma('pagas'),
+            'Atrasadas': soma('atrasadas'),
+            'Pendentes': soma('pendentes'),
+        }
+        status = sorted(((rotulo, qtd) for rotulo, qtd in status.items() if qtd),
+                        key=lambda item: item[1], reverse=True)
+        
+        com_valor = soma('com_valor')
+        popular = por_alunos[0] if por_alunos else None
+        
+        return DashboardSnapshot(
+            versao=versao,
+            data_referencia=hoje,
+            gerado_em=datetime.now(),
+            estatisticas=_congelar({
+                'total_alunos': total_alunos,
+                'total_turmas': len(turmas),
+                'receita_mes': receitas[-1],
+                'pendentes': soma('pendentes'),
+                'atrasadas': soma('atrasadas')
+            }),
+            resumos=_congelar({
+                'turma_popular': f"{popular['nome']} - {popular['serie']} ({popular['alunos']} alunos)"
+                                 if popular else "N/A",
+                'valor_aberto': soma('aberto'),
+                'proximo_vencimento': format_date(date.fromordinal(proximo).isoformat())
+                                      if proximo else "N/A",
+                'meta_mensal': soma('meta')
+            }),
+            status_mensalidades=_congelar({
+                'labels': [rotulo for rotulo, _ in status],
+                'valores': [qtd for _, qtd in status],
+                'cores': [CORES_STATUS[rotulo] for rotulo, _ in status]
+            }),
+            receita_mensal=_congelar({
+                'labels': [_rotulo_mes(ano, mes) for ano, mes in meses] if cursor else [],
+                'valores': receitas if cursor else [],
+                'cor': '#007bff'
+            }),
+            alunos_por_turma=_congelar({
+                'labels': [f"{t['nome']} - {t['serie']}" for t in por_alunos[:8]],
+                'valores': [t['alunos'] for t in por_alunos[:8]],
+                'cor': '#28a745'
+            }),
+            inadimplencia=_congelar({
+                'labels': [_rotulo_mes(ano, mes) for ano, mes in meses] if cursor else [],
+                'valores': movimento['inadimplentes_mes'] if cursor else [],
+                'cor': '#dc3545'
+            }),
+            top_inadimplentes=_congelar({
+                'labels': [f"{t['nome']} - {t['serie']}" for t in por_inadimplentes[:5]],
+                'valores': [t['inadimplentes'] for t in por_inadimplentes[:5]],
+                'cor': '#fd7e14'
+            }),
+            resumo_financeiro=_congelar({
+                'receita_ano': movimento.get('receita_ano', 0),
+                'total_inadimplentes': soma('inadimplentes'),
+                'valor_medio_mensalidade': (soma('meta') / com_valor)
+                                           if com_valor else 0
+            })
+        )
+
+    def _agregar_turmas(self, cursor):
+        """Consulta 1: contadores por turma, lidos de resumo_turmas (uma linha por turma)"""
+        cursor.execute("""
+            SELECT 
+                t.id, t.nome, t.serie,
+                COALESCE(r.alunos_ativos, 0),
+                COALESCE(r.meta_mensal, 0),
+                COALESCE(r.alunos_com_valor, 0),
+                COALESCE(r.pendentes, 0),
+                COALESCE(r.atrasadas, 0),
+                COALESCE(r.pagas, 0),
+                COALESCE(r.valor_pendente + r.valor_atrasado, 0),
+                COALESCE(r.inadimplentes, 0)
+            FROM turmas t
+            LEFT JOIN resumo_turmas r ON r.turma_id = t.id
+            ORDER BY t.id
+        """)
+        return [
+            {'id': row[0], 'nome': row[1], 'serie': row[2], 'alunos': row[3],
+             'meta': row[4], 'com_valor': row[5], 'pendentes': row[6],
+             'atrasadas': row[7], 'pagas': row[8], 'aberto': row[9], 'inadimplentes': row[10]}
+            for row in cursor.fetchall()
+        ]
+
+    def _agregar_movimento(self, cursor, hoje, faixas):
+        """Consulta 2: o que depende da data de hoje, cada parte por um índice de status"""
+        ano_inicio, ano_fim = year_ordinal_range(hoje.year)
+        n = len(faixas)
+        receita_meses = ",\n".join(
+            f"SUM(CASE WHEN p.pagamento_ordinal BETWEEN {inicio} AND {fim} THEN p.valor_final END)"
+            for inicio, fim in faixas)
+        # Inadimplente no mês = aluno ativo com mensalidade atrasada vencida até o fim do mês
+        inadimplentes_meses = ",\n".join(
+            f"COUNT(DISTINCT CASE WHEN p.vencimento_ordinal <= {fim} THEN p.aluno_id END)"
+            for _, fim in faixas)
+        
+        cursor.execute(f"""
+            SELECT receitas.*, inadimplentes.*, proximo.*
+            FROM (
+                SELECT 
+                    SUM(CASE WHEN p.pagamento_ordinal BETWEEN ? AND ? THEN p.valor_final END),
+                    {receita_meses}
+                FROM pagamentos p
+                WHERE p.status = 'Pago' AND p.pagamento_ordinal BETWEEN ? AND ?
+            ) AS receitas, (
+                SELECT {inadimplentes_meses}
+                FROM pagamentos p
+                INNER JOIN alunos a ON a.id = p.aluno_id AND a.status = 'Ativo'
+                WHERE p.status = 'Atrasado'
+            ) AS inadimplentes, (
+                SELECT MIN(p.vencimento_ordinal)
+                FROM pagamentos p
+                INNER JOIN alunos a ON a.id = p.aluno_id AND a.status = 'Ativo'
+                WHERE p.status = 'Pendente' AND p.vencimento_ordinal >= ?
+            ) AS proximo
+        """, (ano_inicio, ano_fim, min(ano_inicio, faixas[0][0]), max(ano_fim, faixas[-1][1]),
+              hoje.toordinal()))
+        
+        row = cursor.fetchone()
+        return {
+            'receita_ano': row[0] or 0,
+            'receitas': [valor or 0 for valor in row[1:1 + n]],
+            'inadimplentes_mes': list(row[1 + n:1 + 2 * n]),
+            'proximo': row[1 + 2 * n]
+        }
+
+    # === Acesso por parte (compatibilidade) ===
 
-            labels = [row[0] for row in dados]
-            valores = [row[1] for row in dados]
-            cores = ['#28a745', '#dc3545', '#ffc107']  # Verde, Vermelho, Amarelo
+    def obter_estatisticas_gerais(self):
+        """Obtém estatísticas gerais para o dashboard"""
+        return _descongelar(self.snapshot().estatisticas)
 
-            return {
-                'labels': labels,
-                'valores': valores,
-                'cores': cores[:len(labels)]
-            }
+    def obter_resumos(self):
+        """Obtém resumos adicionais"""
+        return _descongelar(self.snapshot().resumos)
 
-        except Exception as e:
-            conn.close()
-            print(f"Erro ao obter dados do gráfico de status: {e}")
-            return {'labels': [], 'valores': [], 'cores': []}
+    def obter_dados_grafico_status_mensalidades(self):
+        """Dados para gráfico de pizza - Status das mensalidades"""
+        return _descongelar(self.snapshot().status_mensalidades)
 
     def obter_dados_grafico_receita_mensal(self):
         """Dados para gráfico de barras - Receita mensal dos últimos 6 meses"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-
-        try:
-            # Obter últimos 6 meses
-            meses = []
-            data_atual = date.today()
-            
-            for i in range(5, -1, -1):  # 6 meses para trás
-                if data_atual.month - i <= 0:
-                    mes = data_atual.month - i + 12
-                    ano = data_atual.year - 1
-                else:
-                    mes = data_atual.month - i
-                    ano = data_atual.year
-                
-                meses.append(f"{ano}-{mes:02d}")
-
-            receitas = []
-            labels = []
-
-            for mes_ano in meses:
-                cursor.execute("""
-                    SELECT COALESCE(SUM(valor_final), 0)
-                    FROM pagamentos
-                    WHERE status = 'Pago'
-                    AND strftime('%Y-%m', data_pagamento) = ?
-                """, (mes_ano,))
-                
-                receita = cursor.fetchone()[0] or 0
-                receitas.append(receita)
-                
-                # Converter para nome do mês
-                ano, mes = mes_ano.split('-')
-                nome_mes = calendar.month_name[int(mes)][:3]  # Primeiras 3 letras
-                labels.append(f"{nome_mes}/{ano[2:]}")
-
-            conn.close()
-
-            return {
-                'labels': labels,
-                'valores': receitas,
-                'cor': '#007bff'
-            }
-
-        except Exception as e:
-            conn.close()
-            print(f"Erro ao obter dados de receita mensal: {e}")
-            return {'labels': [], 'valores': [], 'cor': '#007bff'}
+        return _descongelar(self.snapshot().receita_mensal)
 
     def obter_dados_grafico_alunos_por_turma(self):
         """Dados para gráfico de barras - Alunos por turma"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute("""
-                SELECT 
-                    t.nome || ' - ' || t.serie as turma_display,
-                    COUNT(a.id) as total_alunos
-                FROM turmas t
-                LEFT JOIN alunos a ON t.id = a.turma_id AND a.status = 'Ativo'
-                GROUP BY t.id, t.nome, t.serie
-                HAVING total_alunos > 0  -- Apenas turmas com alunos
-                ORDER BY total_alunos DESC
-                LIMIT 8  -- Top 8 turmas
-            """)
-            
-            dados = cursor.fetchall()
-            conn.close()
-
-            labels = [row[0] for row in dados]
-            valores = [row[1] for row in dados]
-
-            return {
-                'labels': labels,
-                'valores': valores,
-                'cor': '#28a745'
-            }
-
-        except Exception as e:
-            conn.close()
-            print(f"Erro ao obter dados de alunos por turma: {e}")
-            return {'labels': [], 'valores': [], 'cor': '#28a745'}
+        return _descongelar(self.snapshot().alunos_por_turma)
 
     def obter_dados_grafico_inadimplencia(self):
         """Dados para gráfico de linha - Evolução da inadimplência"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-
-        try:
-            # Últimos 6 meses de inadimplência
-            meses = []
-            data_atual = date.today()
-            
-            for i in range(5, -1, -1):  # 6 meses para trás
-                if data_atual.month - i <= 0:
-                    mes = data_atual.month - i + 12
-                    ano = data_atual.year - 1
-                else:
-                    mes = data_atual.month - i
-                    ano = data_atual.year
-                
-                meses.append(f"{ano}-{mes:02d}")
-
-            inadimplencia = []
-            labels = []
-
-            for mes_ano in meses:
-                # Contar mensalidades atrasadas neste mês
-                cursor.execute("""
-                    SELECT COUNT(DISTINCT p.aluno_id)
-                    FROM pagamentos p
-                    INNER JOIN alunos a ON p.aluno_id = a.id
-                    WHERE (p.status = 'Atrasado' OR (p.status = 'Pendente' AND date(p.data_vencimento) < date('now')))
-                    AND strftime('%Y-%m', p.data_vencimento) <= ?
-                    AND a.status = 'Ativo'
-                """, (mes_ano,))
-                
-                total_inadimplentes = cursor.fetchone()[0] or 0
-                inadimplencia.append(total_inadimplentes)
-                
-                # Converter para nome do mês
-                ano, mes = mes_ano.split('-')
-                nome_mes = calendar.month_name[int(mes)][:3]
-                labels.append(f"{nome_mes}/{ano[2:]}")
-
-            conn.close()
-
-            return {
-                'labels': labels,
-                'valores': inadimplencia,
-                'cor': '#dc3545'
-            }
-
-        except Exception as e:
-            conn.close()
-            print(f"Erro ao obter dados de inadimplência: {e}")
-            return {'labels': [], 'valores': [], 'cor': '#dc3545'}
+        return _descongelar(self.snapshot().inadimplencia)
 
     def obter_dados_grafico_top_inadimplentes(self):
         """Dados para gráfico de barras horizontais - Top 5 turmas com mais inadimplentes"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute("""
-                SELECT 
-                    t.nome || ' - ' || t.serie as turma_display,
-                    COUNT(DISTINCT p.aluno_id) as total_inadimplentes
-                FROM turmas t
-                INNER JOIN alunos a ON t.id = a.turma_id AND a.status = 'Ativo'
-                INNER JOIN pagamentos p ON a.id = p.aluno_id
-                WHERE (p.status = 'Atrasado' OR (p.status = 'Pendente' AND date(p.data_vencimento) < date('now')))
-                GROUP BY t.id, t.nome, t.serie
-                HAVING total_inadimplentes > 0
-                ORDER BY total_inadimplentes DESC
-                LIMIT 5
-            """)
-            
-            dados = cursor.fetchall()
-            conn.close()
-
-            labels = [row[0] for row in dados]
-            valores = [row[1] for row in dados]
-
-            return {
-                'labels': labels,
-                'valores': valores,
-                'cor': '#fd7e14'
-            }
-
-        except Exception as e:
-            conn.close()
-            print(f"Erro ao obter dados de top inadimplentes: {e}")
-            return {'labels': [], 'valores': [], 'cor': '#fd7e14'}
+        return _descongelar(self.snapshot().top_inadimplentes)
 
     def obter_resumo_financeiro_atual(self):
         """Resumo financeiro para exibição rápida"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-
-        try:
-            # Receita total do ano
-            ano_atual = date.today().year
-            cursor.execute("""
-                SELECT COALESCE(SUM(valor_final), 0)
-                FROM pagamentos
-                WHERE status = 'Pago'
-                AND strftime('%Y', data_pagamento) = ?
-            """, (str(ano_atual),))
-            receita_ano = cursor.fetchone()[0] or 0
-
-            # Total de alunos inadimplentes
-            cursor.execute("""
-                SELECT COUNT(DISTINCT p.aluno_id)
-                FROM pagamentos p
-                INNER JOIN alunos a ON p.aluno_id = a.id
-                WHERE (p.status = 'Atrasado' OR (p.status = 'Pendente' AND date(p.data_vencimento) < date('now')))
-                AND a.status = 'Ativo'
-            """)
-            total_inadimplentes = cursor.fetchone()[0] or 0
-
-            # Valor médio de mensalidade
-            cursor.execute("""
-                SELECT AVG(valor_mensalidade)
-                FROM alunos
-                WHERE status = 'Ativo'
-                AND valor_mensalidade > 0
-            """)
-            valor_medio = cursor.fetchone()[0] or 0
-
-            conn.close()
-
-            return {
-                'receita_ano': receita_ano,
-                'total_inadimplentes': total_inadimplentes,
-                'valor_medio_mensalidade': valor_medio
-            }
-
-        except Exception as e:
-            conn.close()
-            print(f"Erro ao obter resumo financeiro: {e}")
-            return {
-                'receita_ano': 0,
-                'total_inadimplentes': 0,
-                'valor_medio_mensalidade': 0
-            }
\ No newline at end of file
+        return _descongelar(self.snapshot().resumo_financeiro)
@@ -1,36 +1,80 @@
 import csv
 from datetime import datetime
+from database.connection import db
+from services.financeiro_service import FinanceiroService
 from utils.formatters import format_currency, format_date
 
 class ExportService:
+    # Linhas lidas do cursor por vez e buffer do arquivo na exportação direta
+    TAMANHO_LOTE = 5000
+    BUFFER_ARQUIVO = 1024 * 1024
+
+    CABECALHO_MENSALIDADES = [
+        'ID', 'Aluno', 'Turma', 'Mes_Ano', 'Valor_Original',
+        'Desconto', 'Multa', 'Valor_Final', 'Data_Vencimento',
+        'Data_Pagamento', 'Status', 'Responsavel', 'Telefone', 'Observacoes'
+    ]
+
+    # Mesma ordem dos índices percorridos (alunos por status/turma e
+    # idx_pagamentos_aluno_vencimento): as linhas saem enquanto são lidas
+    ORDEM_EXPORTAR_MENSALIDADES = " ORDER BY a.turma_id, a.id, p.data_vencimento"
+
+    # Mesmas colunas do cabeçalho, já formatadas no SQL; o responsável é o
+    # principal do aluno (ou o primeiro cadastrado). O CROSS JOIN fixa os
+    # alunos no laço externo: sem ele, um filtro por status ou mês faz o
+    # SQLite partir de pagamentos e ordenar tudo numa TEMP B-TREE
+    SQL_EXPORTAR_MENSALIDADES = """
+        SELECT
+            p.id,
+            a.nome,
+            t.nome || ' - ' || t.serie,
+            p.mes_referencia,
+            p.valor_original,
+            COALESCE(p.desconto_aplicado, 0),
+            COALESCE(p.multa_aplicada, 0),
+            p.valor_final,
+            COALESCE(strftime('%d/%m/%Y', p.data_vencimento), p.data_vencimento),
+            COALESCE(strftime('%d/%m/%Y', p.data_pagamento), p.data_pagamento, ''),
+            p.status,
+            COALESCE(r.nome, ''),
+            COALESCE(r.telefone, ''),
+            COALESCE(p.observacoes, '')
+        FROM alunos a
+        CROSS JOIN pagamentos p ON p.aluno_id = a.id
+        INNER JOIN turmas t ON a.turma_id = t.id
+        LEFT JOIN responsaveis r ON r.id = (
+            SELECT r2.id FROM responsaveis r2
+            WHERE r2.aluno_id = a.id
+            ORDER BY r2.principal DESC, r2.id
+            LIMIT 1
+        )
+    """
+
     def __init__(self):
-        pass
-    
+        self.db = db
+
     def exportar_mensalidades_csv(self, mensalidades, filename="mensalidades.csv"):
         """Exporta mensalidades para CSV"""
         try:
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = [
-                    'ID', 'Aluno', 'Turma', 'Mes_Ano', 'Valor_Original', 
-                    'Desconto', 'Multa', 'Valor_Final', 'Data_Vencimento', 
-                    'Data_Pagamento', 'Status', 'Responsavel', 'Telefone', 'Observacoes'
-                ]
+                fieldnames = self.CABECALHO_MENSALIDADES
                 
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                 writer.writeheader()
                 
                 for m in mensalidades:
+                    data_pagamento = m.get('data_pagamento')
                     writer.writerow({
                         'ID': m.get('id', ''),
                         'Aluno': m.get('aluno_nome', ''),
-                        'Turma': f"{m.get('turma_nome', '')} - {m.get('turma_serie', '')}",
+                        'Turma': m.get('turma_nome', ''),
                         'Mes_Ano': m.get('mes_referencia', ''),
                         'Valor_Original': m.get('valor_original', 0),
                         'Desconto': m.get('desconto_aplicado', 0),
                         'Multa': m.get('multa_aplicada', 0),
                         'Valor_Final': m.get('valor_final', 0),
                         'Data_Vencimento': format_date(m.get('data_vencimento', '')),
-                        'Data_Pagamento': format_date(m.get('data_pagamento', '')) if m.get('data_pagamento') else '',
+                        'Data_Pagamento': format_date(data_pagamento) if data_pagamento else '',
                         'Status': m.get('status', ''),
                         'Responsavel': m.get('responsavel_nome', ''),
                         'Telefone': m.get('responsavel_telefone', ''),
@@ -38,6 +82,51 @@ class ExportService:
                     })
             
             return {'success': True, 'filename': filename}
+        
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def exportar_mensalidades_banco_csv(self, filename="mensalidades.csv", filtros=None, progresso=None):
+        """Exporta mensalidades direto do cursor, com memória constante.
+        
+        Aceita os mesmos filtros da grade (FinanceiroService). As linhas são
+        lidas com fetchmany em lotes de TAMANHO_LOTE, com responsável e datas
+        resolvidos no SQL, e gravadas por um arquivo com buffer; nenhum
+        momento guarda o resultado inteiro. `progresso(linhas)` é chamado a
+        cada lote.
+        """
+        where, params = FinanceiroService()._montar_filtros_mensalidades(filtros)
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        total = 0
+        
+        try:
+            # Nenhum filtro exige ordenar: as linhas saem enquanto são lidas
+            cursor.execute(
+                self.SQL_EXPORTAR_MENSALIDADES + f" WHERE {where}" + self.ORDEM_EXPORTAR_MENSALIDADES,
+                params
+            )
+            
+            with open(filename, 'w', newline='', encoding='utf-8',
+                      buffering=self.BUFFER_ARQUIVO) as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(self.CABECALHO_MENSALIDADES)
+                
+                while True:
+                    linhas = cursor.fetchmany(self.TAMANHO_LOTE)
+                    if not linhas:
+                        break
+                    writer.writerows(linhas)
+                    total += len(linhas)
+                    if progresso:
+                        progresso(total)
             
+            conn.close()
+            print(f"✅ {total} mensalidades exportadas para {filename}")
+            return {'success': True, 'filename': filename, 'linhas': total}
+        
         except Exception as e:
+            conn.close()
+            print(f"❌ Erro ao exportar mensalidades: {e}")
             return {'success': False, 'error': str(e)}
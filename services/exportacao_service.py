@@ -1,15 +1,25 @@
 from database.connection import db
 import sqlite3
-import pandas as pd
-from datetime import datetime
+from datetime import datetime, date
 import os
 from utils.formatters import format_currency, format_date
 
+# Tentar importar openpyxl para planilhas (modo write-only, sem pandas)
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+    print("Aviso: openpyxl não está disponível. Para gerar planilhas, instale com: pip install openpyxl")
+
 # Tentar importar reportlab para PDFs
 try:
     from reportlab.lib import colors
     from reportlab.lib.pagesizes import letter, A4
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.units import inch
     REPORTLAB_AVAILABLE = True
@@ -18,11 +28,114 @@ except ImportError:
     print("Aviso: ReportLab não está disponível. Para gerar PDFs, instale com: pip install reportlab")
 
 class ExportacaoService:
+    # Planilhas: linhas lidas do cursor por vez, linhas usadas para estimar
+    # a largura das colunas e largura máxima
+    LOTE_PLANILHA = 2000
+    AMOSTRA_LARGURA = 200
+    LARGURA_MAXIMA = 50
+    
+    # PDF de inadimplência: linhas por tabela (cerca de uma página A4).
+    # Tabelas pequenas em sequência evitam que o ReportLab meça e divida uma
+    # tabela única com todos os alunos a cada quebra de página
+    LINHAS_POR_TABELA = 25
+    
+    CABECALHO_INADIMPLENCIA = ['Aluno', 'Turma', 'Mens.\nAtrasadas', 'Valor\nDevido',
+                               'Primeira\nPendência', 'Responsável', 'Telefone']
+    
+    # Alunos ativos com mensalidade em aberto vencida antes de :hoje (ordinal)
+    FILTRO_INADIMPLENCIA = """
+        p.status IN ('Atrasado', 'Pendente')
+        AND p.vencimento_ordinal < :hoje
+        AND a.status = 'Ativo'
+    """
+    
+    # Responsável principal do aluno (ou o primeiro cadastrado)
+    SQL_INADIMPLENTES = f"""
+        SELECT 
+            a.nome as aluno_nome, 
+            t.nome as turma_nome,
+            t.serie,
+            COUNT(p.id) as mensalidades_atrasadas,
+            SUM(p.valor_final) as valor_total_devido,
+            MIN(p.data_vencimento) as primeira_pendencia,
+            r.nome as responsavel_nome, 
+            r.telefone as responsavel_telefone
+        FROM alunos a
+        INNER JOIN turmas t ON a.turma_id = t.id
+        INNER JOIN pagamentos p ON a.id = p.aluno_id
+        LEFT JOIN responsaveis r ON r.id = (
+            SELECT r2.id FROM responsaveis r2
+            WHERE r2.aluno_id = a.id
+            ORDER BY r2.principal DESC, r2.id
+            LIMIT 1
+        )
+        WHERE {FILTRO_INADIMPLENCIA}
+        GROUP BY a.id
+        ORDER BY primeira_pendencia ASC, valor_total_devido DESC
+    """
+    
     def __init__(self):
         self.db = db
         # Criar pasta de exportações
         os.makedirs("exportacoes", exist_ok=True)
     
+    def _nova_planilha(self):
+        """Workbook em modo write-only (linhas vão direto para o arquivo)"""
+        if not OPENPYXL_AVAILABLE:
+            raise RuntimeError('openpyxl não está disponível. Instale com: pip install openpyxl')
+        return Workbook(write_only=True)
+    
+    def _escrever_aba(self, workbook, nome_aba, cursor, sql, params=()):
+        """Executa a consulta e grava o resultado numa aba, em lotes.
+        
+        O modo write-only exige as larguras antes da primeira linha: elas são
+        estimadas pelo cabeçalho e pelas primeiras AMOSTRA_LARGURA linhas.
+        Retorna o número de linhas gravadas.
+        """
+        cursor.execute(sql, params)
+        cabecalho = [coluna[0] for coluna in cursor.description]
+        amostra = cursor.fetchmany(max(self.AMOSTRA_LARGURA, 1))
+        
+        aba = workbook.create_sheet(nome_aba)
+        for indice, titulo in enumerate(cabecalho):
+            largura = max([len(str(titulo))] + [len(str(linha[indice])) for linha in amostra
+                                                if linha[indice] is not None])
+            aba.column_dimensions[get_column_letter(indice + 1)].width = min(largura + 2, self.LARGURA_MAXIMA)
+        aba.freeze_panes = 'A2'
+        
+        negrito = Font(bold=True)
+        celulas = []
+        for titulo in cabecalho:
+            celula = WriteOnlyCell(aba, value=titulo)
+            celula.font = negrito
+            celulas.append(celula)
+        aba.append(celulas)
+        
+        total = 0
+        linhas = amostra
+        while linhas:
+            for linha in linhas:
+                aba.append(linha)
+            total += len(linhas)
+            linhas = cursor.fetchmany(self.LOTE_PLANILHA)
+        
+        return total
+    
+    def _exportar_planilha(self, arquivo, abas):
+        """Grava `abas` [(nome, sql, params)] num .xlsx; retorna linhas por aba"""
+        workbook = self._nova_planilha()
+        conn = self.db.get_connection()
+        
+        try:
+            cursor = conn.cursor()
+            registros = {nome: self._escrever_aba(workbook, nome, cursor, sql, params)
+                         for nome, sql, params in abas}
+        finally:
+            conn.close()
+        
+        workbook.save(arquivo)
+        return registros
+    
     def exportar_turmas_excel(self, arquivo=None):
         """Exporta dados das turmas para Excel"""
         try:
@@ -30,48 +143,25 @@ class ExportacaoService:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 arquivo = os.path.join("exportacoes", f"turmas_{timestamp}.xlsx")
             
-            # Buscar dados das turmas
-            conn = self.db.get_connection()
+            # Valores financeiros ficam nos alunos: a turma mostra a média
             query = """
                 SELECT 
                     t.id as ID,
                     t.nome as "Nome da Turma",
                     t.serie as "Série",
                     t.ano_letivo as "Ano Letivo",
-                    t.valor_mensalidade as "Valor Mensalidade",
-                    t.dia_vencimento as "Dia Vencimento",
-                    t.dia_limite_desconto as "Dia Limite Desconto",
-                    t.percentual_desconto as "% Desconto",
-                    t.percentual_multa as "% Multa",
+                    ROUND(AVG(a.valor_mensalidade), 2) as "Mensalidade Média",
                     COUNT(a.id) as "Total Alunos",
-                    t.created_at as "Data Criação"
+                    strftime('%d/%m/%Y %H:%M', t.created_at) as "Data Criação"
                 FROM turmas t
                 LEFT JOIN alunos a ON t.id = a.turma_id AND a.status = 'Ativo'
                 GROUP BY t.id
                 ORDER BY t.nome
             """
             
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            registros = self._exportar_planilha(arquivo, [('Turmas', query, ())])
             
-            # Formatar dados
-            if not df.empty:
-                df['Valor Mensalidade'] = df['Valor Mensalidade'].apply(
-                    lambda x: f"R$ {x:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                )
-                df['Data Criação'] = pd.to_datetime(df['Data Criação']).dt.strftime('%d/%m/%Y %H:%M')
-            
-            # Exportar para Excel
-            with pd.ExcelWriter(arquivo, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Turmas', index=False)
-                
-                # Ajustar larguras das colunas
-                worksheet = writer.sheets['Turmas']
-                for idx, col in enumerate(df.columns):
-                    max_length = max(len(str(col)), df[col].astype(str).str.len().max() if not df.empty else 10)
-                    worksheet.column_dimensions[chr(65 + idx)].width = min(max_length + 2, 50)
-            
-            return {'success': True, 'arquivo': arquivo, 'registros': len(df)}
+            return {'success': True, 'arquivo': arquivo, 'registros': registros['Turmas']}
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -83,67 +173,46 @@ class ExportacaoService:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 arquivo = os.path.join("exportacoes", f"alunos_{timestamp}.xlsx")
             
-            conn = self.db.get_connection()
-            
             # Query principal dos alunos
             query_alunos = """
                 SELECT 
                     a.id as ID,
                     a.nome as "Nome do Aluno",
-                    a.data_nascimento as "Data Nascimento",
+                    strftime('%d/%m/%Y', a.data_nascimento) as "Data Nascimento",
                     CAST((julianday('now') - julianday(a.data_nascimento)) / 365.25 AS INTEGER) as Idade,
                     a.sexo as Sexo,
                     a.endereco as "Endereço", 
                     a.telefone as Telefone,
                     a.nacionalidade as Nacionalidade,
-                    a.possui_alergia as "Possui Alergia",
-                    a.detalhes_alergia as "Detalhes Alergia",
                     t.nome as Turma,
                     t.serie as "Série",
+                    a.valor_mensalidade as "Mensalidade",
                     a.status as Status,
-                    a.created_at as "Data Cadastro"
+                    strftime('%d/%m/%Y %H:%M', a.created_at) as "Data Cadastro"
                 FROM alunos a
                 INNER JOIN turmas t ON a.turma_id = t.id
                 ORDER BY a.nome
             """
             
-            df_alunos = pd.read_sql_query(query_alunos, conn)
-            
             # Query dos responsáveis
             query_responsaveis = """
                 SELECT 
                     a.nome as "Nome do Aluno",
-                    rf.nome as "Nome Responsável",
-                    rf.telefone as "Telefone Responsável",
-                    rf.parentesco as Parentesco,
-                    CASE WHEN rf.principal = 1 THEN 'Sim' ELSE 'Não' END as Principal
+                    r.nome as "Nome Responsável",
+                    r.telefone as "Telefone Responsável",
+                    r.parentesco as Parentesco,
+                    CASE WHEN r.principal = 1 THEN 'Sim' ELSE 'Não' END as Principal
                 FROM alunos a
-                INNER JOIN responsaveis_financeiros rf ON a.id = rf.aluno_id
-                ORDER BY a.nome, rf.principal DESC
+                INNER JOIN responsaveis r ON a.id = r.aluno_id
+                ORDER BY a.nome, r.principal DESC
             """
             
-            df_responsaveis = pd.read_sql_query(query_responsaveis, conn)
-            conn.close()
+            registros = self._exportar_planilha(arquivo, [
+                ('Alunos', query_alunos, ()),
+                ('Responsáveis', query_responsaveis, ()),
+            ])
             
-            # Formatar dados dos alunos
-            if not df_alunos.empty:
-                df_alunos['Data Nascimento'] = pd.to_datetime(df_alunos['Data Nascimento']).dt.strftime('%d/%m/%Y')
-                df_alunos['Data Cadastro'] = pd.to_datetime(df_alunos['Data Cadastro']).dt.strftime('%d/%m/%Y %H:%M')
-            
-            # Exportar para Excel com múltiplas abas
-            with pd.ExcelWriter(arquivo, engine='openpyxl') as writer:
-                df_alunos.to_excel(writer, sheet_name='Alunos', index=False)
-                df_responsaveis.to_excel(writer, sheet_name='Responsáveis', index=False)
-                
-                # Ajustar larguras
-                for sheet_name, df in [('Alunos', df_alunos), ('Responsáveis', df_responsaveis)]:
-                    if not df.empty:
-                        worksheet = writer.sheets[sheet_name]
-                        for idx, col in enumerate(df.columns):
-                            max_length = max(len(str(col)), df[col].astype(str).str.len().max())
-                            worksheet.column_dimensions[chr(65 + idx)].width = min(max_length + 2, 50)
-            
-            return {'success': True, 'arquivo': arquivo, 'registros': len(df_alunos)}
+            return {'success': True, 'arquivo': arquivo, 'registros': registros['Alunos']}
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -155,9 +224,7 @@ class ExportacaoService:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 arquivo = os.path.join("exportacoes", f"financeiro_{timestamp}.xlsx")
             
-            conn = self.db.get_connection()
-            
-            # Query base
+            # Valores ficam numéricos na planilha (somáveis); datas em DD/MM/AAAA
             sql = """
                 SELECT 
                     p.id as ID,
@@ -166,11 +233,11 @@ class ExportacaoService:
                     t.serie as "Série",
                     p.mes_referencia as "Mês/Ano",
                     p.valor_original as "Valor Original",
-                    p.desconto_aplicado as Desconto,
-                    p.multa_aplicada as Multa,
+                    COALESCE(p.desconto_aplicado, 0) as Desconto,
+                    COALESCE(p.multa_aplicada, 0) as Multa,
                     p.valor_final as "Valor Final",
-                    p.data_vencimento as Vencimento,
-                    p.data_pagamento as Pagamento,
+                    strftime('%d/%m/%Y', p.data_vencimento) as Vencimento,
+                    COALESCE(strftime('%d/%m/%Y', p.data_pagamento), '-') as Pagamento,
                     p.status as Status,
                     p.observacoes as "Observações"
                 FROM pagamentos p
@@ -179,89 +246,71 @@ class ExportacaoService:
                 WHERE 1=1
             """
             
-            params = []
-            
-            # Aplicar filtros se fornecidos
-            if filtros:
-                if filtros.get('status') and filtros['status'] != 'Todos':
-                    sql += " AND p.status = ?"
-                    params.append(filtros['status'])
-                
-                if filtros.get('turma_id') and filtros['turma_id'] != 'Todas':
-                    sql += " AND t.id = ?"
-                    params.append(filtros['turma_id'])
-                
-                if filtros.get('mes_ano'):
-                    sql += " AND p.mes_referencia = ?"
-                    params.append(filtros['mes_ano'])
-            
-            sql += " ORDER BY p.data_vencimento DESC, a.nome"
-            
-            df_pagamentos = pd.read_sql_query(sql, conn, params=params)
-            
             # Query de resumo
             resumo_sql = """
                 SELECT 
                     COUNT(*) as "Total Mensalidades",
-                    SUM(CASE WHEN status = 'Pago' THEN 1 ELSE 0 END) as "Pagas",
-                    SUM(CASE WHEN status = 'Pendente' THEN 1 ELSE 0 END) as "Pendentes", 
-                    SUM(CASE WHEN status = 'Atrasado' THEN 1 ELSE 0 END) as "Atrasadas",
-                    SUM(CASE WHEN status = 'Pago' THEN valor_final ELSE 0 END) as "Total Recebido",
-                    SUM(CASE WHEN status != 'Pago' THEN valor_final ELSE 0 END) as "Total Pendente"
+                    SUM(CASE WHEN p.status = 'Pago' THEN 1 ELSE 0 END) as "Pagas",
+                    SUM(CASE WHEN p.status = 'Pendente' THEN 1 ELSE 0 END) as "Pendentes", 
+                    SUM(CASE WHEN p.status = 'Atrasado' THEN 1 ELSE 0 END) as "Atrasadas",
+                    SUM(CASE WHEN p.status = 'Pago' THEN p.valor_final ELSE 0 END) as "Total Recebido",
+                    SUM(CASE WHEN p.status != 'Pago' THEN p.valor_final ELSE 0 END) as "Total Pendente"
                 FROM pagamentos p
                 INNER JOIN alunos a ON p.aluno_id = a.id
                 INNER JOIN turmas t ON a.turma_id = t.id
                 WHERE 1=1
             """
             
+            condicoes = ""
+            params = []
+            
+            # Aplicar filtros se fornecidos
             if filtros:
                 if filtros.get('status') and filtros['status'] != 'Todos':
-                    resumo_sql += " AND p.status = ?"
+                    condicoes += " AND p.status = ?"
+                    params.append(filtros['status'])
+                
                 if filtros.get('turma_id') and filtros['turma_id'] != 'Todas':
-                    resumo_sql += " AND t.id = ?"
+                    condicoes += " AND t.id = ?"
+                    params.append(filtros['turma_id'])
+                
                 if filtros.get('mes_ano'):
-                    resumo_sql += " AND p.mes_referencia = ?"
-            
-            df_resumo = pd.read_sql_query(resumo_sql, conn, params=params)
-            conn.close()
+                    condicoes += " AND p.mes_referencia = ?"
+                    params.append(filtros['mes_ano'])
             
-            # Formatar dados
-            if not df_pagamentos.empty:
-                for col in ['Valor Original', 'Desconto', 'Multa', 'Valor Final']:
-                    df_pagamentos[col] = df_pagamentos[col].apply(
-                        lambda x: f"R$ {x:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                    )
-                
-                df_pagamentos['Vencimento'] = pd.to_datetime(df_pagamentos['Vencimento']).dt.strftime('%d/%m/%Y')
-                df_pagamentos['Pagamento'] = pd.to_datetime(df_pagamentos['Pagamento'], errors='coerce').dt.strftime('%d/%m/%Y')
-                df_pagamentos['Pagamento'] = df_pagamentos['Pagamento'].fillna('-')
-            
-            if not df_resumo.empty:
-                for col in ['Total Recebido', 'Total Pendente']:
-                    df_resumo[col] = df_resumo[col].apply(
-                        lambda x: f"R$ {x:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                    )
-            
-            # Exportar para Excel
-            with pd.ExcelWriter(arquivo, engine='openpyxl') as writer:
-                df_pagamentos.to_excel(writer, sheet_name='Mensalidades', index=False)
-                df_resumo.to_excel(writer, sheet_name='Resumo', index=False)
-                
-                # Ajustar larguras
-                for sheet_name, df in [('Mensalidades', df_pagamentos), ('Resumo', df_resumo)]:
-                    if not df.empty:
-                        worksheet = writer.sheets[sheet_name]
-                        for idx, col in enumerate(df.columns):
-                            max_length = max(len(str(col)), df[col].astype(str).str.len().max())
-                            worksheet.column_dimensions[chr(65 + idx)].width = min(max_length + 2, 50)
+            registros = self._exportar_planilha(arquivo, [
+                ('Mensalidades', sql + condicoes + " ORDER BY p.data_vencimento DESC, a.nome", params),
+                ('Resumo', resumo_sql + condicoes, params),
+            ])
             
-            return {'success': True, 'arquivo': arquivo, 'registros': len(df_pagamentos)}
+            return {'success': True, 'arquivo': arquivo, 'registros': registros['Mensalidades']}
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def _lotes_inadimplencia(self, cursor):
+        """Lê os inadimplentes do cursor em lotes de LINHAS_POR_TABELA, já formatados"""
+        cursor.execute(self.SQL_INADIMPLENTES, {'hoje': date.today().toordinal()})
+        while True:
+            linhas = cursor.fetchmany(self.LINHAS_POR_TABELA)
+            if not linhas:
+                break
+            yield [[
+                row[0][:20] + "..." if len(row[0]) > 20 else row[0],  # aluno_nome
+                f"{row[1]}\n{row[2]}",  # turma_nome - serie
+                str(row[3]),  # mensalidades_atrasadas
+                format_currency(row[4]),  # valor_total_devido
+                format_date(row[5]),  # primeira_pendencia
+                row[6][:15] + "..." if row[6] and len(row[6]) > 15 else (row[6] or "N/I"),  # responsavel_nome
+                row[7] or "N/I"  # responsavel_telefone
+            ] for row in linhas]
+    
     def gerar_relatorio_inadimplencia_pdf(self, arquivo=None):
-        """Gera relatório de inadimplência em PDF"""
+        """Gera relatório de inadimplência em PDF.
+        
+        Os alunos vêm do cursor em lotes e cada lote vira uma LongTable do
+        tamanho de uma página, com o cabeçalho repetido.
+        """
         if not REPORTLAB_AVAILABLE:
             return {'success': False, 'error': 'ReportLab não está disponível. Instale com: pip install reportlab'}
         
@@ -270,33 +319,6 @@ class ExportacaoService:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 arquivo = os.path.join("exportacoes", f"relatorio_inadimplencia_{timestamp}.pdf")
             
-            # Buscar dados de inadimplentes
-            conn = self.db.get_connection()
-            query = """
-                SELECT 
-                    a.nome as aluno_nome, 
-                    t.nome as turma_nome,
-                    t.serie,
-                    COUNT(p.id) as mensalidades_atrasadas,
-                    SUM(p.valor_final) as valor_total_devido,
-                    MIN(p.data_vencimento) as primeira_pendencia,
-                    rf.nome as responsavel_nome, 
-                    rf.telefone as responsavel_telefone
-                FROM alunos a
-                INNER JOIN turmas t ON a.turma_id = t.id
-                INNER JOIN pagamentos p ON a.id = p.aluno_id
-                LEFT JOIN responsaveis_financeiros rf ON a.id = rf.aluno_id AND rf.principal = 1
-                WHERE p.status IN ('Atrasado', 'Pendente') 
-                AND p.data_vencimento < date('now')
-                GROUP BY a.id, a.nome, t.nome, t.serie, rf.nome, rf.telefone
-                ORDER BY primeira_pendencia ASC, valor_total_devido DESC
-            """
-            
-            cursor = conn.cursor()
-            cursor.execute(query)
-            inadimplentes = cursor.fetchall()
-            conn.close()
-            
             # Criar PDF
             doc = SimpleDocTemplate(arquivo, pagesize=A4)
             story = []
@@ -315,66 +337,69 @@ class ExportacaoService:
             story.append(Paragraph(f"Gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}", styles['Normal']))
             story.append(Spacer(1, 20))
             
-            if not inadimplentes:
-                story.append(Paragraph("✅ Não há alunos inadimplentes no momento!", styles['Normal']))
-            else:
-                # Resumo
-                total_inadimplentes = len(inadimplentes)
-                valor_total = sum(row[4] for row in inadimplentes)
-                
-                resumo_text = f"""
-                <b>RESUMO GERAL:</b><br/>
-                • Total de alunos inadimplentes: {total_inadimplentes}<br/>
-                • Valor total em atraso: {format_currency(valor_total)}<br/>
-                • Data do relatório: {datetime.now().strftime('%d/%m/%Y')}
-                """
-                
-                story.append(Paragraph(resumo_text, styles['Normal']))
-                story.append(Spacer(1, 20))
+            conn = self.db.get_connection()
+            try:
+                cursor = conn.cursor()
                 
-                # Tabela de inadimplentes
-                data = [['Aluno', 'Turma', 'Mens.\nAtrasadas', 'Valor\nDevido', 'Primeira\nPendência', 'Responsável', 'Telefone']]
+                # Resumo calculado no banco, antes de ler as linhas
+                cursor.execute(f"""
+                    SELECT COUNT(DISTINCT p.aluno_id), COALESCE(SUM(p.valor_final), 0)
+                    FROM pagamentos p
+                    INNER JOIN alunos a ON a.id = p.aluno_id
+                    INNER JOIN turmas t ON a.turma_id = t.id
+                    WHERE {self.FILTRO_INADIMPLENCIA}
+                """, {'hoje': date.today().toordinal()})
+                total_inadimplentes, valor_total = cursor.fetchone()
                 
-                for row in inadimplentes:
-                    data.append([
-                        row[0][:20] + "..." if len(row[0]) > 20 else row[0],  # aluno_nome
-                        f"{row[1]}\n{row[2]}",  # turma_nome - serie
-                        str(row[3]),  # mensalidades_atrasadas
-                        format_currency(row[4]),  # valor_total_devido
-                        format_date(row[5]),  # primeira_pendencia
-                        row[6][:15] + "..." if row[6] and len(row[6]) > 15 else (row[6] or "N/I"),  # responsavel_nome
-                        row[7] or "N/I"  # responsavel_telefone
+                if not total_inadimplentes:
+                    story.append(Paragraph("✅ Não há alunos inadimplentes no momento!", styles['Normal']))
+                else:
+                    resumo_text = f"""
+                    <b>RESUMO GERAL:</b><br/>
+                    • Total de alunos inadimplentes: {total_inadimplentes}<br/>
+                    • Valor total em atraso: {format_currency(valor_total)}<br/>
+                    • Data do relatório: {datetime.now().strftime('%d/%m/%Y')}
+                    """
+                    
+                    story.append(Paragraph(resumo_text, styles['Normal']))
+                    story.append(Spacer(1, 20))
+                    
+                    estilo_tabela = TableStyle([
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                        ('FONTSIZE', (0, 0), (-1, 0), 9),
+                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                        ('FONTSIZE', (0, 1), (-1, -1), 8),
+                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
                     ])
-                
-                # Criar tabela
-                table = Table(data, colWidths=[2*inch, 1.5*inch, 0.8*inch, 1*inch, 1*inch, 1.2*inch, 1*inch])
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 8),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
-                ]))
-                
-                story.append(table)
-                
-                # Rodapé
-                story.append(Spacer(1, 30))
-                story.append(Paragraph(
-                    f"<i>Relatório gerado automaticamente pelo Sistema de Gestão Escolar em {datetime.now().strftime('%d/%m/%Y às %H:%M')}</i>", 
-                    styles['Italic']
-                ))
+                    larguras = [2*inch, 1.5*inch, 0.8*inch, 1*inch, 1*inch, 1.2*inch, 1*inch]
+                    
+                    # Uma tabela por lote; repeatRows repete o cabeçalho se
+                    # um lote ainda assim quebrar entre duas páginas
+                    for lote in self._lotes_inadimplencia(cursor):
+                        table = LongTable([self.CABECALHO_INADIMPLENCIA] + lote,
+                                          colWidths=larguras, repeatRows=1)
+                        table.setStyle(estilo_tabela)
+                        story.append(table)
+                    
+                    # Rodapé
+                    story.append(Spacer(1, 30))
+                    story.append(Paragraph(
+                        f"<i>Relatório gerado automaticamente pelo Sistema de Gestão Escolar em {datetime.now().strftime('%d/%m/%Y às %H:%M')}</i>", 
+                        styles['Italic']
+                    ))
+            finally:
+                conn.close()
             
             # Gerar PDF
             doc.build(story)
             
-            return {'success': True, 'arquivo': arquivo, 'inadimplentes': len(inadimplentes) if inadimplentes else 0}
+            return {'success': True, 'arquivo': arquivo, 'inadimplentes': total_inadimplentes}
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -389,12 +414,15 @@ class ExportacaoService:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 arquivo = os.path.join("exportacoes", f"relatorio_turmas_{timestamp}.pdf")
             
-            # Buscar dados das turmas
+            # Buscar dados das turmas (valores financeiros ficam nos alunos)
             conn = self.db.get_connection()
             query = """
                 SELECT 
-                    t.nome, t.serie, t.ano_letivo, t.valor_mensalidade,
-                    t.dia_vencimento, t.percentual_desconto, t.percentual_multa,
+                    t.nome, t.serie, t.ano_letivo,
+                    COALESCE(ROUND(AVG(a.valor_mensalidade), 2), 0) as mensalidade_media,
+                    COALESCE(MIN(a.valor_mensalidade), 0) as menor_mensalidade,
+                    COALESCE(MAX(a.valor_mensalidade), 0) as maior_mensalidade,
+                    COALESCE(SUM(a.valor_mensalidade), 0) as receita_mensal,
                     COUNT(a.id) as total_alunos
                 FROM turmas t
                 LEFT JOIN alunos a ON t.id = a.turma_id AND a.status = 'Ativo'
@@ -431,7 +459,7 @@ class ExportacaoService:
                 # Resumo
                 total_turmas = len(turmas)
                 total_alunos = sum(row[7] for row in turmas)
-                receita_potencial = sum(row[3] * row[7] for row in turmas)
+                receita_potencial = sum(row[6] for row in turmas)
                 
                 resumo_text = f"""
                 <b>RESUMO GERAL:</b><br/>
@@ -444,21 +472,22 @@ class ExportacaoService:
                 story.append(Spacer(1, 20))
                 
                 # Tabela de turmas
-                data = [['Turma', 'Série', 'Ano', 'Mensalidade', 'Venc.', '% Desc.', '% Multa', 'Alunos']]
+                data = [['Turma', 'Série', 'Ano', 'Mensalidade\nMédia', 'Menor', 'Maior',
+                         'Receita\nMensal', 'Alunos']]
                 
                 for row in turmas:
                     data.append([
                         row[0],  # nome
                         row[1],  # serie
                         row[2],  # ano_letivo
-                        format_currency(row[3]),  # valor_mensalidade
-                        f"Dia {row[4]}",  # dia_vencimento
-                        f"{row[5]}%",  # percentual_desconto
-                        f"{row[6]}%",  # percentual_multa
+                        format_currency(row[3]),  # mensalidade_media
+                        format_currency(row[4]),  # menor_mensalidade
+                        format_currency(row[5]),  # maior_mensalidade
+                        format_currency(row[6]),  # receita_mensal
                         str(row[7])  # total_alunos
                     ])
                 
-                table = Table(data, colWidths=[1.8*inch, 1*inch, 0.8*inch, 1.2*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch])
+                table = Table(data, colWidths=[1.6*inch, 0.9*inch, 0.6*inch, 1*inch, 0.9*inch, 0.9*inch, 1*inch, 0.6*inch])
                 table.setStyle(TableStyle([
                     ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
                     ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -486,6 +515,17 @@ class ExportacaoService:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def _colunas_backup(self, cursor, tabela):
+        """Colunas da tabela para o SELECT do backup, com datas em DD/MM/AAAA HH:MM"""
+        cursor.execute(f"PRAGMA table_info({tabela})")
+        colunas = []
+        for _, coluna, *_ in cursor.fetchall():
+            if 'data' in coluna.lower() or coluna.lower() in ('created_at', 'updated_at'):
+                colunas.append(f"COALESCE(strftime('%d/%m/%Y %H:%M', {coluna}), {coluna}) AS {coluna}")
+            else:
+                colunas.append(coluna)
+        return ", ".join(colunas)
+    
     def exportar_backup_dados_excel(self, arquivo=None):
         """Exporta backup completo dos dados em Excel"""
         try:
@@ -493,42 +533,26 @@ class ExportacaoService:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 arquivo = os.path.join("exportacoes", f"backup_completo_{timestamp}.xlsx")
             
-            conn = self.db.get_connection()
-            
-            # Queries para todas as tabelas
-            queries = {
-                'Turmas': "SELECT * FROM turmas ORDER BY nome",
-                'Alunos': "SELECT * FROM alunos ORDER BY nome", 
-                'Responsaveis': "SELECT * FROM responsaveis_financeiros ORDER BY aluno_id, principal DESC",
-                'Pagamentos': "SELECT * FROM pagamentos ORDER BY data_vencimento DESC",
-                'Configuracoes': "SELECT * FROM configuracoes ORDER BY chave"
+            # Aba: (tabela, ordenação); as tabelas grandes seguem a ordem
+            # da chave primária, sem ordenar o resultado inteiro
+            tabelas = {
+                'Turmas': ('turmas', 'nome'),
+                'Alunos': ('alunos', 'nome'),
+                'Responsaveis': ('responsaveis', 'aluno_id, principal DESC'),
+                'Pagamentos': ('pagamentos', 'id'),
+                'Transferencias': ('historico_transferencias', 'id'),
+                'Configuracoes': ('configuracoes', 'chave')
             }
             
-            # Exportar todas as tabelas
-            with pd.ExcelWriter(arquivo, engine='openpyxl') as writer:
-                total_registros = 0
-                
-                for sheet_name, query in queries.items():
-                    df = pd.read_sql_query(query, conn)
-                    
-                    if not df.empty:
-                        # Formatar datas
-                        for col in df.columns:
-                            if 'data' in col.lower() or 'created_at' in col.lower() or 'updated_at' in col.lower():
-                                df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%d/%m/%Y %H:%M')
-                        
-                        df.to_excel(writer, sheet_name=sheet_name, index=False)
-                        total_registros += len(df)
-                        
-                        # Ajustar larguras
-                        worksheet = writer.sheets[sheet_name]
-                        for idx, col in enumerate(df.columns):
-                            max_length = max(len(str(col)), df[col].astype(str).str.len().max())
-                            worksheet.column_dimensions[chr(65 + idx)].width = min(max_length + 2, 50)
-            
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            abas = [(aba, f"SELECT {self._colunas_backup(cursor, tabela)} FROM {tabela} ORDER BY {ordem}", ())
+                    for aba, (tabela, ordem) in tabelas.items()]
             conn.close()
             
-            return {'success': True, 'arquivo': arquivo, 'registros': total_registros}
+            registros = self._exportar_planilha(arquivo, abas)
+            
+            return {'success': True, 'arquivo': arquivo, 'registros': sum(registros.values())}
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -1,146 +1,415 @@
 from database.connection import db
+from database.migrations import reconstruir_resumos
 import sqlite3
 from datetime import datetime, date, timedelta
-from utils.formatters import format_currency, format_date
+from utils.formatters import format_currency, format_date, date_to_ordinal, year_ordinal_range
+from services.modelo_pagamentos import ModeloPagamentos, CODIGO_STATUS
+from services.motor_encargos import obter_motor
+import numpy as np
 
 class FinanceiroService:
     def __init__(self):
         self.db = db
 
+    # Acima disso a tela financeira não carrega o modelo colunar
+    LIMITE_MODELO_PAGAMENTOS = 300000
+
+    # Colunas da grade que podem ser ordenadas no banco (lista fechada:
+    # a expressão entra no SQL, nunca o texto vindo da interface)
+    ORDENACAO_MENSALIDADES = {
+        'id': 'p.id',
+        'aluno': 'a.nome',
+        'turma': 't.nome',
+        'mes_ref': 'p.mes_referencia',
+        'vencimento': 'p.vencimento_ordinal',
+        'valor_original': 'p.valor_original',
+        'desconto': 'COALESCE(p.desconto_aplicado, 0)',
+        'multa': 'COALESCE(p.multa_aplicada, 0)',
+        'valor_final': 'p.valor_final',
+        'status': 'p.status',
+        'dias_atraso': 'COALESCE(p.dias_atraso, 0)',
+    }
+
+    SQL_SELECT_MENSALIDADES = """
+        SELECT 
+            p.id,
+            p.aluno_id,
+            a.nome as aluno_nome,
+            t.nome as turma_nome,
+            t.serie as turma_serie,
+            p.mes_referencia,
+            p.valor_original,
+            p.desconto_aplicado,
+            p.multa_aplicada,
+            p.valor_final,
+            p.data_vencimento,
+            p.data_pagamento,
+            p.status,
+            p.observacoes,
+            p.dias_atraso,
+            p.pode_receber_multa
+        FROM pagamentos p
+        INNER JOIN alunos a ON p.aluno_id = a.id
+        INNER JOIN turmas t ON a.turma_id = t.id
+    """
+
+    def _linha_para_mensalidade(self, row):
+        """Converte uma linha de SQL_SELECT_MENSALIDADES em dicionário"""
+        # Status de atraso já persistido pelo recálculo diário
+        return {
+            'id': row[0],
+            'aluno_id': row[1],
+            'aluno_nome': row[2],
+            'turma_nome': f"{row[3]} - {row[4]}",
+            'mes_referencia': row[5],
+            'valor_original': row[6],
+            'desconto_aplicado': row[7] or 0,
+            'multa_aplicada': row[8] or 0,
+            'valor_final': row[9],
+            'data_vencimento': row[10],
+            'data_pagamento': row[11],
+            'status': row[12],
+            'observacoes': row[13] or '',
+            'dias_atraso': row[14] or 0,
+            'pode_receber_multa': row[15] != 0
+        }
+
+    def _montar_filtros_mensalidades(self, filtros=None):
+        """Monta a cláusula WHERE (e parâmetros) a partir do dicionário de filtros.
+
+        Chaves aceitas (todas opcionais; None, '' e "Todos"/"Todas" são ignorados):
+        status, mes, ano, turma_id, aluno_id, valor_min, valor_max,
+        data_inicio, data_fim (date ou 'YYYY-MM-DD').
+        """
+        filtros = {chave: valor for chave, valor in (filtros or {}).items()
+                   if valor not in (None, '', 'Todos', 'Todas')}
+
+        condicoes = ["a.status = 'Ativo'"]
+        params = []
+
+        if 'status' in filtros:
+            condicoes.append("p.status = ?")
+            params.append(filtros['status'])
+
+        mes = int(filtros['mes']) if 'mes' in filtros else None
+        ano = int(filtros['ano']) if 'ano' in filtros else None
+        if mes and ano:
+            condicoes.append("p.mes = ? AND p.ano = ?")
+            params.extend([mes, ano])
+        elif mes:
+            condicoes.append("p.mes = ?")
+            params.append(mes)
+        elif ano:
+            condicoes.append("p.vencimento_ordinal BETWEEN ? AND ?")
+            params.extend(year_ordinal_range(ano))
+
+        if 'turma_id' in filtros:
+            condicoes.append("a.turma_id = ?")
+            params.append(int(filtros['turma_id']))
+
+        if 'aluno_id' in filtros:
+            condicoes.append("p.aluno_id = ?")
+            params.append(int(filtros['aluno_id']))
+
+        if 'valor_min' in filtros:
+            condicoes.append("p.valor_final >= ?")
+            params.append(float(filtros['valor_min']))
+
+        if 'valor_max' in filtros:
+            condicoes.append("p.valor_final <= ?")
+            params.append(float(filtros['valor_max']))
+
+        if 'data_inicio' in filtros:
+            condicoes.append("p.vencimento_ordinal >= ?")
+            params.append(date_to_ordinal(filtros['data_inicio']))
+
+        if 'data_fim' in filtros:
+            condicoes.append("p.vencimento_ordinal <= ?")
+            params.append(date_to_ordinal(filtros['data_fim']))
+
+        return " AND ".join(condicoes), params
+
     def listar_mensalidades(self, status_filtro=None, mes_filtro=None):
         """Lista mensalidades com filtros CORRIGIDO"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
         try:
-            # Query base corrigida
-            sql = """
+            where, params = self._montar_filtros_mensalidades({
+                'status': status_filtro,
+                'mes': mes_filtro
+            })
+            
+            cursor.execute(
+                self.SQL_SELECT_MENSALIDADES +
+                f" WHERE {where} ORDER BY p.data_vencimento DESC, a.nome",
+                params
+            )
+            
+            mensalidades = [self._linha_para_mensalidade(row) for row in cursor.fetchall()]
+            
+            conn.close()
+            print(f"✅ {len(mensalidades)} mensalidades carregadas")
+            return mensalidades
+            
+        except sqlite3.Error as e:
+            conn.close()
+            print(f"❌ Erro ao listar mensalidades: {e}")
+            return []
+
+    def buscar_pagina_mensalidades(self, filtros=None, ordenar_por='vencimento',
+                                   decrescente=True, apos=None, limite=200):
+        """Busca uma página de mensalidades com filtros e ordenação no banco.
+
+        Usa paginação por chave (keyset): `apos` é o cursor devolvido pela
+        página anterior, e a próxima página começa logo depois dele, sem
+        OFFSET. Retorna {'mensalidades', 'cursor', 'tem_mais'}.
+        """
+        expressao = self.ORDENACAO_MENSALIDADES.get(ordenar_por)
+        if expressao is None:
+            raise ValueError(f"Coluna de ordenação inválida: {ordenar_por}")
+        
+        direcao = 'DESC' if decrescente else 'ASC'
+        where, params = self._montar_filtros_mensalidades(filtros)
+        
+        if apos is not None:
+            where += f" AND ({expressao}, p.id) {'<' if decrescente else '>'} (?, ?)"
+            params.extend(apos)
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            sql = self.SQL_SELECT_MENSALIDADES.replace(
+                "SELECT ", f"SELECT {expressao} AS chave_ordenacao,", 1
+            )
+            cursor.execute(
+                sql + f" WHERE {where} ORDER BY {expressao} {direcao}, p.id {direcao} LIMIT ?",
+                params + [limite + 1]
+            )
+            rows = cursor.fetchall()
+            conn.close()
+            
+            tem_mais = len(rows) > limite
+            rows = rows[:limite]
+            
+            return {
+                'mensalidades': [self._linha_para_mensalidade(row[1:]) for row in rows],
+                'cursor': (rows[-1][0], rows[-1][1]) if rows else apos,
+                'tem_mais': tem_mais
+            }
+            
+        except sqlite3.Error as e:
+            conn.close()
+            print(f"❌ Erro ao buscar página de mensalidades: {e}")
+            return {'mensalidades': [], 'cursor': apos, 'tem_mais': False}
+
+    def resumir_mensalidades(self, filtros=None):
+        """Totais (quantidade, valor e contagem por status) para os filtros dados"""
+        where, params = self._montar_filtros_mensalidades(filtros)
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(f"""
+                SELECT 
+                    COUNT(*),
+                    COALESCE(SUM(p.valor_final), 0),
+                    COALESCE(SUM(p.status = 'Pendente'), 0),
+                    COALESCE(SUM(p.status = 'Atrasado'), 0),
+                    COALESCE(SUM(p.status = 'Pago'), 0),
+                    COALESCE(SUM(CASE WHEN p.status = 'Pago' THEN p.valor_final END), 0)
+                FROM pagamentos p
+                INNER JOIN alunos a ON p.aluno_id = a.id
+                WHERE {where}
+            """, params)
+            total, valor_total, pendentes, atrasadas, pagas, valor_pago = cursor.fetchone()
+            conn.close()
+            
+            return {
+                'total': total,
+                'valor_total': valor_total,
+                'pendentes': pendentes,
+                'atrasadas': atrasadas,
+                'pagas': pagas,
+                'valor_pago': valor_pago
+            }
+            
+        except sqlite3.Error as e:
+            conn.close()
+            print(f"❌ Erro ao resumir mensalidades: {e}")
+            return {'total': 0, 'valor_total': 0, 'pendentes': 0, 'atrasadas': 0,
+                    'pagas': 0, 'valor_pago': 0}
+
+    def carregar_modelo_pagamentos(self, limite=None):
+        """Carrega as mensalidades de alunos ativos no modelo colunar (NumPy).
+
+        Com `limite`, retorna None quando há mais mensalidades que isso: a
+        tela passa a usar as páginas do banco (buscar_pagina_mensalidades)
+        em vez de manter o histórico inteiro em memória.
+        """
+        codigos = " ".join(f"WHEN '{status}' THEN {codigo}"
+                           for status, codigo in CODIGO_STATUS.items())
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            if limite is not None:
+                cursor.execute("""
+                    SELECT COUNT(*)
+                    FROM pagamentos p
+                    INNER JOIN alunos a ON p.aluno_id = a.id
+                    WHERE a.status = 'Ativo'
+                """)
+                total = cursor.fetchone()[0]
+                if total > limite:
+                    conn.close()
+                    print(f"ℹ️ {total} mensalidades: grade paginada no banco")
+                    return None
+            
+            # Só números: nomes e textos são buscados por id quando exibidos
+            cursor.execute(f"""
                 SELECT 
                     p.id,
                     p.aluno_id,
-                    a.nome as aluno_nome,
-                    t.nome as turma_nome,
-                    t.serie as turma_serie,
-                    p.mes_referencia,
-                    p.valor_original,
-                    p.desconto_aplicado,
-                    p.multa_aplicada,
-                    p.valor_final,
-                    p.data_vencimento,
-                    p.data_pagamento,
-                    p.status,
-                    p.observacoes
+                    a.turma_id,
+                    CASE p.status {codigos} ELSE {CODIGO_STATUS['Outro']} END,
+                    COALESCE(p.vencimento_ordinal, 0),
+                    COALESCE(p.mes, 0),
+                    COALESCE(p.ano, 0),
+                    CAST(substr(p.mes_referencia, 1, 4) || substr(p.mes_referencia, 6, 2) AS INTEGER),
+                    COALESCE(p.valor_original, 0),
+                    COALESCE(p.desconto_aplicado, 0),
+                    COALESCE(p.multa_aplicada, 0),
+                    COALESCE(p.valor_final, 0),
+                    COALESCE(p.dias_atraso, 0),
+                    DENSE_RANK() OVER (ORDER BY a.nome),
+                    DENSE_RANK() OVER (ORDER BY t.nome)
                 FROM pagamentos p
                 INNER JOIN alunos a ON p.aluno_id = a.id
                 INNER JOIN turmas t ON a.turma_id = t.id
                 WHERE a.status = 'Ativo'
-            """
-            
-            params = []
-            
-            # Aplicar filtros
-            if status_filtro and status_filtro != "Todos":
-                if status_filtro == "Atrasado":
-                    sql += """ AND (p.status = 'Atrasado' OR 
-                                  (p.status = 'Pendente' AND date(p.data_vencimento) < date('now')))"""
-                else:
-                    sql += " AND p.status = ?"
-                    params.append(status_filtro)
+            """)
+            modelo = ModeloPagamentos(cursor.fetchall())
+            conn.close()
             
-            if mes_filtro and mes_filtro != "Todos":
-                sql += " AND strftime('%m', p.data_vencimento) = ?"
-                params.append(mes_filtro)
+            print(f"✅ Modelo colunar com {len(modelo)} mensalidades")
+            return modelo
             
-            sql += " ORDER BY p.data_vencimento DESC, a.nome"
+        except sqlite3.Error as e:
+            conn.close()
+            print(f"❌ Erro ao carregar modelo de pagamentos: {e}")
+            return ModeloPagamentos([])
+
+    def obter_mensalidades_por_ids(self, ids):
+        """Mensalidades completas (mesmo formato de listar_mensalidades) indexadas por id"""
+        ids = [int(i) for i in ids]
+        mensalidades = {}
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Lotes para ficar abaixo do limite de parâmetros do SQLite
+            for inicio in range(0, len(ids), 500):
+                lote = ids[inicio:inicio + 500]
+                marcadores = ", ".join("?" * len(lote))
+                cursor.execute(self.SQL_SELECT_MENSALIDADES + f" WHERE p.id IN ({marcadores})", lote)
+                for row in cursor.fetchall():
+                    mensalidades[row[0]] = self._linha_para_mensalidade(row)
             
-            cursor.execute(sql, params)
+            conn.close()
+            return mensalidades
             
-            mensalidades = []
-            for row in cursor.fetchall():
-                # Determinar status real (considerar atrasos)
-                status_real = self._determinar_status_real(row[12], row[10])
-                
-                mensalidade = {
-                    'id': row[0],
-                    'aluno_id': row[1],
-                    'aluno_nome': row[2],
-                    'turma_nome': f"{row[3]} - {row[4]}",
-                    'mes_referencia': row[5],
-                    'valor_original': row[6],
-                    'desconto_aplicado': row[7] or 0,
-                    'multa_aplicada': row[8] or 0,
-                    'valor_final': row[9],
-                    'data_vencimento': row[10],
-                    'data_pagamento': row[11],
-                    'status': status_real,
-                    'observacoes': row[13] or ''
-                }
-                mensalidades.append(mensalidade)
+        except sqlite3.Error as e:
+            conn.close()
+            print(f"❌ Erro ao buscar mensalidades por id: {e}")
+            return mensalidades
+
+    def listar_mensalidades_em_aberto(self):
+        """Mensalidades pendentes e atrasadas de alunos ativos, da mais antiga à mais nova"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(self.SQL_SELECT_MENSALIDADES + """
+                WHERE a.status = 'Ativo' AND p.status IN ('Pendente', 'Atrasado')
+                ORDER BY p.vencimento_ordinal, p.id
+            """)
+            mensalidades = [self._linha_para_mensalidade(row) for row in cursor.fetchall()]
             
             conn.close()
-            print(f"✅ {len(mensalidades)} mensalidades carregadas")
             return mensalidades
             
         except sqlite3.Error as e:
             conn.close()
-            print(f"❌ Erro ao listar mensalidades: {e}")
+            print(f"❌ Erro ao listar mensalidades em aberto: {e}")
             return []
 
-    def _determinar_status_real(self, status_bd, data_vencimento):
-        """Determina o status real considerando atrasos"""
-        try:
-            if status_bd == 'Pago':
-                return 'Pago'
-            
-            if data_vencimento:
-                if isinstance(data_vencimento, str):
-                    venc_date = datetime.strptime(data_vencimento, '%Y-%m-%d').date()
-                else:
-                    venc_date = data_vencimento
-                
-                hoje = date.today()
-                
-                if venc_date < hoje:
-                    return 'Atrasado'
-                else:
-                    return 'Pendente'
-            else:
-                return status_bd
-                
-        except:
-            return status_bd or 'Pendente'
-
-    def processar_pagamento(self, pagamento_id, valor_final, desconto, multa, observacoes):
-        """Processa pagamento de mensalidade CORRIGIDO"""
+    def listar_anos_mensalidades(self):
+        """Anos com mensalidades, do mais recente ao mais antigo"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
         try:
-            # Buscar mensalidade atual
-            cursor.execute("SELECT * FROM pagamentos WHERE id = ?", (pagamento_id,))
-            mensalidade = cursor.fetchone()
+            # MIN/MAX sobre o ordinal são resolvidos direto no índice
+            cursor.execute("SELECT MIN(vencimento_ordinal), MAX(vencimento_ordinal) FROM pagamentos")
+            primeiro, ultimo = cursor.fetchone()
+            conn.close()
             
-            if not mensalidade:
-                return {'success': False, 'error': 'Mensalidade não encontrada'}
+            if primeiro is None:
+                return []
             
-            if mensalidade[12] == 'Pago':  # status
-                return {'success': False, 'error': 'Mensalidade já foi paga'}
+            return list(range(date.fromordinal(ultimo).year,
+                              date.fromordinal(primeiro).year - 1, -1))
             
-            # Atualizar pagamento
+        except sqlite3.Error as e:
+            conn.close()
+            print(f"❌ Erro ao listar anos: {e}")
+            return []
+
+    def processar_pagamento(self, pagamento_id, valor_final, desconto, multa, observacoes):
+        """Processa pagamento de mensalidade.
+
+        Retorna também a mensalidade já atualizada (mesmo formato de
+        listar_mensalidades), para a tela corrigir só aquela linha.
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
             data_pagamento = date.today().strftime('%Y-%m-%d')
             
+            # Condicional: só quem ainda não está paga (vale entre terminais/processos)
             cursor.execute("""
                 UPDATE pagamentos 
                 SET desconto_aplicado = ?, multa_aplicada = ?, valor_final = ?,
-                    data_pagamento = ?, status = 'Pago', observacoes = ?
-                WHERE id = ?
-            """, (desconto, multa, valor_final, data_pagamento, observacoes, pagamento_id))
+                    data_pagamento = ?, status = 'Pago', observacoes = ?,
+                    dias_atraso = MAX(0, ? - vencimento_ordinal)
+                WHERE id = ? AND status IS NOT 'Pago'
+            """, (desconto, multa, valor_final, data_pagamento, observacoes,
+                  date.today().toordinal(), pagamento_id))
+            
+            if cursor.rowcount == 0:
+                cursor.execute("SELECT status FROM pagamentos WHERE id = ?", (pagamento_id,))
+                existente = cursor.fetchone()
+                conn.rollback()
+                conn.close()
+                if not existente:
+                    return {'success': False, 'error': 'Mensalidade não encontrada'}
+                return {'success': False, 'error': 'Mensalidade já foi paga'}
+            
+            cursor.execute(self.SQL_SELECT_MENSALIDADES + " WHERE p.id = ?", (pagamento_id,))
+            row = cursor.fetchone()
             
             conn.commit()
             conn.close()
             
             print(f"✅ Pagamento processado: ID {pagamento_id}, Valor: R$ {valor_final:.2f}")
-            return {'success': True}
+            return {'success': True,
+                    'mensalidade': self._linha_para_mensalidade(row) if row else None}
             
         except sqlite3.Error as e:
             conn.rollback()
@@ -148,45 +417,53 @@ class FinanceiroService:
             print(f"❌ Erro ao processar pagamento: {e}")
             return {'success': False, 'error': str(e)}
 
+    def calcular_encargos_em_aberto(self, data_pagamento=None, motor=None):
+        """Desconto, multa e valor final de todas as mensalidades em aberto,
+        como se fossem pagas em `data_pagamento` (padrão: hoje), num só cálculo.
+        
+        Retorna os arrays de MotorEncargos.calcular mais 'ids'.
+        """
+        motor = motor or obter_motor(self.db)
+        data_pagamento = data_pagamento or date.today()
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT id, valor_original, COALESCE(vencimento_ordinal, 0),
+                       COALESCE(pode_receber_multa, 1)
+                FROM pagamentos
+                WHERE status IN ('Pendente', 'Atrasado')
+            """)
+            linhas = cursor.fetchall()
+            conn.close()
+        except sqlite3.Error as e:
+            conn.close()
+            print(f"❌ Erro ao calcular encargos em aberto: {e}")
+            linhas = []
+        
+        ids, valores, vencimentos, pode_multa = (zip(*linhas) if linhas else ((), (), (), ()))
+        calculo = motor.calcular(np.array(valores, dtype=np.float64),
+                                 np.array(vencimentos, dtype=np.int64),
+                                 data_pagamento,
+                                 np.array(pode_multa, dtype=bool))
+        calculo['ids'] = np.array(ids, dtype=np.int64)
+        return calculo
+
     def obter_mensalidade_por_id(self, mensalidade_id):
         """Obtém mensalidade específica por ID"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute("""
-                SELECT 
-                    p.*,
-                    a.nome as aluno_nome,
-                    t.nome as turma_nome,
-                    t.serie as turma_serie
-                FROM pagamentos p
-                INNER JOIN alunos a ON p.aluno_id = a.id
-                INNER JOIN turmas t ON a.turma_id = t.id
-                WHERE p.id = ?
-            """, (mensalidade_id,))
+            # Colunas por nome: pagamentos ganhou colunas nas migrações
+            cursor.execute(self.SQL_SELECT_MENSALIDADES + " WHERE p.id = ?", (mensalidade_id,))
             
             row = cursor.fetchone()
             conn.close()
             
-            if row:
-                return {
-                    'id': row[0],
-                    'aluno_id': row[1],
-                    'mes_referencia': row[2],
-                    'valor_original': row[3],
-                    'desconto_aplicado': row[4] or 0,
-                    'multa_aplicada': row[5] or 0,
-                    'valor_final': row[6],
-                    'data_vencimento': row[7],
-                    'data_pagamento': row[8],
-                    'status': row[9],
-                    'observacoes': row[11] or '',
-                    'aluno_nome': row[13],
-                    'turma_nome': f"{row[14]} - {row[15]}"
-                }
-            else:
-                return None
+            return self._linha_para_mensalidade(row) if row else None
                 
         except sqlite3.Error as e:
             conn.close()
@@ -199,17 +476,15 @@ class FinanceiroService:
         cursor = conn.cursor()
         
         try:
-            # Total de mensalidades por status
+            # Totais por status (alunos ativos) a partir dos resumos por turma
             cursor.execute("""
                 SELECT 
-                    COUNT(CASE WHEN status = 'Pago' THEN 1 END) as pagas,
-                    COUNT(CASE WHEN status = 'Pendente' THEN 1 END) as pendentes,
-                    COUNT(CASE WHEN status = 'Atrasado' OR (status = 'Pendente' AND date(data_vencimento) < date('now')) THEN 1 END) as atrasadas,
-                    SUM(CASE WHEN status = 'Pago' THEN valor_final ELSE 0 END) as receita_total,
-                    SUM(CASE WHEN status != 'Pago' THEN valor_final ELSE 0 END) as valor_pendente
-                FROM pagamentos p
-                INNER JOIN alunos a ON p.aluno_id = a.id
-                WHERE a.status = 'Ativo'
+                    SUM(pagas) as pagas,
+                    SUM(pendentes) as pendentes,
+                    SUM(atrasadas) as atrasadas,
+                    SUM(valor_pago) as receita_total,
+                    SUM(valor_total - valor_pago) as valor_pendente
+                FROM resumo_turmas
             """)
             
             row = cursor.fetchone()
@@ -233,6 +508,66 @@ class FinanceiroService:
                 'receita_total': 0, 'valor_pendente': 0
             }
 
+    def obter_resumo_meses(self, limite=12):
+        """Totais por mês de referência (alunos ativos), do mais recente ao mais antigo"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT mes_referencia, mensalidades, pagas, valor_pago,
+                       pendentes, valor_pendente, atrasadas, valor_atrasado
+                FROM resumo_meses
+                WHERE mensalidades > 0
+                ORDER BY mes_referencia DESC
+                LIMIT ?
+            """, (limite,))
+            
+            resumo = [
+                {
+                    'mes_referencia': row[0],
+                    'mensalidades': row[1],
+                    'pagas': row[2],
+                    'valor_pago': row[3],
+                    'pendentes': row[4],
+                    'valor_pendente': row[5],
+                    'atrasadas': row[6],
+                    'valor_atrasado': row[7]
+                }
+                for row in cursor.fetchall()
+            ]
+            
+            conn.close()
+            return resumo
+            
+        except sqlite3.Error as e:
+            conn.close()
+            print(f"❌ Erro ao obter resumo por mês: {e}")
+            return []
+
+    def reconstruir_resumos(self):
+        """Recalcula as tabelas de resumo financeiro a partir de pagamentos e alunos"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            reconstruir_resumos(cursor)
+            conn.commit()
+            
+            cursor.execute("SELECT COUNT(*) FROM resumo_alunos")
+            alunos = cursor.fetchone()[0]
+            conn.close()
+            
+            print(f"✅ Resumos financeiros reconstruídos ({alunos} alunos)")
+            return {'success': True, 'alunos': alunos}
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            conn.close()
+            print(f"❌ Erro ao reconstruir resumos: {e}")
+            return {'success': False, 'error': str(e)}
+
     def gerar_relatorio_financeiro(self, data_inicio=None, data_fim=None):
         """Gera relatório financeiro por período"""
         conn = self.db.get_connection()
@@ -260,12 +595,12 @@ class FinanceiroService:
             params = []
             
             if data_inicio:
-                sql += " AND date(p.data_vencimento) >= ?"
-                params.append(data_inicio)
+                sql += " AND p.vencimento_ordinal >= ?"
+                params.append(date_to_ordinal(data_inicio))
             
             if data_fim:
-                sql += " AND date(p.data_vencimento) <= ?"
-                params.append(data_fim)
+                sql += " AND p.vencimento_ordinal <= ?"
+                params.append(date_to_ordinal(data_fim))
             
             sql += " ORDER BY p.data_vencimento DESC"
             
@@ -301,37 +636,12 @@ class FinanceiroService:
         cursor = conn.cursor()
         
         try:
-            cursor.execute("""
-                SELECT 
-                    p.*,
-                    a.nome as aluno_nome,
-                    t.nome as turma_nome,
-                    t.serie as turma_serie
-                FROM pagamentos p
-                INNER JOIN alunos a ON p.aluno_id = a.id
-                INNER JOIN turmas t ON a.turma_id = t.id
+            cursor.execute(self.SQL_SELECT_MENSALIDADES + """
                 WHERE p.aluno_id = ?
                 ORDER BY p.data_vencimento DESC
             """, (aluno_id,))
             
-            mensalidades = []
-            for row in cursor.fetchall():
-                mensalidade = {
-                    'id': row[0],
-                    'aluno_id': row[1],
-                    'mes_referencia': row[2],
-                    'valor_original': row[3],
-                    'desconto_aplicado': row[4] or 0,
-                    'multa_aplicada': row[5] or 0,
-                    'valor_final': row[6],
-                    'data_vencimento': row[7],
-                    'data_pagamento': row[8],
-                    'status': row[9],
-                    'observacoes': row[11] or '',
-                    'aluno_nome': row[13],
-                    'turma_nome': f"{row[14]} - {row[15]}"
-                }
-                mensalidades.append(mensalidade)
+            mensalidades = [self._linha_para_mensalidade(row) for row in cursor.fetchall()]
             
             conn.close()
             return mensalidades
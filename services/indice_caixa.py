@@ -0,0 +1,208 @@
+"""
+Índice em memória do modo caixa.
+
+Carrega uma vez as mensalidades em aberto de alunos ativos e monta
+dicionários para achar, em O(1), a mensalidade a receber a partir do que
+o atendente digita ou lê com o leitor de código de barras:
+
+- código de referência impresso (id com dígito verificador, ver
+  `codigo_referencia`);
+- id da mensalidade;
+- CPF do aluno (a mensalidade em aberto mais antiga dele).
+
+Irmãos (alunos com um responsável de mesmo telefone) formam uma família:
+cada busca já traz as próximas mensalidades em aberto da família inteira.
+Pagamentos feitos pelo caixa saem do índice na hora; escritas de outros
+processos são percebidas pelo contador de versoes_tabelas, consultado no
+máximo a cada INTERVALO_VERIFICACAO segundos.
+"""
+
+import re
+import time
+
+from database.connection import db, versao_tabelas
+from services.financeiro_service import FinanceiroService
+
+# Mudanças de responsáveis passam pelo cadastro do aluno (que grava `alunos`)
+TABELAS_CAIXA = ('alunos', 'pagamentos')
+
+INTERVALO_VERIFICACAO = 2.0
+
+# Mensalidades da família mostradas em cada busca
+LIMITE_FAMILIA = 12
+
+DIGITOS_CODIGO = 8
+
+
+def _digitos(texto):
+    return re.sub(r'\D', '', str(texto or ''))
+
+
+def _digito_verificador(numero):
+    """Dígito verificador módulo 10 (Luhn) de uma sequência de dígitos"""
+    soma = 0
+    for posicao, digito in enumerate(reversed(numero)):
+        valor = int(digito) * (2 if posicao % 2 == 0 else 1)
+        soma += valor - 9 if valor > 9 else valor
+    return str((10 - soma % 10) % 10)
+
+
+def codigo_referencia(mensalidade_id):
+    """Código de referência impresso da mensalidade: id com 8 dígitos + verificador"""
+    numero = f"{int(mensalidade_id):0{DIGITOS_CODIGO}d}"
+    return numero + _digito_verificador(numero)
+
+
+def ler_codigo_referencia(texto):
+    """Id da mensalidade a partir do código de referência (None se inválido)"""
+    codigo = _digitos(texto)
+    if len(codigo) != DIGITOS_CODIGO + 1 or _digito_verificador(codigo[:-1]) != codigo[-1]:
+        return None
+    return int(codigo[:-1])
+
+
+class IndiceCaixa:
+    def __init__(self, banco=None):
+        self.db = banco or db
+        self.financeiro_service = FinanceiroService()
+        self.financeiro_service.db = self.db
+
+        self.mensalidades = {}       # id -> mensalidade em aberto
+        self.abertas_por_aluno = {}  # aluno_id -> [ids por vencimento]
+        self.aluno_por_cpf = {}      # CPF (só dígitos) -> aluno_id
+        self.familia = {}            # aluno_id -> tupla de aluno_ids da família
+        self.versao = None
+        self._verificado_em = 0.0
+
+    def carregar(self):
+        """(Re)monta o índice a partir do banco"""
+        conn = self.db.get_connection()
+        try:
+            versao = versao_tabelas(conn, TABELAS_CAIXA)
+            alunos = conn.execute("""
+                SELECT id, cpf FROM alunos WHERE status = 'Ativo'
+            """).fetchall()
+            telefones = conn.execute("""
+                SELECT r.aluno_id, r.telefone
+                FROM responsaveis r
+                INNER JOIN alunos a ON a.id = r.aluno_id AND a.status = 'Ativo'
+            """).fetchall()
+        finally:
+            conn.close()
+
+        mensalidades = self.financeiro_service.listar_mensalidades_em_aberto()
+
+        self.mensalidades = {m['id']: m for m in mensalidades}
+        self.abertas_por_aluno = {}
+        for m in mensalidades:
+            self.abertas_por_aluno.setdefault(m['aluno_id'], []).append(m['id'])
+
+        self.aluno_por_cpf = {}
+        for aluno_id, cpf in alunos:
+            cpf = _digitos(cpf)
+            if len(cpf) == 11:
+                self.aluno_por_cpf[cpf] = aluno_id
+
+        self.familia = self._montar_familias(telefones)
+        self.versao = versao
+        self._verificado_em = time.monotonic()
+
+        print(f"✅ Índice do caixa: {len(self.mensalidades)} mensalidades em aberto")
+        return self
+
+    def _montar_familias(self, telefones):
+        """Agrupa alunos ligados por telefone de responsável (union-find)"""
+        pai = {}
+
+        def raiz(aluno_id):
+            while pai.setdefault(aluno_id, aluno_id) != aluno_id:
+                pai[aluno_id] = pai[pai[aluno_id]]
+                aluno_id = pai[aluno_id]
+            return aluno_id
+
+        primeiro_por_telefone = {}
+        for aluno_id, telefone in telefones:
+            telefone = _digitos(telefone)
+            if len(telefone) < 8:
+                continue
+            outro = primeiro_por_telefone.setdefault(telefone, aluno_id)
+            pai[raiz(aluno_id)] = raiz(outro)
+
+        grupos = {}
+        for aluno_id in pai:
+            grupos.setdefault(raiz(aluno_id), []).append(aluno_id)
+        return {aluno_id: tuple(sorted(grupo))
+                for grupo in grupos.values() for aluno_id in grupo}
+
+    def _verificar_versao(self):
+        """Recarrega se outro processo alterou alunos ou mensalidades"""
+        if time.monotonic() - self._verificado_em < INTERVALO_VERIFICACAO:
+            return
+        conn = self.db.get_connection()
+        try:
+            versao = versao_tabelas(conn, TABELAS_CAIXA)
+        finally:
+            conn.close()
+        if versao != self.versao:
+            self.carregar()
+        else:
+            self._verificado_em = time.monotonic()
+
+    def resolver(self, texto):
+        """Id da mensalidade em aberto para um código, id ou CPF (None se não achar)"""
+        digitos = _digitos(texto)
+        if not digitos:
+            return None
+
+        if len(digitos) == 11 and digitos in self.aluno_por_cpf:
+            abertas = self.abertas_por_aluno.get(self.aluno_por_cpf[digitos])
+            return abertas[0] if abertas else None
+
+        mensalidade_id = ler_codigo_referencia(digitos)
+        if mensalidade_id in self.mensalidades:
+            return mensalidade_id
+
+        mensalidade_id = int(digitos)
+        return mensalidade_id if mensalidade_id in self.mensalidades else None
+
+    def buscar(self, texto):
+        """Mensalidade encontrada e as próximas em aberto da família.
+
+        Retorna {'mensalidade': dict, 'familia': [dicts]} (a encontrada vem
+        primeiro na lista da família) ou None.
+        """
+        self._verificar_versao()
+        mensalidade_id = self.resolver(texto)
+        if mensalidade_id is None:
+            return None
+
+        mensalidade = self.mensalidades[mensalidade_id]
+        return {'mensalidade': mensalidade, 'familia': self.abertas_da_familia(mensalidade)}
+
+    def abertas_da_familia(self, mensalidade):
+        """Próximas mensalidades em aberto da família, começando pela informada"""
+        aluno_id = mensalidade['aluno_id']
+        outras = sorted(
+            (i for membro in self.familia.get(aluno_id, (aluno_id,))
+             for i in self.abertas_por_aluno.get(membro, ()) if i != mensalidade['id']),
+            key=lambda i: (self.mensalidades[i]['data_vencimento'], i)
+        )
+        primeira = [mensalidade] if mensalidade['id'] in self.mensalidades else []
+        return (primeira + [self.mensalidades[i] for i in outras])[:LIMITE_FAMILIA]
+
+    def registrar_pagamento(self, mensalidade_id):
+        """Tira do índice uma mensalidade paga pelo próprio caixa"""
+        mensalidade = self.mensalidades.pop(mensalidade_id, None)
+        if mensalidade:
+            abertas = self.abertas_por_aluno.get(mensalidade['aluno_id'], [])
+            if mensalidade_id in abertas:
+                abertas.remove(mensalidade_id)
+
+        # A escrita foi nossa: acompanha o contador sem recarregar
+        conn = self.db.get_connection()
+        try:
+            self.versao = versao_tabelas(conn, TABELAS_CAIXA)
+        finally:
+            conn.close()
+        self._verificado_em = time.monotonic()
+        return mensalidade
@@ -7,6 +7,56 @@ class MensalidadeService:
     def __init__(self):
         self.db = db
 
+    SQL_INSERIR_MENSALIDADE = """
+        INSERT OR IGNORE INTO pagamentos 
+        (aluno_id, mes_referencia, valor_original, desconto_aplicado, 
+         multa_aplicada, valor_final, data_vencimento, status, dias_atraso, pode_receber_multa)
+        VALUES (?, ?, ?, 0, 0, ?, ?, ?, ?, 1)
+    """
+
+    def _calcular_mes_inicio(self, data_matricula, ano_referencia):
+        """Mês da primeira mensalidade: mês da matrícula no ano letivo, nunca antes de março"""
+        if not data_matricula:
+            return 3
+        
+        try:
+            if isinstance(data_matricula, str):
+                data_mat = datetime.strptime(data_matricula, '%Y-%m-%d').date()
+            else:
+                data_mat = data_matricula
+            
+            # Se a matrícula foi no ano letivo atual, começar do mês da matrícula
+            if data_mat.year == ano_referencia:
+                return max(data_mat.month, 3)  # Não antes de março
+            return 3  # Março (início do ano letivo)
+        except (ValueError, TypeError):
+            return 3
+
+    def _montar_mensalidades(self, aluno_id, valor_mensalidade, ano_referencia, mes_inicio, hoje=None):
+        """Monta as linhas (parâmetros do INSERT) de mes_inicio a dezembro"""
+        hoje = hoje or date.today()
+        linhas = []
+        
+        for mes in range(mes_inicio, 13):  # De março (3) até dezembro (12)
+            # Calcular data de vencimento (dia 10 do mês)
+            data_vencimento = date(ano_referencia, mes, min(10, monthrange(ano_referencia, mes)[1]))
+            
+            # Mesma regra do recálculo diário: vencida nasce atrasada
+            dias_atraso = max(0, (hoje - data_vencimento).days)
+            status = 'Atrasado' if dias_atraso > 0 else 'Pendente'
+            
+            linhas.append((
+                aluno_id,
+                f"{ano_referencia}-{mes:02d}",
+                valor_mensalidade,
+                valor_mensalidade,
+                data_vencimento.strftime('%Y-%m-%d'),
+                status,
+                dias_atraso
+            ))
+        
+        return linhas
+
     def gerar_mensalidades_aluno(self, aluno_id):
         """Gera mensalidades automáticas para um aluno recém-cadastrado"""
         conn = self.db.get_connection()
@@ -26,91 +76,25 @@ class MensalidadeService:
             
             aluno_data = cursor.fetchone()
             if not aluno_data:
+                conn.close()
                 return {'success': False, 'error': 'Aluno não encontrado'}
             
             nome_aluno, valor_mensalidade, data_matricula, ano_letivo, turma_nome = aluno_data
             
             if not valor_mensalidade or valor_mensalidade <= 0:
+                conn.close()
                 return {'success': False, 'error': 'Valor da mensalidade deve ser maior que zero'}
             
-            # Determinar ano letivo
+            # Determinar ano letivo e mês de início (março se não especificado)
             ano_referencia = int(ano_letivo) if ano_letivo else date.today().year
-            
-            # Determinar mês de início (março se não especificado)
-            if data_matricula:
-                try:
-                    if isinstance(data_matricula, str):
-                        data_mat = datetime.strptime(data_matricula, '%Y-%m-%d').date()
-                    else:
-                        data_mat = data_matricula
-                    
-                    # Se a matrícula foi no ano letivo atual, começar do mês da matrícula
-                    if data_mat.year == ano_referencia:
-                        mes_inicio = max(data_mat.month, 3)  # Não antes de março
-                    else:
-                        mes_inicio = 3  # Março (início do ano letivo)
-                except:
-                    mes_inicio = 3
-            else:
-                mes_inicio = 3
-            
-            # Gerar mensalidades de março a dezembro (10 meses)
-            mensalidades_geradas = 0
-            mes_atual = date.today().month
-            ano_atual = date.today().year
+            mes_inicio = self._calcular_mes_inicio(data_matricula, ano_referencia)
             
             print(f"📅 Gerando mensalidades de {mes_inicio:02d}/{ano_referencia} a 12/{ano_referencia}")
             
-            for mes in range(mes_inicio, 13):  # De março (3) até dezembro (12)
-                # Verificar se já existe mensalidade para este mês
-                cursor.execute("""
-                    SELECT id FROM pagamentos 
-                    WHERE aluno_id = ? AND mes_referencia = ?
-                """, (aluno_id, f"{ano_referencia}-{mes:02d}"))
-                
-                if cursor.fetchone():
-                    print(f"⚠️ Mensalidade {mes:02d}/{ano_referencia} já existe - pulando")
-                    continue
-                
-                # Calcular data de vencimento (dia 10 do mês)
-                try:
-                    data_vencimento = date(ano_referencia, mes, 10)
-                except ValueError:
-                    # Se o dia 10 não existir no mês (improvável), usar último dia do mês
-                    ultimo_dia = monthrange(ano_referencia, mes)[1]
-                    data_vencimento = date(ano_referencia, mes, ultimo_dia)
-                
-                # Determinar status baseado na data atual
-                if ano_atual > ano_referencia or (ano_atual == ano_referencia and mes_atual > mes):
-                    # Mês já passou
-                    if data_vencimento < date.today():
-                        status = 'Atrasado'
-                    else:
-                        status = 'Pendente'
-                elif ano_atual == ano_referencia and mes_atual == mes:
-                    # Mês atual
-                    status = 'Pendente'
-                else:
-                    # Mês futuro
-                    status = 'Pendente'
-                
-                # Inserir mensalidade
-                cursor.execute("""
-                    INSERT INTO pagamentos 
-                    (aluno_id, mes_referencia, valor_original, desconto_aplicado, 
-                     multa_aplicada, valor_final, data_vencimento, status, pode_receber_multa)
-                    VALUES (?, ?, ?, 0, 0, ?, ?, ?, 1)
-                """, (
-                    aluno_id,
-                    f"{ano_referencia}-{mes:02d}",
-                    valor_mensalidade,
-                    valor_mensalidade,
-                    data_vencimento.strftime('%Y-%m-%d'),
-                    status
-                ))
-                
-                mensalidades_geradas += 1
-                print(f"✅ Mensalidade {mes:02d}/{ano_referencia}: R$ {valor_mensalidade:.2f} - {status}")
+            # Meses já existentes são ignorados pelo índice único (aluno_id, mes_referencia)
+            linhas = self._montar_mensalidades(aluno_id, valor_mensalidade, ano_referencia, mes_inicio)
+            cursor.executemany(self.SQL_INSERIR_MENSALIDADE, linhas)
+            mensalidades_geradas = cursor.rowcount
             
             conn.commit()
             conn.close()
@@ -144,6 +128,102 @@ class MensalidadeService:
             print(f"❌ Erro inesperado ao gerar mensalidades: {e}")
             return {'success': False, 'error': f'Erro inesperado: {str(e)}'}
 
+    def gerar_mensalidades_todas_turmas(self, turma_id=None, ano_letivo=None):
+        """
+        Gera em lote as mensalidades de todos os alunos ativos
+        (opcionalmente apenas de uma turma e/ou ano letivo), em uma única transação
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        resultado = {
+            'success': True,
+            'total_alunos': 0,
+            'total_sucesso': 0,
+            'total_erro': 0,
+            'mensalidades_criadas': 0,
+            'mensalidades_existentes': 0,
+            'detalhes': []
+        }
+        
+        try:
+            sql = """
+                SELECT a.id, a.nome, a.valor_mensalidade, a.data_matricula, t.ano_letivo
+                FROM alunos a
+                INNER JOIN turmas t ON a.turma_id = t.id
+                WHERE a.status = 'Ativo'
+            """
+            params = []
+            
+            if turma_id:
+                sql += " AND a.turma_id = ?"
+                params.append(turma_id)
+            
+            if ano_letivo:
+                sql += " AND t.ano_letivo = ?"
+                params.append(str(ano_letivo))
+            
+            cursor.execute(sql, params)
+            alunos = cursor.fetchall()
+            resultado['total_alunos'] = len(alunos)
+            
+            if not alunos:
+                conn.close()
+                return resultado
+            
+            print(f"💰 Gerando mensalidades em lote para {len(alunos)} alunos...")
+            
+            hoje = date.today()
+            linhas = []
+            
+            for aluno_id, nome, valor_mensalidade, data_matricula, ano_turma in alunos:
+                if not valor_mensalidade or valor_mensalidade <= 0:
+                    resultado['total_erro'] += 1
+                    resultado['detalhes'].append(f"❌ {nome}: valor da mensalidade não definido")
+                    continue
+                
+                try:
+                    ano_referencia = int(ano_turma) if ano_turma else hoje.year
+                except ValueError:
+                    resultado['total_erro'] += 1
+                    resultado['detalhes'].append(f"❌ {nome}: ano letivo inválido ({ano_turma})")
+                    continue
+                
+                mes_inicio = self._calcular_mes_inicio(data_matricula, ano_referencia)
+                linhas.extend(self._montar_mensalidades(
+                    aluno_id, valor_mensalidade, ano_referencia, mes_inicio, hoje
+                ))
+                resultado['total_sucesso'] += 1
+            
+            # Um único executemany; duplicatas são ignoradas pelo índice único
+            cursor.executemany(self.SQL_INSERIR_MENSALIDADE, linhas)
+            resultado['mensalidades_criadas'] = max(cursor.rowcount, 0)
+            resultado['mensalidades_existentes'] = len(linhas) - resultado['mensalidades_criadas']
+            
+            conn.commit()
+            conn.close()
+            
+            resultado['detalhes'].insert(0,
+                f"✅ {resultado['mensalidades_criadas']} mensalidades criadas, "
+                f"{resultado['mensalidades_existentes']} já existiam"
+            )
+            print(f"🎉 {resultado['mensalidades_criadas']} mensalidades geradas para "
+                  f"{resultado['total_sucesso']} alunos")
+            return resultado
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            conn.close()
+            print(f"❌ Erro ao gerar mensalidades em lote: {e}")
+            resultado.update({
+                'success': False,
+                'error': f'Erro no banco de dados: {str(e)}',
+                'total_sucesso': 0,
+                'total_erro': resultado['total_alunos'],
+                'mensalidades_criadas': 0
+            })
+            return resultado
+
     def regenerar_mensalidades_aluno(self, aluno_id):
         """Regenera mensalidades quando valor é alterado"""
         conn = self.db.get_connection()
@@ -245,6 +325,104 @@ class MensalidadeService:
             conn.close()
             return {'success': False, 'error': str(e)}
 
+    CHAVE_ULTIMO_RECALCULO = 'ultimo_recalculo_status'
+
+    def recalcular_status_mensalidades(self, data_referencia=None):
+        """
+        Atualiza em lote o status de atraso das mensalidades em aberto:
+        Pendente vencida → Atrasado (com dias_atraso), dias_atraso das já
+        atrasadas e Atrasado não vencida → Pendente
+        """
+        data_referencia = data_referencia or date.today()
+        hoje = data_referencia.toordinal()
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Pendentes vencidas: marcar como atrasadas e gravar os dias de atraso
+            cursor.execute("""
+                UPDATE pagamentos
+                SET status = 'Atrasado', dias_atraso = ? - vencimento_ordinal
+                WHERE status = 'Pendente'
+                AND vencimento_ordinal < ?
+            """, (hoje, hoje))
+            atrasadas = cursor.rowcount
+            
+            # Já atrasadas: só os dias de atraso (linhas em dia não são regravadas)
+            cursor.execute("""
+                UPDATE pagamentos
+                SET dias_atraso = ? - vencimento_ordinal
+                WHERE status = 'Atrasado'
+                AND vencimento_ordinal < ?
+                AND dias_atraso IS NOT ? - vencimento_ordinal
+            """, (hoje, hoje, hoje))
+            dias_atualizados = cursor.rowcount
+            
+            # Não vencidas (ex.: vencimento alterado): voltar para pendente
+            cursor.execute("""
+                UPDATE pagamentos
+                SET status = 'Pendente', dias_atraso = 0
+                WHERE status IN ('Pendente', 'Atrasado')
+                AND vencimento_ordinal >= ?
+                AND (status = 'Atrasado' OR dias_atraso != 0)
+            """, (hoje,))
+            reabertas = cursor.rowcount
+            
+            # Fora de configuracoes, para não invalidar o cache de configurações
+            cursor.execute("""
+                INSERT OR REPLACE INTO marcadores_execucao (chave, valor, updated_at)
+                VALUES (?, ?, ?)
+            """, (self.CHAVE_ULTIMO_RECALCULO, data_referencia.isoformat(), datetime.now().isoformat()))
+            
+            conn.commit()
+            conn.close()
+            
+            print(f"✅ Status recalculado: {atrasadas} em atraso, {reabertas} reabertas, "
+                  f"{dias_atualizados} com dias de atraso atualizados")
+            return {
+                'success': True,
+                'mensalidades_atualizadas': atrasadas + reabertas + dias_atualizados,
+                'atrasadas': atrasadas,
+                'reabertas': reabertas,
+                'dias_atualizados': dias_atualizados
+            }
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            conn.close()
+            print(f"❌ Erro ao recalcular status: {e}")
+            return {'success': False, 'error': str(e)}
+
+    def recalcular_status_se_necessario(self):
+        """Executa o recálculo de status uma vez por dia (chamado na inicialização)"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT valor FROM marcadores_execucao WHERE chave = ?",
+                           (self.CHAVE_ULTIMO_RECALCULO,))
+            row = cursor.fetchone()
+            conn.close()
+        except sqlite3.Error as e:
+            conn.close()
+            print(f"⚠️ Erro ao verificar último recálculo: {e}")
+            row = None
+        
+        if row and row[0] == date.today().isoformat():
+            return {'success': True, 'mensalidades_atualizadas': 0, 'executado': False}
+        
+        resultado = self.recalcular_status_mensalidades()
+        resultado['executado'] = True
+        return resultado
+
+    def recalcular_todas_mensalidades(self):
+        """Recalcula sob demanda o status de todas as mensalidades não pagas"""
+        resultado = self.recalcular_status_mensalidades()
+        if resultado['success']:
+            resultado['atualizadas'] = resultado['mensalidades_atualizadas']
+        return resultado
+
     def verificar_mensalidades_aluno(self, aluno_id):
         """Verifica quantas mensalidades o aluno tem"""
         conn = self.db.get_connection()
@@ -0,0 +1,183 @@
+"""
+Modelo colunar das mensalidades para a tela financeira.
+
+Cada coluna é um array NumPy, e filtros, estatísticas e ordenação viram
+operações vetorizadas (máscaras booleanas, bincount e argsort). Textos
+(nomes, observações) não ficam aqui: a grade busca os detalhes por id
+apenas das linhas visíveis.
+"""
+
+import numpy as np
+
+from utils.formatters import date_to_ordinal
+
+# Códigos inteiros de status (posição na tupla)
+STATUS_MENSALIDADE = ('Pendente', 'Atrasado', 'Pago', 'Outro')
+CODIGO_STATUS = {status: codigo for codigo, status in enumerate(STATUS_MENSALIDADE)}
+
+# Colunas, na ordem da consulta, e seus tipos
+COLUNAS = (
+    ('id', np.int64),
+    ('aluno_id', np.int32),
+    ('turma_id', np.int32),
+    ('status', np.int8),
+    ('vencimento', np.int32),
+    ('mes', np.int8),
+    ('ano', np.int16),
+    ('referencia', np.int32),
+    ('valor_original', np.float64),
+    ('desconto', np.float64),
+    ('multa', np.float64),
+    ('valor_final', np.float64),
+    ('dias_atraso', np.int32),
+    ('ordem_aluno', np.int32),
+    ('ordem_turma', np.int32),
+)
+
+# Coluna da grade -> coluna do modelo usada como chave de ordenação
+CHAVES_ORDENACAO = {
+    'id': 'id',
+    'aluno': 'ordem_aluno',
+    'turma': 'ordem_turma',
+    'mes_ref': 'referencia',
+    'vencimento': 'vencimento',
+    'valor_original': 'valor_original',
+    'desconto': 'desconto',
+    'multa': 'multa',
+    'valor_final': 'valor_final',
+    'status': 'status',
+    'dias_atraso': 'dias_atraso',
+}
+
+
+class ModeloPagamentos:
+    """Mensalidades em colunas NumPy (uma posição por mensalidade)"""
+
+    def __init__(self, linhas):
+        colunas = list(zip(*linhas)) if linhas else [()] * len(COLUNAS)
+        for (nome, tipo), valores in zip(COLUNAS, colunas):
+            setattr(self, nome, np.array(valores, dtype=tipo))
+
+        self._ordens = {}
+        self._posicao_por_id = None
+
+        # Status em ordem alfabética para ordenar a coluna como texto
+        self._status_alfabetico = np.argsort(np.argsort(np.array(STATUS_MENSALIDADE))).astype(np.int8)
+
+    def __len__(self):
+        return len(self.id)
+
+    def mascara(self, filtros=None, posicoes=None):
+        """Máscara booleana com os mesmos filtros de FinanceiroService._montar_filtros_mensalidades.
+
+        Com `posicoes`, avalia só essas linhas (a máscara tem o tamanho delas).
+        """
+        filtros = {chave: valor for chave, valor in (filtros or {}).items()
+                   if valor not in (None, '', 'Todos', 'Todas')}
+
+        def coluna(nome):
+            valores = getattr(self, nome)
+            return valores if posicoes is None else valores[posicoes]
+
+        mascara = np.ones(len(self) if posicoes is None else len(posicoes), dtype=bool)
+
+        if 'status' in filtros:
+            mascara &= coluna('status') == CODIGO_STATUS.get(filtros['status'], CODIGO_STATUS['Outro'])
+        if 'mes' in filtros:
+            mascara &= coluna('mes') == int(filtros['mes'])
+        if 'ano' in filtros:
+            mascara &= coluna('ano') == int(filtros['ano'])
+        if 'turma_id' in filtros:
+            mascara &= coluna('turma_id') == int(filtros['turma_id'])
+        if 'aluno_id' in filtros:
+            mascara &= coluna('aluno_id') == int(filtros['aluno_id'])
+        if 'valor_min' in filtros:
+            mascara &= coluna('valor_final') >= float(filtros['valor_min'])
+        if 'valor_max' in filtros:
+            mascara &= coluna('valor_final') <= float(filtros['valor_max'])
+        if 'data_inicio' in filtros:
+            mascara &= coluna('vencimento') >= date_to_ordinal(filtros['data_inicio'])
+        if 'data_fim' in filtros:
+            mascara &= coluna('vencimento') <= date_to_ordinal(filtros['data_fim'])
+
+        return mascara
+
+    def filtrar(self, filtros=None):
+        """Posições das mensalidades que atendem aos filtros"""
+        return np.flatnonzero(self.mascara(filtros))
+
+    def ordem(self, coluna='vencimento', decrescente=True):
+        """Ordem completa do modelo pela coluna da grade (desempate pelo id), em cache"""
+        if (coluna, decrescente) not in self._ordens:
+            chave = getattr(self, CHAVES_ORDENACAO[coluna])
+            if coluna == 'status':
+                chave = self._status_alfabetico[chave]
+
+            ordem = np.lexsort((self.id, chave))
+            self._ordens[(coluna, decrescente)] = ordem[::-1] if decrescente else ordem
+        return self._ordens[(coluna, decrescente)]
+
+    def ordenar(self, posicoes, coluna='vencimento', decrescente=True):
+        """Reordena as posições pela coluna da grade.
+
+        Usa a ordem completa em cache: marcar as posições e percorrê-la é
+        O(n), sem novo argsort a cada filtro.
+        """
+        ordem = self.ordem(coluna, decrescente)
+        selecionadas = np.zeros(len(self), dtype=bool)
+        selecionadas[posicoes] = True
+        return ordem[selecionadas[ordem]]
+
+    def posicao(self, mensalidade_id):
+        """Posição da mensalidade no modelo (None se não estiver carregada)"""
+        if self._posicao_por_id is None:
+            self._posicao_por_id = {int(i): posicao for posicao, i in enumerate(self.id)}
+        return self._posicao_por_id.get(int(mensalidade_id))
+
+    def atualizar_mensalidade(self, mensalidade):
+        """Grava em sua posição os valores de uma mensalidade alterada (ex.: após o pagamento).
+
+        Recebe o dict de FinanceiroService.listar_mensalidades e retorna a
+        posição, ou None se a mensalidade não faz parte do modelo. As ordens
+        em cache das colunas alteradas são descartadas.
+        """
+        posicao = self.posicao(mensalidade['id'])
+        if posicao is None:
+            return None
+
+        novos = {
+            'status': CODIGO_STATUS.get(mensalidade.get('status'), CODIGO_STATUS['Outro']),
+            'valor_original': mensalidade.get('valor_original') or 0,
+            'desconto': mensalidade.get('desconto_aplicado') or 0,
+            'multa': mensalidade.get('multa_aplicada') or 0,
+            'valor_final': mensalidade.get('valor_final') or 0,
+            'dias_atraso': mensalidade.get('dias_atraso') or 0,
+        }
+        alteradas = set()
+        for nome, valor in novos.items():
+            coluna = getattr(self, nome)
+            if coluna[posicao] != valor:
+                coluna[posicao] = valor
+                alteradas.add(nome)
+
+        for chave in [chave for chave in self._ordens if CHAVES_ORDENACAO[chave[0]] in alteradas]:
+            del self._ordens[chave]
+
+        return posicao
+
+    def resumir(self, posicoes):
+        """Totais no formato de FinanceiroService.resumir_mensalidades"""
+        status = self.status[posicoes]
+        valores = self.valor_final[posicoes]
+
+        contagem = np.bincount(status, minlength=len(STATUS_MENSALIDADE))
+        soma = np.bincount(status, weights=valores, minlength=len(STATUS_MENSALIDADE))
+
+        return {
+            'total': int(len(posicoes)),
+            'valor_total': float(valores.sum()),
+            'pendentes': int(contagem[CODIGO_STATUS['Pendente']]),
+            'atrasadas': int(contagem[CODIGO_STATUS['Atrasado']]),
+            'pagas': int(contagem[CODIGO_STATUS['Pago']]),
+            'valor_pago': float(soma[CODIGO_STATUS['Pago']])
+        }
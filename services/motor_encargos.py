@@ -0,0 +1,118 @@
+"""
+Motor único de multa e desconto de pontualidade.
+
+Usa a config_financeiras do cache de configurações e calcula em lote:
+recebe arrays de valor original, vencimento e pagamento e devolve arrays
+de desconto, multa e valor final. Grade, diálogo de pagamento, prévia das
+configurações e cálculo em lote das mensalidades em aberto usam as mesmas
+regras:
+
+- desconto de pontualidade (valor fixo) se pago no vencimento ou até
+  `dias_limite_desconto` dias antes;
+- multa de `multa_por_dia` por dia de atraso depois de `dias_carencia_multa`
+  dias, só para mensalidades que podem receber multa.
+"""
+
+from datetime import date
+
+import numpy as np
+
+from services.cache_configuracoes import CacheConfiguracoes
+from utils.formatters import date_to_ordinal
+
+# Ordinal usado para "sem data" (date.toordinal() começa em 1)
+SEM_DATA = 0
+
+CONFIG_PADRAO = {
+    'desconto_pontualidade': 10.0,
+    'dias_limite_desconto': 5,
+    'multa_por_dia': 2.0,
+    'dias_carencia_multa': 30,
+}
+
+
+def ordinais(datas):
+    """Array de ordinais a partir de ordinais, date ou 'AAAA-MM-DD' (vazio → SEM_DATA)"""
+    if isinstance(datas, np.ndarray) and np.issubdtype(datas.dtype, np.integer):
+        return datas.astype(np.int64)
+    if datas is None or isinstance(datas, (str, date, int, np.integer)):
+        datas = [datas]
+    valores = [int(d) if isinstance(d, (int, np.integer)) else date_to_ordinal(d) for d in datas]
+    return np.array([SEM_DATA if v is None else v for v in valores], dtype=np.int64)
+
+
+def obter_motor(banco=None):
+    """Motor com a configuração atual (refeito só quando a configuração muda)"""
+    return CacheConfiguracoes(banco).motor()
+
+
+class MotorEncargos:
+    """Regras de multa e desconto com a configuração já carregada"""
+
+    def __init__(self, config=None):
+        config = {**CONFIG_PADRAO, **(config or {})}
+        self.config = config
+        self.desconto_pontualidade = float(config['desconto_pontualidade'] or 0)
+        self.dias_limite_desconto = int(config['dias_limite_desconto'] or 0)
+        self.multa_por_dia = float(config['multa_por_dia'] or 0)
+        self.dias_carencia_multa = int(config['dias_carencia_multa'] or 0)
+
+    def calcular(self, valores_originais, vencimentos, pagamentos, pode_receber_multa=True):
+        """Desconto, multa e valor final de várias mensalidades de uma vez.
+
+        Datas em ordinais (date.toordinal), date ou 'AAAA-MM-DD'; escalares
+        valem para todas as posições (ex.: a mesma data de pagamento).
+        Sem data de pagamento não há desconto nem multa.
+        """
+        valores, vencimento, pagamento, pode_multa = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(valores_originais, dtype=np.float64)),
+            ordinais(vencimentos),
+            ordinais(pagamentos),
+            np.atleast_1d(np.asarray(pode_receber_multa, dtype=bool))
+        )
+
+        com_datas = (vencimento != SEM_DATA) & (pagamento != SEM_DATA)
+        dias_diferenca = np.where(com_datas, pagamento - vencimento, 0)
+
+        com_desconto = com_datas & (dias_diferenca <= 0) & (-dias_diferenca <= self.dias_limite_desconto)
+        desconto = np.where(com_desconto, self.desconto_pontualidade, 0.0)
+
+        dias_multa = np.where(com_datas & pode_multa, dias_diferenca - self.dias_carencia_multa, 0).clip(min=0)
+        multa = np.round(dias_multa * self.multa_por_dia, 2)
+
+        return {
+            'dias_diferenca': dias_diferenca,
+            'dias_multa': dias_multa,
+            'desconto': desconto,
+            'multa': multa,
+            'valor_final': np.maximum(valores - desconto + multa, 0)
+        }
+
+    def calcular_um(self, valor_original, data_vencimento, data_pagamento, pode_receber_multa=True):
+        """Mesmo cálculo para uma mensalidade, com a observação para exibir"""
+        calculo = self.calcular(valor_original, data_vencimento, data_pagamento, pode_receber_multa)
+        dias_diferenca = int(calculo['dias_diferenca'][0])
+        dias_multa = int(calculo['dias_multa'][0])
+        desconto = float(calculo['desconto'][0])
+        multa = float(calculo['multa'][0])
+
+        if dias_diferenca <= 0:
+            if desconto:
+                observacao = f"Desconto por pontualidade aplicado (pago {abs(dias_diferenca)} dia(s) antes do vencimento)"
+            else:
+                observacao = "Pago no vencimento"
+        elif multa:
+            observacao = f"Multa aplicada ({dias_multa} dias × R$ {self.multa_por_dia:.2f})"
+        elif not pode_receber_multa:
+            observacao = f"Pago com {dias_diferenca} dias de atraso (sem multa - matrícula anterior)"
+        else:
+            observacao = f"Pago com {dias_diferenca} dias de atraso (dentro do período de carência)"
+
+        return {
+            'valor_final': float(calculo['valor_final'][0]),
+            'desconto_aplicado': desconto,
+            'multa_aplicada': multa,
+            'dias_diferenca': dias_diferenca,
+            'dias_multa': dias_multa,
+            'observacao': observacao
+        }
@@ -0,0 +1,318 @@
+from database.connection import BancoSomenteLeitura
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import importlib
+import threading
+import sqlite3
+import json
+import os
+from datetime import datetime
+
+# tipo -> (módulo, classe, método, descrição, extensão)
+# O método recebe o caminho de saída como primeiro argumento
+TIPOS_TRABALHO = {
+    'turmas_excel': ('services.exportacao_service', 'ExportacaoService',
+                     'exportar_turmas_excel', 'Turmas (Excel)', 'xlsx'),
+    'alunos_excel': ('services.exportacao_service', 'ExportacaoService',
+                     'exportar_alunos_excel', 'Alunos e Responsáveis (Excel)', 'xlsx'),
+    'financeiro_excel': ('services.exportacao_service', 'ExportacaoService',
+                         'exportar_financeiro_excel', 'Financeiro (Excel)', 'xlsx'),
+    'backup_excel': ('services.exportacao_service', 'ExportacaoService',
+                     'exportar_backup_dados_excel', 'Backup Completo (Excel)', 'xlsx'),
+    'inadimplencia_pdf': ('services.exportacao_service', 'ExportacaoService',
+                          'gerar_relatorio_inadimplencia_pdf', 'Inadimplência (PDF)', 'pdf'),
+    'turmas_pdf': ('services.exportacao_service', 'ExportacaoService',
+                   'gerar_relatorio_turmas_pdf', 'Turmas (PDF)', 'pdf'),
+    'mensalidades_csv': ('services.export_service', 'ExportService',
+                         'exportar_mensalidades_banco_csv', 'Mensalidades (CSV)', 'csv'),
+}
+
+# Relatórios do fechamento do mês, enfileirados de uma vez
+PACOTE_MENSAL = ('financeiro_excel', 'inadimplencia_pdf', 'turmas_pdf', 'mensalidades_csv', 'backup_excel')
+
+MAX_PROCESSOS = max(1, min(4, (os.cpu_count() or 2) - 1))
+PASTA_EXPORTACOES = "exportacoes"
+
+_pool = None
+_pool_lock = threading.Lock()
+_aceitando = False          # False depois de encerrar_processos (fechando o sistema)
+_em_execucao = {}           # id do trabalho -> Future
+_orfaos_liberados = set()   # bancos cujos 'Executando' de sessões anteriores já voltaram à fila
+
+# Só no processo de trabalho: uma conexão somente leitura por banco
+_bancos_processo = {}
+
+
+def _executar_trabalho(db_path, tipo, arquivo, parametros):
+    """Roda no processo de trabalho: uma exportação com conexão somente leitura"""
+    banco = _bancos_processo.get(db_path)
+    if banco is None:
+        banco = _bancos_processo[db_path] = BancoSomenteLeitura(db_path)
+
+    modulo, classe, metodo = TIPOS_TRABALHO[tipo][:3]
+    servico = getattr(importlib.import_module(modulo), classe)()
+    servico.db = banco
+
+    inicio = datetime.now()
+    resultado = getattr(servico, metodo)(arquivo, **parametros)
+    
+    # Cada exportação conta os registros com um nome próprio
+    registros = next((resultado[chave] for chave in ('registros', 'linhas', 'inadimplentes', 'turmas')
+                      if chave in resultado), None)
+    return {
+        'success': resultado.get('success', False),
+        'error': resultado.get('error'),
+        'registros': registros,
+        'iniciado_em': inicio.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def obter_pool():
+    """Pool de processos compartilhado (criado sob demanda)"""
+    global _pool, _aceitando
+    with _pool_lock:
+        if _pool is None:
+            # spawn: mesmo comportamento no Windows e sem herdar threads/conexões do Tk
+            _pool = ProcessPoolExecutor(max_workers=MAX_PROCESSOS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+            _aceitando = True
+        return _pool
+
+
+def _descartar_pool_quebrado(pool):
+    """Um processo morreu no meio do trabalho: o próximo despacho cria outro pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def encerrar_processos(esperar=False):
+    """Encerra o pool; trabalhos que não começaram voltam para a fila no banco"""
+    global _pool, _aceitando
+    with _pool_lock:
+        pool, _pool = _pool, None
+        _aceitando = False
+    if pool is not None:
+        pool.shutdown(wait=esperar, cancel_futures=True)
+
+
+class TrabalhoExportacaoService:
+    """Fila de exportações executadas em processos separados.
+
+    Cada pedido vira uma linha em trabalhos_exportacao ('Pendente'); até
+    MAX_PROCESSOS rodam ao mesmo tempo ('Executando'), cada processo com a
+    sua conexão somente leitura. O processo da interface só grava o status
+    e o arquivo gerado ('Concluído' ou 'Erro') quando cada um termina.
+    """
+
+    def __init__(self):
+        # Só o processo da interface usa o banco de leitura e escrita
+        from database.connection import db
+        self.db = db
+        os.makedirs(PASTA_EXPORTACOES, exist_ok=True)
+
+    def _arquivo_padrao(self, tipo, trabalho_id):
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return os.path.abspath(os.path.join(
+            PASTA_EXPORTACOES, f"{tipo}_{timestamp}_{trabalho_id}.{TIPOS_TRABALHO[tipo][4]}"
+        ))
+
+    def enfileirar(self, tipo, parametros=None, arquivo=None):
+        """Enfileira um relatório; retorna {'success', 'id'}"""
+        resultado = self.enfileirar_pacote([(tipo, parametros, arquivo)])
+        if not resultado['success']:
+            return resultado
+        return {'success': True, 'id': resultado['ids'][0]}
+
+    def enfileirar_pacote(self, pedidos):
+        """Enfileira vários relatórios de uma vez e começa a executá-los.
+
+        `pedidos`: tipos ou tuplas (tipo, parametros[, arquivo]).
+        """
+        normalizados = []
+        for pedido in pedidos:
+            if isinstance(pedido, str):
+                pedido = (pedido,)
+            tipo, parametros, arquivo = (tuple(pedido) + (None, None))[:3]
+            if tipo not in TIPOS_TRABALHO:
+                return {'success': False, 'error': f'Tipo de relatório desconhecido: {tipo}'}
+            normalizados.append((tipo, json.dumps(parametros or {}), arquivo))
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            ids = []
+            for tipo, parametros, arquivo in normalizados:
+                cursor.execute("""
+                    INSERT INTO trabalhos_exportacao (tipo, parametros, arquivo)
+                    VALUES (?, ?, ?)
+                """, (tipo, parametros, arquivo))
+                trabalho_id = cursor.lastrowid
+                if not arquivo:
+                    cursor.execute("UPDATE trabalhos_exportacao SET arquivo = ? WHERE id = ?",
+                                   (self._arquivo_padrao(tipo, trabalho_id), trabalho_id))
+                ids.append(trabalho_id)
+
+            conn.commit()
+            conn.close()
+
+        except sqlite3.Error as e:
+            conn.rollback()
+            conn.close()
+            return {'success': False, 'error': f'Erro ao enfileirar relatórios: {str(e)}'}
+
+        print(f"📦 {len(ids)} relatório(s) na fila de exportação")
+        self.despachar()
+        return {'success': True, 'ids': ids}
+
+    def despachar(self):
+        """Envia trabalhos pendentes ao pool enquanto houver processo livre"""
+        db_path = str(self.db.db_path)
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            with _pool_lock:
+                # 'Executando' de uma sessão anterior (app fechado no meio) volta à fila
+                if db_path not in _orfaos_liberados:
+                    cursor.execute("UPDATE trabalhos_exportacao SET status = 'Pendente' WHERE status = 'Executando'")
+                    conn.commit()
+                    _orfaos_liberados.add(db_path)
+
+                vagas = MAX_PROCESSOS - len(_em_execucao)
+                if vagas <= 0:
+                    conn.close()
+                    return
+
+                cursor.execute("""
+                    SELECT id, tipo, arquivo, parametros FROM trabalhos_exportacao
+                    WHERE status = 'Pendente'
+                    ORDER BY id
+                    LIMIT ?
+                """, (vagas,))
+                pendentes = cursor.fetchall()
+
+                cursor.executemany("""
+                    UPDATE trabalhos_exportacao
+                    SET status = 'Executando', iniciado_em = CURRENT_TIMESTAMP, erro = NULL
+                    WHERE id = ?
+                """, [(trabalho_id,) for trabalho_id, *_ in pendentes])
+                conn.commit()
+                conn.close()
+
+                for trabalho_id, tipo, arquivo, parametros in pendentes:
+                    _em_execucao[trabalho_id] = None
+
+            pool = obter_pool()
+            for trabalho_id, tipo, arquivo, parametros in pendentes:
+                try:
+                    future = pool.submit(_executar_trabalho, db_path, tipo, arquivo, json.loads(parametros))
+                except RuntimeError as e:
+                    # Pool encerrado (ou quebrado) entre a seleção e o envio
+                    print(f"⚠️ Exportação {trabalho_id} volta para a fila: {e}")
+                    if isinstance(e, BrokenProcessPool):
+                        _descartar_pool_quebrado(pool)
+                    self._concluir(trabalho_id, None)
+                    continue
+                with _pool_lock:
+                    _em_execucao[trabalho_id] = future
+                future.add_done_callback(lambda f, trabalho_id=trabalho_id, pool=pool:
+                                         self._concluir(trabalho_id, f, pool))
+
+        except sqlite3.Error as e:
+            conn.close()
+            print(f"❌ Erro ao despachar exportações: {e}")
+
+    def _concluir(self, trabalho_id, future, pool=None):
+        """Grava o resultado de um trabalho (chamado pelo pool ao terminar).
+
+        Sem `future` (ou cancelado), o trabalho volta para a fila.
+        """
+        with _pool_lock:
+            _em_execucao.pop(trabalho_id, None)
+
+        try:
+            resultado = future.result() if future is not None else None
+        except CancelledError:
+            resultado = None
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                _descartar_pool_quebrado(pool)
+            resultado = {'success': False, 'error': f'{type(e).__name__}: {e}'}
+
+        conn = self.db.get_connection()
+        try:
+            if resultado is None:
+                # Pool encerrado antes de começar: continua na fila
+                conn.execute("UPDATE trabalhos_exportacao SET status = 'Pendente' WHERE id = ?", (trabalho_id,))
+            elif resultado.get('success'):
+                conn.execute("""
+                    UPDATE trabalhos_exportacao
+                    SET status = 'Concluído', registros = ?, iniciado_em = ?,
+                        concluido_em = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (resultado['registros'], resultado['iniciado_em'], trabalho_id))
+            else:
+                conn.execute("""
+                    UPDATE trabalhos_exportacao
+                    SET status = 'Erro', erro = ?, concluido_em = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (resultado.get('error') or 'Erro desconhecido', trabalho_id))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"❌ Erro ao registrar exportação {trabalho_id}: {e}")
+        finally:
+            conn.close()
+
+        if resultado is not None:
+            print(f"{'✅' if resultado.get('success') else '❌'} Exportação {trabalho_id} finalizada")
+            if _aceitando or _pool is None:
+                self.despachar()
+
+    def listar_trabalhos(self, limite=50):
+        """Trabalhos mais recentes, com status e arquivo"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                SELECT id, tipo, status, arquivo, registros, erro, criado_em, iniciado_em, concluido_em
+                FROM trabalhos_exportacao
+                ORDER BY id DESC
+                LIMIT ?
+            """, (limite,))
+
+            trabalhos = [{
+                'id': row[0],
+                'tipo': row[1],
+                'descricao': TIPOS_TRABALHO[row[1]][3] if row[1] in TIPOS_TRABALHO else row[1],
+                'status': row[2],
+                'arquivo': row[3],
+                'registros': row[4],
+                'erro': row[5],
+                'criado_em': row[6],
+                'iniciado_em': row[7],
+                'concluido_em': row[8]
+            } for row in cursor.fetchall()]
+
+            conn.close()
+            return trabalhos
+
+        except sqlite3.Error as e:
+            conn.close()
+            print(f"❌ Erro ao listar exportações: {e}")
+            return []
+
+    def em_aberto(self):
+        """Quantidade de trabalhos pendentes ou em execução"""
+        conn = self.db.get_connection()
+        try:
+            return conn.execute("""
+                SELECT COUNT(*) FROM trabalhos_exportacao
+                WHERE status IN ('Pendente', 'Executando')
+            """).fetchone()[0]
+        finally:
+            conn.close()
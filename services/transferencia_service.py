@@ -2,58 +2,19 @@ from database.connection import db
 import sqlite3
 from datetime import datetime, date
 
+# Ids por comando, abaixo do limite de parâmetros do SQLite
+TAMANHO_LOTE_IDS = 500
+
+
+def _lotes(ids):
+    """Fatias de `ids` para cláusulas IN (?, ?, ...)"""
+    ids = list(ids)
+    for inicio in range(0, len(ids), TAMANHO_LOTE_IDS):
+        yield ids[inicio:inicio + TAMANHO_LOTE_IDS]
+
 class TransferenciaService:
     def __init__(self):
         self.db = db
-        # Verificar e corrigir estrutura da tabela
-        self._verificar_estrutura_historico()
-
-    def _verificar_estrutura_historico(self):
-        """Verifica e corrige estrutura da tabela de histórico"""
-        try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            # Verificar se tabela existe e tem estrutura correta
-            cursor.execute("""
-                SELECT sql FROM sqlite_master 
-                WHERE type='table' AND name='historico_transferencias'
-            """)
-            
-            result = cursor.fetchone()
-            
-            if not result or 'data_transferencia TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP' not in result[0]:
-                print("🔧 Corrigindo estrutura da tabela de transferências...")
-                
-                # Recriar tabela com estrutura correta
-                cursor.execute("DROP TABLE IF EXISTS historico_transferencias")
-                
-                cursor.execute("""
-                    CREATE TABLE historico_transferencias (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        aluno_id INTEGER NOT NULL,
-                        turma_origem_id INTEGER,
-                        turma_destino_id INTEGER,
-                        motivo TEXT NOT NULL DEFAULT 'Transferência',
-                        observacoes TEXT,
-                        data_transferencia TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                        tipo_transferencia TEXT DEFAULT 'TRANSFERENCIA',
-                        usuario TEXT DEFAULT 'Sistema',
-                        FOREIGN KEY (aluno_id) REFERENCES alunos (id),
-                        FOREIGN KEY (turma_origem_id) REFERENCES turmas (id),
-                        FOREIGN KEY (turma_destino_id) REFERENCES turmas (id)
-                    )
-                """)
-                
-                conn.commit()
-                print("✅ Tabela de transferências corrigida!")
-            
-            conn.close()
-            
-        except sqlite3.Error as e:
-            if 'conn' in locals():
-                conn.close()
-            print(f"❌ Erro ao verificar estrutura: {e}")
 
     def listar_turmas_para_filtro(self):
         """Lista turmas para filtros"""
@@ -223,6 +184,159 @@ class TransferenciaService:
             print(f"❌ Erro geral na transferência: {e}")
             return {'success': False, 'error': f'Erro inesperado: {str(e)}'}
 
+    def _validar_lote(self, cursor, aluno_ids, turma_origem_id, turma_destino_id):
+        """Valida a seleção inteira com uma consulta por tabela.
+
+        Retorna (problemas_gerais, validos, erros, turmas), onde `validos` é
+        a lista de (id, nome) transferíveis e `erros` tem um dict por aluno.
+        """
+        problemas_gerais = []
+        
+        if turma_origem_id == turma_destino_id:
+            problemas_gerais.append('Turma de origem deve ser diferente da turma de destino')
+        
+        cursor.execute("SELECT id, nome FROM turmas WHERE id IN (?, ?)", (turma_origem_id, turma_destino_id))
+        turmas = dict(cursor.fetchall())
+        if turma_destino_id not in turmas:
+            problemas_gerais.append('Turma de destino não encontrada')
+        
+        # Alunos selecionados em poucos SELECTs (IN com até TAMANHO_LOTE_IDS ids)
+        encontrados = {}
+        for lote in _lotes(dict.fromkeys(aluno_ids)):
+            marcadores = ", ".join("?" * len(lote))
+            cursor.execute(f"""
+                SELECT id, nome, status, turma_id
+                FROM alunos
+                WHERE id IN ({marcadores})
+            """, lote)
+            encontrados.update((row[0], row[1:]) for row in cursor.fetchall())
+        
+        validos, erros = [], []
+        for aluno_id in dict.fromkeys(aluno_ids):
+            if aluno_id not in encontrados:
+                erros.append({'aluno_id': aluno_id, 'nome': None, 'error': 'Aluno não encontrado'})
+                continue
+            
+            nome, status, turma_id = encontrados[aluno_id]
+            if (status or '').lower() != 'ativo':
+                erros.append({'aluno_id': aluno_id, 'nome': nome, 'error': f'Aluno {nome} não está ativo'})
+            elif turma_id != turma_origem_id:
+                erros.append({'aluno_id': aluno_id, 'nome': nome,
+                              'error': 'Aluno não pertence à turma de origem especificada'})
+            else:
+                validos.append((aluno_id, nome))
+        
+        return problemas_gerais, validos, erros, turmas
+
+    def validar_transferencia_lote(self, aluno_ids, turma_origem_id, turma_destino_id):
+        """Valida uma seleção de alunos sem transferir (mesmas regras do lote)"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            problemas_gerais, validos, erros, _ = self._validar_lote(
+                cursor, aluno_ids, turma_origem_id, turma_destino_id
+            )
+            conn.close()
+            
+            return {
+                'success': not problemas_gerais and not erros,
+                'problemas': problemas_gerais,
+                'validos': [aluno_id for aluno_id, _ in validos],
+                'erros': erros
+            }
+            
+        except sqlite3.Error as e:
+            conn.close()
+            return {
+                'success': False,
+                'problemas': [f'Erro no banco: {str(e)}'],
+                'validos': [],
+                'erros': []
+            }
+
+    def transferir_alunos_lote(self, aluno_ids, turma_origem_id, turma_destino_id,
+                               motivo, observacoes, progresso=None):
+        """Transfere vários alunos numa única transação.
+
+        A seleção é validada em lote; os alunos válidos mudam de turma com um
+        UPDATE por lote de ids e o histórico é gravado com executemany. Alunos inválidos
+        não impedem os demais e voltam em 'erros'. `progresso(feitos, total,
+        mensagem)` é chamado a cada etapa.
+        """
+        aluno_ids = list(dict.fromkeys(aluno_ids))
+        total = len(aluno_ids)
+        
+        def avisar(feitos, mensagem):
+            if progresso:
+                progresso(feitos, total, mensagem)
+        
+        try:
+            with self.db.transacao() as conn:
+                cursor = conn.cursor()
+                
+                avisar(0, f"Validando {total} aluno(s)...")
+                problemas_gerais, validos, erros, turmas = self._validar_lote(
+                    cursor, aluno_ids, turma_origem_id, turma_destino_id
+                )
+                
+                if problemas_gerais:
+                    return {
+                        'success': False,
+                        'error': '; '.join(problemas_gerais),
+                        'transferidos': [],
+                        'erros': erros
+                    }
+                
+                if validos:
+                    # Um UPDATE por lote de ids; as condições repetem a
+                    # validação para o caso de outro processo ter mudado algo
+                    avisar(0, f"Transferindo {len(validos)} aluno(s)...")
+                    alterados = 0
+                    for lote in _lotes(aluno_id for aluno_id, _ in validos):
+                        marcadores = ", ".join("?" * len(lote))
+                        cursor.execute(f"""
+                            UPDATE alunos
+                            SET turma_id = ?
+                            WHERE id IN ({marcadores})
+                              AND turma_id = ? AND LOWER(status) = 'ativo'
+                        """, [turma_destino_id] + lote + [turma_origem_id])
+                        alterados += cursor.rowcount
+                    
+                    if alterados != len(validos):
+                        raise sqlite3.IntegrityError(
+                            'Alunos da seleção foram alterados durante a transferência; tente novamente'
+                        )
+                    
+                    avisar(len(validos), "Registrando histórico...")
+                    data_atual = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    cursor.executemany("""
+                        INSERT INTO historico_transferencias 
+                        (aluno_id, turma_origem_id, turma_destino_id, motivo, observacoes, data_transferencia, tipo_transferencia, usuario)
+                        VALUES (?, ?, ?, ?, ?, ?, 'TRANSFERENCIA', 'Sistema')
+                    """, [(aluno_id, turma_origem_id, turma_destino_id, motivo or 'Transferência',
+                           observacoes or '', data_atual) for aluno_id, _ in validos])
+            
+            avisar(total, f"{len(validos)} aluno(s) transferido(s)")
+            print(f"✅ Transferência em lote: {len(validos)} transferido(s), {len(erros)} erro(s)")
+            
+            return {
+                'success': bool(validos),
+                'transferidos': [{'id': aluno_id, 'nome': nome} for aluno_id, nome in validos],
+                'erros': erros,
+                'turma_origem': turmas.get(turma_origem_id, 'N/A'),
+                'turma_destino': turmas.get(turma_destino_id, 'N/A')
+            }
+            
+        except sqlite3.Error as e:
+            print(f"❌ Erro SQL na transferência em lote: {e}")
+            return {
+                'success': False,
+                'error': f'Erro no banco de dados: {str(e)}',
+                'transferidos': [],
+                'erros': []
+            }
+
     def obter_historico_transferencias(self, limite=10):
         """Obtém histórico de transferências"""
         conn = self.db.get_connection()
@@ -0,0 +1,210 @@
+from database.connection import db
+from services.turma_service import TurmaService
+from services.transferencia_service import TransferenciaService
+from services.mensalidade_service import MensalidadeService
+import sqlite3
+import re
+
+class ViradaAnoService:
+    """Encerramento do ano letivo: turmas do ano seguinte, promoção e mensalidades.
+
+    Tudo roda numa única transação (db.transacao): as turmas são criadas
+    com o TurmaService, os alunos ativos de cada turma são promovidos com
+    TransferenciaService.transferir_alunos_lote, os concluintes da última
+    série ficam inativos e as mensalidades do novo ano são geradas em lote
+    pelo MensalidadeService. Se qualquer etapa falhar, nada é gravado.
+    """
+
+    # Séries sem número seguem este mapa; "Nº Ano" vira "(N+1)º Ano"
+    PROXIMA_SERIE = {'Infantil': '1º Ano'}
+    ULTIMO_ANO = 9
+    MESES_ANO_LETIVO = 10  # março a dezembro
+    MOTIVO = 'Promoção para próxima série'
+    STATUS_CONCLUINTE = 'Inativo'
+
+    def __init__(self):
+        self.db = db
+        self.turma_service = TurmaService()
+        self.transferencia_service = TransferenciaService()
+        self.mensalidade_service = MensalidadeService()
+
+    def proxima_serie(self, serie):
+        """Série do ano seguinte, ou None quando o aluno conclui (última série)"""
+        serie = (serie or '').strip()
+        if serie in self.PROXIMA_SERIE:
+            return self.PROXIMA_SERIE[serie]
+
+        encontrado = re.fullmatch(r'(\d+)\s*º\s*Ano', serie)
+        if encontrado and int(encontrado.group(1)) < self.ULTIMO_ANO:
+            return f"{int(encontrado.group(1)) + 1}º Ano"
+        return None
+
+    def _nome_turma_destino(self, nome, serie, nova_serie):
+        """'5º Ano A' (5º Ano) → '6º Ano A'; nomes sem a série ganham o prefixo"""
+        if serie and serie in nome:
+            return nome.replace(serie, nova_serie, 1)
+        return f"{nova_serie} - {nome}"
+
+    def _montar_plano(self, cursor, ano_atual, reajuste_percentual=0):
+        """Lê as turmas do ano e seus alunos ativos e monta o plano da virada"""
+        ano_atual = str(ano_atual)
+        ano_novo = str(int(ano_atual) + 1)
+
+        cursor.execute("""
+            SELECT t.id, t.nome, t.serie, a.id, a.valor_mensalidade
+            FROM turmas t
+            LEFT JOIN alunos a ON a.turma_id = t.id AND a.status = 'Ativo'
+            WHERE t.ano_letivo = ?
+            ORDER BY t.nome, a.id
+        """, (ano_atual,))
+
+        turmas = {}
+        for turma_id, nome, serie, aluno_id, valor in cursor.fetchall():
+            turma = turmas.setdefault(turma_id, {
+                'origem_id': turma_id, 'origem_nome': nome, 'serie': serie,
+                'aluno_ids': [], 'com_mensalidade': 0
+            })
+            if aluno_id is not None:
+                turma['aluno_ids'].append(aluno_id)
+                turma['com_mensalidade'] += 1 if valor and valor > 0 else 0
+
+        # Turmas do novo ano que já existem são reaproveitadas (pelo nome)
+        cursor.execute("SELECT nome, id FROM turmas WHERE ano_letivo = ?", (ano_novo,))
+        existentes = dict(cursor.fetchall())
+
+        promocoes, concluintes = [], []
+        for turma in turmas.values():
+            nova_serie = self.proxima_serie(turma['serie'])
+            if nova_serie is None:
+                concluintes.append(turma)
+                continue
+
+            turma['destino_serie'] = nova_serie
+            turma['destino_nome'] = self._nome_turma_destino(turma['origem_nome'], turma['serie'], nova_serie)
+            turma['destino_id'] = existentes.get(turma['destino_nome'])
+            promocoes.append(turma)
+
+        novas = {t['destino_nome'] for t in promocoes if t['destino_id'] is None}
+
+        return {
+            'success': bool(turmas),
+            'error': None if turmas else f'Nenhuma turma encontrada no ano letivo {ano_atual}',
+            'ano_atual': ano_atual,
+            'ano_novo': ano_novo,
+            'reajuste_percentual': reajuste_percentual or 0,
+            'promocoes': promocoes,
+            'concluintes': concluintes,
+            'turmas_novas': sorted(novas),
+            'total_promovidos': sum(len(t['aluno_ids']) for t in promocoes),
+            'total_concluintes': sum(len(t['aluno_ids']) for t in concluintes),
+            'mensalidades_previstas': sum(t['com_mensalidade'] for t in promocoes) * self.MESES_ANO_LETIVO
+        }
+
+    def planejar_virada(self, ano_atual, reajuste_percentual=0):
+        """Prévia (dry-run) da virada: nada é gravado"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            plano = self._montar_plano(cursor, ano_atual, reajuste_percentual)
+            conn.close()
+            return plano
+
+        except (sqlite3.Error, ValueError) as e:
+            conn.close()
+            return {'success': False, 'error': f'Erro ao planejar virada: {str(e)}'}
+
+    def executar_virada(self, ano_atual, reajuste_percentual=0, simular=False, progresso=None):
+        """Encerra `ano_atual`: cria as turmas do ano seguinte, promove os
+        alunos ativos, inativa os concluintes e gera as mensalidades do novo
+        ano, num único COMMIT.
+
+        Com `simular=True` apenas retorna o plano. `reajuste_percentual`
+        corrige a mensalidade dos promovidos (novo contrato).
+        `progresso(feitos, total, mensagem)` é chamado a cada turma.
+        """
+        if simular:
+            return self.planejar_virada(ano_atual, reajuste_percentual)
+
+        # Os serviços usados nas etapas gravam na mesma transação
+        for servico in (self.turma_service, self.transferencia_service, self.mensalidade_service):
+            servico.db = self.db
+
+        def avisar(feitos, total, mensagem):
+            if progresso:
+                progresso(feitos, total, mensagem)
+
+        try:
+            with self.db.transacao() as conn:
+                plano = self._montar_plano(conn.cursor(), ano_atual, reajuste_percentual)
+                if not plano['success']:
+                    return plano
+
+                ano_novo = plano['ano_novo']
+                total = len(plano['promocoes'])
+                turmas_criadas = {}
+                promovidos = []
+
+                print(f"🎓 Virada {plano['ano_atual']} → {ano_novo}: "
+                      f"{plano['total_promovidos']} aluno(s) em {total} turma(s)")
+
+                for feitos, turma in enumerate(plano['promocoes']):
+                    avisar(feitos, total, f"Promovendo {turma['origem_nome']}...")
+
+                    destino_id = turma['destino_id'] or turmas_criadas.get(turma['destino_nome'])
+                    if destino_id is None:
+                        resultado = self.turma_service.salvar_turma({
+                            'nome': turma['destino_nome'],
+                            'serie': turma['destino_serie'],
+                            'ano_letivo': ano_novo
+                        })
+                        if not resultado['success']:
+                            raise sqlite3.Error(resultado['error'])
+                        destino_id = turmas_criadas[turma['destino_nome']] = resultado['id']
+
+                    if not turma['aluno_ids']:
+                        continue
+
+                    resultado = self.transferencia_service.transferir_alunos_lote(
+                        turma['aluno_ids'], turma['origem_id'], destino_id, self.MOTIVO,
+                        f"Virada do ano letivo {plano['ano_atual']}→{ano_novo}"
+                    )
+                    if resultado.get('error') or resultado['erros']:
+                        erro = resultado.get('error') or resultado['erros'][0]['error']
+                        raise sqlite3.Error(f"{turma['origem_nome']}: {erro}")
+                    promovidos.extend(turma['aluno_ids'])
+
+                # Concluintes saem da escola: sem mensalidades do novo ano
+                concluintes = [aluno_id for turma in plano['concluintes'] for aluno_id in turma['aluno_ids']]
+                conn.executemany("UPDATE alunos SET status = ? WHERE id = ?",
+                                 [(self.STATUS_CONCLUINTE, aluno_id) for aluno_id in concluintes])
+
+                if plano['reajuste_percentual'] and promovidos:
+                    conn.executemany("""
+                        UPDATE alunos SET valor_mensalidade = ROUND(valor_mensalidade * ?, 2)
+                        WHERE id = ?
+                    """, [(1 + plano['reajuste_percentual'] / 100, aluno_id) for aluno_id in promovidos])
+
+                avisar(total, total, f"Gerando mensalidades de {ano_novo}...")
+                mensalidades = self.mensalidade_service.gerar_mensalidades_todas_turmas(ano_letivo=ano_novo)
+                if not mensalidades['success']:
+                    raise sqlite3.Error(mensalidades['error'])
+
+            print(f"🎉 Virada concluída: {len(promovidos)} promovido(s), "
+                  f"{len(concluintes)} concluinte(s), {len(turmas_criadas)} turma(s) criada(s), "
+                  f"{mensalidades['mensalidades_criadas']} mensalidade(s)")
+
+            return {
+                'success': True,
+                'ano_atual': plano['ano_atual'],
+                'ano_novo': ano_novo,
+                'turmas_criadas': len(turmas_criadas),
+                'alunos_promovidos': len(promovidos),
+                'concluintes': len(concluintes),
+                'mensalidades_criadas': mensalidades['mensalidades_criadas'],
+                'detalhes': mensalidades['detalhes']
+            }
+
+        except (sqlite3.Error, ValueError) as e:
+            print(f"❌ Erro na virada do ano letivo: {e}")
+            return {'success': False, 'error': f'Virada não realizada, nada foi alterado: {str(e)}'}
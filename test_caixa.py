@@ -0,0 +1,168 @@
+# test_caixa.py - Índice em memória do modo caixa
+
+import sqlite3
+from collections import deque
+
+import pytest
+
+from database.connection import DatabaseConnection
+from services import indice_caixa
+from services.indice_caixa import IndiceCaixa, codigo_referencia, ler_codigo_referencia
+
+
+@pytest.fixture
+def banco(tmp_path):
+    banco = DatabaseConnection(tmp_path / "caixa.db")
+    conn = banco.get_connection()
+    conn.executemany("""
+        INSERT INTO alunos (id, nome, data_nascimento, cpf, turma_id, status, valor_mensalidade)
+        VALUES (?, ?, '2015-01-01', ?, 1, 'Ativo', 500)
+    """, [(1, 'Ana', '123.456.789-01'), (2, 'Bruno', '234.567.890-12'), (3, 'Carla', None)])
+    # Ana e Bruno são irmãos (mesmo telefone do responsável)
+    conn.executemany("""
+        INSERT INTO responsaveis (aluno_id, nome, telefone, parentesco, principal)
+        VALUES (?, ?, ?, 'Mãe', 1)
+    """, [(1, 'Maria', '(11) 99999-0000'), (2, 'Maria', '11999990000'), (3, 'Joana', '11888887777')])
+    conn.executemany("""
+        INSERT INTO pagamentos (id, aluno_id, mes_referencia, valor_original, valor_final,
+                                data_vencimento, status)
+        VALUES (?, ?, ?, 500, 500, ?, ?)
+    """, [
+        (10, 1, '2025-03', '2025-03-10', 'Pago'),
+        (11, 1, '2025-04', '2025-04-10', 'Atrasado'),
+        (12, 1, '2025-05', '2025-05-10', 'Pendente'),
+        (20, 2, '2025-04', '2025-04-10', 'Pendente'),
+        (30, 3, '2025-04', '2025-04-10', 'Pendente'),
+    ])
+    conn.commit()
+    conn.close()
+    yield banco
+    banco.close_connection()
+
+
+def test_codigo_de_referencia_com_digito_verificador():
+    codigo = codigo_referencia(12)
+
+    assert len(codigo) == 9 and ler_codigo_referencia(codigo) == 12
+    # Um dígito trocado não vira outra mensalidade
+    assert ler_codigo_referencia(codigo[:-2] + str((int(codigo[-2]) + 1) % 10) + codigo[-1]) is None
+
+
+def test_busca_por_codigo_id_e_cpf_traz_a_familia(banco):
+    indice = IndiceCaixa(banco).carregar()
+
+    assert indice.buscar(codigo_referencia(12))['mensalidade']['id'] == 12
+    assert indice.buscar('20')['mensalidade']['id'] == 20
+    assert indice.buscar('10') is None  # já paga
+
+    # CPF: a mensalidade em aberto mais antiga do aluno, e a família junto
+    resultado = indice.buscar('123.456.789-01')
+    assert resultado['mensalidade']['id'] == 11
+    assert [m['id'] for m in resultado['familia']] == [11, 20, 12]
+    assert [m['id'] for m in indice.buscar('30')['familia']] == [30]
+
+
+def test_pagamento_sai_do_indice_sem_recarregar(banco, monkeypatch):
+    indice = IndiceCaixa(banco).carregar()
+    monkeypatch.setattr(indice_caixa, 'INTERVALO_VERIFICACAO', 0)
+    monkeypatch.setattr(indice, 'carregar', lambda: pytest.fail("recarregou o índice"))
+
+    resultado = indice.financeiro_service.processar_pagamento(11, 500, 0, 0, '')
+    mensalidade = indice.registrar_pagamento(resultado['mensalidade']['id'])
+
+    assert [m['id'] for m in indice.abertas_da_familia(mensalidade)] == [20, 12]
+    assert indice.buscar('123.456.789-01')['mensalidade']['id'] == 12
+
+
+def test_pagamento_em_dobro_recusado(banco):
+    financeiro = IndiceCaixa(banco).financeiro_service
+
+    assert financeiro.processar_pagamento(11, 500, 0, 0, 'Caixa 1')['success']
+    segundo = financeiro.processar_pagamento(11, 999, 0, 0, 'Caixa 2')
+
+    assert segundo == {'success': False, 'error': 'Mensalidade já foi paga'}
+    mensalidade = financeiro.obter_mensalidade_por_id(11)
+    assert mensalidade['valor_final'] == 500 and mensalidade['observacoes'] == 'Caixa 1'
+    assert not financeiro.processar_pagamento(999, 500, 0, 0, '')['success']
+
+
+def test_escrita_de_outro_terminal_recarrega(banco, monkeypatch):
+    indice = IndiceCaixa(banco).carregar()
+    monkeypatch.setattr(indice_caixa, 'INTERVALO_VERIFICACAO', 0)
+
+    externo = sqlite3.connect(banco.db_path)
+    externo.execute("UPDATE pagamentos SET status = 'Pago' WHERE id = 20")
+    externo.commit()
+    externo.close()
+
+    assert indice.buscar('20') is None
+
+
+class WidgetFalso:
+    """Aceita qualquer chamada de widget Tk (config, insert, delete...)"""
+
+    def __init__(self, texto=''):
+        self.texto = texto
+
+    def get(self):
+        return self.texto
+
+    def __getattr__(self, nome):
+        return lambda *args, **kwargs: ()
+
+
+class TarefasSincronas:
+    """TarefasTela que roda a função na hora, registrando as chamadas"""
+
+    def __init__(self):
+        self.chamadas = []
+
+    def executar(self, funcao, *args, ao_concluir=None, **kwargs):
+        self.chamadas.append(kwargs.get('chave'))
+        ao_concluir(funcao(*args))
+
+
+def _caixa(banco):
+    from interface.modo_caixa import ModoCaixa
+
+    caixa = ModoCaixa.__new__(ModoCaixa)
+    caixa.ao_pagar = None
+    caixa.indice = IndiceCaixa(banco).carregar()
+    caixa.financeiro_service = caixa.indice.financeiro_service
+    caixa.indice_pronto = True
+    caixa.fila, caixa.familia, caixa.encargos = deque(), [], None
+    caixa.destacada, caixa.recebidas, caixa.total_recebido, caixa._recebido_em = 0, 0, 0.0, 0.0
+    caixa.tarefas = TarefasSincronas()
+    caixa.entry_codigo = caixa.tree = WidgetFalso()
+    caixa.lbl_sessao = caixa.lbl_status = caixa.lbl_total = caixa.lbl_fila = caixa.lbl_carregando = WidgetFalso()
+    return caixa
+
+
+def test_enter_vazio_nao_recebe_e_f12_repetido_e_ignorado(banco, monkeypatch):
+    caixa = _caixa(banco)
+    caixa.buscar('123.456.789-01')
+
+    # CR/LF extra do leitor depois da busca
+    caixa.on_enter()
+    assert caixa.recebidas == 0
+
+    caixa.on_confirmar()
+    caixa.on_confirmar()  # tecla segurada
+    assert caixa.recebidas == 1
+    assert [m['id'] for m in caixa.familia] == [20, 12]
+
+    monkeypatch.setattr('interface.modo_caixa.INTERVALO_CONFIRMACAO', 0)
+    caixa.on_confirmar()
+    assert caixa.recebidas == 2
+
+
+def test_conflito_recarrega_o_indice_em_segundo_plano(banco):
+    caixa = _caixa(banco)
+    caixa.buscar('123.456.789-01')
+    caixa.financeiro_service.processar_pagamento(11, 500, 0, 0, 'Caixa 2')
+
+    caixa.on_confirmar()
+
+    assert caixa.recebidas == 0 and caixa.tarefas.chamadas == ['indice_caixa']
+    assert caixa.indice_pronto
+    assert [m['id'] for m in caixa.familia] == [20, 12]
@@ -0,0 +1,108 @@
+# test_configuracoes.py - Cache de configurações: uma leitura por mudança
+
+import sqlite3
+
+import pytest
+
+from database.connection import DatabaseConnection
+from services import cache_configuracoes
+from services.config_financeira_service import ConfigFinanceiraService
+from services.configuracao_service import ConfiguracaoService
+
+
+@pytest.fixture
+def banco(tmp_path):
+    banco = DatabaseConnection(tmp_path / "config.db")
+    yield banco
+    cache_configuracoes.CacheConfiguracoes(banco).invalidar()
+    banco.close_connection()
+
+
+@pytest.fixture
+def financeiro(banco):
+    servico = ConfigFinanceiraService()
+    servico.db = banco
+    return servico
+
+
+def _rastrear(banco):
+    comandos = []
+    conn = banco.get_connection()
+    conn.set_trace_callback(comandos.append)
+    conn.close()
+    return comandos
+
+
+def test_banco_novo_tem_configuracao_financeira_padrao(financeiro):
+    config = financeiro.obter_configuracoes()
+
+    assert config['id'] == 1 and config['multa_por_dia'] == 2.0
+    assert config['dias_carencia_multa'] == 30
+
+
+def test_calculos_leem_a_configuracao_uma_vez(banco, financeiro):
+    comandos = _rastrear(banco)
+
+    for dias in range(100):
+        financeiro.calcular_valor_com_ajustes(500.0, '2025-03-10', f'2025-04-{dias % 28 + 1:02d}')
+    financeiro.calcular_preview_valores(500.0, '2025-03-10')
+
+    assert len([c for c in comandos if 'FROM config_financeiras' in c]) == 1
+
+
+def test_salvar_invalida_na_hora(financeiro):
+    assert financeiro.calcular_valor_com_ajustes(500.0, '2025-03-10', '2025-04-24')['multa_aplicada'] == 30
+
+    financeiro.salvar_configuracoes({
+        'desconto_pontualidade': 10.0, 'dias_limite_desconto': 5,
+        'multa_por_dia': 3.0, 'dias_carencia_multa': 30
+    })
+
+    assert financeiro.obter_configuracoes()['multa_por_dia'] == 3.0
+    assert financeiro.calcular_valor_com_ajustes(500.0, '2025-03-10', '2025-04-24')['multa_aplicada'] == 45
+
+
+def test_escrita_de_outro_processo_pelo_contador_de_versao(banco, monkeypatch):
+    servico = ConfiguracaoService()
+    servico.db = banco
+    assert servico.obter_inteiro('dias_aviso', 7) == 7
+
+    externo = sqlite3.connect(banco.db_path)
+    externo.execute("INSERT INTO configuracoes (chave, valor) VALUES ('dias_aviso', '15')")
+    externo.commit()
+    externo.close()
+
+    # Dentro do intervalo de verificação o snapshot ainda vale
+    assert servico.obter_inteiro('dias_aviso', 7) == 7
+    monkeypatch.setattr(cache_configuracoes, 'INTERVALO_VERIFICACAO', 0)
+    assert servico.obter_inteiro('dias_aviso', 7) == 15
+
+
+def test_acessores_tipados(banco):
+    servico = ConfiguracaoService()
+    servico.db = banco
+    servico.salvar_configuracao('juros', '1,5')
+    servico.salvar_configuracao('enviar_lembretes', 'Sim')
+
+    assert servico.obter_decimal('juros') == 1.5
+    assert servico.obter_booleano('enviar_lembretes') is True
+    assert servico.obter_inteiro('juros', 0) == 1
+    assert servico.obter_configuracao('inexistente', 'padrão') == 'padrão'
+
+
+def test_leitura_dentro_de_transacao(banco, financeiro):
+    novo = {'desconto_pontualidade': 0, 'dias_limite_desconto': 5,
+            'multa_por_dia': 3.0, 'dias_carencia_multa': 30}
+
+    with banco.transacao():
+        financeiro.salvar_configuracoes(novo)
+        assert financeiro.obter_configuracoes()['multa_por_dia'] == 3.0
+    assert financeiro.obter_configuracoes()['multa_por_dia'] == 3.0
+
+    # Transação desfeita: o valor lido dentro dela não fica no cache
+    with pytest.raises(RuntimeError):
+        with banco.transacao():
+            financeiro.salvar_configuracoes({**novo, 'multa_por_dia': 4.0})
+            assert financeiro.obter_configuracoes()['multa_por_dia'] == 4.0
+            raise RuntimeError("cancelado")
+    assert financeiro.obter_configuracoes()['multa_por_dia'] == 3.0
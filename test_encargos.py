@@ -0,0 +1,114 @@
+# test_encargos.py - Motor único de multa e desconto, em lote com NumPy
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from database.connection import DatabaseConnection, versao_tabelas
+from services.financeiro_service import FinanceiroService
+from services.motor_encargos import MotorEncargos
+
+CONFIG = {
+    'desconto_pontualidade': 10.0,
+    'dias_limite_desconto': 5,
+    'multa_por_dia': 2.0,
+    'dias_carencia_multa': 30,
+}
+
+
+@pytest.fixture
+def motor():
+    return MotorEncargos(CONFIG)
+
+
+def test_lote_aplica_desconto_carencia_e_multa(motor):
+    vencimento = date(2025, 3, 10).toordinal()
+    pagamentos = [vencimento - 6, vencimento - 5, vencimento, vencimento + 30, vencimento + 45, vencimento + 45, 0]
+    pode_multa = [True, True, True, True, True, False, True]
+
+    calculo = motor.calcular([500.0] * 7, vencimento, pagamentos, pode_multa)
+
+    assert calculo['desconto'].tolist() == [0, 10, 10, 0, 0, 0, 0]
+    assert calculo['multa'].tolist() == [0, 0, 0, 0, 30, 0, 0]
+    assert calculo['valor_final'].tolist() == [500, 490, 490, 500, 530, 500, 500]
+
+
+def test_uma_mensalidade_igual_ao_lote(motor):
+    calculo = motor.calcular_um(500.0, '2025-03-10', '2025-04-24')
+
+    assert calculo['multa_aplicada'] == 30 and calculo['valor_final'] == 530
+    assert calculo['dias_diferenca'] == 45 and calculo['dias_multa'] == 15
+    assert calculo['observacao'] == "Multa aplicada (15 dias × R$ 2.00)"
+
+
+def test_encargos_de_todas_em_aberto(tmp_path, motor):
+    banco = DatabaseConnection(tmp_path / "encargos.db")
+    conn = banco.get_connection()
+    conn.executemany("""
+        INSERT INTO alunos (id, nome, data_nascimento, turma_id, status, valor_mensalidade)
+        VALUES (?, ?, '2015-01-01', 1, 'Ativo', 500)
+    """, [(1, 'Aluno 1'), (2, 'Aluno 2')])
+    conn.executemany("""
+        INSERT INTO pagamentos (aluno_id, mes_referencia, valor_original, valor_final,
+                                data_vencimento, status, pode_receber_multa)
+        VALUES (?, ?, 500, 500, ?, ?, ?)
+    """, [
+        (1, '2025-03', '2025-03-10', 'Atrasado', 1),
+        (1, '2025-04', '2025-04-10', 'Pago', 1),
+        (2, '2025-03', '2025-03-10', 'Atrasado', 0),
+        (2, '2025-05', '2025-05-10', 'Pendente', 1),
+    ])
+    conn.commit()
+    conn.close()
+
+    servico = FinanceiroService()
+    servico.db = banco
+    calculo = servico.calcular_encargos_em_aberto(date(2025, 4, 24), motor)
+    banco.close_connection()
+
+    por_id = dict(zip(calculo['ids'].tolist(), calculo['valor_final'].tolist()))
+    # Pagas ficam de fora; sem multa para quem não pode recebê-la
+    assert por_id == {1: 530, 3: 500, 4: 500}
+    assert np.isclose(calculo['multa'].sum(), 30)
+
+
+def test_recalculo_de_status_separa_novas_e_ja_atrasadas(tmp_path):
+    from services.mensalidade_service import MensalidadeService
+
+    banco = DatabaseConnection(tmp_path / "status.db")
+    conn = banco.get_connection()
+    conn.execute("""
+        INSERT INTO alunos (id, nome, data_nascimento, turma_id, status, valor_mensalidade)
+        VALUES (1, 'Aluno 1', '2015-01-01', 1, 'Ativo', 500)
+    """)
+    conn.executemany("""
+        INSERT INTO pagamentos (id, aluno_id, mes_referencia, valor_original, valor_final,
+                                data_vencimento, status, dias_atraso)
+        VALUES (?, 1, ?, 500, 500, ?, ?, ?)
+    """, [
+        (1, '2025-02', '2025-02-10', 'Atrasado', 5),    # dias desatualizados
+        (2, '2025-03', '2025-03-10', 'Atrasado', 45),   # já em dia
+        (3, '2025-04', '2025-04-10', 'Pendente', 0),    # venceu agora
+        (4, '2025-05', '2025-05-10', 'Atrasado', 3),    # vencimento adiado
+    ])
+    conn.commit()
+    conn.close()
+
+    servico = MensalidadeService()
+    servico.db = banco
+    conn = banco.get_connection()
+    versao_config = versao_tabelas(conn, ('configuracoes',))
+    conn.close()
+
+    resultado = servico.recalcular_status_mensalidades(date(2025, 4, 24))
+
+    conn = banco.get_connection()
+    linhas = conn.execute("SELECT id, status, dias_atraso FROM pagamentos ORDER BY id").fetchall()
+    # O marcador do último recálculo não invalida o cache de configurações
+    assert versao_tabelas(conn, ('configuracoes',)) == versao_config
+    conn.close()
+    banco.close_connection()
+
+    assert (resultado['atrasadas'], resultado['dias_atualizados'], resultado['reabertas']) == (1, 1, 1)
+    assert linhas == [(1, 'Atrasado', 73), (2, 'Atrasado', 45), (3, 'Atrasado', 14), (4, 'Pendente', 0)]
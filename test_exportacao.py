@@ -0,0 +1,202 @@
+# test_exportacao.py - Exportação CSV direto do cursor, com memória constante
+
+import csv
+import tracemalloc
+
+import pytest
+
+from database.connection import DatabaseConnection
+from services.export_service import ExportService
+
+MESES = [f"{ano}-{mes:02d}" for ano in (2022, 2023, 2024, 2025) for mes in range(3, 13)]
+
+
+@pytest.fixture
+def banco(tmp_path):
+    banco = DatabaseConnection(tmp_path / "exportacao.db")
+    conn = banco.get_connection()
+    # 75 alunos na turma 1 e 225 na turma 2, 40 mensalidades cada
+    conn.executemany("""
+        INSERT INTO alunos (id, nome, data_nascimento, turma_id, status, valor_mensalidade)
+        VALUES (?, ?, '2015-01-01', ?, 'Ativo', 500)
+    """, [(i, f"Aluno {i:03d}", 1 if i <= 75 else 2) for i in range(1, 301)])
+    conn.executemany("""
+        INSERT INTO responsaveis (aluno_id, nome, telefone, parentesco, principal)
+        VALUES (?, ?, '11999999999', ?, ?)
+    """, [(i, f"Pai {i}", 'Pai', 0) for i in range(1, 301)] +
+         [(i, f"Mãe {i}", 'Mãe', 1) for i in range(1, 301, 2)])
+    conn.executemany("""
+        INSERT INTO pagamentos (aluno_id, mes_referencia, valor_original, valor_final,
+                                data_vencimento, status)
+        VALUES (?, ?, 500, 500, ?, 'Pendente')
+    """, [(i, mes, f"{mes}-10") for i in range(1, 301) for mes in MESES])
+    conn.commit()
+    conn.close()
+    yield banco
+    banco.close_connection()
+
+
+@pytest.fixture
+def servico(banco):
+    servico = ExportService()
+    servico.db = banco
+    servico.TAMANHO_LOTE = 500
+    return servico
+
+
+def _exportar_medindo(servico, arquivo, filtros=None):
+    tracemalloc.start()
+    try:
+        resultado = servico.exportar_mensalidades_banco_csv(str(arquivo), filtros)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, pico
+
+
+def test_exporta_com_responsavel_e_datas_formatadas(servico, tmp_path):
+    arquivo = tmp_path / "mensalidades.csv"
+    lotes = []
+
+    resultado = servico.exportar_mensalidades_banco_csv(str(arquivo), {'aluno_id': 1}, progresso=lotes.append)
+
+    assert resultado['success'] and resultado['linhas'] == len(MESES)
+    assert lotes == [len(MESES)]
+    with open(arquivo, newline='', encoding='utf-8') as f:
+        linhas = list(csv.DictReader(f))
+    assert len(linhas) == len(MESES)
+    # Responsável principal tem preferência
+    assert {(l['Responsavel'], l['Turma']) for l in linhas} == {('Mãe 1', '1º Ano A - 1º Ano')}
+    assert linhas[0]['Data_Vencimento'] == '10/03/2022' and linhas[0]['Data_Pagamento'] == ''
+
+
+def test_memoria_nao_cresce_com_o_numero_de_linhas(servico, tmp_path):
+    pequeno, pico_pequeno = _exportar_medindo(servico, tmp_path / "turma1.csv", {'turma_id': 1})
+    completo, pico_completo = _exportar_medindo(servico, tmp_path / "todas.csv")
+
+    assert pequeno['linhas'] == 75 * len(MESES)
+    assert completo['linhas'] == 300 * len(MESES)
+    # 4x mais linhas, praticamente o mesmo pico (buffer do arquivo + um lote)
+    assert pico_completo < pico_pequeno * 1.5
+
+
+@pytest.mark.parametrize('filtros', [
+    None, {'turma_id': 1}, {'aluno_id': 7}, {'status': 'Atrasado'},
+    {'mes': 4, 'ano': 2025}, {'turma_id': 1, 'status': 'Pendente'},
+    {'data_inicio': '2023-01-01', 'data_fim': '2023-12-31'},
+])
+@pytest.mark.parametrize('estatisticas', [False, True])
+def test_exportacao_filtrada_segue_os_indices(banco, filtros, estatisticas):
+    from services.financeiro_service import FinanceiroService
+
+    where, params = FinanceiroService()._montar_filtros_mensalidades(filtros)
+    conn = banco.get_connection()
+    try:
+        if estatisticas:
+            # Como depois do PRAGMA optimize de close_connection
+            conn.execute("ANALYZE")
+        plano = [linha[3] for linha in conn.execute(
+            "EXPLAIN QUERY PLAN " + ExportService.SQL_EXPORTAR_MENSALIDADES +
+            f" WHERE {where}" + ExportService.ORDEM_EXPORTAR_MENSALIDADES, params
+        )]
+    finally:
+        conn.close()
+
+    assert 'USE TEMP B-TREE FOR ORDER BY' not in plano, plano
+
+
+def test_planilha_write_only_em_lotes(banco, tmp_path, monkeypatch):
+    openpyxl = pytest.importorskip('openpyxl')
+    monkeypatch.chdir(tmp_path)
+    from services.exportacao_service import ExportacaoService
+
+    servico = ExportacaoService()
+    servico.db = banco
+    servico.LOTE_PLANILHA = 500
+    arquivo = tmp_path / "financeiro.xlsx"
+
+    resultado = servico.exportar_financeiro_excel(str(arquivo), {'turma_id': 1})
+
+    assert resultado['success'], resultado.get('error')
+    assert resultado['registros'] == 75 * len(MESES)
+
+    workbook = openpyxl.load_workbook(arquivo)
+    mensalidades = workbook['Mensalidades']
+    assert mensalidades.max_row == 75 * len(MESES) + 1
+    assert mensalidades['A1'].value == 'ID' and mensalidades['A1'].font.bold
+    assert mensalidades['J2'].value == '10/12/2025' and mensalidades['I2'].value == 500
+    # Largura estimada pela amostra: "Aluno 001" (9) + 2
+    assert mensalidades.column_dimensions['B'].width == 11
+    assert workbook['Resumo']['A2'].value == 75 * len(MESES)
+
+
+def test_backup_completo_sem_pandas(banco, tmp_path, monkeypatch):
+    openpyxl = pytest.importorskip('openpyxl')
+    monkeypatch.chdir(tmp_path)
+    from services.exportacao_service import ExportacaoService
+
+    servico = ExportacaoService()
+    servico.db = banco
+    resultado = servico.exportar_backup_dados_excel(str(tmp_path / "backup.xlsx"))
+
+    assert resultado['success'], resultado.get('error')
+    workbook = openpyxl.load_workbook(tmp_path / "backup.xlsx")
+    assert workbook.sheetnames == ['Turmas', 'Alunos', 'Responsaveis', 'Pagamentos',
+                                   'Transferencias', 'Configuracoes']
+    assert workbook['Pagamentos'].max_row == 300 * len(MESES) + 1
+
+
+def test_inadimplencia_em_lotes_com_responsavel(banco, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from services.exportacao_service import ExportacaoService
+
+    servico = ExportacaoService()
+    servico.db = banco
+    conn = banco.get_connection()
+    try:
+        lotes = list(servico._lotes_inadimplencia(conn.cursor()))
+    finally:
+        conn.close()
+
+    # 300 alunos em tabelas de uma página cada
+    assert [len(lote) for lote in lotes] == [25] * 12
+    linhas = {linha[0]: linha for lote in lotes for linha in lote}
+    assert linhas['Aluno 001'][2] == str(len(MESES)) and linhas['Aluno 001'][5] == 'Mãe 1'
+    assert linhas['Aluno 002'][5] == 'Pai 2' and linhas['Aluno 002'][4] == '10/03/2022'
+
+
+def test_pdf_inadimplencia(banco, tmp_path, monkeypatch):
+    pytest.importorskip('reportlab')
+    monkeypatch.chdir(tmp_path)
+    from services.exportacao_service import ExportacaoService
+
+    servico = ExportacaoService()
+    servico.db = banco
+    resultado = servico.gerar_relatorio_inadimplencia_pdf(str(tmp_path / "inadimplencia.pdf"))
+
+    assert resultado['success'], resultado.get('error')
+    assert resultado['inadimplentes'] == 300
+    assert (tmp_path / "inadimplencia.pdf").stat().st_size > 0
+
+
+def test_inadimplencia_so_de_alunos_ativos(banco, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from services.exportacao_service import ExportacaoService
+
+    conn = banco.get_connection()
+    conn.execute("UPDATE alunos SET status = 'Inativo' WHERE id IN (1, 2)")
+    # Vencimento no futuro: ainda não é inadimplência
+    conn.execute("UPDATE pagamentos SET data_vencimento = '2999-01-10' WHERE aluno_id = 3")
+    conn.commit()
+
+    servico = ExportacaoService()
+    servico.db = banco
+    try:
+        lotes = list(servico._lotes_inadimplencia(conn.cursor()))
+        plano = conn.execute("EXPLAIN QUERY PLAN " + servico.SQL_INADIMPLENTES, {'hoje': 0}).fetchall()
+    finally:
+        conn.close()
+
+    nomes = {linha[0] for lote in lotes for linha in lote}
+    assert len(nomes) == 297 and not {'Aluno 001', 'Aluno 002', 'Aluno 003'} & nomes
+    assert not [linha for linha in plano if linha[3].startswith('SCAN p')]
@@ -0,0 +1,60 @@
+# test_importtime.py - Orçamento de importação do caminho de abertura (main.py)
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Módulos carregados até a primeira janela (dashboard) aparecer
+CAMINHO_ABERTURA = (
+    "import main; main.verificar_dependencias(); "
+    "import database.connection, services.mensalidade_service, "
+    "interface.dashboard, interface.main_window"
+)
+
+# Antes das telas sob demanda o mesmo caminho levava ~700 ms (matplotlib + numpy)
+ORCAMENTO_IMPORTACAO_MS = 300
+
+# Só devem ser importados na primeira navegação / no primeiro gráfico
+MODULOS_ADIADOS = (
+    'matplotlib', 'numpy',
+    'interface.alunos', 'interface.turmas',
+    'interface.financeiro_corrigido', 'interface.transferencia_corrigida',
+)
+
+
+def _medir_importacoes():
+    """Roda o caminho de abertura com -X importtime: {módulo: acumulado em µs}"""
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CAMINHO_ABERTURA],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, timeout=60
+    )
+    assert resultado.returncode == 0, resultado.stderr
+
+    modulos = {}
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, acumulado, nome = linha[len('import time:'):].split('|')
+        modulos[nome.rstrip()] = int(acumulado)
+    return modulos
+
+
+@pytest.fixture(scope='module')
+def importacoes():
+    # Melhor de 3 execuções para não depender de um disco frio
+    medicoes = [_medir_importacoes() for _ in range(3)]
+    return min(medicoes, key=lambda m: sum(v for k, v in m.items() if not k.startswith(' ')))
+
+
+def test_caminho_de_abertura_nao_importa_modulos_adiados(importacoes):
+    importados = {nome.strip() for nome in importacoes}
+    assert not [m for m in MODULOS_ADIADOS if m in importados]
+
+
+def test_caminho_de_abertura_dentro_do_orcamento(importacoes):
+    # Só módulos de primeiro nível: o acumulado deles já inclui as dependências
+    total_ms = sum(v for nome, v in importacoes.items() if not nome.startswith(' ')) / 1000
+    assert total_ms < ORCAMENTO_IMPORTACAO_MS, f"{total_ms:.0f} ms"
@@ -0,0 +1,334 @@
+# test_query_plans.py - Regressão de planos de consulta (EXPLAIN QUERY PLAN)
+#
+# Executa as consultas dos serviços em um banco temporário, captura cada
+# SELECT e falha se alguma tabela "quente" for lida com SCAN completo.
+
+import re
+from datetime import date
+
+import pytest
+
+from database.connection import DatabaseConnection
+from services.aluno_service import AlunoService
+from services.dashboard_service import DashboardService
+from services.financeiro_service import FinanceiroService
+
+TABELAS_QUENTES = {'pagamentos', 'alunos', 'responsaveis'}
+
+PALAVRAS_SQL = {'on', 'where', 'inner', 'left', 'join', 'group', 'order',
+                'limit', 'having', 'and', 'using', 'cross', 'natural'}
+
+
+class BancoRastreado(DatabaseConnection):
+    """DatabaseConnection que registra os SELECTs executados pelos serviços"""
+
+    def __init__(self, db_name):
+        self.consultas = []
+        self.rastrear = False
+        super().__init__(db_name)
+
+    def get_connection(self):
+        conn = super().get_connection()
+        conn.set_trace_callback(self._registrar)
+        return conn
+
+    def _registrar(self, sql):
+        if self.rastrear and sql.lstrip().upper().startswith('SELECT'):
+            self.consultas.append(sql)
+
+
+def _mapa_aliases(sql):
+    """Mapeia alias (e nome) de cada tabela citada em FROM/JOIN"""
+    mapa = {}
+    for tabela, alias in re.findall(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?',
+                                    sql, flags=re.IGNORECASE):
+        mapa[tabela] = tabela
+        if alias and alias.lower() not in PALAVRAS_SQL:
+            mapa[alias] = tabela
+    return mapa
+
+
+def scans_em_tabelas_quentes(conn, sql):
+    """Retorna as linhas do plano que fazem SCAN de tabelas quentes"""
+    mapa = _mapa_aliases(sql)
+    violacoes = []
+    for _, _, _, detalhe in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+        m = re.match(r'SCAN (\w+)', detalhe)
+        if m and mapa.get(m.group(1)) in TABELAS_QUENTES:
+            violacoes.append(detalhe)
+    return violacoes
+
+
+def _popular(banco):
+    """Insere volume suficiente para o planejador preferir índices"""
+    conn = banco.get_connection()
+    turmas = [row[0] for row in conn.execute("SELECT id FROM turmas")]
+    for i in range(300):
+        cursor = conn.execute("""
+            INSERT INTO alunos (nome, data_nascimento, turma_id, status, valor_mensalidade)
+            VALUES (?, '2015-01-01', ?, ?, 500)
+        """, (f"Aluno {i:03d}", turmas[i % len(turmas)], 'Ativo' if i % 10 else 'Inativo'))
+        aluno_id = cursor.lastrowid
+        conn.execute("""
+            INSERT INTO responsaveis (aluno_id, nome, telefone, parentesco, principal)
+            VALUES (?, ?, '11999999999', 'Mãe', 1)
+        """, (aluno_id, f"Responsável {i:03d}"))
+        for mes in range(3, 13):
+            status = 'Pago' if mes < 6 else 'Pendente'
+            conn.execute("""
+                INSERT INTO pagamentos (aluno_id, mes_referencia, valor_original, valor_final,
+                                        data_vencimento, data_pagamento, status)
+                VALUES (?, ?, 500, 500, ?, ?, ?)
+            """, (aluno_id, f"2025-{mes:02d}", f"2025-{mes:02d}-10",
+                  f"2025-{mes:02d}-08" if status == 'Pago' else None, status))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def banco(tmp_path):
+    banco = BancoRastreado(tmp_path / "planos.db")
+    _popular(banco)
+    yield banco
+    banco.close_connection()
+
+
+CONSULTAS_QUENTES = {
+    'financeiro.listar_mensalidades': (FinanceiroService, lambda s: s.listar_mensalidades()),
+    'financeiro.listar_mensalidades_pendente': (FinanceiroService, lambda s: s.listar_mensalidades('Pendente')),
+    'financeiro.listar_mensalidades_atrasado': (FinanceiroService, lambda s: s.listar_mensalidades('Atrasado')),
+    'financeiro.listar_mensalidades_mes': (FinanceiroService, lambda s: s.listar_mensalidades('Pago', '03')),
+    'financeiro.obter_mensalidade_por_id': (FinanceiroService, lambda s: s.obter_mensalidade_por_id(1)),
+    'financeiro.obter_estatisticas_financeiras': (FinanceiroService, lambda s: s.obter_estatisticas_financeiras()),
+    'financeiro.gerar_relatorio_financeiro': (FinanceiroService, lambda s: s.gerar_relatorio_financeiro('2025-03-01', '2025-06-30')),
+    'financeiro.pagina_padrao': (FinanceiroService, lambda s: s.buscar_pagina_mensalidades()),
+    'financeiro.pagina_status_aluno': (FinanceiroService, lambda s: s.buscar_pagina_mensalidades(
+        {'status': 'Pendente'}, ordenar_por='aluno', decrescente=False)),
+    'financeiro.pagina_turma_valor': (FinanceiroService, lambda s: s.buscar_pagina_mensalidades(
+        {'turma_id': 1, 'valor_min': 100, 'valor_max': 900}, ordenar_por='valor_final')),
+    'financeiro.pagina_aluno_cursor': (FinanceiroService, lambda s: s.buscar_pagina_mensalidades(
+        {'aluno_id': 5}, apos=(date(2025, 6, 10).toordinal(), 50))),
+    'financeiro.pagina_mes_ano': (FinanceiroService, lambda s: s.buscar_pagina_mensalidades(
+        {'mes': 4, 'ano': 2025}, ordenar_por='status')),
+    'financeiro.pagina_periodo': (FinanceiroService, lambda s: s.buscar_pagina_mensalidades(
+        {'ano': 2025, 'data_inicio': '2025-05-01', 'data_fim': '2025-07-31'})),
+    'financeiro.carregar_modelo_pagamentos': (FinanceiroService, lambda s: s.carregar_modelo_pagamentos()),
+    'financeiro.carregar_modelo_pagamentos_limite': (FinanceiroService, lambda s: s.carregar_modelo_pagamentos(10)),
+    'financeiro.obter_mensalidades_por_ids': (FinanceiroService, lambda s: s.obter_mensalidades_por_ids(range(1, 40))),
+    'financeiro.resumir_mensalidades': (FinanceiroService, lambda s: s.resumir_mensalidades({'status': 'Pago'})),
+    'financeiro.buscar_mensalidades_aluno': (FinanceiroService, lambda s: s.buscar_mensalidades_aluno(1)),
+    'financeiro.listar_mensalidades_em_aberto': (FinanceiroService, lambda s: s.listar_mensalidades_em_aberto()),
+    'alunos.listar_alunos_turma': (AlunoService, lambda s: s.listar_alunos(1)),
+    'alunos.buscar_aluno_por_id': (AlunoService, lambda s: s.buscar_aluno_por_id(1)),
+    'alunos.buscar_historico_financeiro': (AlunoService, lambda s: s.buscar_historico_financeiro(1)),
+    'dashboard.obter_estatisticas_gerais': (DashboardService, lambda s: s.obter_estatisticas_gerais()),
+    'dashboard.obter_resumos': (DashboardService, lambda s: s.obter_resumos()),
+    'dashboard.status_mensalidades': (DashboardService, lambda s: s.obter_dados_grafico_status_mensalidades()),
+    'dashboard.receita_mensal': (DashboardService, lambda s: s.obter_dados_grafico_receita_mensal()),
+    'dashboard.alunos_por_turma': (DashboardService, lambda s: s.obter_dados_grafico_alunos_por_turma()),
+    'dashboard.inadimplencia': (DashboardService, lambda s: s.obter_dados_grafico_inadimplencia()),
+    'dashboard.top_inadimplentes': (DashboardService, lambda s: s.obter_dados_grafico_top_inadimplentes()),
+    'dashboard.resumo_financeiro_atual': (DashboardService, lambda s: s.obter_resumo_financeiro_atual()),
+}
+
+
+@pytest.mark.parametrize('nome', sorted(CONSULTAS_QUENTES))
+def test_consulta_sem_scan_em_tabela_quente(banco, nome):
+    classe_servico, chamada = CONSULTAS_QUENTES[nome]
+    servico = classe_servico()
+    servico.db = banco
+
+    banco.rastrear = True
+    chamada(servico)
+    banco.rastrear = False
+
+    assert banco.consultas, f"{nome}: nenhuma consulta capturada"
+
+    conn = banco.get_connection()
+    try:
+        for sql in banco.consultas:
+            violacoes = scans_em_tabelas_quentes(conn, sql)
+            assert not violacoes, f"{nome}: {violacoes}\n{sql}"
+    finally:
+        conn.close()
+
+
+def test_indices_criados(banco):
+    conn = banco.get_connection()
+    indices = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")}
+    conn.close()
+
+    assert {'idx_pagamentos_aluno_vencimento',
+            'idx_pagamentos_status_vencimento',
+            'idx_pagamentos_abertos_vencimento',
+            'idx_alunos_turma_status',
+            'idx_responsaveis_aluno_principal'} <= indices
+
+
+def test_colunas_periodo_sincronizadas(banco):
+    conn = banco.get_connection()
+    try:
+        pagamento_id = conn.execute("""
+            INSERT INTO pagamentos (aluno_id, mes_referencia, valor_original, valor_final,
+                                    data_vencimento, status)
+            VALUES (1, '2024-02', 100, 100, '2024-02-29', 'Pendente')
+        """).lastrowid
+        conn.execute("UPDATE pagamentos SET data_pagamento = '2024-03-05', status = 'Pago' WHERE id = ?",
+                     (pagamento_id,))
+        row = conn.execute("""
+            SELECT vencimento_ordinal, pagamento_ordinal, ano, mes
+            FROM pagamentos WHERE id = ?
+        """, (pagamento_id,)).fetchone()
+        conn.rollback()
+    finally:
+        conn.close()
+
+    assert row == (date(2024, 2, 29).toordinal(), date(2024, 3, 5).toordinal(), 2024, 2)
+
+
+@pytest.mark.parametrize('ordenar_por,decrescente', [('vencimento', True), ('aluno', False), ('status', True)])
+def test_paginacao_keyset_sem_repeticoes(banco, ordenar_por, decrescente):
+    servico = FinanceiroService()
+    servico.db = banco
+    filtros = {'valor_min': 100}
+
+    vistos, cursor = [], None
+    while True:
+        pagina = servico.buscar_pagina_mensalidades(filtros, ordenar_por, decrescente,
+                                                    apos=cursor, limite=170)
+        vistos.extend(m['id'] for m in pagina['mensalidades'])
+        cursor = pagina['cursor']
+        if not pagina['tem_mais']:
+            break
+
+    assert len(vistos) == len(set(vistos)) == servico.resumir_mensalidades(filtros)['total']
+
+
+@pytest.mark.parametrize('filtros,ordenar_por,decrescente', [
+    ({}, 'vencimento', True),
+    ({'status': 'Pendente', 'valor_min': 100}, 'aluno', False),
+    ({'turma_id': 2, 'ano': 2025}, 'status', True),
+    ({'mes': 4, 'data_inicio': '2025-01-01', 'data_fim': '2025-12-31'}, 'turma', False),
+])
+def test_modelo_colunar_igual_ao_sql(banco, filtros, ordenar_por, decrescente):
+    servico = FinanceiroService()
+    servico.db = banco
+    modelo = servico.carregar_modelo_pagamentos()
+
+    posicoes = modelo.ordenar(modelo.filtrar(filtros), ordenar_por, decrescente)
+    pagina = servico.buscar_pagina_mensalidades(filtros, ordenar_por, decrescente, limite=10000)
+
+    assert list(modelo.id[posicoes]) == [m['id'] for m in pagina['mensalidades']]
+    assert modelo.resumir(posicoes) == pytest.approx(servico.resumir_mensalidades(filtros))
+
+
+def test_modelo_acima_do_limite_fica_no_banco(banco):
+    servico = FinanceiroService()
+    servico.db = banco
+    total = servico.resumir_mensalidades()['total']
+
+    assert servico.carregar_modelo_pagamentos(limite=total - 1) is None
+    assert len(servico.carregar_modelo_pagamentos(limite=total)) == total
+
+
+def test_mensalidade_por_id_e_do_aluno_com_nomes(banco):
+    servico = FinanceiroService()
+    servico.db = banco
+
+    mensalidade = servico.obter_mensalidade_por_id(1)
+    assert mensalidade['aluno_nome'] == 'Aluno 000'
+    assert mensalidade['turma_nome'] == '1º Ano A - 1º Ano'
+    assert mensalidade['status'] == 'Pago' and mensalidade['mes_referencia'] == '2025-03'
+
+    do_aluno = servico.buscar_mensalidades_aluno(1)
+    assert len(do_aluno) == 10
+    assert {(m['aluno_nome'], m['turma_nome']) for m in do_aluno} == {('Aluno 000', '1º Ano A - 1º Ano')}
+    assert do_aluno[0]['mes_referencia'] == '2025-12'
+
+
+def test_pagamento_corrige_o_modelo_sem_recarregar(banco):
+    servico = FinanceiroService()
+    servico.db = banco
+    modelo = servico.carregar_modelo_pagamentos()
+    pendentes = modelo.ordenar(modelo.filtrar({'status': 'Pendente'}), 'valor_final')
+    pagamento_id = int(modelo.id[pendentes[0]])
+
+    resultado = servico.processar_pagamento(pagamento_id, 520.0, 0, 20.0, 'Com multa')
+    posicao = modelo.atualizar_mensalidade(resultado['mensalidade'])
+
+    assert resultado['mensalidade']['status'] == 'Pago'
+    assert not modelo.mascara({'status': 'Pendente'}, [posicao])[0]
+    # Ordens em cache das colunas alteradas foram refeitas
+    recarregado = servico.carregar_modelo_pagamentos()
+    for filtros in ({}, {'status': 'Pago'}):
+        assert list(modelo.id[modelo.ordenar(modelo.filtrar(filtros), 'valor_final')]) == \
+            list(recarregado.id[recarregado.ordenar(recarregado.filtrar(filtros), 'valor_final')])
+    assert modelo.resumir(modelo.filtrar({})) == recarregado.resumir(recarregado.filtrar({}))
+
+
+class GradeFalsa:
+    """Só o que aplicar_mensalidade_alterada usa da VirtualTreeview"""
+
+    def __init__(self):
+        self.inseridas = []
+
+    def definir_fonte(self, fonte):
+        self.fonte = fonte
+
+    def inserir_linha(self, indice):
+        self.inseridas.append(indice)
+
+
+def test_pagamento_entra_na_grade_filtrada_em_pago(banco):
+    from interface.financeiro_corrigido import FinanceiroInterface
+
+    tela = FinanceiroInterface.__new__(FinanceiroInterface)
+    tela.financeiro_service = FinanceiroService()
+    tela.financeiro_service.db = banco
+    tela.modelo = tela.financeiro_service.carregar_modelo_pagamentos()
+    tela.ordenacao, tela.tamanho_pagina, tela.mensalidade_selecionada = ('vencimento', True), 200, None
+    tela.tree = GradeFalsa()
+    tela.coletar_filtros = lambda: {'status': 'Pago'}
+    tela.exibir_estatisticas = lambda: None
+    tela.aplicar_filtros()
+
+    pendente = int(tela.modelo.id[tela.modelo.filtrar({'status': 'Pendente'})[0]])
+    resultado = tela.financeiro_service.processar_pagamento(pendente, 500, 0, 0, '')
+    assert tela.aplicar_mensalidade_alterada(resultado['mensalidade'])
+
+    # Mesma grade e mesmos cards de uma filtragem do zero
+    indice = tela.tree.inseridas[0]
+    assert tela.mensalidades_filtradas[indice]['id'] == pendente
+    chaves, resumo = list(tela.mensalidades_filtradas.chaves), tela.resumo_atual
+    tela.aplicar_filtros()
+    assert list(tela.mensalidades_filtradas.chaves) == chaves
+    assert tela.resumo_atual == pytest.approx(resumo)
+
+
+def test_snapshot_dashboard_em_cache_ate_escrita(banco):
+    servico = DashboardService()
+    servico.db = banco
+    servico.invalidar_cache()
+
+    banco.rastrear = True
+    primeiro = servico.snapshot()
+    consultas_calculo = len(banco.consultas)
+    segundo = servico.snapshot()
+    banco.rastrear = False
+
+    # Versão + duas consultas agrupadas; o segundo acesso só confere a versão
+    assert consultas_calculo == 3
+    assert len(banco.consultas) == consultas_calculo + 1
+    assert segundo is primeiro
+    with pytest.raises(TypeError):
+        primeiro.estatisticas['total_alunos'] = 0
+
+    conn = banco.get_connection()
+    conn.execute("UPDATE alunos SET status = 'Inativo' WHERE id = 2")
+    conn.commit()
+    conn.close()
+
+    terceiro = servico.snapshot()
+    assert terceiro is not primeiro
+    assert terceiro.estatisticas['total_alunos'] == primeiro.estatisticas['total_alunos'] - 1
@@ -0,0 +1,107 @@
+# test_resumos.py - Resumos financeiros mantidos por triggers
+
+import pytest
+
+from database.connection import DatabaseConnection
+from database.migrations import reconstruir_resumos
+from services.dashboard_service import DashboardService
+from services.financeiro_service import FinanceiroService
+
+
+@pytest.fixture
+def banco(tmp_path):
+    banco = DatabaseConnection(tmp_path / "resumos.db")
+    conn = banco.get_connection()
+    conn.executemany("""
+        INSERT INTO alunos (id, nome, data_nascimento, turma_id, status, valor_mensalidade)
+        VALUES (?, ?, '2015-01-01', ?, ?, 500)
+    """, [(1, 'Aluno 1', 1, 'Ativo'), (2, 'Aluno 2', 1, 'Ativo'), (3, 'Aluno 3', 2, 'Inativo')])
+    conn.executemany("""
+        INSERT INTO pagamentos (aluno_id, mes_referencia, valor_original, valor_final,
+                                data_vencimento, status)
+        VALUES (?, ?, 500, 500, ?, ?)
+    """, [(aluno, f'2025-{mes:02d}', f'2025-{mes:02d}-10', 'Pago' if mes < 5 else 'Atrasado')
+          for aluno in (1, 2, 3) for mes in range(3, 8)])
+    conn.commit()
+    conn.close()
+    yield banco
+    DashboardService._snapshots.pop(str(banco.db_path), None)
+    banco.close_connection()
+
+
+def _resumos(conn):
+    return [
+        [tuple(row) for row in conn.execute(f"SELECT * FROM {tabela} ORDER BY 1")]
+        for tabela in ('resumo_alunos', 'resumo_turmas', 'resumo_meses')
+    ]
+
+
+def test_triggers_igual_a_reconstrucao(banco):
+    conn = banco.get_connection()
+    conn.execute("UPDATE alunos SET turma_id = 2 WHERE id = 2")
+    conn.execute("UPDATE alunos SET status = 'Ativo' WHERE id = 3")
+    conn.execute("UPDATE pagamentos SET status = 'Pago' WHERE aluno_id = 1 AND mes_referencia = '2025-05'")
+    conn.execute("UPDATE pagamentos SET valor_final = 530 WHERE aluno_id = 2 AND mes_referencia = '2025-06'")
+    conn.execute("DELETE FROM pagamentos WHERE aluno_id = 2 AND mes_referencia = '2025-07'")
+    conn.execute("UPDATE alunos SET status = 'Inativo' WHERE id = 1")
+    conn.execute("DELETE FROM pagamentos WHERE aluno_id = 3")
+    conn.execute("DELETE FROM alunos WHERE id = 3")
+    conn.commit()
+    incremental = _resumos(conn)
+
+    reconstruir_resumos(conn.cursor())
+    conn.commit()
+
+    assert _resumos(conn) == incremental
+    conn.close()
+
+
+def test_estatisticas_leem_os_resumos(banco):
+    financeiro = FinanceiroService()
+    financeiro.db = banco
+
+    # Aluno 3 é inativo: fica fora das estatísticas
+    assert financeiro.obter_estatisticas_financeiras() == {
+        'pagas': 4, 'pendentes': 0, 'atrasadas': 6,
+        'receita_total': 2000, 'valor_pendente': 3000
+    }
+    assert [mes['mes_referencia'] for mes in financeiro.obter_resumo_meses(2)] == ['2025-07', '2025-06']
+
+    dashboard = DashboardService()
+    dashboard.db = banco
+    assert dashboard.obter_estatisticas_gerais()['atrasadas'] == 6
+    assert dashboard.obter_resumo_financeiro_atual()['total_inadimplentes'] == 2
+
+
+def test_comando_de_reconstrucao(banco):
+    conn = banco.get_connection()
+    conn.execute("DELETE FROM resumo_turmas")
+    conn.commit()
+    conn.close()
+
+    financeiro = FinanceiroService()
+    financeiro.db = banco
+    assert financeiro.reconstruir_resumos() == {'success': True, 'alunos': 3}
+    assert financeiro.obter_estatisticas_financeiras()['atrasadas'] == 6
+
+
+def test_snapshot_do_dashboard_dentro_de_transacao(banco):
+    dashboard = DashboardService()
+    dashboard.db = banco
+
+    def status():
+        dados = dashboard.obter_dados_grafico_status_mensalidades()
+        return dict(zip(dados['labels'], dados['valores']))
+
+    with pytest.raises(RuntimeError):
+        with banco.transacao() as conn:
+            conn.execute("""
+                UPDATE pagamentos SET status = 'Cancelado'
+                WHERE aluno_id = 1 AND mes_referencia = '2025-07'
+            """)
+            # Outros status não contam como pendentes
+            assert status() == {'Pagas': 4, 'Atrasadas': 5}
+            raise RuntimeError("cancelado")
+
+    # Transação desfeita: o snapshot lido dentro dela não fica no cache
+    assert status() == {'Pagas': 4, 'Atrasadas': 6}
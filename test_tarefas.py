@@ -0,0 +1,123 @@
+# test_tarefas.py - Tarefas em segundo plano entregues no thread da tela
+
+import threading
+import time
+
+from utils.tarefas import TarefasTela
+
+
+class WidgetFalso:
+    """Só o necessário de um widget Tk: after/after_cancel e bind(<Destroy>)"""
+
+    def __init__(self):
+        self.agendados = {}
+        self.ao_destruir = None
+        self._proximo = 0
+
+    def after(self, ms, funcao):
+        self._proximo += 1
+        self.agendados[self._proximo] = funcao
+        return self._proximo
+
+    def after_cancel(self, after_id):
+        self.agendados.pop(after_id, None)
+
+    def bind(self, sequencia, funcao, add=None):
+        self.ao_destruir = funcao
+
+    def rodar_loop(self, limite=5.0):
+        """Executa os after() pendentes até não sobrar nenhum"""
+        fim = time.time() + limite
+        while self.agendados and time.time() < fim:
+            after_id = min(self.agendados)
+            self.agendados.pop(after_id)()
+            time.sleep(0.005)
+
+    def destruir(self):
+        self.ao_destruir(type('Evento', (), {'widget': self})())
+
+
+def test_resultado_entregue_no_thread_da_tela():
+    widget = WidgetFalso()
+    tarefas = TarefasTela(widget)
+    recebidos = []
+
+    tarefas.executar(
+        lambda a, b: (a + b, threading.current_thread()),
+        2, 3,
+        ao_concluir=lambda r: recebidos.append((r[0], r[1], threading.current_thread()))
+    )
+    widget.rodar_loop()
+
+    soma, thread_trabalho, thread_callback = recebidos[0]
+    assert soma == 5
+    assert thread_trabalho is not threading.main_thread()
+    assert thread_callback is threading.main_thread()
+    assert tarefas.pendentes() == 0
+
+
+def test_falha_vai_para_ao_falhar():
+    widget = WidgetFalso()
+    tarefas = TarefasTela(widget)
+    erros = []
+
+    def falhar():
+        raise ValueError("sem banco")
+
+    tarefas.executar(falhar, ao_concluir=lambda r: erros.append('ok'), ao_falhar=erros.append)
+    widget.rodar_loop()
+
+    assert len(erros) == 1 and isinstance(erros[0], ValueError)
+
+
+def test_mesma_chave_cancela_a_anterior():
+    widget = WidgetFalso()
+    tarefas = TarefasTela(widget)
+    liberar = threading.Event()
+    recebidos = []
+
+    tarefas.executar(lambda: liberar.wait(5) and 'antiga', ao_concluir=recebidos.append, chave='dados')
+    tarefas.executar(lambda: 'nova', ao_concluir=recebidos.append, chave='dados')
+    liberar.set()
+    time.sleep(0.05)
+    widget.rodar_loop()
+
+    assert recebidos == ['nova']
+
+
+def test_destruir_tela_descarta_resultados():
+    widget = WidgetFalso()
+    tarefas = TarefasTela(widget)
+    liberar = threading.Event()
+    recebidos = []
+
+    tarefas.executar(lambda: liberar.wait(5), ao_concluir=recebidos.append)
+    widget.destruir()
+    liberar.set()
+    time.sleep(0.05)
+    widget.rodar_loop()
+
+    assert recebidos == []
+    assert not widget.agendados
+    assert tarefas.executar(lambda: 1) is None
+
+
+def test_progresso_entregue_no_thread_da_tela():
+    widget = WidgetFalso()
+    tarefas = TarefasTela(widget)
+    etapas = []
+
+    def trabalho(total, progresso):
+        for feitos in range(1, total + 1):
+            progresso(feitos, total)
+        return 'fim'
+
+    tarefas.executar(
+        trabalho, 3,
+        ao_progresso=lambda feitos, total: etapas.append((feitos, threading.current_thread())),
+        ao_concluir=etapas.append
+    )
+    widget.rodar_loop()
+
+    assert [e[0] for e in etapas[:-1]] == [1, 2, 3] and etapas[-1] == 'fim'
+    assert all(thread is threading.main_thread() for _, thread in etapas[:-1])
@@ -0,0 +1,123 @@
+# test_trabalhos_exportacao.py - Fila de exportações em processos separados
+
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from database.connection import DatabaseConnection, BancoSomenteLeitura
+from services import trabalho_exportacao_service as modulo
+from services.trabalho_exportacao_service import TrabalhoExportacaoService
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    banco = DatabaseConnection(tmp_path / "trabalhos.db")
+    conn = banco.get_connection()
+    conn.executemany("""
+        INSERT INTO alunos (id, nome, data_nascimento, turma_id, status, valor_mensalidade)
+        VALUES (?, ?, '2015-01-01', 1, 'Ativo', 500)
+    """, [(i, f"Aluno {i}") for i in range(1, 21)])
+    conn.executemany("""
+        INSERT INTO pagamentos (aluno_id, mes_referencia, valor_original, valor_final,
+                                data_vencimento, status)
+        VALUES (?, ?, 500, 500, ?, 'Pendente')
+    """, [(i, f"2025-{mes:02d}", f"2025-{mes:02d}-10") for i in range(1, 21) for mes in range(3, 13)])
+    conn.commit()
+    conn.close()
+    yield banco
+    modulo.encerrar_processos(esperar=True)
+    banco.close_connection()
+
+
+def _aguardar(servico, limite=60):
+    fim = time.time() + limite
+    while servico.em_aberto() and time.time() < fim:
+        time.sleep(0.1)
+    return servico.listar_trabalhos()
+
+
+def test_pacote_roda_em_processos_e_registra_status(banco):
+    servico = TrabalhoExportacaoService()
+    servico.db = banco
+
+    resultado = servico.enfileirar_pacote([
+        'mensalidades_csv',
+        ('mensalidades_csv', {'filtros': {'aluno_id': 1}}),
+        'inadimplencia_pdf',
+    ])
+    assert resultado['success']
+
+    trabalhos = {t['id']: t for t in _aguardar(servico)}
+    csv_todos, csv_aluno, pdf = (trabalhos[i] for i in resultado['ids'])
+
+    assert csv_todos['status'] == 'Concluído' and csv_todos['registros'] == 200
+    assert csv_aluno['status'] == 'Concluído' and csv_aluno['registros'] == 10
+    assert Path(csv_todos['arquivo']).exists() and csv_todos['concluido_em']
+    # Sem ReportLab instalado o trabalho termina em erro, com a mensagem gravada
+    assert pdf['status'] in ('Concluído', 'Erro')
+    assert pdf['status'] == 'Concluído' or 'ReportLab' in pdf['erro']
+
+
+def test_pacote_mensal_completo(banco):
+    servico = TrabalhoExportacaoService()
+    servico.db = banco
+
+    resultado = servico.enfileirar_pacote(modulo.PACOTE_MENSAL)
+    assert resultado['success']
+
+    trabalhos = {t['id']: t for t in _aguardar(servico)}
+    for trabalho_id in resultado['ids']:
+        trabalho = trabalhos[trabalho_id]
+        assert trabalho['status'] == 'Concluído', (trabalho['tipo'], trabalho['erro'])
+        assert Path(trabalho['arquivo']).stat().st_size > 0
+
+
+def test_tipo_desconhecido_nao_enfileira(banco):
+    servico = TrabalhoExportacaoService()
+    servico.db = banco
+
+    resultado = servico.enfileirar_pacote(['mensalidades_csv', 'relatorio_inexistente'])
+
+    assert not resultado['success']
+    assert servico.listar_trabalhos() == []
+
+
+def test_conexao_do_processo_e_somente_leitura(banco):
+    leitura = BancoSomenteLeitura(banco.db_path)
+    conn = leitura.get_connection()
+
+    assert conn.execute("SELECT COUNT(*) FROM alunos").fetchone()[0] == 20
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM alunos")
+    conn.close()
+    assert leitura.get_connection() is conn
+    leitura.close_connection()
+
+
+def test_processo_de_trabalho_nao_abre_o_banco_de_producao(banco, tmp_path):
+    raiz = Path(modulo.__file__).resolve().parent.parent
+    pasta_banco = raiz / "database"
+    antes = {p.name: p.stat().st_mtime_ns for p in pasta_banco.glob("escola*")}
+
+    # Mesmo caminho de um processo do pool: importa o módulo e roda o trabalho
+    codigo = (
+        "import sys; from services.trabalho_exportacao_service import _executar_trabalho; "
+        "r = _executar_trabalho(sys.argv[1], 'mensalidades_csv', sys.argv[2], {}); "
+        "from database.connection import db; "
+        "assert r['success'] and r['registros'] == 200, r; "
+        "assert not db._inicializado"
+    )
+    resultado = subprocess.run(
+        [sys.executable, '-c', codigo, str(banco.db_path), str(tmp_path / "m.csv")],
+        cwd=raiz, capture_output=True, text=True, timeout=60,
+        env={**os.environ, 'PYTHONPATH': str(raiz)}
+    )
+
+    assert resultado.returncode == 0, resultado.stderr
+    assert {p.name: p.stat().st_mtime_ns for p in pasta_banco.glob("escola*")} == antes
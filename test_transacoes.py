@@ -0,0 +1,123 @@
+# test_transacoes.py - Unidade de trabalho: matrícula, responsáveis e mensalidades num só COMMIT
+
+import sqlite3
+
+import pytest
+
+from database.connection import DatabaseConnection, TransacaoAbortada
+from services.aluno_service import AlunoService
+
+ALUNO = {
+    'nome': 'Aluno Transação',
+    'data_nascimento': '2015-05-05',
+    'turma_id': 1,
+    'status': 'Ativo',
+    'valor_mensalidade': 450.0,
+}
+RESPONSAVEIS = [
+    {'nome': 'Mãe', 'telefone': '11999999999', 'parentesco': 'Mãe', 'principal': True},
+    {'nome': 'Pai', 'telefone': '11888888888', 'parentesco': 'Pai', 'principal': False},
+]
+
+
+@pytest.fixture
+def banco(tmp_path):
+    banco = DatabaseConnection(tmp_path / "transacoes.db")
+    yield banco
+    banco.close_connection()
+
+
+@pytest.fixture
+def servico(banco):
+    servico = AlunoService()
+    servico.db = banco
+    return servico
+
+
+def _contar(banco, sql, params=()):
+    conn = banco.get_connection()
+    total = conn.execute(sql, params).fetchone()[0]
+    conn.close()
+    return total
+
+
+def _rastrear_commits(banco):
+    """Liga o trace na conexão ociosa do pool (a mesma é reaproveitada)"""
+    comandos = []
+    conn = banco.get_connection()
+    conn.set_trace_callback(comandos.append)
+    conn.close()
+    return lambda: [c for c in comandos if c.strip().upper().startswith('COMMIT')]
+
+
+def test_matricula_completa_em_um_commit(banco, servico):
+    commits = _rastrear_commits(banco)
+
+    resultado = servico.salvar_aluno(dict(ALUNO), RESPONSAVEIS)
+
+    assert resultado['success']
+    aluno_id = resultado['id']
+    assert _contar(banco, "SELECT COUNT(*) FROM responsaveis WHERE aluno_id = ?", (aluno_id,)) == 2
+    assert _contar(banco, "SELECT COUNT(*) FROM pagamentos WHERE aluno_id = ?", (aluno_id,)) > 0
+    assert len(commits()) == 1
+
+
+def test_falha_nas_mensalidades_desfaz_matricula(banco, servico):
+    conn = banco.get_connection()
+    conn.execute("""
+        CREATE TRIGGER trg_teste_falha BEFORE INSERT ON pagamentos
+        BEGIN SELECT RAISE(ABORT, 'falha simulada'); END
+    """)
+    conn.commit()
+    conn.close()
+
+    alunos_antes = _contar(banco, "SELECT COUNT(*) FROM alunos")
+    resultado = servico.salvar_aluno(dict(ALUNO), RESPONSAVEIS)
+
+    assert not resultado['success']
+    assert _contar(banco, "SELECT COUNT(*) FROM alunos") == alunos_antes
+    assert _contar(banco, "SELECT COUNT(*) FROM responsaveis WHERE nome IN ('Mãe', 'Pai')") == 0
+
+
+def test_edicao_reajusta_pendentes_na_mesma_transacao(banco, servico):
+    aluno_id = servico.salvar_aluno(dict(ALUNO), RESPONSAVEIS)['id']
+    commits = _rastrear_commits(banco)
+
+    edicao = dict(ALUNO, id=aluno_id, valor_mensalidade=600.0)
+    assert servico.salvar_aluno(edicao, RESPONSAVEIS[:1])['success']
+
+    assert len(commits()) == 1
+    assert _contar(banco, """
+        SELECT COUNT(*) FROM pagamentos
+        WHERE aluno_id = ? AND status != 'Pago' AND valor_original != 600
+    """, (aluno_id,)) == 0
+    assert _contar(banco, "SELECT COUNT(*) FROM responsaveis WHERE aluno_id = ?", (aluno_id,)) == 1
+
+
+def test_etapas_viram_savepoints(banco):
+    with banco.transacao() as conn:
+        conn.execute("UPDATE turmas SET nome = 'Externa' WHERE id = 1")
+
+        # Etapa confirmada: fica
+        etapa = banco.get_connection()
+        etapa.execute("UPDATE turmas SET nome = 'Confirmada' WHERE id = 2")
+        etapa.commit()
+        etapa.close()
+
+        # Etapa fechada sem commit: descartada (como no pool)
+        etapa = banco.get_connection()
+        etapa.execute("UPDATE turmas SET nome = 'Descartada' WHERE id = 1")
+        etapa.close()
+
+    assert _contar(banco, "SELECT COUNT(*) FROM turmas WHERE nome IN ('Externa', 'Confirmada')") == 2
+
+    # Uma etapa que desfaz aborta a transação inteira
+    with pytest.raises(TransacaoAbortada):
+        with banco.transacao() as conn:
+            conn.execute("UPDATE turmas SET nome = 'Perdida' WHERE id = 1")
+            etapa = banco.get_connection()
+            etapa.rollback()
+            etapa.close()
+
+    assert _contar(banco, "SELECT COUNT(*) FROM turmas WHERE nome = 'Perdida'") == 0
+    assert issubclass(TransacaoAbortada, sqlite3.Error)
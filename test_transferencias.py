@@ -0,0 +1,87 @@
+# test_transferencias.py - Transferência em lote: uma transação, um UPDATE por lote de ids, erros por aluno
+
+import pytest
+
+from database.connection import DatabaseConnection
+from services import transferencia_service
+from services.transferencia_service import TransferenciaService
+
+
+@pytest.fixture
+def banco(tmp_path):
+    banco = DatabaseConnection(tmp_path / "transferencias.db")
+    yield banco
+    banco.close_connection()
+
+
+@pytest.fixture
+def servico(banco):
+    servico = TransferenciaService()
+    servico.db = banco
+    return servico
+
+
+def _inserir_alunos(banco, alunos):
+    conn = banco.get_connection()
+    ids = []
+    for nome, turma_id, status in alunos:
+        cursor = conn.execute(
+            "INSERT INTO alunos (nome, data_nascimento, turma_id, status) VALUES (?, '2015-01-01', ?, ?)",
+            (nome, turma_id, status)
+        )
+        ids.append(cursor.lastrowid)
+    conn.commit()
+    conn.close()
+    return ids
+
+
+def _consultar(banco, sql, params=()):
+    conn = banco.get_connection()
+    linhas = [tuple(row) for row in conn.execute(sql, params).fetchall()]
+    conn.close()
+    return linhas
+
+
+@pytest.mark.parametrize('tamanho_lote', [500, 7])
+def test_lote_transfere_validos_e_reporta_erros_por_aluno(banco, servico, monkeypatch, tamanho_lote):
+    # Lote pequeno: a seleção passa por vários IN (?, ...)
+    monkeypatch.setattr(transferencia_service, 'TAMANHO_LOTE_IDS', tamanho_lote)
+    ativos = _inserir_alunos(banco, [(f"Aluno {i}", 1, 'Ativo') for i in range(30)])
+    inativo, outra_turma = _inserir_alunos(banco, [("Inativo", 1, 'Inativo'), ("Outra Turma", 2, 'Ativo')])
+
+    comandos = []
+    conn = banco.get_connection()
+    conn.set_trace_callback(comandos.append)
+    conn.close()
+    progresso = []
+
+    resultado = servico.transferir_alunos_lote(
+        ativos + [inativo, outra_turma, 99999], 1, 2, 'Remanejamento', 'lote',
+        progresso=lambda feitos, total, msg: progresso.append((feitos, total))
+    )
+
+    assert resultado['success']
+    assert {a['id'] for a in resultado['transferidos']} == set(ativos)
+    assert {e['aluno_id'] for e in resultado['erros']} == {inativo, outra_turma, 99999}
+
+    assert len([c for c in comandos if c.strip().upper().startswith('COMMIT')]) == 1
+
+    assert _consultar(banco, "SELECT COUNT(*) FROM alunos WHERE turma_id = 2 AND id != ?", (outra_turma,)) == [(30,)]
+    assert _consultar(banco, "SELECT turma_id FROM alunos WHERE id = ?", (inativo,)) == [(1,)]
+    assert _consultar(banco, """
+        SELECT COUNT(*) FROM historico_transferencias
+        WHERE turma_origem_id = 1 AND turma_destino_id = 2 AND motivo = 'Remanejamento'
+    """) == [(30,)]
+
+    assert progresso[0] == (0, 33) and progresso[-1] == (33, 33)
+
+
+def test_lote_com_turmas_iguais_nao_altera_nada(banco, servico):
+    ids = _inserir_alunos(banco, [("Aluno A", 1, 'Ativo')])
+
+    validacao = servico.validar_transferencia_lote(ids, 1, 1)
+    resultado = servico.transferir_alunos_lote(ids, 1, 1, 'Teste', '')
+
+    assert not validacao['success'] and validacao['problemas']
+    assert not resultado['success'] and resultado['error']
+    assert _consultar(banco, "SELECT COUNT(*) FROM historico_transferencias") == [(0,)]
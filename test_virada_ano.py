@@ -0,0 +1,106 @@
+# test_virada_ano.py - Virada do ano letivo: prévia sem gravar e execução num só COMMIT
+
+import pytest
+
+from database.connection import DatabaseConnection
+from services.virada_ano_service import ViradaAnoService
+
+
+@pytest.fixture
+def banco(tmp_path):
+    banco = DatabaseConnection(tmp_path / "virada.db")
+    conn = banco.get_connection()
+    conn.execute("DELETE FROM turmas")
+    conn.executemany("INSERT INTO turmas (id, nome, serie, ano_letivo) VALUES (?, ?, ?, '2025')", [
+        (1, '5º Ano A', '5º Ano'),
+        (2, '9º Ano A', '9º Ano'),
+        (3, 'Pré-escola', 'Infantil'),
+    ])
+    conn.executemany("""
+        INSERT INTO alunos (nome, data_nascimento, turma_id, status, valor_mensalidade, data_matricula)
+        VALUES (?, '2015-01-01', ?, ?, 500, '2025-02-01')
+    """, [(f"Aluno {i}", 1 + i % 3, 'Inativo' if i == 0 else 'Ativo') for i in range(12)])
+    conn.commit()
+    conn.close()
+    yield banco
+    banco.close_connection()
+
+
+@pytest.fixture
+def servico(banco):
+    servico = ViradaAnoService()
+    servico.db = banco
+    return servico
+
+
+def _consultar(banco, sql, params=()):
+    conn = banco.get_connection()
+    linhas = [tuple(row) for row in conn.execute(sql, params).fetchall()]
+    conn.close()
+    return linhas
+
+
+def test_proxima_serie(servico):
+    assert servico.proxima_serie('5º Ano') == '6º Ano'
+    assert servico.proxima_serie('Infantil') == '1º Ano'
+    assert servico.proxima_serie('9º Ano') is None
+
+
+def test_previa_nao_grava_nada(banco, servico):
+    plano = servico.executar_virada(2025, simular=True)
+
+    assert plano['success']
+    assert plano['turmas_novas'] == ['1º Ano - Pré-escola', '6º Ano A']
+    assert plano['total_promovidos'] == 7 and plano['total_concluintes'] == 4
+    assert plano['mensalidades_previstas'] == 70
+    assert _consultar(banco, "SELECT COUNT(*) FROM turmas WHERE ano_letivo = '2026'") == [(0,)]
+
+
+def test_virada_em_um_commit(banco, servico):
+    comandos = []
+    conn = banco.get_connection()
+    conn.set_trace_callback(comandos.append)
+    conn.close()
+
+    resultado = servico.executar_virada(2025, reajuste_percentual=10)
+
+    assert resultado['success']
+    assert resultado['turmas_criadas'] == 2 and resultado['alunos_promovidos'] == 7
+    assert resultado['mensalidades_criadas'] == 70 and resultado['concluintes'] == 4
+    assert len([c for c in comandos if c.strip().upper().startswith('COMMIT')]) == 1
+
+    assert _consultar(banco, """
+        SELECT t.nome, COUNT(*), MIN(a.valor_mensalidade) FROM alunos a
+        JOIN turmas t ON t.id = a.turma_id
+        WHERE t.ano_letivo = '2026' GROUP BY t.nome ORDER BY t.nome
+    """) == [('1º Ano - Pré-escola', 4, 550.0), ('6º Ano A', 3, 550.0)]
+    # Inativos e concluintes ficam onde estão; concluintes (9º Ano) ficam inativos
+    assert _consultar(banco, "SELECT COUNT(*) FROM alunos WHERE turma_id IN (1, 2)") == [(5,)]
+    assert _consultar(banco, "SELECT status, COUNT(*) FROM alunos WHERE turma_id = 2 GROUP BY status") == [('Inativo', 4)]
+    assert _consultar(banco, """
+        SELECT COUNT(*) FROM pagamentos p JOIN alunos a ON a.id = p.aluno_id WHERE a.turma_id = 2
+    """) == [(0,)]
+    assert _consultar(banco, """
+        SELECT COUNT(*) FROM historico_transferencias WHERE motivo = 'Promoção para próxima série'
+    """) == [(7,)]
+
+    # Rodar de novo reaproveita as turmas e não promove ninguém duas vezes
+    repeticao = servico.executar_virada(2025)
+    assert repeticao['success'] and repeticao['turmas_criadas'] == 0 and repeticao['alunos_promovidos'] == 0
+    assert repeticao['concluintes'] == 0
+
+
+def test_falha_desfaz_a_virada_inteira(banco, servico):
+    conn = banco.get_connection()
+    conn.execute("""
+        CREATE TRIGGER trg_teste_falha BEFORE INSERT ON pagamentos
+        BEGIN SELECT RAISE(ABORT, 'falha simulada'); END
+    """)
+    conn.commit()
+    conn.close()
+
+    resultado = servico.executar_virada(2025)
+
+    assert not resultado['success']
+    assert _consultar(banco, "SELECT COUNT(*) FROM turmas WHERE ano_letivo = '2026'") == [(0,)]
+    assert _consultar(banco, "SELECT COUNT(*) FROM historico_transferencias") == [(0,)]
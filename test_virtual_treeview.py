@@ -0,0 +1,171 @@
+# test_virtual_treeview.py - Grade virtual e fonte paginada
+
+from utils.virtual_treeview import FontePaginada, VirtualTreeview
+
+
+class TreeviewFalso:
+    """Só o necessário de um ttk.Treeview: itens na ordem da tela e a vista"""
+
+    def __init__(self):
+        self.ordem = []
+        self.valores = {}
+        self.preenchimentos = 0
+        self.topo = 0.0
+        self._selecao = ()
+        self._proximo = 0
+
+    def insert(self, parent, index):
+        self._proximo += 1
+        iid = f"I{self._proximo}"
+        self.ordem.append(iid)
+        return iid
+
+    def move(self, iid, parent, index):
+        if iid in self.ordem:
+            self.ordem.remove(iid)
+        self.ordem.insert(len(self.ordem) if index == 'end' else index, iid)
+
+    def detach(self, iid):
+        if iid in self.ordem:
+            self.ordem.remove(iid)
+
+    def delete(self, iid):
+        self.detach(iid)
+
+    def item(self, iid, values, tags):
+        self.valores[iid] = values
+        self.preenchimentos += 1
+
+    def yview_moveto(self, fracao):
+        self.topo = fracao
+
+    def selection(self):
+        return self._selecao
+
+    def selection_set(self, itens):
+        self._selecao = tuple(itens)
+
+    def linhas_visiveis(self, quantidade):
+        """Valores das linhas que a vista mostra"""
+        primeira = round(self.topo * len(self.ordem))
+        return [self.valores[iid][0] for iid in self.ordem[primeira:primeira + quantidade]]
+
+
+class BarraFalsa:
+    def set(self, inicio, fim):
+        self.posicao = (inicio, fim)
+
+
+def _grade(total, linhas=10):
+    grade = VirtualTreeview.__new__(VirtualTreeview)
+    grade.formatar_linha = lambda registro: ((registro,), ())
+    grade.fonte, grade.inicio, grade.primeiro, grade.indice_selecionado = [], 0, 0, None
+    grade._itens, grade._indice_item = [], {}
+    grade._linhas_visiveis, grade._ignorar_selecao = linhas, 0
+    grade.tree, grade.v_scroll = TreeviewFalso(), BarraFalsa()
+    grade.definir_fonte(list(range(total)))
+    return grade
+
+
+def test_reserva_acima_e_abaixo_da_tela():
+    grade = _grade(1000)
+    reserva = VirtualTreeview.LINHAS_RESERVA
+
+    assert len(grade._itens) == 10 + 2 * reserva
+    grade.rolar(100)
+    assert grade.tree.linhas_visiveis(10) == list(range(100, 110))
+    assert sorted(grade._indice_item.values()) == list(range(100 - reserva, 110 + reserva))
+
+
+def test_rolagem_curta_so_move_a_vista():
+    grade = _grade(1000)
+    grade.rolar(50)
+    antes = grade.tree.preenchimentos
+
+    grade.rolar(VirtualTreeview.LINHAS_RESERVA)
+    grade.rolar(-VirtualTreeview.LINHAS_RESERVA)
+
+    assert grade.tree.preenchimentos == antes
+    assert grade.tree.linhas_visiveis(10) == list(range(50, 60))
+
+
+def test_rolagem_longa_preenche_cada_linha_uma_vez():
+    grade = _grade(1000)
+    itens = list(grade._itens)
+    antes = grade.tree.preenchimentos
+
+    for _ in range(300):
+        grade.rolar(1)
+        assert grade.tree.linhas_visiveis(10) == list(range(grade.inicio, grade.inicio + 10))
+
+    # Os mesmos itens do Tk, reaproveitados; só as linhas novas são preenchidas
+    assert sorted(grade._itens) == sorted(itens)
+    assert grade.tree.preenchimentos - antes <= 300 + VirtualTreeview.LINHAS_RESERVA
+
+
+def test_fim_e_lista_curta():
+    grade = _grade(1000)
+    grade.rolar(5000)
+    assert grade.inicio == 990
+    assert grade.tree.linhas_visiveis(10) == list(range(990, 1000))
+
+    curta = _grade(12)
+    curta.rolar(5)
+    assert curta.inicio == 2
+    assert curta.tree.linhas_visiveis(10) == list(range(2, 12))
+
+
+def test_linha_inserida_e_removida_mantem_a_selecao():
+    grade = _grade(100)
+    grade.rolar(20)
+    grade.indice_selecionado = 25
+
+    grade.fonte.insert(22, 'nova')
+    grade.inserir_linha(22)
+    assert grade.tree.linhas_visiveis(3) == [20, 21, 'nova']
+    assert grade.registro_selecionado() == 25
+
+    del grade.fonte[22]
+    grade.remover_linha(22)
+    assert grade.tree.linhas_visiveis(3) == [20, 21, 22]
+    assert grade.registro_selecionado() == 25
+
+
+def _buscador(registros, chamadas):
+    """Simula buscar_pagina_mensalidades sobre uma lista ordenada"""
+    def buscar_pagina(apos, limite):
+        chamadas.append(limite)
+        inicio = 0 if apos is None else apos + 1
+        pagina = registros[inicio:inicio + limite]
+        return {
+            'registros': pagina,
+            'cursor': inicio + len(pagina) - 1 if pagina else apos,
+            'tem_mais': inicio + limite < len(registros)
+        }
+    return buscar_pagina
+
+
+def test_busca_somente_paginas_necessarias():
+    chamadas = []
+    fonte = FontePaginada(_buscador(list(range(1000)), chamadas), 1000, tamanho_pagina=50)
+
+    assert [fonte[i] for i in range(20)] == list(range(20))
+    assert chamadas == [50]
+
+    # Salto longo: uma única busca cobre o intervalo
+    assert fonte[900] == 900
+    assert len(chamadas) == 2
+    assert fonte.registros == list(range(len(fonte.registros)))
+
+
+def test_total_ajustado_quando_base_encolhe():
+    chamadas = []
+    fonte = FontePaginada(_buscador(list(range(30)), chamadas), 40, tamanho_pagina=25)
+
+    try:
+        fonte[35]
+    except IndexError:
+        pass
+
+    assert len(fonte) == 30
+    assert fonte[-1] == 29
@@ -0,0 +1,118 @@
+"""
+Cache de telas vivas para a janela principal.
+
+Cada tela é construída uma vez dentro do seu próprio Frame; navegar só
+esconde (pack_forget) a atual e mostra a escolhida. Ao voltar para uma
+tela, ela recarrega os dados apenas se a versão das tabelas das quais
+depende mudou desde que foi escondida. As telas menos usadas recentemente
+são destruídas quando o limite é atingido.
+"""
+
+import tkinter as tk
+from collections import OrderedDict
+
+MAX_TELAS_VIVAS = 3
+
+
+class TelaViva:
+    """Uma tela construída: container, objeto da interface e versão vista"""
+
+    def __init__(self, nome, container, interface, versao):
+        self.nome = nome
+        self.container = container
+        self.interface = interface
+        self.versao = versao
+
+
+class CacheTelas:
+    """LRU de telas construídas dentro de `parent`.
+
+    `construir(nome, container)` cria a interface; `versao(nome)` retorna a
+    versão atual dos dados da tela (ex.: versao_tabelas) e `recarregar(nome,
+    interface)` atualiza uma tela cujos dados mudaram.
+    """
+
+    def __init__(self, parent, construir, versao, recarregar, max_telas=MAX_TELAS_VIVAS):
+        self.parent = parent
+        self.construir = construir
+        self.versao = versao
+        self.recarregar = recarregar
+        self.max_telas = max_telas
+
+        self._telas = OrderedDict()
+        self.atual = None
+
+    def __contains__(self, nome):
+        return nome in self._telas
+
+    def __len__(self):
+        return len(self._telas)
+
+    def nomes(self):
+        """Telas vivas, da menos para a mais recentemente usada"""
+        return list(self._telas)
+
+    def containers(self):
+        return [tela.container for tela in self._telas.values()]
+
+    def mostrar(self, nome):
+        """Mostra a tela (construindo ou recarregando se preciso) e retorna a interface"""
+        self.esconder()
+
+        tela = self._telas.get(nome)
+        if tela is None:
+            tela = self._construir(nome)
+        else:
+            self._telas.move_to_end(nome)
+            versao = self.versao(nome)
+            if versao != tela.versao:
+                print(f"🔄 Dados da tela '{nome}' mudaram: recarregando")
+                tela.versao = versao
+                self.recarregar(nome, tela.interface)
+
+        tela.container.pack(fill=tk.BOTH, expand=True)
+        self.atual = nome
+        return tela.interface
+
+    def esconder(self):
+        """Esconde a tela atual, guardando a versão dos dados que ela exibe"""
+        tela = self._telas.get(self.atual)
+        if tela is not None:
+            tela.container.pack_forget()
+            tela.versao = self.versao(tela.nome)
+        self.atual = None
+
+    def descartar(self, nome):
+        """Destroi a tela (as tarefas pendentes dela são canceladas)"""
+        tela = self._telas.pop(nome, None)
+        if tela is None:
+            return
+        if self.atual == nome:
+            self.atual = None
+        tarefas = getattr(tela.interface, 'tarefas', None)
+        if tarefas is not None:
+            tarefas.encerrar()
+        tela.container.destroy()
+
+    def limpar(self):
+        for nome in list(self._telas):
+            self.descartar(nome)
+
+    def _construir(self, nome):
+        # Abrir espaço antes de construir mantém no máximo `max_telas` vivas
+        while len(self._telas) >= self.max_telas:
+            antiga = next(iter(self._telas))
+            print(f"🗑️ Liberando tela '{antiga}' (menos usada recentemente)")
+            self.descartar(antiga)
+
+        container = tk.Frame(self.parent, bg='white')
+        versao = self.versao(nome)
+        try:
+            interface = self.construir(nome, container)
+        except Exception:
+            container.destroy()
+            raise
+
+        tela = TelaViva(nome, container, interface, versao)
+        self._telas[nome] = tela
+        return tela
@@ -91,3 +91,33 @@ def parse_date(date_string):
         
     except:
         return None
+
+def date_to_ordinal(date_value):
+    """Converte data (date ou 'AAAA-MM-DD') para ordinal inteiro (date.toordinal)"""
+    try:
+        if not date_value:
+            return None
+        
+        if isinstance(date_value, datetime):
+            return date_value.date().toordinal()
+        
+        if isinstance(date_value, date):
+            return date_value.toordinal()
+        
+        return datetime.strptime(str(date_value)[:10], '%Y-%m-%d').date().toordinal()
+        
+    except (ValueError, TypeError):
+        return None
+
+def month_ordinal_range(ano, mes):
+    """Retorna (primeiro_dia, ultimo_dia) do mês como ordinais inteiros"""
+    inicio = date(int(ano), int(mes), 1)
+    if int(mes) == 12:
+        proximo = date(int(ano) + 1, 1, 1)
+    else:
+        proximo = date(int(ano), int(mes) + 1, 1)
+    return inicio.toordinal(), proximo.toordinal() - 1
+
+def year_ordinal_range(ano):
+    """Retorna (primeiro_dia, ultimo_dia) do ano como ordinais inteiros"""
+    return date(int(ano), 1, 1).toordinal(), date(int(ano), 12, 31).toordinal()
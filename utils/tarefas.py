@@ -0,0 +1,202 @@
+"""
+Tarefas em segundo plano para as telas Tkinter.
+
+O Tk só pode ser usado pelo thread principal. As consultas dos serviços
+rodam num pool de threads compartilhado e o resultado vai para a fila da
+tela; a tela esvazia essa fila com after() e os callbacks rodam no thread
+do Tk. Quando a tela é destruída (troca de tela), as tarefas pendentes são
+canceladas e seus resultados descartados.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_TRABALHADORES = 4
+INTERVALO_FILA_MS = 40
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool():
+    """Pool de threads compartilhado por todas as telas (criado sob demanda)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_TRABALHADORES,
+                                       thread_name_prefix='tarefa')
+        return _pool
+
+
+def encerrar_pool(esperar=False):
+    """Encerra o pool, descartando o que ainda não começou a rodar"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=esperar, cancel_futures=True)
+
+
+class Tarefa:
+    """Uma chamada de serviço em segundo plano"""
+
+    def __init__(self, funcao, args, kwargs, ao_concluir, ao_falhar, carregando, chave,
+                 ao_progresso=None):
+        self.funcao = funcao
+        self.args = args
+        self.kwargs = kwargs
+        self.ao_concluir = ao_concluir
+        self.ao_falhar = ao_falhar
+        self.ao_progresso = ao_progresso
+        self.carregando = carregando
+        self.chave = chave
+        self.future = None
+        self.cancelada = False
+
+    def cancelar(self):
+        """Descarta o resultado (e evita a execução, se ainda estiver na fila)"""
+        self.cancelada = True
+        if self.future is not None:
+            self.future.cancel()
+        self.esconder_carregando()
+
+    def mostrar_carregando(self):
+        if self.carregando is not None:
+            self.carregando.place(relx=0.5, rely=0.5, anchor='center')
+            self.carregando.lift()
+
+    def esconder_carregando(self):
+        try:
+            if self.carregando is not None and self.carregando.winfo_exists():
+                self.carregando.place_forget()
+        except Exception:
+            pass
+
+
+class TarefasTela:
+    """Tarefas em segundo plano de uma tela.
+
+    `widget` deve pertencer à tela: a fila é esvaziada com `widget.after()`
+    e, quando ele é destruído, todas as tarefas pendentes são canceladas.
+    """
+
+    def __init__(self, widget, intervalo=INTERVALO_FILA_MS):
+        self.widget = widget
+        self.intervalo = intervalo
+        self.ativa = True
+
+        self._fila = queue.Queue()
+        self._pendentes = []
+        self._after_id = None
+
+        widget.bind('<Destroy>', self._on_destroy, add='+')
+
+    def executar(self, funcao, *args, ao_concluir=None, ao_falhar=None, ao_progresso=None,
+                 carregando=None, chave=None, **kwargs):
+        """Roda `funcao(*args, **kwargs)` no pool.
+
+        `ao_concluir(resultado)` ou `ao_falhar(erro)` são chamados no thread
+        do Tk. Com `ao_progresso`, a função recebe `progresso=` e cada
+        chamada dela chega a `ao_progresso(*args)` também no thread do Tk.
+        `carregando` é um widget exibido sobre o conteúdo enquanto a
+        tarefa roda. Uma nova tarefa com a mesma `chave` cancela a anterior
+        (ex.: recarregar antes da carga anterior terminar).
+        """
+        if not self.ativa:
+            return None
+
+        if chave is not None:
+            for pendente in [t for t in self._pendentes if t.chave == chave]:
+                self._descartar(pendente)
+
+        tarefa = Tarefa(funcao, args, kwargs, ao_concluir, ao_falhar, carregando, chave, ao_progresso)
+        if ao_progresso is not None:
+            kwargs['progresso'] = lambda *valores: self._fila.put((tarefa, 'progresso', valores))
+        tarefa.mostrar_carregando()
+        self._pendentes.append(tarefa)
+        tarefa.future = obter_pool().submit(self._rodar, tarefa)
+        self._agendar()
+        return tarefa
+
+    def pendentes(self):
+        """Quantidade de tarefas ainda sem resultado entregue"""
+        return len(self._pendentes)
+
+    def cancelar_todas(self):
+        """Cancela todas as tarefas pendentes da tela"""
+        for tarefa in list(self._pendentes):
+            self._descartar(tarefa)
+
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def encerrar(self):
+        """Cancela tudo e não aceita novas tarefas"""
+        self.ativa = False
+        self.cancelar_todas()
+
+    # === Thread de trabalho ===
+
+    def _rodar(self, tarefa):
+        if tarefa.cancelada:
+            return
+        try:
+            resultado = tarefa.funcao(*tarefa.args, **tarefa.kwargs)
+        except Exception as e:
+            self._fila.put((tarefa, 'erro', e))
+        else:
+            self._fila.put((tarefa, 'ok', resultado))
+
+    # === Thread do Tk ===
+
+    def _agendar(self):
+        if self._after_id is None and self.ativa and self._pendentes:
+            self._after_id = self.widget.after(self.intervalo, self.processar_fila)
+
+    def processar_fila(self):
+        """Entrega os resultados prontos aos callbacks (chamado via after)"""
+        self._after_id = None
+
+        while self.ativa:
+            try:
+                tarefa, tipo, valor = self._fila.get_nowait()
+            except queue.Empty:
+                break
+
+            if tarefa.cancelada:
+                continue
+
+            if tipo == 'progresso':
+                try:
+                    tarefa.ao_progresso(*valor)
+                except Exception as e:
+                    print(f"⚠️ Erro ao exibir progresso da tarefa: {e}")
+                continue
+
+            self._pendentes.remove(tarefa)
+            tarefa.esconder_carregando()
+
+            callback = tarefa.ao_concluir if tipo == 'ok' else tarefa.ao_falhar
+            try:
+                if callback:
+                    callback(valor)
+                elif tipo == 'erro':
+                    print(f"❌ Erro em tarefa de segundo plano: {valor}")
+            except Exception as e:
+                print(f"❌ Erro ao exibir resultado da tarefa: {e}")
+
+        self._agendar()
+
+    def _descartar(self, tarefa):
+        tarefa.cancelar()
+        if tarefa in self._pendentes:
+            self._pendentes.remove(tarefa)
+
+    def _on_destroy(self, event):
+        if event.widget is self.widget:
+            self.encerrar()
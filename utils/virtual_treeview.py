@@ -0,0 +1,388 @@
+"""
+Treeview com rolagem virtual para listas grandes.
+
+Só as linhas visíveis, mais LINHAS_RESERVA acima e abaixo, existem como
+itens do Tk. Rolagens curtas só deslocam a vista dentro dessa reserva; ao
+sair dela, os mesmos itens são reaproveitados (movidos de uma ponta à outra
+e preenchidos com a nova linha), então o custo de desenhar não depende do
+tamanho da lista.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+
+class FontePaginada:
+    """Fonte de dados que busca páginas sob demanda (paginação por chave).
+
+    `buscar_pagina(apos, limite)` deve retornar um dict com 'registros',
+    'cursor' e 'tem_mais'. `total` é a quantidade de registros esperada
+    (normalmente um COUNT com os mesmos filtros).
+    """
+
+    def __init__(self, buscar_pagina, total, tamanho_pagina=200):
+        self.buscar_pagina = buscar_pagina
+        self.total = total
+        self.tamanho_pagina = tamanho_pagina
+        self.registros = []
+        self._cursor = None
+        self._tem_mais = total > 0
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, indice):
+        if indice < 0:
+            indice += self.total
+        self.garantir(indice)
+        return self.registros[indice]
+
+    def garantir(self, indice):
+        """Carrega páginas até que `indice` esteja disponível"""
+        while indice >= len(self.registros) and self._tem_mais:
+            # Um salto longo (ex.: arrastar a barra até o fim) vira uma só busca,
+            # arredondada para páginas inteiras
+            faltam = indice - len(self.registros) + 1
+            paginas = -(-faltam // self.tamanho_pagina)
+            pagina = self.buscar_pagina(self._cursor, paginas * self.tamanho_pagina)
+            self.registros.extend(pagina['registros'])
+            self._cursor = pagina['cursor']
+            self._tem_mais = pagina['tem_mais']
+
+        if indice >= len(self.registros):
+            # A base mudou entre o COUNT e as páginas: ajusta o total
+            self.total = len(self.registros)
+            raise IndexError(indice)
+
+
+class VirtualTreeview(tk.Frame):
+    """Grade virtual baseada em ttk.Treeview.
+
+    A fonte de dados é qualquer sequência (len + índice) e `formatar_linha`
+    converte um registro em (values, tags). A seleção é guardada pelo índice
+    do registro, então continua válida mesmo quando a linha sai da tela.
+    """
+
+    # Linhas já preenchidas acima e abaixo da área visível
+    LINHAS_RESERVA = 5
+
+    def __init__(self, parent, columns, formatar_linha, height=15, bg='white', **tree_options):
+        super().__init__(parent, bg=bg)
+
+        self.formatar_linha = formatar_linha
+        self.fonte = []
+        self.inicio = 0           # primeira linha visível
+        self.primeiro = 0         # linha do primeiro item (reserva de cima incluída)
+        self.indice_selecionado = None
+
+        self._itens = []          # itens reaproveitados, na ordem da tela
+        self._indice_item = {}    # iid -> índice do registro exibido
+        self._linhas_visiveis = height
+        self._ignorar_selecao = 0
+
+        self.tree = ttk.Treeview(self, columns=columns, show='headings', height=height,
+                                 selectmode='browse', **tree_options)
+
+        self.v_scroll = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.h_scroll = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.h_scroll.set)
+
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.v_scroll.grid(row=0, column=1, sticky='ns')
+        self.h_scroll.grid(row=1, column=0, sticky='ew')
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        # Eventos internos ficam numa bindtag própria, antes da do widget,
+        # para não serem substituídos pelos tree.bind() das telas
+        self._tag = f"VirtualTreeview{id(self)}"
+        self.tree.bindtags((self._tag,) + self.tree.bindtags())
+
+        eventos = {
+            '<<TreeviewSelect>>': self._on_select,
+            '<Configure>': self._on_configure,
+            '<MouseWheel>': self._on_mousewheel,
+            '<Button-4>': lambda e: self.rolar(-3),
+            '<Button-5>': lambda e: self.rolar(3),
+            '<Up>': lambda e: self._mover_selecao(-1),
+            '<Down>': lambda e: self._mover_selecao(1),
+            '<Prior>': lambda e: self._mover_selecao(-self._linhas_visiveis),
+            '<Next>': lambda e: self._mover_selecao(self._linhas_visiveis),
+            '<Home>': lambda e: self._mover_selecao(-len(self.fonte)),
+            '<End>': lambda e: self._mover_selecao(len(self.fonte)),
+        }
+        for sequencia, funcao in eventos.items():
+            self.tree.bind_class(self._tag, sequencia, funcao)
+
+    # === API compatível com Treeview ===
+
+    def heading(self, column, **kw):
+        return self.tree.heading(column, **kw)
+
+    def column(self, column, **kw):
+        return self.tree.column(column, **kw)
+
+    def tag_configure(self, tagname, **kw):
+        return self.tree.tag_configure(tagname, **kw)
+
+    def bind(self, sequence=None, func=None, add=None):
+        return self.tree.bind(sequence, func, add)
+
+    def focus_set(self):
+        self.tree.focus_set()
+
+    # === Dados ===
+
+    def definir_fonte(self, fonte, manter_posicao=False):
+        """Troca a fonte de dados e redesenha as linhas visíveis"""
+        self.fonte = fonte
+        if not manter_posicao:
+            self.inicio = 0
+            self.indice_selecionado = None
+        self._desenhar(self.inicio, completo=True)
+
+    def recarregar(self):
+        """Redesenha as linhas visíveis (ex.: após alterar registros da fonte)"""
+        self._desenhar(self.inicio, completo=True)
+
+    def atualizar_linha(self, indice):
+        """Redesenha apenas a linha do índice informado, se estiver visível"""
+        for iid, indice_item in self._indice_item.items():
+            if indice_item == indice:
+                self._preencher(iid, indice)
+                break
+
+    def remover_linha(self, indice):
+        """Ajusta a grade depois que a fonte perdeu o registro do índice.
+
+        Só as linhas visíveis são redesenhadas; a seleção acompanha o registro.
+        """
+        if self.indice_selecionado is not None:
+            if self.indice_selecionado == indice:
+                self.indice_selecionado = None
+            elif self.indice_selecionado > indice:
+                self.indice_selecionado -= 1
+        self._desenhar(self.inicio, completo=True)
+
+    def inserir_linha(self, indice):
+        """Ajusta a grade depois que a fonte ganhou um registro no índice.
+
+        Só as linhas visíveis são redesenhadas; a seleção acompanha o registro.
+        """
+        if self.indice_selecionado is not None and self.indice_selecionado >= indice:
+            self.indice_selecionado += 1
+        self._desenhar(self.inicio, completo=True)
+
+    def registro_selecionado(self):
+        """Registro da fonte atualmente selecionado (ou None)"""
+        if self.indice_selecionado is None or self.indice_selecionado >= len(self.fonte):
+            return None
+        return self.fonte[self.indice_selecionado]
+
+    def selecionar_indice(self, indice):
+        """Seleciona o registro do índice, rolando até ele (dispara <<TreeviewSelect>>)"""
+        if not len(self.fonte):
+            return
+        indice = max(0, min(indice, len(self.fonte) - 1))
+        self.ver_indice(indice)
+
+        iid = self._item_do_indice(indice)
+        if iid:
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+        self.indice_selecionado = indice
+
+    def limpar_selecao(self):
+        """Remove a seleção (dispara <<TreeviewSelect>>)"""
+        self.indice_selecionado = None
+        if self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+    def ver_indice(self, indice):
+        """Rola o mínimo necessário para o índice ficar visível"""
+        if indice < self.inicio:
+            self._desenhar(indice)
+        elif indice >= self.inicio + self._linhas_visiveis:
+            self._desenhar(indice - self._linhas_visiveis + 1)
+
+    def rolar(self, linhas):
+        """Rola a grade em `linhas` (negativo para cima)"""
+        self._desenhar(self.inicio + linhas)
+        return "break"
+
+    # === Desenho ===
+
+    def _on_scrollbar(self, *args):
+        total = len(self.fonte)
+        if args[0] == 'moveto':
+            self._desenhar(int(float(args[1]) * total))
+        elif args[0] == 'scroll':
+            passos = int(args[1])
+            if args[2] == 'pages':
+                passos *= self._linhas_visiveis
+            self._desenhar(self.inicio + passos)
+
+    def _on_mousewheel(self, event):
+        return self.rolar(-3 if event.delta > 0 else 3)
+
+    def _on_configure(self, event):
+        """Recalcula quantas linhas cabem quando a grade muda de tamanho"""
+        altura_linha, topo = 20, 25
+        if 0 <= self.inicio - self.primeiro < len(self._itens):
+            bbox = self.tree.bbox(self._itens[self.inicio - self.primeiro])
+            if bbox:
+                altura_linha, topo = bbox[3], bbox[1]
+
+        linhas = max(1, (event.height - topo) // altura_linha)
+        if linhas != self._linhas_visiveis:
+            self._linhas_visiveis = linhas
+            self._desenhar(self.inicio, completo=True)
+
+    def _desenhar(self, inicio, completo=False):
+        total = len(self.fonte)
+        inicio = max(0, min(inicio, total - self._linhas_visiveis))
+        if self._ajustar_itens():
+            completo = True
+
+        n = len(self._itens)
+        dentro = self.primeiro <= inicio and inicio + self._linhas_visiveis <= self.primeiro + n
+        if completo or not dentro:
+            # Saiu da reserva: recentraliza os itens em volta da área visível
+            self._posicionar(max(0, min(inicio - self.LINHAS_RESERVA, total - n)), completo)
+
+        # A vista mostra `inicio` no topo (fração sobre os itens presentes)
+        self.inicio = inicio
+        exibidos = min(n, total - self.primeiro)
+        self.tree.yview_moveto((inicio - self.primeiro) / exibidos if exibidos > 0 else 0)
+        self._sincronizar_selecao()
+
+        if total:
+            self.v_scroll.set(self.inicio / total, min(1.0, (self.inicio + self._linhas_visiveis) / total))
+        else:
+            self.v_scroll.set(0, 1)
+
+    def _posicionar(self, primeiro, completo):
+        """Faz os itens cobrirem as linhas a partir de `primeiro`"""
+        total = len(self.fonte)
+        deslocamento = primeiro - self.primeiro
+        n = len(self._itens)
+        cheio = primeiro + n <= total and self.primeiro + n <= total
+
+        if not completo and cheio and 0 < abs(deslocamento) < n:
+            # Reaproveitar: só as linhas que entraram na reserva são preenchidas
+            if deslocamento > 0:
+                reciclados = self._itens[:deslocamento]
+                self._itens = self._itens[deslocamento:] + reciclados
+                for iid in reciclados:
+                    self.tree.move(iid, '', 'end')
+                novos = range(n - deslocamento, n)
+            else:
+                reciclados = self._itens[deslocamento:]
+                self._itens = reciclados + self._itens[:deslocamento]
+                for posicao, iid in enumerate(reciclados):
+                    self.tree.move(iid, '', posicao)
+                novos = range(-deslocamento)
+
+            self.primeiro = primeiro
+            for posicao in novos:
+                self._preencher(self._itens[posicao], primeiro + posicao)
+
+        elif completo or deslocamento:
+            self.primeiro = primeiro
+            for posicao, iid in enumerate(self._itens):
+                indice = primeiro + posicao
+                if indice < total:
+                    self.tree.move(iid, '', posicao)
+                    self._preencher(iid, indice)
+                else:
+                    self.tree.detach(iid)
+                    self._indice_item.pop(iid, None)
+
+    def _ajustar_itens(self):
+        """Mantém um item do Tk por linha visível e de reserva; retorna True se mudou"""
+        quantidade = len(self._itens)
+        desejada = self._linhas_visiveis + 2 * self.LINHAS_RESERVA
+        while len(self._itens) < desejada:
+            self._itens.append(self.tree.insert('', tk.END))
+        while len(self._itens) > desejada:
+            iid = self._itens.pop()
+            self._indice_item.pop(iid, None)
+            self.tree.delete(iid)
+        return len(self._itens) != quantidade
+
+    def _preencher(self, iid, indice):
+        try:
+            values, tags = self.formatar_linha(self.fonte[indice])
+        except IndexError:
+            self.tree.detach(iid)
+            self._indice_item.pop(iid, None)
+            return
+        self.tree.item(iid, values=values, tags=tags)
+        self._indice_item[iid] = indice
+
+    # === Seleção ===
+
+    def _item_do_indice(self, indice):
+        for iid, indice_item in self._indice_item.items():
+            if indice_item == indice:
+                return iid
+        return None
+
+    def _sincronizar_selecao(self):
+        """Faz a seleção do Tk acompanhar o registro selecionado"""
+        desejada = ()
+        if self.indice_selecionado is not None:
+            iid = self._item_do_indice(self.indice_selecionado)
+            desejada = (iid,) if iid else ()
+
+        if tuple(self.tree.selection()) != desejada:
+            # Mudança causada pela rolagem: não repassar às telas
+            self._ignorar_selecao += 1
+            self.tree.selection_set(desejada)
+
+    def _on_select(self, event):
+        if self._ignorar_selecao:
+            self._ignorar_selecao -= 1
+            return "break"
+
+        selecao = self.tree.selection()
+        self.indice_selecionado = self._indice_item.get(selecao[0]) if selecao else None
+
+    def _mover_selecao(self, passos):
+        atual = self.indice_selecionado if self.indice_selecionado is not None else self.inicio - 1
+        self.selecionar_indice(atual + passos)
+        return "break"
+
+
+class FonteEmBlocos:
+    """Fonte de dados sobre uma lista de chaves já filtrada e ordenada.
+
+    Os registros completos são buscados em blocos com
+    `buscar_por_chaves(chaves) -> {chave: registro}` quando a linha aparece.
+    """
+
+    def __init__(self, chaves, buscar_por_chaves, tamanho_bloco=200):
+        self.chaves = chaves
+        self.buscar_por_chaves = buscar_por_chaves
+        self.tamanho_bloco = tamanho_bloco
+        self.registros = {}
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def __getitem__(self, indice):
+        chave = self.chaves[indice]
+        if chave not in self.registros:
+            bloco = [c for c in self.chaves[indice:indice + self.tamanho_bloco]
+                     if c not in self.registros]
+            self.registros.update(self.buscar_por_chaves(bloco))
+
+        if chave not in self.registros:
+            # Registro removido depois que as chaves foram montadas
+            raise IndexError(indice)
+        return self.registros[chave]
+
+    def atualizar(self, indice, registro):
+        """Troca o registro já buscado do índice (ex.: depois de salvar)"""
+        self.registros[self.chaves[indice]] = registro